@@ -2,6 +2,7 @@
 
 from analytics.indicator_engine import TechnicalIndicatorEngine
 from analytics.candlestick_patterns import CandlestickPatternDetector
+import numpy as np
 import pandas as pd
 
 class StrategyEvaluator:
@@ -66,20 +67,9 @@ class StrategyEvaluator:
         tech_engine = TechnicalIndicatorEngine(self.df)
         df_with_indicators = tech_engine.compute_all_indicators_df()
 
-        signals = []
-        for _, row in df_with_indicators.iterrows():
-            rsi = row.get("RSI")
-            macd_diff = row.get("MACD_diff")
-
-            if rsi is not None:
-                if rsi < 45:
-                    signals.append("LONG")
-                elif rsi > 55:
-                    signals.append("SHORT")
-                else:
-                    signals.append(None)
-            else:
-                signals.append(None)
+        # RSI NaN (primeras velas) no cumple ninguna condición -> sin señal
+        rsi = df_with_indicators["RSI"].to_numpy(dtype=float)
+        signals = np.select([rsi < 45, rsi > 55], ["LONG", "SHORT"], default=None)
 
         df_with_indicators["signal"] = signals
 
@@ -2,38 +2,53 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import plotly.express as px
 import os
-from intelligence.smart_trade_intelligence import SmartTradeIntelligence
 from datetime import datetime
 import random
+from typing import Any, Optional
+from simulator.replay_engine import SIMULATOR_LOOKBACK_BARS, BarEvent, IntelligenceWindowAnalyzer, ReplayEngine
 
 REPORTS_DIR = "reports"
 os.makedirs(REPORTS_DIR, exist_ok=True)
 
 class SmartTradeSimulator:
-    def __init__(self, symbol: str, interval: str = "15m", capital: float = 1000.0):
+    def __init__(self, symbol: str, interval: str = "15m", capital: float = 1000.0,
+                 df: Optional[pd.DataFrame] = None, analyzer: Optional[Any] = None):
         self.symbol = symbol.upper()
         self.interval = interval
         self.initial_capital = capital
         self.remaining_capital = capital
         self.total_profit = 0.0
         self.trades_executed = []
+        # Velas y analizador inyectables (por defecto SmartTradeIntelligence sobre el prefijo completo,
+        # o las últimas SIMULATOR_LOOKBACK_BARS velas si está definido)
+        self.df = df
+        self.analyzer = analyzer
+        self.replay_stats = {}
+
+    def _prepare_replay(self):
+        if self.df is None or self.analyzer is None:
+            from intelligence.smart_trade_intelligence import SmartTradeIntelligence
+            intelligence = SmartTradeIntelligence(self.symbol, self.interval)
+            if self.df is None:
+                self.df = intelligence.fetch_candles()
+            if self.analyzer is None:
+                self.analyzer = IntelligenceWindowAnalyzer(intelligence, lookback=SIMULATOR_LOOKBACK_BARS,
+                                                           auto_decision=True)
+        return self.df, self.analyzer
 
     def run(self, max_profit_target=200.0):
-        intelligence = SmartTradeIntelligence(self.symbol, self.interval)
-        df = intelligence.fetch_candles()
+        df, analyzer = self._prepare_replay()
         print(f"\n📊 Ejecutando simulación para {self.symbol} [{self.interval}] con capital inicial ${self.initial_capital}\n")
+        target_reached = False
 
-        for i in range(len(df) - 1):
-            window_df = df.iloc[:i + 1]
-            intelligence.fetch_candles = lambda: window_df
-            result = intelligence.analyze(show_dashboard=False, auto_decision=True)
-
-            decision = result.get("auto_decision", {})
+        def on_bar(event: BarEvent):
+            nonlocal target_reached
+            decision = event.decision
             if decision.get("action") in ["long", "short"]:
-                entry_price = window_df['close'].iloc[-1]
+                entry_price = event.close
                 stake = self._next_stake()
                 if stake == 0.0:
-                    continue
+                    return
 
                 tp_levels = [0.007, 0.008, 0.01]
                 for tp in tp_levels:
@@ -49,18 +64,24 @@ class SmartTradeSimulator:
                         "profit": round(profit, 2),
                         "type": decision['action'],
                         "stake": stake,
-                        "timestamp": window_df.index[-1],
+                        "timestamp": event.timestamp,
                         "reason": decision.get("reason", "N/A"),
                         "score": decision.get("score", 0),
                         "score_components": decision.get("score_components", [])
                     })
 
-                    print(f"✔️ {decision['action'].upper()} ejecutada - Stake ${stake} - Profit: ${profit:.2f} - {window_df.index[-1]} - {decision.get('reason', '')}")
+                    print(f"✔️ {decision['action'].upper()} ejecutada - Stake ${stake} - Profit: ${profit:.2f} - {event.timestamp} - {decision.get('reason', '')}")
                     if self.total_profit >= max_profit_target:
-                        print("\n🎯 Objetivo alcanzado!")
-                        self._generate_report()
-                        return self.trades_executed
+                        target_reached = True
+                        return False
                     break
+
+        # Una pasada por las velas (antes: analyze() sobre df.iloc[:i + 1] en cada vela)
+        self.replay_stats = ReplayEngine(df, analyzer).run(on_bar)
+        if target_reached:
+            print("\n🎯 Objetivo alcanzado!")
+            self._generate_report()
+            return self.trades_executed
         print("\n📉 Simulación finalizada. No se alcanzó el objetivo.")
         self._generate_report()
         return self.trades_executed
@@ -58,6 +58,12 @@ def create_db_and_tables():
     from models.user import User, UserSession
     SQLModel.metadata.create_all(engine)
 
+def ensure_indexes(*tables, bind=None):
+    """Crear índices declarados que falten en tablas ya existentes (create_all no los añade)"""
+    for table in tables:
+        for index in table.indexes:
+            index.create(bind or engine, checkfirst=True)
+
 def get_session():
     """Get database session for dependency injection"""
     return Session(engine)
\ No newline at end of file
@@ -1,15 +1,31 @@
 # logger/daily_logger.py
 
+import atexit
+import threading
 from datetime import datetime
 from pathlib import Path
 
 LOGS_DIR = Path("logs")
 LOGS_DIR.mkdir(exist_ok=True)
 
+# Fichero del día abierto una sola vez (se reabre al cambiar de fecha)
+_log_lock = threading.Lock()
+_log_date = None
+_log_file = None
+
+def _close_log_file():
+    global _log_date, _log_file
+    with _log_lock:
+        if _log_file is not None:
+            _log_file.close()
+        _log_date = _log_file = None
+
+atexit.register(_close_log_file)
+
 def log_operation_detail(operation: dict):
+    global _log_date, _log_file
     now = datetime.utcnow()
     date_str = now.strftime("%Y-%m-%d")
-    log_file = LOGS_DIR / f"{date_str}.log"
     
     log_line = (
         f"[{now.isoformat()}] | "
@@ -21,5 +37,10 @@ def log_operation_detail(operation: dict):
         f"{operation.get('reason')}\n"
     )
 
-    with open(log_file, "a") as f:
-        f.write(log_line)
\ No newline at end of file
+    with _log_lock:
+        if date_str != _log_date:
+            if _log_file is not None:
+                _log_file.close()
+            _log_file = open(LOGS_DIR / f"{date_str}.log", "a", buffering=1)  # line-buffered
+            _log_date = date_str
+        _log_file.write(log_line)
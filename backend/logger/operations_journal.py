@@ -0,0 +1,440 @@
+# logger/operations_journal.py
+"""
+📒 OperationsJournal - Diario append-only de operaciones en JSONL
+Cada operación es una línea JSON añadida al segmento del día
+(operations-YYYY-MM-DD-NNN.jsonl), rotado también por tamaño. append() solo
+encola (sin E/S); un hilo escritor serializa y escribe por lotes con política
+de fsync configurable. Cada segmento tiene un índice disperso (.idx con
+timestamp<TAB>offset cada N líneas) para leer rangos de tiempo con seek sin
+recorrer el histórico, y el lector devuelve un iterador (streaming).
+"""
+
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+OPERATIONS_JOURNAL_DIR = os.getenv("OPERATIONS_JOURNAL_DIR", "data/journal")
+OPERATIONS_JOURNAL_MAX_MB = float(os.getenv("OPERATIONS_JOURNAL_MAX_MB", "64"))
+OPERATIONS_JOURNAL_FSYNC = os.getenv("OPERATIONS_JOURNAL_FSYNC", "interval")  # always | interval | never
+OPERATIONS_JOURNAL_FSYNC_SECONDS = float(os.getenv("OPERATIONS_JOURNAL_FSYNC_SECONDS", "1"))
+OPERATIONS_JOURNAL_FLUSH_MS = float(os.getenv("OPERATIONS_JOURNAL_FLUSH_MS", "100"))
+OPERATIONS_JOURNAL_INDEX_EVERY = int(os.getenv("OPERATIONS_JOURNAL_INDEX_EVERY", "256"))
+
+LEGACY_OPERATIONS_FILE = Path("data/operations.json")
+_SEGMENT_PREFIX = "operations-"
+_FSYNC_POLICIES = ("always", "interval", "never")
+
+TimeBound = Union[str, datetime, None]
+
+
+def _as_iso(bound: TimeBound) -> Optional[str]:
+    return bound.isoformat() if isinstance(bound, datetime) else bound
+
+
+class OperationsJournal:
+    """Diario JSONL rotado por día/tamaño con escritor en segundo plano e índice disperso"""
+
+    def __init__(self, directory: Union[str, Path] = OPERATIONS_JOURNAL_DIR,
+                 max_bytes: Optional[int] = None, fsync: str = OPERATIONS_JOURNAL_FSYNC,
+                 fsync_interval: float = OPERATIONS_JOURNAL_FSYNC_SECONDS,
+                 flush_interval_ms: float = OPERATIONS_JOURNAL_FLUSH_MS,
+                 index_every: int = OPERATIONS_JOURNAL_INDEX_EVERY):
+        if fsync not in _FSYNC_POLICIES:
+            raise ValueError(f"fsync debe ser uno de {_FSYNC_POLICIES}")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes or int(OPERATIONS_JOURNAL_MAX_MB * 1024 * 1024)
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.flush_interval = flush_interval_ms / 1000
+        self.index_every = max(1, index_every)
+
+        self._queue: Deque[Dict[str, Any]] = deque()
+        self._lock = threading.Lock()
+        self._progress = threading.Condition(self._lock)
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._closing = False
+        self._submitted = 0
+        self._written = 0
+        self._failed = 0
+
+        # Estado del segmento abierto (solo lo toca el hilo escritor)
+        self._file = None
+        self._index_file = None
+        self._segment_day: Optional[str] = None
+        self._segment_size = 0
+        self._since_index = 0
+        self._last_fsync = 0.0
+
+    # ------------------------------------------------------------------
+    # Escritura
+    # ------------------------------------------------------------------
+
+    def append(self, operation: Dict[str, Any]) -> Dict[str, Any]:
+        """Encolar una operación (asigna timestamp UTC si no trae); O(1) y sin E/S"""
+        with self._lock:
+            if self._closing:
+                raise RuntimeError("OperationsJournal cerrado")
+            operation.setdefault("timestamp", datetime.utcnow().isoformat())
+            self._queue.append(operation)
+            self._submitted += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="operations-journal", daemon=True)
+                self._thread.start()
+        return operation
+
+    def _run(self):
+        try:
+            while True:
+                self._wakeup.wait(self.flush_interval)
+                self._wakeup.clear()
+                self._drain()
+                with self._lock:
+                    if self._closing and not self._queue:
+                        return
+        finally:
+            self._close_segment()
+
+    def _drain(self):
+        while True:
+            with self._lock:
+                batch: List[Dict[str, Any]] = list(self._queue)
+                self._queue.clear()
+            if not batch:
+                return
+            written = 0
+            try:
+                for record in batch:
+                    self._write_record(record)
+                    written += 1
+                self._file.flush()
+                self._index_file.flush()
+                self._apply_fsync_policy()
+            except Exception as e:
+                logger.error(f"❌ Error escribiendo diario de operaciones: {e}")
+            with self._lock:
+                self._written += written
+                self._failed += len(batch) - written
+                self._progress.notify_all()
+
+    def _write_record(self, record: Dict[str, Any]):
+        timestamp = str(record["timestamp"])
+        line = (json.dumps(record, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+        day = timestamp[:10]
+        if (self._file is None or day != self._segment_day
+                or (self._segment_size > 0 and self._segment_size + len(line) > self.max_bytes)):
+            self._rotate(day, len(line))
+        if self._since_index == 0:
+            self._index_file.write(f"{timestamp}\t{self._segment_size}\n")
+        self._file.write(line)
+        self._segment_size += len(line)
+        self._since_index = (self._since_index + 1) % self.index_every
+
+    def _rotate(self, day: str, pending_bytes: int = 0):
+        """Abrir el segmento del día donde quepan `pending_bytes` más sin pasar de max_bytes"""
+        self._close_segment()
+        existing = sorted(self.directory.glob(f"{_SEGMENT_PREFIX}{day}-*.jsonl"))
+        path = existing[-1] if existing else None
+        size = path.stat().st_size if path is not None else 0
+        if path is None or (size > 0 and size + pending_bytes > self.max_bytes):
+            sequence = int(path.stem.rsplit("-", 1)[1]) + 1 if path else 0
+            path = self.directory / f"{_SEGMENT_PREFIX}{day}-{sequence:03d}.jsonl"
+        self._file = open(path, "ab")
+        self._index_file = open(path.with_suffix(".idx"), "a", encoding="utf-8")
+        self._segment_day = day
+        self._segment_size = self._file.tell()
+        self._since_index = 0  # primera línea tras abrir siempre indexada
+
+    def _apply_fsync_policy(self):
+        if self.fsync == "never":
+            return
+        now = time.monotonic()
+        if self.fsync == "always" or now - self._last_fsync >= self.fsync_interval:
+            os.fsync(self._file.fileno())
+            self._last_fsync = now
+
+    def _close_segment(self):
+        for handle in (self._file, self._index_file):
+            if handle is not None:
+                handle.flush()
+                if self.fsync != "never":
+                    os.fsync(handle.fileno())
+                handle.close()
+        self._file = self._index_file = None
+        self._segment_day = None
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Esperar a que lo encolado hasta ahora esté escrito (True si se completó)"""
+        with self._lock:
+            target = self._submitted
+            if self._thread is None or self._written + self._failed >= target:
+                return True
+        self._wakeup.set()
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            while self._written + self._failed < target:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._thread.is_alive():
+                    return False
+                self._progress.wait(remaining)
+        return True
+
+    def close(self, timeout: float = 10.0):
+        with self._lock:
+            self._closing = True
+            thread = self._thread
+        if thread is not None:
+            self._wakeup.set()
+            thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "directory": str(self.directory),
+                "pending": len(self._queue),
+                "submitted": self._submitted,
+                "written": self._written,
+                "failed": self._failed,
+                "segments": len(list(self.directory.glob(f"{_SEGMENT_PREFIX}*.jsonl"))),
+                "fsync": self.fsync
+            }
+
+    # ------------------------------------------------------------------
+    # Lectura (streaming)
+    # ------------------------------------------------------------------
+
+    def segments(self) -> List[Path]:
+        return sorted(self.directory.glob(f"{_SEGMENT_PREFIX}*.jsonl"))
+
+    @staticmethod
+    def _load_index(segment: Path) -> Tuple[List[str], List[int]]:
+        timestamps, offsets = [], []
+        index_path = segment.with_suffix(".idx")
+        if index_path.exists():
+            with open(index_path, encoding="utf-8") as f:
+                for line in f:
+                    timestamp, _, offset = line.rstrip("\n").partition("\t")
+                    if offset:
+                        timestamps.append(timestamp)
+                        offsets.append(int(offset))
+        return timestamps, offsets
+
+    def read(self, start: TimeBound = None, end: TimeBound = None, symbol: Optional[str] = None,
+             limit: Optional[int] = None, flush: bool = True) -> Iterator[Dict[str, Any]]:
+        """
+        Operaciones con start <= timestamp <= end, en orden de escritura.
+
+        Solo abre los segmentos de los días del rango y, dentro de cada uno, salta con el
+        índice disperso a la última entrada anterior a start. Nunca carga el histórico.
+        """
+        if flush:
+            self.flush()
+        start, end = _as_iso(start), _as_iso(end)
+        yielded = 0
+        for segment in self.segments():
+            day = segment.stem[len(_SEGMENT_PREFIX):len(_SEGMENT_PREFIX) + 10]
+            if (start and day < start[:10]) or (end and day > end[:10]):
+                continue
+            offset = 0
+            if start:
+                timestamps, offsets = self._load_index(segment)
+                position = bisect_left(timestamps, start) - 1
+                if position >= 0:
+                    offset = offsets[position]
+            with open(segment, "rb") as f:
+                f.seek(offset)
+                for raw in f:
+                    try:
+                        record = json.loads(raw)
+                    except ValueError:
+                        continue  # línea incompleta (corte durante la escritura)
+                    timestamp = str(record.get("timestamp", ""))
+                    if start and timestamp < start:
+                        continue
+                    if end and timestamp > end:
+                        break
+                    if symbol and record.get("symbol") != symbol:
+                        continue
+                    yield record
+                    yielded += 1
+                    if limit is not None and yielded >= limit:
+                        return
+
+    def tail(self, n: int = 50) -> List[Dict[str, Any]]:
+        """Últimas n operaciones recorriendo solo los segmentos más recientes"""
+        self.flush()
+        collected: Deque[Dict[str, Any]] = deque(maxlen=n)
+        remaining = n
+        for segment in reversed(self.segments()):
+            records = deque(self.read_segment(segment), maxlen=remaining)
+            collected.extendleft(reversed(records))
+            remaining = n - len(collected)
+            if remaining <= 0:
+                break
+        return list(collected)
+
+    @staticmethod
+    def read_segment(segment: Path) -> Iterator[Dict[str, Any]]:
+        with open(segment, "rb") as f:
+            for raw in f:
+                try:
+                    yield json.loads(raw)
+                except ValueError:
+                    continue
+
+    # ------------------------------------------------------------------
+    # Migración
+    # ------------------------------------------------------------------
+
+    def import_legacy(self, path: Union[str, Path] = LEGACY_OPERATIONS_FILE) -> int:
+        """Importar data/operations.json si el diario está vacío (el fichero original no se toca)"""
+        path = Path(path)
+        if self.segments() or not path.exists():
+            return 0
+        try:
+            with open(path, encoding="utf-8") as f:
+                operations = json.load(f)
+        except ValueError as e:
+            logger.warning(f"⚠️ {path} no se pudo importar al diario: {e}")
+            return 0
+        for operation in sorted(operations, key=lambda op: str(op.get("timestamp", ""))):
+            self.append(operation)
+        self.flush()
+        logger.info(f"📒 {len(operations)} operaciones importadas desde {path}")
+        return len(operations)
+
+
+# Instancia global del diario (lazy, importa operations.json la primera vez)
+_journal: Optional[OperationsJournal] = None
+_journal_lock = threading.Lock()
+
+
+def get_operations_journal() -> OperationsJournal:
+    global _journal
+    with _journal_lock:
+        if _journal is None or _journal._closing:
+            _journal = OperationsJournal()
+            _journal.import_legacy()
+        return _journal
+
+
+def close_operations_journal():
+    with _journal_lock:
+        journal = _journal
+    if journal is not None:
+        journal.close()
+
+
+atexit.register(close_operations_journal)
+
+
+# =================================================================
+# TESTING & BENCHMARK
+# =================================================================
+
+def _sample_operation(i: int) -> Dict[str, Any]:
+    return {
+        "symbol": ("BTCUSDT", "ETHUSDT", "SOLUSDT")[i % 3], "interval": "15m", "stake": 20.0,
+        "action": "long" if i % 2 else "short", "reason": "Score alto, señales alcistas", "status": "executed_buy"
+    }
+
+
+def test_operations_journal():
+    """Rotación por día/tamaño, lectura por rango con índice, líneas cortadas e import legado"""
+    import tempfile
+    from datetime import timedelta
+
+    print("🧪 Testing OperationsJournal...")
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = OperationsJournal(Path(tmp) / "journal", max_bytes=20_000, fsync="never", index_every=16)
+        base = datetime(2025, 7, 1)
+        records = []
+        for i in range(3000):  # ~3 días, varios segmentos por día
+            operation = _sample_operation(i)
+            operation["timestamp"] = (base + timedelta(minutes=i * 1.5)).isoformat()
+            records.append(journal.append(operation))
+        journal.flush()
+        assert len(journal.segments()) > 3
+        assert list(journal.read()) == records
+
+        start, end = records[1234]["timestamp"], records[2345]["timestamp"]
+        expected = [r for r in records if start <= r["timestamp"] <= end and r["symbol"] == "ETHUSDT"]
+        assert list(journal.read(start, end, symbol="ETHUSDT")) == expected
+        assert list(journal.read(start, limit=5)) == records[1234:1239]
+        assert journal.tail(7) == records[-7:]
+
+        # Corte a mitad de línea: el lector la descarta y las escrituras siguientes continúan
+        with open(journal.segments()[-1], "ab") as f:
+            f.write(b'{"symbol": "BTCUS')
+        with open(journal.segments()[-1], "ab") as f:
+            f.write(b"\n")
+        late = journal.append({**_sample_operation(0), "timestamp": (base + timedelta(days=5)).isoformat()})
+        assert journal.tail(1) == [late]
+        journal.close()
+
+        # Reaperturas sobre el último segmento del día: ninguno supera max_bytes
+        last_day = datetime.fromisoformat(records[-1]["timestamp"])
+        for i in range(150):
+            reopened = OperationsJournal(Path(tmp) / "journal", max_bytes=20_000, fsync="never")
+            reopened.append({**_sample_operation(i), "timestamp": (last_day + timedelta(seconds=i)).isoformat()})
+            reopened.close()
+        assert all(segment.stat().st_size <= 20_000 for segment in journal.segments())
+
+        legacy = Path(tmp) / "operations.json"
+        legacy.write_text(json.dumps(records[:50], indent=2))
+        migrated = OperationsJournal(Path(tmp) / "migrated", fsync="never")
+        assert migrated.import_legacy(legacy) == 50 and list(migrated.read()) == records[:50]
+        assert migrated.import_legacy(legacy) == 0
+        migrated.close()
+    print("✅ OperationsJournal test completed")
+
+
+def benchmark_operations_journal(n_operations: int = 3000):
+    """Coste por operación: leer + reescribir operations.json vs append encolado"""
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_file = Path(tmp) / "operations.json"
+        start = time.perf_counter()
+        for i in range(n_operations):
+            operation = _sample_operation(i)
+            operation["timestamp"] = datetime.utcnow().isoformat()
+            data = json.loads(legacy_file.read_text()) if legacy_file.exists() else []
+            data.append(operation)
+            legacy_file.write_text(json.dumps(data, indent=2))
+        legacy_us = (time.perf_counter() - start) * 1e6 / n_operations
+
+        journal = OperationsJournal(Path(tmp) / "journal")
+        start = time.perf_counter()
+        for i in range(n_operations):
+            journal.append(_sample_operation(i))
+        append_us = (time.perf_counter() - start) * 1e6 / n_operations
+        journal.flush()
+        drained_us = (time.perf_counter() - start) * 1e6 / n_operations
+
+        start = time.perf_counter()
+        last_hour = list(journal.read(start=datetime.utcnow().replace(microsecond=0).isoformat()[:13]))
+        read_ms = (time.perf_counter() - start) * 1000
+        journal.close()
+
+    print(f"🧪 Operations journal: {n_operations} operaciones")
+    print(f"   operations.json (leer + reescribir): {legacy_us:9.1f} µs/operación")
+    print(f"   append encolado:                     {append_us:9.1f} µs/operación")
+    print(f"   append + escritura en disco:         {drained_us:9.1f} µs/operación")
+    print(f"   lectura por rango ({len(last_hour)} ops):         {read_ms:9.1f} ms")
+
+
+if __name__ == "__main__":
+    test_operations_journal()
+    benchmark_operations_journal()
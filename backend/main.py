@@ -199,12 +199,32 @@ async def startup_event():
         from models.user import User, UserSession
         from models.user_exchange import UserExchange
         
+        from models.trading_operation import TradingOperation
+        from db.database import ensure_indexes
+        
         engine = create_engine(DATABASE_URL, echo=False)
         SQLModel.metadata.create_all(engine)
+        ensure_indexes(TradingOperation.__table__, bind=engine)
         
         db_type = "PostgreSQL" if "postgresql" in DATABASE_URL else "SQLite"
         print(f"✅ Database initialized successfully - {db_type}")
         
+        # 📊 Rollups diarios del dashboard (backfill si no cuadran + mantenimiento incremental)
+        from services.dashboard_rollups import ensure_dashboard_rollups
+        if ensure_dashboard_rollups():
+            print("✅ Dashboard rollups ready")
+        else:
+            print("⚠️ Dashboard rollups unavailable - using SQL aggregation")
+        
+        # 🤖 Scheduler central de bots: un análisis por (símbolo, intervalo) y cierre de vela
+        from services.bot_scheduler import BOT_SCHEDULER_ENABLED, start_bot_scheduler
+        if BOT_SCHEDULER_ENABLED:
+            try:
+                loaded = await start_bot_scheduler()
+                print(f"✅ Bot scheduler started - {loaded} running bots")
+            except Exception as scheduler_error:
+                print(f"⚠️ Bot scheduler not started: {scheduler_error}")
+        
         # 🏛️ ETAPA 0.2: WebSocket RealtimeDataManager Initialization
         # DL-001 COMPLIANCE: Real services initialization, no hardcode/simulation
         try:
@@ -223,6 +243,24 @@ async def startup_event():
     except Exception as e:
         print(f"⚠️ Database initialization warning: {e}")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the bot scheduler and close pooled HTTP connections, Binance stream sockets, background analysis workers, metric writers and the operations journal"""
+    from utils.http_client_pool import http_client_pool
+    from utils.analysis_pool import shutdown_analysis_pool
+    from utils.sqlite_batch_writer import close_sqlite_batch_writers
+    from services.binance_stream_manager import close_binance_stream_managers
+    from services.execution_metrics import persist_execution_sketches
+    from services.bot_scheduler import stop_bot_scheduler
+    from logger.operations_journal import close_operations_journal
+    await stop_bot_scheduler()
+    await close_binance_stream_managers()
+    await http_client_pool.aclose()
+    shutdown_analysis_pool()
+    persist_execution_sketches()
+    close_sqlite_batch_writers()
+    close_operations_journal()
+
 # ✅ DL-001 COMPLIANCE: Función eliminada - No hardcode admin creation
 # Admin users se crean vía registro normal con email verification
 
@@ -463,6 +501,30 @@ try:
 except Exception as e:
     print(f"⚠️ Could not load real trading routes: {e}")
 
+# Load market scanner routes (Multi-symbol Smart Scalper scan)
+try:
+    from routes.scanner import router as scanner_router
+    app.include_router(scanner_router)
+    print("✅ Market scanner routes loaded successfully")
+except Exception as e:
+    print(f"⚠️ Could not load market scanner routes: {e}")
+
+# Load candle store routes (Local columnar kline history + backfill)
+try:
+    from routes.candles import router as candles_router
+    app.include_router(candles_router)
+    print("✅ Candle store routes loaded successfully")
+except Exception as e:
+    print(f"⚠️ Could not load candle store routes: {e}")
+
+# Load parameter optimizer routes (Strategy threshold / TP-SL sweeps)
+try:
+    from routes.optimizer import router as optimizer_router
+    app.include_router(optimizer_router)
+    print("✅ Parameter optimizer routes loaded successfully")
+except Exception as e:
+    print(f"⚠️ Could not load parameter optimizer routes: {e}")
+
 # 🔄 Trading Operations - Sistema de Persistencia  
 try:
     from routes.trading_operations import router as trading_operations_router
@@ -725,11 +787,11 @@ except Exception as e:
 @app.get("/api/real-market/{symbol}")
 async def get_real_market_simple(symbol: str):
     """Obtener datos reales de mercado simplificados"""
-    import httpx
     import time
+    from utils.http_client_pool import http_client_pool
     
     try:
-        async with httpx.AsyncClient() as client:
+        async with http_client_pool.client() as client:
             # Obtener ticker 24h
             response = await client.get(f"https://testnet.binance.vision/api/v3/ticker/24hr", params={"symbol": symbol.upper()})
             if response.status_code == 200:
@@ -6,10 +6,11 @@ Moved from routes/ to models/ for proper architecture compliance
 ✅ GUARDRAILS P3: Architectural fix - models should be in models/ not routes/
 """
 
-from datetime import datetime
+from datetime import date, datetime
 from enum import Enum
 from typing import Optional
 from uuid import uuid4
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field
 
 class TradeSide(str, Enum):
@@ -26,6 +27,11 @@ class TradeStatus(str, Enum):
 class TradingOperation(SQLModel, table=True):
     """Modelo para operaciones de trading persistentes"""
     __tablename__ = "trading_operations"
+    __table_args__ = (
+        # Feed/listados por usuario o bot ordenados por fecha (keyset sobre created_at, id)
+        Index("ix_trading_operations_user_id_created_at", "user_id", "created_at"),
+        Index("ix_trading_operations_bot_id_created_at", "bot_id", "created_at"),
+    )
     
     # Identificadores
     id: str = Field(primary_key=True, default_factory=lambda: str(uuid4()))
@@ -93,4 +99,19 @@ class TradeResponse(SQLModel):
     status: TradeStatus
     created_at: datetime
     executed_at: Optional[datetime]
-    trade_metadata: Optional[str]
\ No newline at end of file
+    trade_metadata: Optional[str]
+
+
+class TradingOperationDailyRollup(SQLModel, table=True):
+    """Agregado diario de operaciones por usuario/bot/símbolo (mantenido por services.dashboard_rollups)"""
+    __tablename__ = "trading_operation_daily_rollups"
+
+    user_id: int = Field(primary_key=True)
+    bot_id: int = Field(primary_key=True)
+    symbol: str = Field(primary_key=True)
+    day: date = Field(primary_key=True, index=True)
+
+    operations: int = 0
+    wins: int = 0
+    pnl: float = 0.0
+    last_operation_at: Optional[datetime] = None
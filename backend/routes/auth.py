@@ -155,7 +155,8 @@ async def update_api_keys(
     """
     # DL-003: Lazy imports to avoid psycopg2 dependency at module level
     from models.user import ApiKeysUpdate
-    from services.auth_service import get_current_user_safe
+    from services.auth_service import get_current_user_safe, auth_service
+    from db.database import get_session
     
     # DL-003 COMPLIANT: Authentication via dependency function
     current_user = await get_current_user_safe(authorization)
@@ -167,16 +168,17 @@ async def update_api_keys(
         # Convertir a dict
         keys_dict = api_keys_data.dict(exclude_unset=True)
         
-        # Actualizar usuario
-        updated_user = auth_service.update_user_api_keys(
-            current_user.id, keys_dict, session
-        )
+        # Actualizar usuario (invalida su entrada en el caché de autenticación)
+        with get_session() as session:
+            updated_user = auth_service.update_user_api_keys(
+                current_user.id, keys_dict, session
+            )
         
-        return {
-            "message": "API keys updated successfully",
-            "preferred_mode": updated_user.preferred_mode,
-            "api_keys_configured": str(updated_user.api_keys_configured)
-        }
+            return {
+                "message": "API keys updated successfully",
+                "preferred_mode": updated_user.preferred_mode,
+                "api_keys_configured": str(updated_user.api_keys_configured)
+            }
         
     except HTTPException:
         raise
@@ -649,14 +651,17 @@ async def logout(authorization: str = Header(None)):
     """
     Cerrar sesión del usuario.
     
-    En implementación completa se invalidaría el token JWT.
+    El token queda revocado en este proceso hasta su expiración.
     """
     # DL-003: Lazy imports to avoid psycopg2 dependency at module level
-    from services.auth_service import get_current_user_safe
+    from services.auth_service import get_current_user_safe, auth_service
     
     # DL-003 COMPLIANT: Authentication via dependency function
     current_user = await get_current_user_safe(authorization)
     
+    # Revocar el token y descartar su entrada cacheada
+    auth_service.revoke_token(auth_service.get_token_from_header(authorization))
+    
     return {
         "message": "Logout successful",
         "timestamp": datetime.utcnow().isoformat()
@@ -6,6 +6,7 @@ from typing import List, Dict, Any
 # Lazy imports to avoid psycopg2 dependency at module level
 import asyncio
 import logging
+from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
@@ -37,14 +38,16 @@ async def execute_smart_scalper_analysis(
     """
     try:
         # Smart Scalper algorithm imports
-        import pandas as pd
         from services.binance_real_data import BinanceRealDataService
         from services.advanced_algorithm_selector import AdvancedAlgorithmSelector
         from services.market_microstructure_analyzer import MarketMicrostructureAnalyzer
         from services.institutional_detector import InstitutionalDetector, ManipulationType, MarketPhase
         from services.multi_timeframe_coordinator import MultiTimeframeCoordinator, TimeframeData
         from services.signal_quality_assessor import SignalQualityAssessor  # 🆕 ETAPA 1 COMPLETAR
-        from services.ta_alternative import calculate_rsi, calculate_ema, calculate_sma, calculate_atr
+        from services.feature_frame import get_feature_frame
+        from utils.analysis_pool import StageTimer, timed
+        
+        timer = StageTimer()
         
         # 🔗 Inicializar servicios Smart Scalper disponibles
         binance_service = BinanceRealDataService()
@@ -54,38 +57,54 @@ async def execute_smart_scalper_analysis(
         multi_tf_coordinator = MultiTimeframeCoordinator()
         signal_quality_assessor = SignalQualityAssessor()  # 🆕 ETAPA 1 COMPLETAR
         
-        # 📊 Obtener datos reales multi-timeframe
+        # 📊 Obtener datos reales multi-timeframe (descargas concurrentes)
         timeframes = ["1m", "5m", "15m", "1h"]
         timeframe_data = {}
         all_data = {}
+        feature_frames = {}
         
-        for tf in timeframes:
+        async def fetch_timeframe(tf):
+            # Real-time data with timeout protection
             try:
-                # Real-time data with timeout protection
-                df = await asyncio.wait_for(
+                return await asyncio.wait_for(
                     binance_service.get_klines(symbol=symbol, interval=tf, limit=100),
                     timeout=5.0
                 )
-                if not df.empty:
+            except Exception:
+                return None
+        
+        with timer.stage("fetch_klines"):
+            frames = await asyncio.gather(*(fetch_timeframe(tf) for tf in timeframes))
+        
+        with timer.stage("timeframe_indicators"):
+            for tf, df in zip(timeframes, frames):
+                if df is None or df.empty:
+                    continue
+                try:
                     opens = df['open'].tolist()
                     highs = df['high'].tolist() 
                     lows = df['low'].tolist()
                     closes = df['close'].tolist()
                     volumes = df['volume'].tolist()
                     
+                    # Frame de features único por (símbolo, tf, última vela): todos los
+                    # consumidores de esta request leen sus indicadores de aquí
+                    feature_frames[tf] = get_feature_frame(
+                        symbol, tf, opens, highs, lows, closes, volumes,
+                        last_candle_time=int(df['timestamp'].iloc[-1])
+                    )
+                    
                     # Crear TimeframeData con indicadores técnicos
                     timeframe_data[tf] = create_timeframe_data(
-                        symbol, opens, highs, lows, closes, volumes, tf
+                        symbol, opens, highs, lows, closes, volumes, tf,
+                        features=feature_frames[tf]
                     )
                     all_data[tf] = {
                         'opens': opens, 'highs': highs, 'lows': lows,
                         'closes': closes, 'volumes': volumes
                     }
-                    
-            except asyncio.TimeoutError:
-                continue
-            except Exception as e:
-                continue
+                except Exception:
+                    continue
         
         if not timeframe_data:
             raise HTTPException(
@@ -93,36 +112,41 @@ async def execute_smart_scalper_analysis(
                 detail=f"No se pudieron obtener datos de mercado para {symbol}. Timeframes intentados: {timeframes}"
             )
         
-        # 🔬 Análisis de microestructura
-        main_data = all_data.get("1m", list(all_data.values())[0])
-        microstructure = microstructure_analyzer.analyze_market_microstructure(
-            symbol=symbol,
-            timeframe="1m", 
-            highs=main_data['highs'],
-            lows=main_data['lows'],
-            closes=main_data['closes'],
-            volumes=main_data['volumes']
-        )
-        
-        # 🏛️ Detección institucional
-        institutional = institutional_detector.analyze_institutional_activity(
-            symbol=symbol,
-            timeframe="1m",
-            opens=main_data['opens'],
-            highs=main_data['highs'], 
-            lows=main_data['lows'],
-            closes=main_data['closes'],
-            volumes=main_data['volumes']
-        )
-        
-        # ⏰ Coordinación multi-timeframe
-        multi_tf = multi_tf_coordinator.analyze_multi_timeframe_signal(
-            symbol=symbol,
-            timeframe_data=timeframe_data
+        main_tf = "1m" if "1m" in all_data else next(iter(all_data))
+        main_data = all_data[main_tf]
+        
+        # 🔬 Microestructura, 🏛️ detección institucional y ⏰ multi-timeframe son independientes:
+        # se ejecutan en paralelo en el pool de análisis, fuera del event loop
+        microstructure, institutional, multi_tf = await asyncio.gather(
+            timed(
+                timer, "microstructure", microstructure_analyzer.analyze_market_microstructure,
+                symbol=symbol,
+                timeframe="1m", 
+                highs=main_data['highs'],
+                lows=main_data['lows'],
+                closes=main_data['closes'],
+                volumes=main_data['volumes']
+            ),
+            timed(
+                timer, "institutional", institutional_detector.analyze_institutional_activity,
+                symbol=symbol,
+                timeframe="1m",
+                opens=main_data['opens'],
+                highs=main_data['highs'], 
+                lows=main_data['lows'],
+                closes=main_data['closes'],
+                volumes=main_data['volumes']
+            ),
+            timed(
+                timer, "multi_timeframe", multi_tf_coordinator.analyze_multi_timeframe_signal,
+                symbol=symbol,
+                timeframe_data=timeframe_data
+            )
         )
         
         # 🤖 Selección inteligente de algoritmo
-        algorithm_selection = selector.select_optimal_algorithm(
+        algorithm_selection = await timed(
+            timer, "algorithm_selection", selector.select_optimal_algorithm,
             symbol=symbol,
             microstructure=microstructure,
             institutional=institutional,
@@ -134,14 +158,8 @@ async def execute_smart_scalper_analysis(
         current_price = main_data['closes'][-1]
         
         # 🏆 ETAPA 1 COMPLETAR: SignalQualityAssessor - Multi-confirmation validation
-        # Preparar datos para evaluación de calidad
-        main_df = pd.DataFrame({
-            'open': main_data['opens'],
-            'high': main_data['highs'],
-            'low': main_data['lows'],
-            'close': main_data['closes'],
-            'volume': main_data['volumes']
-        })
+        # Preparar datos para evaluación de calidad (DataFrame memoizado en el frame)
+        main_df = feature_frames[main_tf].to_dataframe()
         
         # 🏛️ INSTITUCIONAL: Solo market structure data (DL-002 - No RSI/MACD retail)
         institutional_market_structure = {
@@ -154,7 +172,8 @@ async def execute_smart_scalper_analysis(
         }
         
         # 🏛️ Evaluar calidad INSTITUCIONAL con algoritmos Smart Money únicamente
-        institutional_quality = signal_quality_assessor.assess_signal_quality(
+        institutional_quality = await timed(
+            timer, "signal_quality", signal_quality_assessor.assess_signal_quality,
             price_data=main_df,
             volume_data=main_data['volumes'],
             indicators={},  # IGNORADO - solo algoritmos institucionales (DL-002)
@@ -182,12 +201,13 @@ async def execute_smart_scalper_analysis(
         if execute_real and signal in ["BUY", "SELL"]:
             try:
                 from services.http_testnet_service import create_testnet_order
-                order_result = await create_testnet_order(
-                    symbol=symbol,
-                    side=signal,
-                    quantity=str(quantity),
-                    price=str(current_price * 0.999 if signal == "BUY" else current_price * 1.001)
-                )
+                with timer.stage("order_execution"):
+                    order_result = await create_testnet_order(
+                        symbol=symbol,
+                        side=signal,
+                        quantity=str(quantity),
+                        price=str(current_price * 0.999 if signal == "BUY" else current_price * 1.001)
+                    )
             except Exception as e:
                 order_result = {"error": f"Error ejecutando orden: {str(e)}"}
         
@@ -248,7 +268,9 @@ async def execute_smart_scalper_analysis(
                     "confidence": f"{ranking.confidence:.1%}"
                 }
                 for ranking in algorithm_selection.algorithm_rankings[:3]
-            ]
+            ],
+            # ⏱️ Desglose de tiempos por etapa (ms) para medir p99 del endpoint
+            "timings_ms": timer.to_dict()
         }
         
     except Exception as e:
@@ -258,13 +280,15 @@ async def execute_smart_scalper_analysis(
         )
 
 
-def create_timeframe_data(symbol, opens, highs, lows, closes, volumes, timeframe):
-    """Crear TimeframeData con indicadores técnicos calculados"""
+def create_timeframe_data(symbol, opens, highs, lows, closes, volumes, timeframe, features=None):
+    """Crear TimeframeData con indicadores técnicos calculados desde un FeatureFrame"""
     
-    # Technical analysis imports
-    from services.ta_alternative import calculate_rsi, calculate_ema, calculate_sma, calculate_atr
+    from services.feature_frame import FeatureFrame
     from services.multi_timeframe_coordinator import TimeframeData
     
+    if features is None:
+        features = FeatureFrame.from_ohlcv(symbol, timeframe, opens, highs, lows, closes, volumes)
+    
     # Calcular indicadores técnicos
     data_length = min(50, len(closes))
     recent_closes = closes[-data_length:]
@@ -273,16 +297,15 @@ def create_timeframe_data(symbol, opens, highs, lows, closes, volumes, timeframe
     recent_opens = opens[-data_length:]
     recent_volumes = volumes[-data_length:]
     
-    # Indicadores técnicos
-    rsi_val = calculate_rsi(recent_closes, period=14)
-    ema_9 = calculate_ema(recent_closes, period=9) if len(recent_closes) >= 9 else recent_closes[-1]
-    ema_21 = calculate_ema(recent_closes, period=21) if len(recent_closes) >= 21 else recent_closes[-1]
-    ema_50 = calculate_ema(recent_closes, period=50) if len(recent_closes) >= 50 else recent_closes[-1]
-    ema_200 = calculate_ema(closes, period=200) if len(closes) >= 200 else closes[-1]
-    atr_val = calculate_atr(recent_highs, recent_lows, recent_closes, period=14)
+    # Indicadores técnicos (ventana de las últimas data_length velas; EMA200 sobre todo el histórico)
+    rsi_val = features.rsi(14, window=data_length)
+    ema_9 = features.ema(9, window=data_length)
+    ema_21 = features.ema(21, window=data_length)
+    ema_50 = features.ema(50, window=data_length)
+    ema_200 = features.ema(200)
+    atr_val = features.atr(14, window=data_length)
     
-    vol_sma_list = calculate_sma(recent_volumes, period=20)
-    vol_sma = vol_sma_list[-1] if isinstance(vol_sma_list, list) else vol_sma_list
+    vol_sma = features.sma(20, window=data_length, column="volumes")
     
     # Support/Resistance
     key_support = min(recent_lows)
@@ -323,7 +346,8 @@ def create_timeframe_data(symbol, opens, highs, lows, closes, volumes, timeframe
         key_support=key_support,
         key_resistance=key_resistance,
         data_quality=0.95,
-        reliability=0.90
+        reliability=0.90,
+        features=features
     )
 
 
@@ -673,6 +697,10 @@ async def delete_bot(bot_id: int, authorization: str = Header(None)):
         session.delete(bot)
         session.commit()
         
+        # Un bot RUNNING borrado no debe seguir analizándose en el scheduler
+        from services.bot_scheduler import get_bot_scheduler
+        get_bot_scheduler().remove_bot(bot_id)
+        
         return {
             "message": f"🗑️ Bot {bot.symbol} eliminado exitosamente",
             "bot_id": bot_id
@@ -773,10 +801,20 @@ async def update_bot(bot_id: int, bot_data: dict, authorization: str = Header(No
                 if hasattr(bot, key):
                     setattr(bot, key, value)
             
+            # Validar antes del commit lo que el scheduler va a necesitar
+            scheduled = _schedulable(bot) if bot.status == "RUNNING" and bot.active else None
+            
             session.add(bot)
             session.commit()
             session.refresh(bot)
             
+            # Re-sincronizar el scheduler con la configuración guardada
+            from services.bot_scheduler import get_bot_scheduler
+            if scheduled is not None:
+                get_bot_scheduler().add_bot(scheduled)
+            else:
+                get_bot_scheduler().remove_bot(bot_id)
+            
             return {
                 "message": f"✅ Bot {bot_id} actualizado exitosamente",
                 "bot": bot
@@ -793,6 +831,19 @@ async def update_bot(bot_id: int, bot_data: dict, authorization: str = Header(No
 
 # Control de Bots (para el panel de control dinámico)
 
+def _schedulable(bot):
+    """ScheduledBot de un BotConfig, validado antes del commit (400 si el scheduler no lo admite)"""
+    from services.bot_scheduler import ScheduledBot
+    from services.market_data_cache import INTERVAL_SECONDS
+    
+    try:
+        scheduled = ScheduledBot.from_config(bot)
+    except (TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Configuración de bot no válida: {e}")
+    if scheduled.interval not in INTERVAL_SECONDS:
+        raise HTTPException(status_code=400, detail=f"Intervalo no soportado: {scheduled.interval}")
+    return scheduled
+
 @router.post("/api/bots/{bot_id}/start")
 async def start_bot(bot_id: int, authorization: str = Header(None)):
     """Iniciar un bot"""
@@ -820,10 +871,28 @@ async def start_bot(bot_id: int, authorization: str = Header(None)):
             detail="Bot not found or access denied"
         )
     
+    # Scheduler central: un análisis por (símbolo, intervalo) compartido por todos sus bots.
+    # Se registra tras el commit: si falla, el bot no opera mientras la BD lo da por parado
+    from services.bot_scheduler import get_bot_scheduler
+    scheduler = get_bot_scheduler()
+    scheduled = _schedulable(bot)
+    
+    bot.status = "RUNNING"
+    bot.updated_at = datetime.utcnow()
+    session.add(bot)
+    session.commit()
+    scheduler.add_bot(scheduled)
+    
     return {
         "message": f"✅ Bot {bot_id} iniciado",
         "status": "RUNNING",
-        "bot_id": bot_id
+        "bot_id": bot_id,
+        "scheduler": {
+            "symbol": bot.symbol,
+            "interval": bot.interval,
+            "bots_in_group": scheduler.group_size(bot_id),
+            "loop_running": scheduler.running
+        }
     }
 
 
@@ -854,6 +923,14 @@ async def pause_bot(bot_id: int, authorization: str = Header(None)):
             detail="Bot not found or access denied"
         )
     
+    bot.status = "PAUSED"
+    bot.updated_at = datetime.utcnow()
+    session.add(bot)
+    session.commit()
+    
+    from services.bot_scheduler import get_bot_scheduler
+    get_bot_scheduler().remove_bot(bot_id)
+    
     return {
         "message": f"⏸️ Bot {bot_id} pausado",
         "status": "PAUSED",
@@ -888,6 +965,14 @@ async def stop_bot(bot_id: int, authorization: str = Header(None)):
             detail="Bot not found or access denied"
         )
     
+    bot.status = "STOPPED"
+    bot.updated_at = datetime.utcnow()
+    session.add(bot)
+    session.commit()
+    
+    from services.bot_scheduler import get_bot_scheduler
+    get_bot_scheduler().remove_bot(bot_id)
+    
     return {
         "message": f"⏹️ Bot {bot_id} detenido",
         "status": "STOPPED",
@@ -895,5 +980,25 @@ async def stop_bot(bot_id: int, authorization: str = Header(None)):
     }
 
 
+@router.get("/api/bot-scheduler/stats")
+async def get_bot_scheduler_stats(bot_id: int = None, authorization: str = Header(None)):
+    """Grupos (símbolo, intervalo), último ciclo por intervalo y lag cierre de vela -> decisión"""
+    # DL-003: Lazy imports to avoid psycopg2 dependency at module level
+    from services.auth_service import get_current_user_safe
+    from services.bot_scheduler import get_bot_scheduler
+    
+    # DL-003 COMPLIANT: Authentication via dependency function
+    current_user = await get_current_user_safe(authorization)
+    
+    scheduler = get_bot_scheduler()
+    if bot_id is not None:
+        bot_status = scheduler.bot_status(bot_id)
+        if not bot_status or bot_status["user_id"] != current_user.id:
+            raise HTTPException(status_code=404, detail="Bot not scheduled or access denied")
+        return {"success": True, "data": bot_status}
+    
+    return {"success": True, "data": scheduler.get_stats()}
+
+
 # ✅ DL-001 COMPLIANCE: Endpoints fallback/debug eliminados
 # Real data endpoints únicamente
\ No newline at end of file
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+🎯 Candle Store Routes - Histórico local de velas
+Backfill paginado desde Binance y cobertura/huecos del almacén columnar
+
+Eduard Guzmán - InteliBotX
+"""
+
+from fastapi import APIRouter, HTTPException, Query, Header
+from fastapi.responses import JSONResponse
+from typing import Optional
+import asyncio
+import logging
+
+# Configurar logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Crear router
+router = APIRouter()
+
+@router.post("/api/candles/backfill")
+async def backfill_candles(
+    symbol: str = Query(..., description="Par de trading (ej: BTCUSDT)"),
+    interval: str = Query("15m", description="Marco temporal (1m, 5m, 15m, 1h, 4h, 1d)"),
+    start: str = Query(..., description="Inicio ISO UTC (ej: 2025-01-01)"),
+    end: Optional[str] = Query(None, description="Fin ISO UTC (default: última vela cerrada)"),
+    authorization: str = Header(None)
+):
+    """
+    Descargar a disco las velas que faltan en [start, end]
+
+    **Retorna:**
+    - Páginas descargadas, velas nuevas, huecos pendientes y cobertura resultante
+    """
+    try:
+        # DL-003: Lazy imports to avoid psycopg2 dependency at module level
+        from services.auth_service import get_current_user_safe
+        from services.candle_store import INTERVAL_SECONDS, get_candle_store
+
+        # DL-008: Authentication pattern
+        current_user = await get_current_user_safe(authorization)
+
+        if interval not in INTERVAL_SECONDS:
+            raise HTTPException(status_code=400, detail=f"Intervalo no soportado: {interval}")
+
+        store = get_candle_store()
+        result = await store.backfill(symbol.upper(), interval, start, end)
+        coverage = await asyncio.to_thread(store.coverage, symbol, interval)
+        return JSONResponse(content={
+            "success": True,
+            "data": {**result, "coverage": coverage}
+        })
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"❌ Error en backfill de velas {symbol} {interval}: {e}")
+        raise HTTPException(status_code=500, detail=f"Error en backfill de velas: {str(e)}")
+
+@router.get("/api/candles/coverage")
+async def get_candle_coverage(
+    symbol: Optional[str] = Query(None, description="Par de trading (default: todas las series)"),
+    interval: str = Query("15m", description="Marco temporal"),
+    authorization: str = Header(None)
+):
+    """Velas guardadas, rango y huecos por serie (símbolo, intervalo)"""
+    try:
+        # DL-003: Lazy imports to avoid psycopg2 dependency at module level
+        from services.auth_service import get_current_user_safe
+        from services.candle_store import INTERVAL_SECONDS, get_candle_store
+
+        # DL-008: Authentication pattern
+        current_user = await get_current_user_safe(authorization)
+
+        store = get_candle_store()
+        if symbol is None:
+            return JSONResponse(content={"success": True, "data": await asyncio.to_thread(store.stats)})
+
+        if interval not in INTERVAL_SECONDS:
+            raise HTTPException(status_code=400, detail=f"Intervalo no soportado: {interval}")
+        step_ms = INTERVAL_SECONDS[interval] * 1000
+        series_gaps, coverage = await asyncio.to_thread(
+            lambda: (store.gaps(symbol, interval), store.coverage(symbol, interval))
+        )
+        gaps = [
+            {"from": start_ms, "to": end_ms, "candles": (end_ms - start_ms) // step_ms + 1}
+            for start_ms, end_ms in series_gaps
+        ]
+        return JSONResponse(content={
+            "success": True,
+            "data": {**coverage, "gaps": gaps[:100]}
+        })
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Error consultando cobertura de velas: {e}")
+        raise HTTPException(status_code=500, detail=f"Error consultando cobertura de velas: {str(e)}")
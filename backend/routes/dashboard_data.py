@@ -25,7 +25,7 @@ async def get_dashboard_summary(
     from db.database import get_session
     from services.auth_service import get_current_user_safe
     from models.bot_config import BotConfig
-    from routes.trading_operations import TradingOperation
+    from services.dashboard_rollups import daily_aggregates
     from sqlmodel import select
     from fastapi import HTTPException, status, Header
     import logging
@@ -48,41 +48,42 @@ async def get_dashboard_summary(
         # 💰 Calcular balance total inicial
         initial_capital = sum(float(bot.stake or 0) for bot in bots)
         
-        # 📊 Obtener operaciones del usuario (últimos 30 días)
-        operations_query = select(TradingOperation).where(
-            TradingOperation.user_id == current_user.id,
-            TradingOperation.created_at >= datetime.utcnow() - timedelta(days=30)
-        )
-        operations = session.exec(operations_query).all()
+        # 📊 Agregados diarios del usuario por símbolo (últimos 30 días)
+        today = datetime.utcnow().date()
+        daily = daily_aggregates(session, current_user.id, datetime.utcnow() - timedelta(days=30),
+                                 group_by=("day", "symbol"))
         
         # 📈 Calcular métricas PnL
-        total_pnl = sum(op.pnl for op in operations)
-        today_operations = [op for op in operations if op.created_at.date() == datetime.utcnow().date()]
-        today_pnl = sum(op.pnl for op in today_operations)
+        total_pnl = sum(row["pnl"] for row in daily)
+        today_rows = [row for row in daily if row["day"] == today]
+        today_pnl = sum(row["pnl"] for row in today_rows)
+        today_operations = sum(row["operations"] for row in today_rows)
         
         # 💵 Balance actual = Capital inicial + PnL total
         current_balance = initial_capital + total_pnl
         
-        # 📊 Operaciones por símbolo
+        # 📊 Operaciones por símbolo y por día
         symbol_pnl = defaultdict(float)
-        for op in operations:
-            symbol_pnl[op.symbol] += op.pnl
+        day_totals = defaultdict(lambda: [0, 0.0])
+        for row in daily:
+            symbol_pnl[row["symbol"]] += row["pnl"]
+            day_totals[row["day"]][0] += row["operations"]
+            day_totals[row["day"]][1] += row["pnl"]
         
         # 🎯 Win rate
-        profitable_ops = len([op for op in operations if op.pnl > 0])
-        total_ops = len(operations)
+        profitable_ops = sum(row["wins"] for row in daily)
+        total_ops = sum(row["operations"] for row in daily)
         win_rate = (profitable_ops / total_ops * 100) if total_ops > 0 else 0
         
         # 📈 Performance últimos 7 días
         last_7_days = []
         for i in range(7):
-            day = datetime.utcnow() - timedelta(days=i)
-            day_ops = [op for op in operations if op.created_at.date() == day.date()]
-            day_pnl = sum(op.pnl for op in day_ops)
+            day = today - timedelta(days=i)
+            day_ops, day_pnl = day_totals.get(day, (0, 0.0))
             last_7_days.append({
                 "date": day.strftime("%Y-%m-%d"),
                 "pnl": round(day_pnl, 2),
-                "operations": len(day_ops)
+                "operations": day_ops
             })
         
         last_7_days.reverse()  # Orden cronológico
@@ -98,7 +99,7 @@ async def get_dashboard_summary(
                 "total_pnl": round(total_pnl, 2),
                 "today_pnl": round(today_pnl, 2),
                 "total_operations": total_ops,
-                "today_operations": len(today_operations),
+                "today_operations": today_operations,
                 "win_rate": round(win_rate, 1),
                 
                 # Performance por símbolo (top 5)
@@ -131,24 +132,16 @@ async def get_balance_evolution(
         from db.database import get_session
         from services.auth_service import get_current_user_safe
         from models.bot_config import BotConfig
-        from models.trading_operation import TradingOperation
+        from services.dashboard_rollups import daily_aggregates
         from sqlmodel import select
         
         # DL-003 COMPLIANT: Authentication via dependency function
         current_user = await get_current_user_safe(authorization)
         session = get_session()
         
-        # Query base
-        query = select(TradingOperation).where(
-            TradingOperation.user_id == current_user.id,
-            TradingOperation.created_at >= datetime.utcnow() - timedelta(days=days)
-        ).order_by(TradingOperation.created_at)
-        
-        # Filtro por símbolo si se especifica
-        if symbol:
-            query = query.where(TradingOperation.symbol == symbol)
-        
-        operations = session.exec(query).all()
+        # Agregados diarios (rollup o GROUP BY), filtrados por símbolo si se especifica
+        daily = daily_aggregates(session, current_user.id, datetime.utcnow() - timedelta(days=days),
+                                 group_by=("day",), symbol=symbol)
         
         # Capital inicial de los bots
         bots_query = select(BotConfig).where(BotConfig.user_id == current_user.id)
@@ -159,14 +152,14 @@ async def get_balance_evolution(
         daily_balance = {}
         running_pnl = 0
         
-        for op in operations:
-            date_key = op.created_at.date().isoformat()
-            running_pnl += op.pnl
+        for row in daily:
+            date_key = row["day"].isoformat()
+            running_pnl += row["pnl"]
             daily_balance[date_key] = {
                 "date": date_key,
                 "balance": round(initial_capital + running_pnl, 2),
                 "pnl": round(running_pnl, 2),
-                "operations": daily_balance.get(date_key, {}).get("operations", 0) + 1
+                "operations": row["operations"]
             }
         
         # Completar días sin operaciones
@@ -216,7 +209,7 @@ async def get_bots_performance(
         from db.database import get_session
         from services.auth_service import get_current_user_safe
         from models.bot_config import BotConfig
-        from models.trading_operation import TradingOperation
+        from services.dashboard_rollups import daily_aggregates
         from sqlmodel import select
         
         # DL-003 COMPLIANT: Authentication via dependency function
@@ -227,29 +220,31 @@ async def get_bots_performance(
         bots_query = select(BotConfig).where(BotConfig.user_id == current_user.id)
         bots = session.exec(bots_query).all()
         
+        # PnL diario de todos los bots en una sola consulta agregada
+        bot_days = defaultdict(dict)
+        since = datetime.utcnow() - timedelta(days=days)
+        for row in daily_aggregates(session, current_user.id, since, group_by=("bot_id", "day")):
+            bot_days[row["bot_id"]][row["day"]] = row
+        
         bot_performance = []
         
         for bot in bots:
-            # Operaciones del bot
-            ops_query = select(TradingOperation).where(
-                TradingOperation.bot_id == bot.id,
-                TradingOperation.user_id == current_user.id,
-                TradingOperation.created_at >= datetime.utcnow() - timedelta(days=days)
-            )
-            operations = session.exec(ops_query).all()
+            # Agregados del bot
+            days_data = bot_days.get(bot.id, {})
             
             # Métricas del bot
-            total_pnl = sum(op.pnl for op in operations)
-            total_ops = len(operations)
-            profitable_ops = len([op for op in operations if op.pnl > 0])
+            total_pnl = sum(row["pnl"] for row in days_data.values())
+            total_ops = sum(row["operations"] for row in days_data.values())
+            profitable_ops = sum(row["wins"] for row in days_data.values())
             win_rate = (profitable_ops / total_ops * 100) if total_ops > 0 else 0
+            last_operation = max((row["last_operation_at"] for row in days_data.values()
+                                  if row["last_operation_at"]), default=None)
             
             # PnL por día (últimos 7 días)
             daily_pnl = []
             for i in range(7):
                 day = datetime.utcnow() - timedelta(days=i)
-                day_ops = [op for op in operations if op.created_at.date() == day.date()]
-                day_pnl_value = sum(op.pnl for op in day_ops)
+                day_pnl_value = days_data[day.date()]["pnl"] if day.date() in days_data else 0
                 daily_pnl.append({
                     "date": day.strftime("%Y-%m-%d"),
                     "pnl": round(day_pnl_value, 2)
@@ -270,7 +265,7 @@ async def get_bots_performance(
                 "total_operations": total_ops,
                 "win_rate": round(win_rate, 1),
                 "daily_pnl": daily_pnl,
-                "last_operation": operations[-1].created_at.isoformat() if operations else None
+                "last_operation": last_operation.isoformat() if last_operation else None
             })
         
         return {
@@ -294,40 +289,33 @@ async def get_symbols_analysis(
         # Lazy imports
         from db.database import get_session
         from services.auth_service import get_current_user_safe
-        from models.trading_operation import TradingOperation
-        from sqlmodel import select
+        from services.dashboard_rollups import daily_aggregates
         
         # DL-003 COMPLIANT: Authentication via dependency function
         current_user = await get_current_user_safe(authorization)
         session = get_session()
         
-        # Obtener operaciones por símbolo
-        operations_query = select(TradingOperation).where(
-            TradingOperation.user_id == current_user.id,
-            TradingOperation.created_at >= datetime.utcnow() - timedelta(days=days)
-        )
-        operations = session.exec(operations_query).all()
+        # Agregados diarios por símbolo
+        daily = daily_aggregates(session, current_user.id, datetime.utcnow() - timedelta(days=days),
+                                 group_by=("symbol", "day"))
         
         # Agrupar por símbolo
         symbols_data = defaultdict(lambda: {
-            'operations': [],
             'total_pnl': 0,
             'total_operations': 0,
             'profitable_operations': 0,
             'daily_pnl': defaultdict(float)
         })
         
-        for op in operations:
-            symbol = op.symbol
-            symbols_data[symbol]['operations'].append(op)
-            symbols_data[symbol]['total_pnl'] += op.pnl
-            symbols_data[symbol]['total_operations'] += 1
-            if op.pnl > 0:
-                symbols_data[symbol]['profitable_operations'] += 1
+        for row in daily:
+            symbol = row["symbol"]
+            symbols_data[symbol]['total_pnl'] += row["pnl"]
+            symbols_data[symbol]['total_operations'] += row["operations"]
+            symbols_data[symbol]['profitable_operations'] += row["wins"]
             
             # PnL diario
-            date_key = op.created_at.date().isoformat()
-            symbols_data[symbol]['daily_pnl'][date_key] += op.pnl
+            date_key = row["day"].isoformat()
+            symbols_data[symbol]['daily_pnl'][date_key] += row["pnl"]
         
         # Formatear respuesta
         symbols_analysis = []
@@ -161,18 +161,14 @@ async def get_system_execution_stats(
         
         # DL-008: Authentication pattern
         current_user = await get_current_user_safe(authorization)
-        import sqlite3
         
         logger.info(f"🌍 Obteniendo estadísticas globales del sistema - {timeframe_hours}h")
         
-        conn = sqlite3.connect(metrics_tracker.db_path)
-        cursor = conn.cursor()
-        
         # Calcular timestamp límite
         limit_time = datetime.utcnow() - timedelta(hours=timeframe_hours)
         
         # Estadísticas globales
-        cursor.execute('''
+        result = (await metrics_tracker.query('''
             SELECT 
                 COUNT(*) as total_executions,
                 COUNT(DISTINCT bot_id) as active_bots,
@@ -188,12 +184,10 @@ async def get_system_execution_stats(
                 SUM(CASE WHEN market_impact IN ('MINIMAL', 'LOW') THEN 1 ELSE 0 END) as low_impact_executions
             FROM execution_metrics
             WHERE timestamp > ?
-        ''', (limit_time.isoformat(),))
-        
-        result = cursor.fetchone()
+        ''', (limit_time.isoformat(),)))[0]
         
         # Top estrategias por eficiencia
-        cursor.execute('''
+        top_strategies = await metrics_tracker.query('''
             SELECT 
                 strategy,
                 COUNT(*) as executions,
@@ -207,10 +201,8 @@ async def get_system_execution_stats(
             LIMIT 5
         ''', (limit_time.isoformat(),))
         
-        top_strategies = cursor.fetchall()
-        
         # Top símbolos por volumen
-        cursor.execute('''
+        top_symbols = await metrics_tracker.query('''
             SELECT 
                 symbol,
                 COUNT(*) as executions,
@@ -223,10 +215,6 @@ async def get_system_execution_stats(
             LIMIT 10
         ''', (limit_time.isoformat(),))
         
-        top_symbols = cursor.fetchall()
-        
-        conn.close()
-        
         if not result or result[0] == 0:
             return JSONResponse(content={
                 "success": True,
@@ -265,6 +253,7 @@ async def get_system_execution_stats(
                     "total_execution_cost": round((result[6] or 0) + (result[7] or 0), 4),
                     "low_slippage_rate": round(low_impact_rate, 2)
                 },
+                "percentile_metrics": metrics_tracker.get_execution_percentiles(timeframe_hours),
                 "top_strategies": [
                     {
                         "strategy": row[0],
@@ -415,6 +404,88 @@ async def simulate_bot_execution(
         logger.error(f"❌ Error simulando ejecución: {e}")
         raise HTTPException(status_code=500, detail=f"Error en simulación: {str(e)}")
 
+# 📐 Percentiles de ejecución (sketches en memoria por bot/símbolo/estrategia)
+@router.get("/api/execution-metrics/percentiles")
+async def get_execution_percentiles(
+    bot_id: Optional[int] = Query(None, description="Filtrar por bot"),
+    symbol: Optional[str] = Query(None, description="Filtrar por símbolo (ej: BTCUSDT)"),
+    strategy: Optional[str] = Query(None, description="Filtrar por estrategia"),
+    timeframe_hours: int = Query(24, description="Ventana de tiempo en horas (granularidad horaria)", ge=1, le=168),
+    authorization: str = Header(None)
+):
+    """
+    Percentiles de latencia total, latencia API y slippage sin escanear execution_metrics
+
+    **Retorna:**
+    - count, mean, max, p50, p90, p99 y p99.9 por métrica (error relativo <= EXECUTION_SKETCH_ACCURACY)
+    """
+    try:
+        # DL-003: Lazy imports to avoid psycopg2 dependency at module level
+        from services.auth_service import get_current_user_safe
+
+        # DL-008: Authentication pattern
+        current_user = await get_current_user_safe(authorization)
+
+        percentiles = metrics_tracker.get_execution_percentiles(
+            timeframe_hours,
+            bot_id=bot_id,
+            symbol=symbol.upper() if symbol else None,
+            strategy=strategy
+        )
+
+        return JSONResponse(content={
+            "success": True,
+            "data": {
+                "filters": {"bot_id": bot_id, "symbol": symbol, "strategy": strategy},
+                "timeframe_hours": timeframe_hours,
+                "percentiles": percentiles
+            },
+            "timestamp": datetime.utcnow().isoformat()
+        })
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Error obteniendo percentiles de ejecución: {e}")
+        raise HTTPException(status_code=500, detail=f"Error obteniendo percentiles: {str(e)}")
+
+# 🔌 Latencias HTTP hacia exchanges (pool de conexiones compartido)
+@router.get("/api/execution-metrics/http-latency")
+async def get_http_latency_stats(
+    host: Optional[str] = Query(None, description="Filtrar por host (ej: api.binance.com)"),
+    reset: bool = Query(False, description="Reiniciar histogramas después de leerlos"),
+    authorization: str = Header(None)
+):
+    """
+    Histogramas de latencia de las llamadas REST a Binance por endpoint
+
+    **Retorna:**
+    - count, errores, avg/p50/p90/p99/max en ms y buckets por host/método/ruta
+    """
+    try:
+        # DL-003: Lazy imports to avoid psycopg2 dependency at module level
+        from services.auth_service import get_current_user_safe
+        from utils.http_client_pool import http_client_pool
+
+        # DL-008: Authentication pattern
+        current_user = await get_current_user_safe(authorization)
+
+        stats = http_client_pool.get_latency_stats(host)
+        if reset:
+            http_client_pool.reset_latency_stats()
+
+        return JSONResponse(content={
+            "success": True,
+            "data": stats,
+            "timestamp": datetime.utcnow().isoformat()
+        })
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Error obteniendo latencias HTTP: {e}")
+        raise HTTPException(status_code=500, detail=f"Error obteniendo latencias: {str(e)}")
+
 # 🏥 Health check endpoint
 @router.get("/api/execution-metrics/health")
 async def health_check(authorization: str = Header(None)):
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+🎯 Optimizer Routes - Barrido de parámetros de estrategia sobre histórico
+Rejilla o muestreo aleatorio de umbrales RSI/volumen y TP/SL, ranking por métrica
+
+Eduard Guzmán - InteliBotX
+"""
+
+from fastapi import APIRouter, HTTPException, Header
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, Field
+import asyncio
+import json
+import logging
+import threading
+import time
+
+# Configurar logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Crear router
+router = APIRouter()
+
+# Modelos Pydantic para requests
+class SweepRequest(BaseModel):
+    symbol: str
+    interval: str = "15m"
+    start: Optional[str] = None
+    end: Optional[str] = None
+    grid: Optional[Dict[str, List[Any]]] = None  # default: DEFAULT_GRID
+    samples: Optional[int] = Field(None, ge=1)  # muestreo aleatorio de la rejilla en lugar del producto completo
+    seed: Optional[int] = None
+    base: Dict[str, Any] = {}  # parámetros fijos (ej: fee_pct, max_hold_bars)
+    metric: str = "sharpe_ratio"
+    top: int = 20
+    min_trades: int = 10
+    stream: bool = True  # NDJSON con progreso y ranking final; False = una sola respuesta JSON
+
+# Segundos mínimos entre registros de progreso del stream NDJSON
+_PROGRESS_SECONDS = 0.5
+
+async def _sweep_stream(request: SweepRequest, optimizer, parameter_sets: List[Dict[str, Any]]):
+    """
+    NDJSON: registros {"type": "progress"} según terminan los sets y al final
+    {"type": "result"} con el ranking (o {"type": "error"}).
+    """
+    from services.parameter_optimizer import rank_results
+    from utils.analysis_pool import run_in_analysis_pool
+
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    abandoned = threading.Event()
+
+    def produce():
+        # Hilo del pool: iter_results reparte los bloques entre procesos
+        results = optimizer.iter_results(parameter_sets)
+        try:
+            for result in results:
+                if abandoned.is_set():
+                    break
+                loop.call_soon_threadsafe(queue.put_nowait, result)
+        finally:
+            results.close()
+            loop.call_soon_threadsafe(queue.put_nowait, None)
+
+    def progress(done: bool = False) -> str:
+        return json.dumps({
+            "type": "progress",
+            "evaluated": len(results),
+            "total": len(parameter_sets),
+            "qualified": qualified,
+            "seconds": round(time.perf_counter() - started, 3),
+            "done": done
+        }) + "\n"
+
+    results: List[Dict[str, Any]] = []
+    qualified = 0
+    started = time.perf_counter()
+    producer = asyncio.ensure_future(run_in_analysis_pool(produce))
+    try:
+        last_progress = started
+        while True:
+            result = await queue.get()
+            if result is None:
+                break
+            results.append(result)
+            qualified += result["trades"] >= request.min_trades
+            if time.perf_counter() - last_progress >= _PROGRESS_SECONDS:
+                last_progress = time.perf_counter()
+                yield progress()
+        await producer
+
+        yield progress(done=True)
+        report = rank_results(results, request.metric, request.top, request.min_trades)
+        yield json.dumps({
+            "type": "result",
+            "success": True,
+            "data": {"symbol": request.symbol.upper(), "interval": request.interval,
+                     **report, "stats": optimizer.last_stats}
+        }) + "\n"
+    except Exception as e:
+        logger.error(f"❌ Error en barrido de parámetros {request.symbol}: {e}")
+        yield json.dumps({"type": "error", "detail": f"Error en barrido de parámetros: {str(e)}"}) + "\n"
+    finally:
+        # Cliente desconectado: el productor deja de consumir y cancela los bloques pendientes
+        abandoned.set()
+
+@router.post("/api/optimizer/sweep")
+async def run_parameter_sweep(request: SweepRequest, authorization: str = Header(None)):
+    """
+    Evaluar sets de parámetros Smart Scalper sobre las velas históricas del símbolo
+
+    **Retorna** (NDJSON; JSON único con `stream: false`):
+    - Progreso del barrido (sets evaluados / total) según terminan los bloques
+    - Ranking (parámetros + Sharpe, profit factor, drawdown, win rate, trades)
+    - Estadísticas del barrido (sets evaluados, procesos, sets/segundo)
+    """
+    try:
+        # DL-003: Lazy imports to avoid psycopg2 dependency at module level
+        from services.auth_service import get_current_user_safe
+        from services.backtest_bot import load_backtest_candles
+        from services.parameter_optimizer import (
+            DEFAULT_GRID, DEFAULT_PARAMETERS, OPTIMIZER_MAX_PARAMETER_SETS, RANKING_METRICS,
+            ParameterOptimizer, grid_parameter_sets, parameter_set_count, random_parameter_sets
+        )
+        from utils.analysis_pool import run_in_analysis_pool
+
+        # DL-008: Authentication pattern
+        current_user = await get_current_user_safe(authorization)
+
+        grid = request.grid or DEFAULT_GRID
+        unknown = [name for name in list(grid) + list(request.base) if name not in DEFAULT_PARAMETERS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Parámetros desconocidos: {', '.join(unknown)}")
+        if request.metric not in RANKING_METRICS:
+            raise HTTPException(status_code=400, detail=f"Métrica no soportada: {request.metric}")
+        requested = parameter_set_count(grid, request.samples)
+        if requested > OPTIMIZER_MAX_PARAMETER_SETS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Máximo {OPTIMIZER_MAX_PARAMETER_SETS} sets por barrido ({requested} pedidos)"
+            )
+
+        if request.samples:
+            parameter_sets = random_parameter_sets(grid, request.samples, request.seed, request.base)
+        else:
+            parameter_sets = grid_parameter_sets(grid, request.base)
+
+        try:
+            # Sin fallback a BTCUSDT: optimizar sobre otro símbolo no tiene sentido
+            candles = await asyncio.to_thread(
+                load_backtest_candles, request.symbol, request.interval, request.start, request.end,
+                fallback=False
+            )
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail=f"Sin histórico para {request.symbol} {request.interval}")
+
+        optimizer = ParameterOptimizer(candles)
+        if not request.stream:
+            report = await run_in_analysis_pool(
+                optimizer.optimize, parameter_sets, request.metric, request.top, request.min_trades
+            )
+            return JSONResponse(content={
+                "success": True,
+                "data": {"symbol": request.symbol.upper(), "interval": request.interval, **report}
+            })
+        return StreamingResponse(_sweep_stream(request, optimizer, parameter_sets),
+                                 media_type="application/x-ndjson",
+                                 headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"❌ Error en barrido de parámetros {request.symbol}: {e}")
+        raise HTTPException(status_code=500, detail=f"Error en barrido de parámetros: {str(e)}")
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+🎯 Scanner Routes - Escaneo multi-símbolo del mercado
+Ranking de oportunidades Smart Scalper sobre cientos de pares, paginado
+
+Eduard Guzmán - InteliBotX
+"""
+
+from fastapi import APIRouter, HTTPException, Query, Header
+from fastapi.responses import JSONResponse
+from typing import Optional
+from datetime import datetime
+import logging
+
+# Configurar logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Crear router
+router = APIRouter()
+
+@router.get("/api/scanner")
+async def scan_market(
+    interval: str = Query("15m", description="Marco temporal (1m, 5m, 15m, 1h, 4h)"),
+    quote: str = Query("USDT", description="Quote asset del universo de pares"),
+    symbols: Optional[str] = Query(None, description="Lista de símbolos separados por coma (default: universo completo)"),
+    limit: int = Query(100, description="Velas por símbolo", ge=60, le=500),
+    max_symbols: Optional[int] = Query(None, description="Máximo de símbolos a escanear (default: SCANNER_MAX_SYMBOLS)", ge=1, le=1000),
+    signal: Optional[str] = Query(None, description="Filtrar por señal (BUY, SELL, HOLD)"),
+    refine_top: int = Query(0, description="Refinar el top N con SmartScalperEngine completo", ge=0, le=50),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(50, ge=1, le=200),
+    authorization: str = Header(None)
+):
+    """
+    Escanear el mercado y devolver las oportunidades ordenadas por score
+
+    **Retorna:**
+    - Página de resultados (rank, señal, confianza, condición de mercado, indicadores)
+    - Metadatos de paginación y estadísticas del scan (símbolos, fallos, tiempos)
+    """
+    try:
+        # DL-003: Lazy imports to avoid psycopg2 dependency at module level
+        from services.auth_service import get_current_user_safe
+        from services.market_scanner import get_market_scanner
+
+        # DL-008: Authentication pattern
+        current_user = await get_current_user_safe(authorization)
+
+        symbol_list = [s.strip() for s in symbols.split(",") if s.strip()] if symbols else None
+        report = await get_market_scanner().scan(
+            symbols=symbol_list,
+            interval=interval,
+            limit=limit,
+            quote_asset=quote.upper(),
+            max_symbols=max_symbols,
+            refine_top=refine_top
+        )
+
+        results = report.results
+        if signal:
+            results = [r for r in results if r["signal"] == signal.upper()]
+
+        total = len(results)
+        start = (page - 1) * page_size
+        items = results[start:start + page_size]
+
+        return JSONResponse(content={
+            "success": True,
+            "data": {
+                "items": items,
+                "pagination": {
+                    "page": page,
+                    "page_size": page_size,
+                    "total": total,
+                    "pages": (total + page_size - 1) // page_size
+                },
+                "scan": {
+                    "interval": report.interval,
+                    "limit": report.limit,
+                    "symbols_requested": report.symbols_requested,
+                    "symbols_scanned": report.symbols_scanned,
+                    "failed_symbols": report.failed_symbols,
+                    "timings_ms": report.timings_ms,
+                    "generated_at": datetime.utcfromtimestamp(report.generated_at).isoformat()
+                }
+            }
+        })
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Error en scanner de mercado: {e}")
+        raise HTTPException(status_code=500, detail=f"Error escaneando mercado: {str(e)}")
@@ -3,11 +3,15 @@
 Endpoints para almacenar y recuperar operaciones de trading con IDs únicos
 """
 
-from fastapi import APIRouter, HTTPException, Query, Header
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Query, Header, Request
+from fastapi.responses import StreamingResponse
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 from uuid import uuid4
+import asyncio
+import base64
 import json
+import os
 
 # Lazy imports to avoid psycopg2 dependency at module level
 
@@ -160,8 +164,12 @@ async def get_bot_trading_operations(
         if side:
             query = query.where(TradingOperation.side == side)
         
+        # Count total para paginación (COUNT(*) sobre ix_trading_operations_bot_id_created_at)
+        total_count = _count(session, query)
+        total_pages = (total_count + limit - 1) // limit
+        
         # Ordenar por fecha descendente
-        query = query.order_by(TradingOperation.created_at.desc())
+        query = query.order_by(TradingOperation.created_at.desc(), TradingOperation.id.desc())
         
         # Paginación
         offset = (page - 1) * limit
@@ -170,18 +178,6 @@ async def get_bot_trading_operations(
         # Ejecutar query
         operations = session.exec(query).all()
         
-        # Count total para paginación
-        count_query = select(TradingOperation).where(
-            TradingOperation.bot_id == bot_id,
-            TradingOperation.user_id == current_user.id,
-            TradingOperation.created_at >= datetime.utcnow() - timedelta(days=days)
-        )
-        if side:
-            count_query = count_query.where(TradingOperation.side == side)
-        
-        total_count = len(session.exec(count_query).all())
-        total_pages = (total_count + limit - 1) // limit
-        
         # Formatear respuesta
         operations_data = []
         for op in operations:
@@ -281,12 +277,67 @@ async def get_trading_operation(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching operation: {str(e)}")
 
+def _count(session, query) -> int:
+    """COUNT(*) en SQL de un select filtrado, sin materializar filas"""
+    from sqlalchemy import func, select
+    return session.execute(select(func.count()).select_from(query.subquery())).scalar_one()
+
+def _encode_cursor(op) -> str:
+    """Cursor opaco keyset (created_at, id) de una operación"""
+    raw = f"{op.created_at.isoformat()}|{op.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, op_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), op_id
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def _time_ago(created_at: datetime, now: datetime) -> str:
+    total_seconds = int((now - created_at).total_seconds())
+    if total_seconds < 60:
+        return f"{total_seconds}s ago"
+    elif total_seconds < 3600:
+        return f"{total_seconds // 60}m ago"
+    elif total_seconds < 86400:
+        return f"{total_seconds // 3600}h ago"
+    return f"{total_seconds // 86400}d ago"
+
+def _feed_item(op, now: datetime) -> dict:
+    """Formato de operación para Trading Live Feed"""
+    return {
+        "id": op.id,
+        "bot_id": op.bot_id,
+        "symbol": op.symbol,
+        "side": op.side,
+        "quantity": op.quantity,
+        "price": op.price,
+        "pnl": op.pnl,
+        "strategy": op.strategy,
+        "signal": op.signal,
+        "algorithm_used": op.algorithm_used,
+        "confidence": op.confidence,
+        "timestamp": op.created_at.isoformat(),
+        "time_ago": _time_ago(op.created_at, now),
+        "profit": op.pnl > 0,
+        "cursor": _encode_cursor(op)
+    }
+
+def _parse_bot_ids(bot_ids: Optional[str]) -> List[int]:
+    if not bot_ids:
+        return []
+    return [int(x.strip()) for x in bot_ids.split(',') if x.strip().isdigit()]
+
 @router.get("/api/trading-feed/live")
 async def get_live_trading_feed(
     page: int = Query(1, ge=1),
     limit: int = Query(50, ge=1, le=200),
     bot_ids: Optional[str] = Query(None),  # Comma-separated bot IDs
     hours: int = Query(24, ge=1, le=168),  # Últimas X horas
+    cursor: Optional[str] = Query(None),  # Keyset: next_cursor de la página anterior (ignora page)
+    include_total: bool = Query(True),  # False = sin COUNT(*) (clientes con scroll infinito)
     authorization: str = Header(None)
 ):
     """
@@ -294,11 +345,14 @@ async def get_live_trading_feed(
     
     **Sustituye**: LiveTradingFeed component data source
     **Beneficio**: Datos persisten + filtros por bots + tiempo real + paginación
+    
+    Paginación keyset sobre (created_at, id) con `cursor`; `page` (OFFSET) se mantiene
+    para compatibilidad.
     """
     try:
         # Lazy imports
         from db.database import get_session
-        from sqlmodel import select
+        from sqlmodel import select, or_, and_
         from fastapi import HTTPException, status, Header
         from services.auth_service import get_current_user_safe
         import logging
@@ -307,64 +361,43 @@ async def get_live_trading_feed(
         
         # DL-003 COMPLIANT: Authentication via dependency function
         current_user = await get_current_user_safe(authorization)
-        session = get_session()
         
-        # Query base
+        # Query base (ix_trading_operations_user_id_created_at)
         base_query = select(TradingOperation).where(
             TradingOperation.user_id == current_user.id,
             TradingOperation.created_at >= datetime.utcnow() - timedelta(hours=hours)
         )
         
         # Filtro por bot IDs si se proporciona
-        if bot_ids:
-            bot_id_list = [int(x.strip()) for x in bot_ids.split(',') if x.strip().isdigit()]
-            if bot_id_list:
-                base_query = base_query.where(TradingOperation.bot_id.in_(bot_id_list))
-        
-        # Count total para paginación
-        count_query = base_query
-        total_count = len(session.exec(count_query).all())
-        total_pages = (total_count + limit - 1) // limit
+        bot_id_list = _parse_bot_ids(bot_ids)
+        if bot_id_list:
+            base_query = base_query.where(TradingOperation.bot_id.in_(bot_id_list))
+        
+        # Query con paginación: keyset si hay cursor, OFFSET si no
+        query = base_query.order_by(TradingOperation.created_at.desc(), TradingOperation.id.desc())
+        if cursor:
+            cursor_created_at, cursor_id = _decode_cursor(cursor)
+            query = query.where(or_(
+                TradingOperation.created_at < cursor_created_at,
+                and_(TradingOperation.created_at == cursor_created_at, TradingOperation.id < cursor_id)
+            ))
+        else:
+            query = query.offset((page - 1) * limit)
+        
+        with get_session() as session:
+            # Count total para paginación
+            total_count = _count(session, base_query) if include_total else None
+            
+            # Una fila extra para saber si hay página siguiente sin contar
+            operations = session.exec(query.limit(limit + 1)).all()
         
-        # Query con paginación
-        query = base_query.order_by(TradingOperation.created_at.desc())
-        offset = (page - 1) * limit
-        query = query.offset(offset).limit(limit)
-        
-        operations = session.exec(query).all()
+        total_pages = (total_count + limit - 1) // limit if total_count is not None else None
+        has_next = len(operations) > limit
+        operations = operations[:limit]
         
         # Formatear para Trading Live Feed
-        feed_data = []
-        for op in operations:
-            # Calcular tiempo relativo
-            time_diff = datetime.utcnow() - op.created_at
-            total_seconds = int(time_diff.total_seconds())
-            
-            if total_seconds < 60:
-                time_ago = f"{total_seconds}s ago"
-            elif total_seconds < 3600:
-                time_ago = f"{total_seconds // 60}m ago"
-            elif total_seconds < 86400:
-                time_ago = f"{total_seconds // 3600}h ago"
-            else:
-                time_ago = f"{total_seconds // 86400}d ago"
-            
-            feed_data.append({
-                "id": op.id,
-                "bot_id": op.bot_id,
-                "symbol": op.symbol,
-                "side": op.side,
-                "quantity": op.quantity,
-                "price": op.price,
-                "pnl": op.pnl,
-                "strategy": op.strategy,
-                "signal": op.signal,
-                "algorithm_used": op.algorithm_used,
-                "confidence": op.confidence,
-                "timestamp": op.created_at.isoformat(),
-                "time_ago": time_ago,
-                "profit": op.pnl > 0
-            })
+        now = datetime.utcnow()
+        feed_data = [_feed_item(op, now) for op in operations]
         
         return {
             "success": True,
@@ -374,15 +407,128 @@ async def get_live_trading_feed(
                 "total_pages": total_pages,
                 "total_count": total_count,
                 "limit": limit,
-                "has_next": page < total_pages,
-                "has_prev": page > 1
+                "has_next": has_next,
+                "has_prev": page > 1 or cursor is not None,
+                "next_cursor": feed_data[-1]["cursor"] if has_next else None
             },
             "time_window_hours": hours
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching live feed: {str(e)}")
 
+# TradingOperation.id es un UUID (sin orden de inserción): el stream relee una ventana
+# de created_at hacia atrás y descarta las ids ya enviadas, de modo que una fila cuyo
+# commit llega tarde respecto a su created_at se emite igualmente
+_STREAM_LOOKBACK = timedelta(seconds=int(os.getenv("TRADING_FEED_STREAM_LOOKBACK_SECONDS", "120")))
+_STREAM_HEARTBEAT_SECONDS = 15
+
+def _stream_query(user_id: int, bot_id_list: List[int], since: datetime):
+    from sqlmodel import select
+    
+    query = select(TradingOperation).where(
+        TradingOperation.user_id == user_id,
+        TradingOperation.created_at >= since
+    )
+    if bot_id_list:
+        query = query.where(TradingOperation.bot_id.in_(bot_id_list))
+    return query
+
+def _fetch_sent_ids(user_id: int, bot_id_list: List[int], after: Tuple[datetime, str]) -> Dict[str, datetime]:
+    """Operaciones hasta el cursor dentro de la ventana: se dan por entregadas al (re)conectar"""
+    from db.database import get_session
+    from sqlmodel import or_, and_
+    
+    after_created_at, after_id = after
+    query = _stream_query(user_id, bot_id_list, after_created_at - _STREAM_LOOKBACK).where(or_(
+        TradingOperation.created_at < after_created_at,
+        and_(TradingOperation.created_at == after_created_at, TradingOperation.id <= after_id)
+    ))
+    with get_session() as session:
+        rows = session.execute(query.with_only_columns(TradingOperation.id, TradingOperation.created_at)).all()
+    return {op_id: created_at for op_id, created_at in rows}
+
+def _fetch_new_operations(user_id: int, bot_id_list: List[int], since: datetime,
+                          sent: Dict[str, datetime], batch: int = 200):
+    """Operaciones desde `since` aún no enviadas, en orden ascendente"""
+    from db.database import get_session
+    
+    query = _stream_query(user_id, bot_id_list, since)
+    if sent:
+        query = query.where(TradingOperation.id.notin_(list(sent)))
+    query = query.order_by(TradingOperation.created_at, TradingOperation.id).limit(batch)
+    
+    with get_session() as session:
+        operations = session.exec(query).all()
+        session.expunge_all()
+    return operations
+
+def _heartbeat_item(now: datetime) -> dict:
+    return {"type": "heartbeat", "timestamp": now.isoformat()}
+
+@router.get("/api/trading-feed/stream")
+async def stream_trading_feed(
+    request: Request,
+    stream_format: str = Query("sse", alias="format", pattern="^(sse|ndjson)$"),
+    bot_ids: Optional[str] = Query(None),  # Comma-separated bot IDs
+    cursor: Optional[str] = Query(None),  # Reanudar tras esta operación (default: desde ahora)
+    poll_interval: float = Query(1.0, ge=0.25, le=30),
+    authorization: str = Header(None)
+):
+    """
+    📡 Feed en streaming de operaciones nuevas (SSE o NDJSON)
+    
+    Cada evento lleva el cursor keyset de la operación; en SSE va como `id:` para
+    que EventSource reanude con Last-Event-ID tras reconectar. Sin actividad se envía
+    un registro `{"type": "heartbeat"}` (evento `heartbeat` en SSE).
+    """
+    from services.auth_service import get_current_user_safe
+    
+    # DL-003 COMPLIANT: Authentication via dependency function
+    current_user = await get_current_user_safe(authorization)
+    bot_id_list = _parse_bot_ids(bot_ids)
+    
+    resume_cursor = cursor or request.headers.get("last-event-id")
+    after = _decode_cursor(resume_cursor) if resume_cursor else (datetime.utcnow(), "")
+    
+    async def event_stream():
+        sent = await asyncio.to_thread(_fetch_sent_ids, current_user.id, bot_id_list, after)
+        newest = after[0]
+        idle_seconds = 0.0
+        while not await request.is_disconnected():
+            since = newest - _STREAM_LOOKBACK
+            operations = await asyncio.to_thread(_fetch_new_operations, current_user.id, bot_id_list, since, sent)
+            now = datetime.utcnow()
+            for op in operations:
+                item = _feed_item(op, now)
+                if stream_format == "sse":
+                    yield f"id: {item['cursor']}\nevent: operation\ndata: {json.dumps(item)}\n\n"
+                else:
+                    yield json.dumps(item) + "\n"
+                sent[op.id] = op.created_at
+                newest = max(newest, op.created_at)
+            if operations:
+                idle_seconds = 0.0
+                continue  # Puede haber más pendientes del mismo lote
+            
+            # Olvidar ids que ya quedan fuera de la ventana releída
+            since = newest - _STREAM_LOOKBACK
+            for op_id in [op_id for op_id, created_at in sent.items() if created_at < since]:
+                del sent[op_id]
+            
+            idle_seconds += poll_interval
+            if idle_seconds >= _STREAM_HEARTBEAT_SECONDS:
+                heartbeat = json.dumps(_heartbeat_item(now))
+                yield f"event: heartbeat\ndata: {heartbeat}\n\n" if stream_format == "sse" else heartbeat + "\n"
+                idle_seconds = 0.0
+            await asyncio.sleep(poll_interval)
+    
+    media_type = "text/event-stream" if stream_format == "sse" else "application/x-ndjson"
+    return StreamingResponse(event_stream(), media_type=media_type,
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 @router.delete("/api/trading-operations/{trade_id}")
 async def delete_trading_operation(
     trade_id: str,
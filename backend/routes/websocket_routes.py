@@ -14,6 +14,8 @@ from datetime import datetime
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, HTTPException, Query, Depends, Header
 from fastapi.responses import JSONResponse
 
+from utils.websocket_fanout import FanoutHub
+
 # Lazy imports to avoid psycopg2 dependency at module level
 
 # Configurar logging
@@ -31,56 +33,51 @@ class WebSocketConnectionManager:
     
     def __init__(self):
         self.active_connections: Dict[str, WebSocket] = {}
-        self.user_subscriptions: Dict[str, Set[str]] = {}  # client_id -> symbols
+        # Difusión con índice símbolo -> clientes y colas de envío acotadas por cliente
+        self.fanout = FanoutHub(on_client_error=self.disconnect)
+        self.user_subscriptions: Dict[str, Set[str]] = self.fanout.client_symbols  # client_id -> symbols
         
     async def connect(self, websocket: WebSocket, client_id: str):
         """Conectar nuevo cliente WebSocket"""
         await websocket.accept()
         self.active_connections[client_id] = websocket
-        self.user_subscriptions[client_id] = set()
+        self.fanout.register(client_id, websocket.send_text)
         logger.info(f"✅ Cliente WebSocket conectado: {client_id}")
 
     def disconnect(self, client_id: str):
         """Desconectar cliente WebSocket"""
         if client_id in self.active_connections:
             del self.active_connections[client_id]
-        if client_id in self.user_subscriptions:
-            del self.user_subscriptions[client_id]
+        self.fanout.unregister(client_id)
         logger.info(f"🔌 Cliente WebSocket desconectado: {client_id}")
 
+    def subscribe(self, client_id: str, symbol: str):
+        """Suscribir cliente a un símbolo (mantiene el índice invertido)"""
+        self.fanout.subscribe(client_id, symbol)
+
+    def unsubscribe(self, client_id: str, symbol: str):
+        """Desuscribir cliente de un símbolo"""
+        self.fanout.unsubscribe(client_id, symbol)
+
     async def send_personal_message(self, message: dict, client_id: str):
-        """Enviar mensaje a cliente específico"""
-        if client_id in self.active_connections:
-            try:
-                websocket = self.active_connections[client_id]
-                await websocket.send_text(json.dumps(message))
-            except Exception as e:
-                logger.error(f"❌ Error enviando mensaje a {client_id}: {e}")
-                self.disconnect(client_id)
+        """Enviar mensaje a cliente específico (misma cola que los broadcasts, orden preservado)"""
+        if not self.fanout.send_to(client_id, message):
+            logger.debug(f"Cliente {client_id} no conectado, mensaje descartado")
 
-    async def broadcast_to_subscribers(self, message: dict, symbol: str):
-        """Broadcast a clientes suscritos a un símbolo"""
-        disconnected_clients = []
-        
-        for client_id, symbols in self.user_subscriptions.items():
-            if symbol in symbols and client_id in self.active_connections:
-                try:
-                    websocket = self.active_connections[client_id]
-                    await websocket.send_text(json.dumps(message))
-                except Exception as e:
-                    logger.error(f"❌ Error en broadcast a {client_id}: {e}")
-                    disconnected_clients.append(client_id)
-        
-        # Limpiar clientes desconectados
-        for client_id in disconnected_clients:
-            self.disconnect(client_id)
+    async def broadcast_to_subscribers(self, message: dict, symbol: str, conflate: bool = False) -> int:
+        """
+        Broadcast a clientes suscritos a un símbolo: serializa una vez y encola sin esperar envíos.
+        conflate=True conserva solo el último mensaje pendiente por (tipo, símbolo) en cada cliente.
+        """
+        return self.fanout.publish(symbol, message, conflate=conflate)
 
     def get_stats(self) -> Dict:
         """Obtener estadísticas de conexiones"""
         return {
             'total_connections': len(self.active_connections),
             'total_subscriptions': sum(len(subs) for subs in self.user_subscriptions.values()),
-            'clients': list(self.active_connections.keys())
+            'clients': list(self.active_connections.keys()),
+            'fanout': self.fanout.get_stats()
         }
 
 # Instancia global del manager
@@ -209,7 +206,7 @@ async def websocket_realtime_endpoint(websocket: WebSocket, client_id: str):
             
             if action == "subscribe" and symbol and is_authenticated:
                 # Suscribir cliente al símbolo
-                connection_manager.user_subscriptions[client_id].add(symbol)
+                connection_manager.subscribe(client_id, symbol)
                 
                 # Suscribir al realtime manager usando configuración del usuario
                 success = await realtime_manager.subscribe_symbol_for_user(
@@ -246,8 +243,7 @@ async def websocket_realtime_endpoint(websocket: WebSocket, client_id: str):
             
             elif action == "unsubscribe" and symbol:
                 # Desuscribir cliente del símbolo
-                if client_id in connection_manager.user_subscriptions:
-                    connection_manager.user_subscriptions[client_id].discard(symbol)
+                connection_manager.unsubscribe(client_id, symbol)
                 
                 await connection_manager.send_personal_message({
                     "type": "unsubscription_confirmed",
@@ -290,6 +286,9 @@ async def websocket_realtime_endpoint(websocket: WebSocket, client_id: str):
         logger.error(f"❌ Error WebSocket {client_id}: {e}")
     finally:
         connection_manager.disconnect(client_id)
+        if realtime_manager is not None:
+            # Liberar referencias del usuario sobre los streams compartidos de Binance
+            await realtime_manager.release_client(user_id, client_id)
         if session:
             session.close()
 
@@ -393,12 +392,10 @@ async def start_realtime_distribution():
         # ✅ GUARDRAILS P3: Enhanced realtime distribution with automatic callbacks
         # Implementing automatic data distribution with <50ms latency requirement
         
-        # Configure callback for automatic data distribution
+        # Push-driven distribution: upstream kline ticks mark symbols dirty and a
+        # coalescing scheduler delivers only changed symbols (WS_MAX_PUSH_HZ)
         await realtime_manager.set_data_callback(distribute_market_data_to_clients)
         
-        # Start background price streaming with performance optimization
-        asyncio.create_task(continuous_price_streaming(realtime_manager))
-        
         # Iniciar limpieza periódica
         asyncio.create_task(realtime_manager.start_periodic_cleanup())
         
@@ -421,61 +418,14 @@ async def distribute_market_data_to_clients(symbol: str, market_data: dict):
             "timestamp": datetime.utcnow().isoformat()
         }
         
-        # Broadcast to subscribed clients with performance optimization
-        tasks = []
-        for client_id, websocket in connection_manager.active_connections.items():
-            if symbol in connection_manager.user_subscriptions.get(client_id, set()):
-                tasks.append(websocket.send_text(json.dumps(message)))
-        
-        # Execute all sends concurrently for minimum latency
-        if tasks:
-            await asyncio.gather(*tasks, return_exceptions=True)
-            logger.debug(f"📡 Market data distributed for {symbol} to {len(tasks)} clients")
+        # Serialize once, enqueue per subscriber; slow clients keep only the latest frame
+        recipients = await connection_manager.broadcast_to_subscribers(message, symbol, conflate=True)
+        if recipients:
+            logger.debug(f"📡 Market data distributed for {symbol} to {recipients} clients")
             
     except Exception as e:
         logger.error(f"❌ Error distributing market data: {e}")
 
-async def continuous_price_streaming(realtime_manager):
-    """Continuous price streaming with performance optimization"""
-    try:
-        logger.info("🚀 Starting continuous price streaming...")
-        
-        while True:
-            # Get all subscribed symbols from active connections
-            all_symbols = set()
-            for symbols in connection_manager.user_subscriptions.values():
-                all_symbols.update(symbols)
-            
-            if not all_symbols:
-                await asyncio.sleep(1)  # No active subscriptions
-                continue
-            
-            # Fetch data for all symbols concurrently
-            tasks = []
-            for symbol in all_symbols:
-                tasks.append(realtime_manager.get_symbol_data(symbol))
-            
-            # Execute with timeout for guaranteed <50ms response
-            try:
-                results = await asyncio.wait_for(
-                    asyncio.gather(*tasks, return_exceptions=True),
-                    timeout=0.045  # 45ms max for data fetch
-                )
-                
-                # Distribute results
-                for symbol, data in zip(all_symbols, results):
-                    if isinstance(data, dict) and data.get("success"):
-                        await distribute_market_data_to_clients(symbol, data)
-                        
-            except asyncio.TimeoutError:
-                logger.warning("⏱️ Price streaming timeout - optimizing next cycle")
-            
-            # Optimal refresh rate for 60fps frontend updates
-            await asyncio.sleep(0.0167)  # ~60 FPS (16.7ms intervals)
-            
-    except Exception as e:
-        logger.error(f"❌ Continuous streaming error: {e}")
-
 # Inicializar distribución de forma diferida (no al importar módulo)
 def initialize_realtime_distribution():
     """Initialize realtime distribution when needed"""
@@ -15,6 +15,7 @@ import logging
 from models.user import User, UserSession, UserCreate, UserLogin
 from db.database import get_session
 from services.encryption_service import encryption_service
+from services.principal_cache import principal_cache, token_digest
 
 logger = logging.getLogger(__name__)
 
@@ -246,6 +247,7 @@ class AuthService:
         session.add(user)
         session.commit()
         session.refresh(user)
+        principal_cache.invalidate_user(user.id)
         
         logger.info(f"API keys updated for user: {user.email}")
         return user
@@ -298,32 +300,62 @@ class AuthService:
             )
         
         return authorization.split(" ")[1]
+    
+    def revoke_token(self, token: str):
+        """
+        Revocar token (logout): se rechaza en este proceso hasta su expiración.
+        """
+        token_data = self.verify_jwt_token(token)
+        principal_cache.revoke(token_digest(token), token_data.get("exp"))
+        logger.info(f"Token revoked for user_id: {token_data['user_id']}")
 
 
 # Instancia global del servicio
 auth_service = AuthService()
 
-# Dependency para obtener usuario actual
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    session: Session = Depends(get_session)
-) -> User:
+def _authenticate_token(token: str, session: Optional[Session] = None) -> User:
     """
-    Dependency para obtener usuario autenticado actual.
-    Verifica token JWT y retorna usuario.
+    Resolver el usuario de un token: caché por hash de token o jwt.decode + lookup.
+    Sin sesión explícita se abre una y se cierra al terminar (conexión devuelta al pool).
     """
-    token = credentials.credentials
+    digest = token_digest(token)
+    if principal_cache.is_revoked(digest):
+        raise AuthenticationError(
+            "Token has been revoked",
+            details={"error_type": "revoked_token"}
+        )
+    
+    cached = principal_cache.get(digest)
+    if cached is not None:
+        return cached[0]
+    
     token_data = auth_service.verify_jwt_token(token)
+    if session is not None:
+        user = auth_service.get_user_by_id(token_data["user_id"], session)
+    else:
+        with get_session() as own_session:
+            user = auth_service.get_user_by_id(token_data["user_id"], own_session)
     
-    user = auth_service.get_user_by_id(token_data["user_id"], session)
     if not user or not user.is_active:
         raise AuthenticationError(
             "User not found or inactive",
             details={"user_exists": user is not None, "user_active": user.is_active if user else False}
         )
     
+    principal_cache.put(digest, user, token_data)
     return user
 
+# Dependency para obtener usuario actual
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    session: Session = Depends(get_session)
+) -> User:
+    """
+    Dependency para obtener usuario autenticado actual.
+    Verifica token JWT y retorna usuario.
+    """
+    return _authenticate_token(credentials.credentials, session)
+
 # DL-003 COMPLIANT: Dependency with lazy imports inside function
 async def get_current_user_safe(authorization: str = None) -> User:
     """
@@ -332,7 +364,6 @@ async def get_current_user_safe(authorization: str = None) -> User:
     """
     # DL-003: Lazy imports to avoid psycopg2 dependency at module level
     from fastapi import HTTPException, status
-    from db.database import get_session
     
     if not authorization:
         raise AuthenticationError(
@@ -342,19 +373,9 @@ async def get_current_user_safe(authorization: str = None) -> User:
     
     try:
         token = auth_service.get_token_from_header(authorization)
-        token_data = auth_service.verify_jwt_token(token)
-        
-        # Get database session and user
-        session = get_session()
-        current_user = auth_service.get_user_by_id(token_data["user_id"], session)
-        
-        if not current_user or not current_user.is_active:
-            raise AuthenticationError(
-                "User not found or inactive",
-                details={"user_exists": current_user is not None, "user_active": current_user.is_active if current_user else False}
-            )
         
-        return current_user
+        # Usuario cacheado por hash de token o verificación JWT + lookup con sesión cerrada al salir
+        return _authenticate_token(token)
         
     except AuthenticationError:
         raise
@@ -402,6 +423,7 @@ def verify_email_token(self, token: str, session: Session) -> User:
     session.add(user)
     session.commit()
     session.refresh(user)
+    principal_cache.invalidate_user(user.id)
     
     logger.info(f"User email verified: {user.email}")
     return user
@@ -503,6 +525,7 @@ def reset_password(self, token: str, new_password: str, session: Session) -> Use
     session.add(user)
     session.commit()
     session.refresh(user)
+    principal_cache.invalidate_user(user.id)
     
     logger.info(f"Password reset completed for: {user.email}")
     return user
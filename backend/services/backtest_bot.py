@@ -1,83 +1,109 @@
+from typing import Optional
+
+import numpy as np
 import pandas as pd
 from analytics.strategy_evaluator import StrategyEvaluator
 from services.db_logger import TradeLogger
 import plotly.graph_objects as go
 import plotly.io as pio
 
+def signal_codes(signals) -> np.ndarray:
+    """Columna de señales LONG/SHORT/None -> códigos int8 (1 / -1 / 0)"""
+    values = np.asarray(signals, dtype=object)
+    return np.select([values == "LONG", values == "SHORT"], [1, -1], default=0).astype(np.int8)
+
+
+def simulate_signal_trades(codes: np.ndarray):
+    """
+    Máquina de estados de run_backtest en operaciones de array, sobre rachas de señal.
+
+    Sin posición se entra en la primera vela con señal; se sale al cierre de la primera
+    vela cuya señal difiere de la de entrada (incluida sin señal) y esa vela no reabre.
+    Una racha de señal de longitud >= 2 siempre termina con posición abierta; las de
+    longitud 1 pegadas a una salida alternan abierta/cerrada desde la última racha determinada.
+    Devuelve (velas de entrada, velas de salida, dirección) de los trades cerrados.
+    """
+    codes = np.asarray(codes, dtype=np.int8)
+    n = codes.size
+    if n == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int8)
+
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    values = codes[starts]
+    lengths = np.diff(np.r_[starts, n])
+    run_ids = np.arange(starts.size)
+
+    determined = (values == 0) | (lengths >= 2)
+    last_determined = np.maximum.accumulate(np.where(determined, run_ids, -1))
+    prior_open = np.zeros(starts.size, dtype=bool)
+    has_prior = last_determined >= 0
+    prior_open[has_prior] = values[last_determined[has_prior]] != 0
+    first_in_chain = (run_ids - last_determined - 1) % 2 == 0
+    is_open = np.where(determined, values != 0, prior_open ^ first_in_chain)
+
+    # La racha que sigue a una salida solo puede abrir desde su segunda vela
+    previous_open = np.r_[False, is_open[:-1]]
+    trade_runs = np.flatnonzero(is_open[:-1])  # la última racha no llega a cerrarse
+    entry_bars = starts[trade_runs] + previous_open[trade_runs]
+    exit_bars = starts[trade_runs + 1]
+    return entry_bars, exit_bars, values[trade_runs]
+
+
 # ✅ Clase principal de Backtest
 class BacktestBot:
-    def __init__(self, df: pd.DataFrame, symbol: str, capital: float = 1000.0):
+    def __init__(self, df: pd.DataFrame, symbol: str, capital: float = 1000.0,
+                 logger: Optional[TradeLogger] = None):
         self.df = df.copy()
         self.symbol = symbol
         self.capital = capital
-        self.logger = TradeLogger()
+        self.logger = logger or TradeLogger()
         self.trades = []
+        self.trade_bars = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64))
 
-    # 🧠 Simulación real usando lógica de señales técnicas
-    def run_backtest(self):
+    # 🧠 Simulación real usando lógica de señales técnicas (motor columnar)
+    def run_backtest(self, persist: bool = True):
         evaluator = StrategyEvaluator(self.df)
         df_with_signals = evaluator.generate_signals_per_row()
 
-        position = None
-        entry_type = None
-
-        for i, row in df_with_signals.iterrows():
-            signal = row["signal"]
-            close_price = row["close"]
-
-            if signal == "LONG" and position is None:
-                position = {"entry_price": close_price, "entry_index": i}
-                entry_type = "LONG"
-                print(f"[ENTRY] LONG at {close_price} | index {i}")
-
-            elif signal == "SHORT" and position is None:
-                position = {"entry_price": close_price, "entry_index": i}
-                entry_type = "SHORT"
-                print(f"[ENTRY] SHORT at {close_price} | index {i}")
-
-            elif signal != entry_type and position is not None:
-                exit_price = close_price
-                if entry_type == "LONG":
-                    profit = exit_price - position["entry_price"]
-                elif entry_type == "SHORT":
-                    profit = position["entry_price"] - exit_price
-
-                self.logger.log_trade(self.symbol, entry_type, position["entry_price"], exit_price)
-                self.trades.append({
-                    "symbol": self.symbol,
-                    "direction": entry_type,
-                    "entry": position["entry_price"],
-                    "exit": exit_price,
-                    "profit": profit
-                })
-                print(f"[EXIT] {entry_type} at {exit_price} | Profit: {profit:.2f} | index {i}")
-                position = None
-                entry_type = None
+        close = df_with_signals["close"].to_numpy(dtype=float)
+        entry_bars, exit_bars, directions = simulate_signal_trades(signal_codes(df_with_signals["signal"]))
+        entry_prices = close[entry_bars]
+        exit_prices = close[exit_bars]
+        profits = np.where(directions == 1, exit_prices - entry_prices, entry_prices - exit_prices)
+
+        self.trade_bars = (entry_bars, exit_bars)
+        self.trades = [
+            {
+                "symbol": self.symbol,
+                "direction": "LONG" if direction == 1 else "SHORT",
+                "entry": entry,
+                "exit": exit_price,
+                "profit": profit
+            }
+            for direction, entry, exit_price, profit in zip(
+                directions.tolist(), entry_prices.tolist(), exit_prices.tolist(), profits.tolist()
+            )
+        ]
+
+        # Persistencia en lote al final (una transacción en lugar de un commit por trade)
+        if persist and self.trades:
+            self.logger.log_trades(self.trades)
+        print(f"[BACKTEST] {self.symbol}: {len(self.trades)} trades en {len(close)} velas")
 
         return self.trades
 
     # 📊 Resumen de rendimiento con métricas clave
     def summary(self):
         profits = [t["profit"] for t in self.trades]
+        returns_array = np.asarray(profits, dtype=float)
         total_trades = len(profits)
         total_profit = sum(profits)
         avg_profit = total_profit / total_trades if total_trades > 0 else 0
-        win_trades = [p for p in profits if p > 0]
-        lose_trades = [p for p in profits if p <= 0]
-        win_rate = len(win_trades) / total_trades * 100 if total_trades > 0 else 0
-
-        # 📉 Max Drawdown
-        equity_curve = [0]
-        for p in profits:
-            equity_curve.append(equity_curve[-1] + p)
-        peak = equity_curve[0]
-        drawdowns = []
-        for value in equity_curve:
-            if value > peak:
-                peak = value
-            drawdown = peak - value
-            drawdowns.append(drawdown)
-        max_drawdown = max(drawdowns) if drawdowns else 0
+        win_rate = int(np.count_nonzero(returns_array > 0)) / total_trades * 100 if total_trades > 0 else 0
+
+        # 📉 Max Drawdown (curva de equity desde 0)
+        equity_curve = np.concatenate(([0.0], np.cumsum(returns_array)))
+        max_drawdown = float(np.max(np.maximum.accumulate(equity_curve) - equity_curve))
 
         # 📈 Sharpe Ratio (anualizado, sin riesgo libre)
         if total_trades > 1:
@@ -115,12 +141,10 @@ class BacktestBot:
             line=dict(color="gray", width=1)
         ))
 
-        for trade in self.trades:
-            entry_index = self.df[self.df["close"] == trade["entry"]].index[0]
-            exit_index = self.df[self.df["close"] == trade["exit"]].index[0]
-
-            entry_time = self.df.loc[entry_index, "timestamp"]
-            exit_time = self.df.loc[exit_index, "timestamp"]
+        timestamps = self.df["timestamp"].to_numpy()
+        for trade, entry_bar, exit_bar in zip(self.trades, *self.trade_bars):
+            entry_time = timestamps[entry_bar]
+            exit_time = timestamps[exit_bar]
 
             color = "green" if trade["direction"] == "LONG" else "red"
 
@@ -163,37 +187,68 @@ class BacktestBot:
         else:
             fig.show()
 
-# ✅ Función auxiliar externa (usada en endpoint o pruebas)
-def run_backtest_and_plot(symbol: str):
-    # ✅ Intenta cargar datos específicos del símbolo, con fallback a BTCUSDT
-    symbol_file = f"data/{symbol.lower().replace('/', '_')}_15m.csv"
-    fallback_file = "data/btcusdt_15m.csv"
-    
+# 🗄️ Velas de backtest: histórico local (CandleStore) y, si no hay, CSV del símbolo o de BTCUSDT
+def load_backtest_candles(symbol: str, interval: str = "15m", start=None, end=None,
+                          verbose: bool = False, fallback: bool = True) -> pd.DataFrame:
+    """
+    Velas del histórico local si cubre [start, end]; si no, data/<symbol>_<interval>.csv
+    recortado a [start, end] (FileNotFoundError si no queda ninguna vela).
+    Con fallback=True (backtests de ejemplo) se recurre a los datos de BTCUSDT cuando el
+    símbolo no tiene CSV propio; con fallback=False se lanza FileNotFoundError.
+    """
+    from services.candle_store import get_candle_store
+
+    # El histórico local solo se usa si cubre el rango completo (sin huecos)
+    store = get_candle_store()
+    store_symbol = symbol.replace('/', '')
+    df = store.load_frame(store_symbol, interval, start, end)
+    if len(df) and not store.gaps(store_symbol, interval, start, end):
+        if verbose:
+            print(f"✅ Usando histórico local de {symbol} {interval} ({len(df)} velas)")
+        return df
+
+    symbol_file = f"data/{symbol.lower().replace('/', '_')}_{interval}.csv"
+    fallback_file = f"data/btcusdt_{interval}.csv"
     try:
         df = pd.read_csv(symbol_file)
-        print(f"✅ Usando datos específicos para {symbol}")
+        if verbose:
+            print(f"✅ Usando datos específicos para {symbol}")
     except FileNotFoundError:
+        if not fallback:
+            raise FileNotFoundError(f"No se encontraron datos para {symbol} {interval}")
         try:
             df = pd.read_csv(fallback_file)
-            print(f"⚠️ Archivo {symbol_file} no encontrado. Usando datos de BTCUSDT como ejemplo para {symbol}")
+            if verbose:
+                print(f"⚠️ Archivo {symbol_file} no encontrado. Usando datos de BTCUSDT como ejemplo para {symbol}")
         except FileNotFoundError:
             raise FileNotFoundError(f"No se encontraron datos para {symbol} ni datos de fallback")
-    
+
+    # El CSV es el fichero completo: recortarlo al rango pedido como el histórico local
+    if start is not None or end is not None:
+        from services.candle_store import to_ms
+        if "timestamp" not in df.columns:
+            raise FileNotFoundError(f"Datos de {symbol} {interval} sin timestamp para filtrar por rango")
+        open_ms = pd.to_datetime(df["timestamp"]).astype("datetime64[ms]").astype("int64")
+        in_range = pd.Series(True, index=df.index)
+        if start is not None:
+            in_range &= open_ms >= to_ms(start)
+        if end is not None:
+            in_range &= open_ms <= to_ms(end)
+        df = df[in_range].reset_index(drop=True)
+        if df.empty:
+            raise FileNotFoundError(f"No hay velas de {symbol} {interval} entre {start} y {end}")
+    return df
+
+# ✅ Función auxiliar externa (usada en endpoint o pruebas)
+def run_backtest_and_plot(symbol: str):
+    df = load_backtest_candles(symbol, verbose=True)
     bot = BacktestBot(df, symbol=symbol, capital=1000.0)
     bot.run_backtest()
     return bot.plot_trades(return_html=True)
 
 # ✅ Nueva función: ejecución con lógica real (puntos de entrada/salida)
 def run_backtest_and_extract_trades(symbol: str):
-    # ✅ Intenta cargar datos específicos del símbolo, con fallback a BTCUSDT
-    symbol_file = f"data/{symbol.lower().replace('/', '_')}_15m.csv"
-    fallback_file = "data/btcusdt_15m.csv"
-    
-    try:
-        df = pd.read_csv(symbol_file)
-    except FileNotFoundError:
-        df = pd.read_csv(fallback_file)
-    
+    df = load_backtest_candles(symbol)
     bot = BacktestBot(df, symbol=symbol, capital=1000.0)
     trades = bot.run_backtest()
     return trades
@@ -212,4 +267,107 @@ def save_summary_report(self, output_dir="logs"):
     with open(filename, "w") as f:
         json.dump(summary_data, f, indent=4)
 
-    print(f"✅ Resumen guardado en: {filename}")
\ No newline at end of file
+    print(f"✅ Resumen guardado en: {filename}")
+
+
+# =================================================================
+# TESTING & BENCHMARK
+# =================================================================
+
+def _legacy_signal_trades(signals, close):
+    """Réplica del bucle iterrows previo (sin prints ni SQLite) como referencia"""
+    trades = []
+    position = None
+    entry_type = None
+    for signal, close_price in zip(signals, close):
+        if signal == "LONG" and position is None:
+            position, entry_type = close_price, "LONG"
+        elif signal == "SHORT" and position is None:
+            position, entry_type = close_price, "SHORT"
+        elif signal != entry_type and position is not None:
+            profit = close_price - position if entry_type == "LONG" else position - close_price
+            trades.append((entry_type, position, close_price, profit))
+            position = None
+            entry_type = None
+    return trades
+
+
+def _synthetic_candles(n_bars: int, seed: int = 7) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, n_bars)))
+    return pd.DataFrame({
+        "timestamp": pd.date_range("2024-01-01", periods=n_bars, freq="1min"),
+        "open": close,
+        "high": close * 1.001,
+        "low": close * 0.999,
+        "close": close,
+        "volume": rng.uniform(1, 10, n_bars)
+    })
+
+
+def test_backtest_engine():
+    """El motor columnar reproduce trade a trade el bucle previo"""
+    import tempfile
+    print("🧪 Testing columnar backtest engine...")
+
+    # Señales aleatorias con muchas rachas de una vela (caso de salida + reentrada)
+    rng = np.random.default_rng(11)
+    for _ in range(200):
+        n = int(rng.integers(0, 60))
+        signals = rng.choice(np.array(["LONG", "SHORT", None], dtype=object), size=n)
+        close = rng.uniform(90, 110, n)
+        entry_bars, exit_bars, directions = simulate_signal_trades(signal_codes(signals))
+        columnar = [
+            ("LONG" if d == 1 else "SHORT", close[e], close[x],
+             close[x] - close[e] if d == 1 else close[e] - close[x])
+            for d, e, x in zip(directions, entry_bars, exit_bars)
+        ]
+        assert columnar == _legacy_signal_trades(signals, close)
+
+    # Pipeline completo: señales RSI, métricas y persistencia en lote
+    with tempfile.TemporaryDirectory() as tmp:
+        logger = TradeLogger(db_path=f"{tmp}/trades.db")
+        bot = BacktestBot(_synthetic_candles(5000), symbol="BTCUSDT", logger=logger)
+        trades = bot.run_backtest()
+        df_with_signals = StrategyEvaluator(bot.df).generate_signals_per_row()
+        legacy = _legacy_signal_trades(df_with_signals["signal"], df_with_signals["close"].to_numpy())
+        assert [(t["direction"], t["entry"], t["exit"], t["profit"]) for t in trades] == legacy
+        assert len(logger.get_all_trades()) == len(trades)
+        print(f"📊 Summary: {bot.summary()}")
+
+    print("✅ Columnar backtest engine test completed")
+
+
+def benchmark_backtest(n_bars: int = 525_600, legacy_bars: int = 20_000):
+    """Un año de velas 1m por símbolo con el motor columnar frente al bucle previo"""
+    import contextlib
+    import io
+    import tempfile
+    import time
+
+    print(f"🧪 Backtest benchmark: {n_bars} velas (legacy medido sobre {legacy_bars})")
+    with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+        logger = TradeLogger(db_path=f"{tmp}/trades.db")
+
+        # Legacy: iterrows + un INSERT/commit por trade
+        df = StrategyEvaluator(_synthetic_candles(legacy_bars)).generate_signals_per_row()
+        start = time.perf_counter()
+        for trade in _legacy_signal_trades((row["signal"] for _, row in df.iterrows()), df["close"]):
+            logger.log_trade("BTCUSDT", trade[0], trade[1], trade[2])
+        legacy_seconds = (time.perf_counter() - start) * n_bars / legacy_bars
+
+        bot = BacktestBot(_synthetic_candles(n_bars), symbol="BTCUSDT", logger=logger)
+        start = time.perf_counter()
+        bot.run_backtest()
+        summary = bot.summary()
+        columnar_seconds = time.perf_counter() - start
+
+    print(f"   legacy (extrapolado): {legacy_seconds:8.2f} s")
+    print(f"   columnar (señales + trades + persistencia + summary): {columnar_seconds:8.2f} s "
+          f"| {summary['total_trades']} trades")
+    return {"legacy_seconds": legacy_seconds, "columnar_seconds": columnar_seconds, "summary": summary}
+
+
+if __name__ == "__main__":
+    test_backtest_engine()
+    benchmark_backtest()
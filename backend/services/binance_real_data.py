@@ -7,7 +7,6 @@ Eduard Guzmán - InteliBotX
 """
 
 import asyncio
-import httpx
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
@@ -23,6 +22,10 @@ from services.ta_alternative import (
     calculate_atr, detect_volume_spike, calculate_volume_sma
 )
 
+# Cache de klines compartido por todo el proceso
+from services.market_data_cache import market_data_cache
+from utils.http_client_pool import HttpClientPool, http_client_pool
+
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -66,14 +69,14 @@ class TechnicalIndicators:
 class BinanceRealDataService:
     """Servicio principal para datos reales de Binance"""
     
-    def __init__(self, use_testnet: bool = True):
+    def __init__(self, use_testnet: bool = True, http_pool: Optional[HttpClientPool] = None):
         self.use_testnet = use_testnet
+        self.http_pool = http_pool or http_client_pool
         self.base_url = "https://testnet.binance.vision/api/v3" if use_testnet else "https://api.binance.com/api/v3"
         self.websocket_url = "wss://testnet.binance.vision/ws" if use_testnet else "wss://stream.binance.com:9443/ws"
         
-        # Cache para datos históricos (evitar muchas llamadas)
-        self.data_cache = {}
-        self.cache_duration = 30  # segundos
+        # Cache compartido entre instancias (LRU + TTL por vela + single-flight)
+        self.data_cache = market_data_cache
         
         # Límites de rate limiting
         self.request_timestamps = []
@@ -85,7 +88,8 @@ class BinanceRealDataService:
         self, 
         symbol: str, 
         interval: str = '15m', 
-        limit: int = 100
+        limit: int = 100,
+        fallback: bool = True
     ) -> pd.DataFrame:
         """
         Obtener datos OHLCV (klines) reales de Binance
@@ -94,83 +98,97 @@ class BinanceRealDataService:
             symbol: Par de trading (ej: BTCUSDT)
             interval: Timeframe (1m, 5m, 15m, 1h, 4h, 1d)
             limit: Número de velas (máx 1500)
+            fallback: Si es False, propaga el error en lugar de devolver datos simulados
         
         Returns:
             DataFrame con columnas: timestamp, open, high, low, close, volume
         """
         try:
-            # Verificar cache
-            cache_key = f"{symbol}_{interval}_{limit}"
-            if self._is_cache_valid(cache_key):
-                logger.info(f"📋 Usando datos en cache para {symbol} {interval}")
-                return self.data_cache[cache_key]['data']
-
-            # Verificar rate limiting
-            if not self._check_rate_limit():
-                logger.warning("⚠️ Rate limit alcanzado, esperando...")
-                await asyncio.sleep(1)
-
-            # Construir parámetros
-            params = {
-                'symbol': symbol.upper(),
-                'interval': interval,
-                'limit': limit
-            }
+            # Cache compartido: N peticiones concurrentes -> 1 llamada a Binance
+            cache_key = ("testnet" if self.use_testnet else "mainnet", symbol.upper(), interval, limit)
+            df = await self.data_cache.get_or_load(
+                cache_key, interval, lambda: self._fetch_klines(symbol, interval, limit)
+            )
+            # Copia para que los consumidores puedan agregar columnas sin alterar el cache
+            return df.copy()
 
-            logger.info(f"📊 Obteniendo datos reales {symbol} {interval} (últimas {limit} velas)")
+        except Exception as e:
+            logger.error(f"❌ Error obteniendo datos de {symbol}: {e}")
+            if not fallback:
+                raise
+            # Fallback a datos simulados realistas
+            return self._generate_fallback_data(symbol, interval, limit)
 
-            async with httpx.AsyncClient() as client:
-                response = await client.get(f"{self.base_url}/klines", params=params, timeout=10.0)
-                
-                if response.status_code != 200:
-                    logger.error(f"❌ Error Binance API: {response.status_code} - {response.text}")
-                    raise Exception(f"Binance API error: {response.status_code}")
+    async def _fetch_klines(self, symbol: str, interval: str, limit: int) -> pd.DataFrame:
+        """Descargar klines de Binance (sin cache); lanza excepción si falla"""
+        # Verificar rate limiting
+        if not self._check_rate_limit():
+            logger.warning("⚠️ Rate limit alcanzado, esperando...")
+            await asyncio.sleep(1)
 
-                data = response.json()
-                
-                if not data:
-                    logger.error(f"❌ No hay datos para {symbol}")
-                    raise Exception(f"No hay datos disponibles para {symbol}")
+        # Construir parámetros
+        params = {
+            'symbol': symbol.upper(),
+            'interval': interval,
+            'limit': limit
+        }
 
-                # Convertir a DataFrame
-                df = pd.DataFrame(data, columns=[
-                    'timestamp', 'open', 'high', 'low', 'close', 'volume',
-                    'close_time', 'quote_volume', 'count', 'taker_buy_volume', 'taker_buy_quote_volume', 'ignore'
-                ])
+        logger.info(f"📊 Obteniendo datos reales {symbol} {interval} (últimas {limit} velas)")
 
-                # Convertir tipos de datos
-                numeric_columns = ['open', 'high', 'low', 'close', 'volume', 'quote_volume']
-                for col in numeric_columns:
-                    df[col] = pd.to_numeric(df[col], errors='coerce')
+        async with self.http_pool.client() as client:
+            response = await client.get(f"{self.base_url}/klines", params=params, timeout=10.0)
+            
+            if response.status_code != 200:
+                logger.error(f"❌ Error Binance API: {response.status_code} - {response.text}")
+                raise Exception(f"Binance API error: {response.status_code}")
 
-                df['timestamp'] = pd.to_numeric(df['timestamp'])
-                df['close_time'] = pd.to_numeric(df['close_time'])
+            data = response.json()
+            
+            if not data:
+                logger.error(f"❌ No hay datos para {symbol}")
+                raise Exception(f"No hay datos disponibles para {symbol}")
 
-                # Agregar datetime readable
-                df['datetime'] = pd.to_datetime(df['timestamp'], unit='ms')
+            # Convertir a DataFrame
+            df = pd.DataFrame(data, columns=[
+                'timestamp', 'open', 'high', 'low', 'close', 'volume',
+                'close_time', 'quote_volume', 'count', 'taker_buy_volume', 'taker_buy_quote_volume', 'ignore'
+            ])
 
-                # Limpiar columnas innecesarias
-                df = df.drop(['ignore'], axis=1)
+            # Convertir tipos de datos
+            numeric_columns = ['open', 'high', 'low', 'close', 'volume', 'quote_volume']
+            for col in numeric_columns:
+                df[col] = pd.to_numeric(df[col], errors='coerce')
 
-                logger.info(f"✅ Obtenidos {len(df)} registros para {symbol} - Último precio: ${df['close'].iloc[-1]:,.2f}")
+            df['timestamp'] = pd.to_numeric(df['timestamp'])
+            df['close_time'] = pd.to_numeric(df['close_time'])
 
-                # Guardar en cache
-                self.data_cache[cache_key] = {
-                    'data': df,
-                    'timestamp': time.time()
-                }
+            # Agregar datetime readable
+            df['datetime'] = pd.to_datetime(df['timestamp'], unit='ms')
 
-                return df
+            # Limpiar columnas innecesarias
+            df = df.drop(['ignore'], axis=1)
 
-        except Exception as e:
-            logger.error(f"❌ Error obteniendo datos de {symbol}: {e}")
-            # Fallback a datos simulados realistas
-            return self._generate_fallback_data(symbol, interval, limit)
+            logger.info(f"✅ Obtenidos {len(df)} registros para {symbol} - Último precio: ${df['close'].iloc[-1]:,.2f}")
+
+            return df
+
+    async def get_trading_symbols(self, quote_asset: Optional[str] = None) -> List[str]:
+        """Pares spot en estado TRADING (opcionalmente filtrados por quote asset)"""
+        async with self.http_pool.client() as client:
+            response = await client.get(f"{self.base_url}/exchangeInfo", timeout=10.0)
+            response.raise_for_status()
+            exchange_info = response.json()
+
+        return [
+            s["symbol"] for s in exchange_info["symbols"]
+            if s["status"] == "TRADING" and s.get("isSpotTradingAllowed", True)
+            and (quote_asset is None or s.get("quoteAsset") == quote_asset.upper())
+        ]
 
     async def get_current_price(self, symbol: str) -> Dict[str, Any]:
         """Obtener precio actual y estadísticas 24h"""
         try:
-            async with httpx.AsyncClient() as client:
+            async with self.http_pool.client() as client:
                 # Precio actual
                 price_response = await client.get(f"{self.base_url}/ticker/price", 
                                                 params={'symbol': symbol.upper()}, timeout=5.0)
@@ -397,14 +415,6 @@ class BinanceRealDataService:
         self.request_timestamps.append(current_time)
         return True
 
-    def _is_cache_valid(self, cache_key: str) -> bool:
-        """Verificar si datos en cache son válidos"""
-        if cache_key not in self.data_cache:
-            return False
-            
-        cache_age = time.time() - self.data_cache[cache_key]['timestamp']
-        return cache_age < self.cache_duration
-
     def _generate_fallback_data(self, symbol: str, interval: str, limit: int) -> pd.DataFrame:
         """Generar datos fallback realistas cuando Binance no esté disponible"""
         logger.warning(f"🔄 Generando datos fallback para {symbol}")
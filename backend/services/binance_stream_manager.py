@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+🔀 BinanceStreamManager - Conexiones WebSocket multiplexadas (combined streams)
+Muchos streams por socket vía SUBSCRIBE/UNSUBSCRIBE, conteo de referencias entre
+usuarios, reparto en un número fijo de shards y reconexión con resuscripción.
+
+Eduard Guzmán - InteliBotX
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+import os
+import zlib
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Union
+
+import websockets
+
+logger = logging.getLogger(__name__)
+
+# Límites documentados por Binance para combined streams
+MAX_STREAMS_PER_CONNECTION = 1024
+MAX_CONTROL_MESSAGES_PER_SECOND = 5
+MAX_PARAMS_PER_CONTROL_MESSAGE = 200
+
+StreamListener = Callable[[str, Dict[str, Any]], Union[None, Awaitable[None]]]
+ReconnectListener = Callable[[List[str]], Union[None, Awaitable[None]]]
+
+
+class StreamShard:
+    """Un socket combinado de Binance con su conjunto de streams"""
+
+    def __init__(self, manager: "BinanceStreamManager", index: int):
+        self.manager = manager
+        self.index = index
+        self.streams: Set[str] = set()
+        self.websocket = None
+        self.task: Optional[asyncio.Task] = None
+        self.connected = asyncio.Event()
+        self.reconnects = 0
+        self.messages = 0
+        self._pending_subscribe: Set[str] = set()
+        self._pending_unsubscribe: Set[str] = set()
+        self._pending_event = asyncio.Event()
+
+    def start(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+
+    def add(self, stream: str):
+        self.streams.add(stream)
+        self._pending_unsubscribe.discard(stream)
+        self._pending_subscribe.add(stream)
+        self._pending_event.set()
+        self.start()
+
+    def remove(self, stream: str):
+        self.streams.discard(stream)
+        self._pending_subscribe.discard(stream)
+        self._pending_unsubscribe.add(stream)
+        self._pending_event.set()
+
+    async def _run(self):
+        backoff = 1.0
+        first_connection = True
+        while self.manager.is_running:
+            flush_task = None
+            try:
+                async with websockets.connect(self.manager.base_url, ping_interval=20, ping_timeout=20) as websocket:
+                    self.websocket = websocket
+                    self.connected.set()
+                    backoff = 1.0
+
+                    # Resuscribir todo el conjunto del shard (primera conexión o reconexión)
+                    self._pending_unsubscribe.clear()
+                    self._pending_subscribe = set(self.streams)
+                    self._pending_event.set()
+                    flush_task = asyncio.create_task(self._flush_control_messages())
+
+                    if not first_connection:
+                        self.reconnects += 1
+                        logger.info(f"🔁 Shard {self.index} reconectado ({len(self.streams)} streams)")
+                        await self.manager._notify_reconnect(sorted(self.streams))
+                    first_connection = False
+
+                    async for raw in websocket:
+                        self.messages += 1
+                        await self.manager._dispatch(raw)
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"⚠️ Shard {self.index} desconectado: {e}")
+            finally:
+                self.websocket = None
+                self.connected.clear()
+                if flush_task:
+                    flush_task.cancel()
+
+            if self.manager.is_running:
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+
+    async def _flush_control_messages(self):
+        """Enviar SUBSCRIBE/UNSUBSCRIBE agrupados respetando el límite de mensajes por segundo"""
+        interval = 1.0 / (MAX_CONTROL_MESSAGES_PER_SECOND - 1)
+        while True:
+            await self._pending_event.wait()
+            self._pending_event.clear()
+            for method, pending in (("UNSUBSCRIBE", self._pending_unsubscribe), ("SUBSCRIBE", self._pending_subscribe)):
+                while pending and self.websocket is not None:
+                    batch = list(itertools.islice(pending, MAX_PARAMS_PER_CONTROL_MESSAGE))
+                    await self.websocket.send(json.dumps({
+                        "method": method,
+                        "params": batch,
+                        "id": next(self.manager._request_ids)
+                    }))
+                    pending.difference_update(batch)
+                    await asyncio.sleep(interval)
+
+    async def close(self):
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self.task = None
+
+
+class BinanceStreamManager:
+    """
+    Gestor único de streams de mercado de Binance para todo el proceso.
+
+    subscribe(stream, owner) cuenta referencias por owner (usuario/servicio): el stream
+    se suscribe en Binance con el primer owner y se libera al salir el último.
+    Los streams se reparten por hash estable entre `shards` sockets combinados.
+    """
+
+    def __init__(self, use_testnet: bool = True, shards: Optional[int] = None):
+        self.use_testnet = use_testnet
+        self.base_url = "wss://testnet.binance.vision/stream" if use_testnet else "wss://stream.binance.com:9443/stream"
+        self.shard_count = shards or int(os.getenv("BINANCE_WS_SHARDS", "4"))
+        self.shards = [StreamShard(self, index) for index in range(self.shard_count)]
+        self.is_running = True
+
+        self._owners: Dict[str, Set[str]] = {}  # stream -> owners
+        self._stream_shard: Dict[str, StreamShard] = {}
+        self._listeners: List[StreamListener] = []
+        self._reconnect_listeners: List[ReconnectListener] = []
+        self._request_ids = itertools.count(1)
+
+        logger.info(f"✅ BinanceStreamManager {'testnet' if use_testnet else 'mainnet'} ({self.shard_count} shards)")
+
+    def _shard_for(self, stream: str) -> StreamShard:
+        shard = self.shards[zlib.crc32(stream.encode()) % self.shard_count]
+        if len(shard.streams) >= MAX_STREAMS_PER_CONNECTION:
+            shard = min(self.shards, key=lambda candidate: len(candidate.streams))
+        return shard
+
+    async def subscribe(self, stream: str, owner: str = "default") -> bool:
+        """Agregar referencia de `owner` al stream; devuelve True si se abrió en Binance"""
+        owners = self._owners.setdefault(stream, set())
+        is_new = not owners
+        owners.add(owner)
+        if is_new:
+            shard = self._shard_for(stream)
+            self._stream_shard[stream] = shard
+            shard.add(stream)
+            logger.info(f"🔗 Stream {stream} -> shard {shard.index}")
+        return is_new
+
+    async def unsubscribe(self, stream: str, owner: str = "default") -> bool:
+        """Quitar referencia de `owner`; devuelve True si el stream se cerró en Binance"""
+        owners = self._owners.get(stream)
+        if not owners:
+            return False
+        owners.discard(owner)
+        if owners:
+            return False
+        del self._owners[stream]
+        shard = self._stream_shard.pop(stream, None)
+        if shard:
+            shard.remove(stream)
+        logger.info(f"🔌 Stream liberado: {stream}")
+        return True
+
+    async def release_owner(self, owner: str) -> int:
+        """Liberar todas las referencias de un owner (p.ej. usuario desconectado)"""
+        released = 0
+        for stream in [s for s, owners in self._owners.items() if owner in owners]:
+            released += await self.unsubscribe(stream, owner)
+        return released
+
+    def owners_of(self, stream: str) -> Set[str]:
+        return set(self._owners.get(stream, ()))
+
+    def add_listener(self, listener: StreamListener):
+        """Registrar callback(stream, data) para todos los mensajes de datos"""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: StreamListener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def add_reconnect_listener(self, listener: ReconnectListener):
+        """Registrar callback(streams) invocado tras reconectar un shard (backfill de gaps)"""
+        self._reconnect_listeners.append(listener)
+
+    async def _dispatch(self, raw: Union[str, bytes]):
+        message = json.loads(raw)
+        stream = message.get("stream")
+        if stream is None:
+            if message.get("error"):
+                logger.error(f"❌ Binance stream control error: {message['error']}")
+            return
+        data = message.get("data", {})
+        for listener in self._listeners:
+            try:
+                result = listener(stream, data)
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:
+                logger.error(f"❌ Error en listener de {stream}: {e}")
+
+    async def _notify_reconnect(self, streams: List[str]):
+        for listener in self._reconnect_listeners:
+            try:
+                result = listener(streams)
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:
+                logger.error(f"❌ Error en backfill tras reconexión: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "network": "testnet" if self.use_testnet else "mainnet",
+            "streams": len(self._owners),
+            "references": sum(len(owners) for owners in self._owners.values()),
+            "sockets_open": sum(1 for shard in self.shards if shard.connected.is_set()),
+            "shards": [
+                {
+                    "index": shard.index,
+                    "streams": len(shard.streams),
+                    "connected": shard.connected.is_set(),
+                    "reconnects": shard.reconnects,
+                    "messages": shard.messages
+                }
+                for shard in self.shards
+            ]
+        }
+
+    async def close(self):
+        self.is_running = False
+        for shard in self.shards:
+            await shard.close()
+        logger.info("✅ BinanceStreamManager cerrado")
+
+
+# Instancias globales por red (testnet/mainnet)
+_stream_managers: Dict[bool, BinanceStreamManager] = {}
+
+
+def get_binance_stream_manager(use_testnet: bool = True) -> BinanceStreamManager:
+    """Gestor de streams compartido por el proceso para la red indicada"""
+    manager = _stream_managers.get(use_testnet)
+    if manager is None or not manager.is_running:
+        manager = _stream_managers[use_testnet] = BinanceStreamManager(use_testnet=use_testnet)
+    return manager
+
+
+async def close_binance_stream_managers():
+    for manager in list(_stream_managers.values()):
+        await manager.close()
+    _stream_managers.clear()
+
+
+# =================================================================
+# TESTING
+# =================================================================
+
+async def test_binance_stream_manager():
+    """Test contra un servidor local que imita el endpoint combinado de Binance"""
+    print("🧪 Testing BinanceStreamManager...")
+
+    connections = []
+    control_messages = []
+
+    async def fake_binance(websocket, *args):
+        connections.append(websocket)
+        try:
+            async for raw in websocket:
+                request = json.loads(raw)
+                control_messages.append((len(connections), request["method"], sorted(request["params"])))
+                await websocket.send(json.dumps({"result": None, "id": request["id"]}))
+                if request["method"] == "SUBSCRIBE":
+                    for stream in request["params"]:
+                        await websocket.send(json.dumps({"stream": stream, "data": {"e": "kline", "s": stream}}))
+        except websockets.exceptions.ConnectionClosed:
+            pass
+
+    async with websockets.serve(fake_binance, "127.0.0.1", 0) as server:
+        port = server.sockets[0].getsockname()[1]
+        manager = BinanceStreamManager(use_testnet=True, shards=2)
+        manager.base_url = f"ws://127.0.0.1:{port}"
+
+        received = []
+        reconnected = []
+        manager.add_listener(lambda stream, data: received.append(stream))
+        manager.add_reconnect_listener(lambda streams: reconnected.extend(streams))
+
+        # 100 usuarios sobre 3 streams -> 3 streams reales, como máximo 2 sockets
+        streams = ["btcusdt@kline_1m", "ethusdt@kline_1m", "solusdt@kline_5m"]
+        for user in range(100):
+            for stream in streams:
+                await manager.subscribe(stream, owner=f"user:{user}")
+        await asyncio.sleep(0.5)
+
+        stats = manager.get_stats()
+        assert stats["streams"] == 3 and stats["references"] == 300
+        assert len(connections) <= 2
+        assert sorted(set(received)) == streams
+
+        # Liberar 99 referencias no cierra el stream; la última sí
+        for user in range(99):
+            assert not await manager.unsubscribe(streams[0], owner=f"user:{user}")
+        assert await manager.unsubscribe(streams[0], owner="user:99")
+        await asyncio.sleep(0.5)
+        assert any(method == "UNSUBSCRIBE" and params == [streams[0]] for _, method, params in control_messages)
+
+        # Reconexión: el shard vuelve a suscribir sus streams y notifica para backfill
+        before = len(connections)
+        await connections[-1].close()
+        await asyncio.sleep(1.8)
+        assert len(connections) == before + 1
+        assert reconnected and set(reconnected) <= set(streams[1:])
+        assert any(n == before + 1 and method == "SUBSCRIBE" for n, method, _ in control_messages)
+
+        print(f"📊 Stats: {manager.get_stats()}")
+        await manager.close()
+
+    print("✅ BinanceStreamManager test completed")
+
+
+if __name__ == "__main__":
+    asyncio.run(test_binance_stream_manager())
@@ -7,25 +7,26 @@ Eduard Guzmán - InteliBotX
 """
 
 import asyncio
-import json
 import logging
-import websockets
 import numpy as np
 import pandas as pd
-from typing import Dict, List, Any, Optional, Callable
+from typing import Dict, List, Any, Optional, Callable, Set, Tuple
 from datetime import datetime, timedelta
 from dataclasses import dataclass, asdict
 from collections import deque
 import os
 
-# Alternative TA functions (Railway compatible)
-from services.ta_alternative import (
-    calculate_rsi, get_rsi_status, calculate_sma, calculate_ema,
-    calculate_atr, detect_volume_spike, calculate_volume_sma
-)
+# Estado incremental de indicadores por (symbol, interval)
+from services.streaming_indicators import StreamingIndicatorState
+
+# Sockets combinados compartidos y pool HTTP para backfill
+from services.binance_stream_manager import BinanceStreamManager, get_binance_stream_manager
+from services.candle_store import CANDLE_STORE_STREAM_APPEND, CandleStore, get_candle_store
+from utils.http_client_pool import HttpClientPool, http_client_pool
 
 # Smart Scalper Multi-Algorithm Engine
 from services.smart_scalper_algorithms import SmartScalperEngine
+from services.feature_frame import get_feature_frame
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
@@ -74,20 +75,33 @@ class RealtimeTechnicalIndicators:
 class BinanceWebSocketService:
     """Servicio WebSocket para datos en tiempo real de Binance"""
     
-    def __init__(self, use_testnet: bool = True):
+    def __init__(self, use_testnet: bool = True, stream_manager: Optional[BinanceStreamManager] = None,
+                 http_pool: Optional[HttpClientPool] = None):
         self.use_testnet = use_testnet
-        self.base_url = "wss://testnet.binance.vision/ws/" if use_testnet else "wss://stream.binance.com:9443/ws/"
+        self.rest_url = "https://testnet.binance.vision" if use_testnet else "https://api.binance.com"
+        
+        # Sockets combinados compartidos por todo el proceso (un gestor por red)
+        self.stream_manager = stream_manager or get_binance_stream_manager(use_testnet)
+        self.stream_manager.add_listener(self._on_stream_message)
+        self.stream_manager.add_reconnect_listener(self._backfill_gaps)
+        self.http_pool = http_pool or http_client_pool
+        
+        # Histórico columnar local: cada vela cerrada se añade al segmento del mes
+        self.candle_store: Optional[CandleStore] = get_candle_store(use_testnet) if CANDLE_STORE_STREAM_APPEND else None
         
         # Almacenar datos históricos para cálculos técnicos
         self.kline_buffers: Dict[str, deque] = {}  # symbol -> deque of klines
         self.buffer_size = 100  # Mantener últimas 100 velas
+        self.indicator_states: Dict[str, StreamingIndicatorState] = {}  # symbol_interval -> estado O(1)
         
         # Callbacks para notificaciones
         self.kline_callbacks: List[Callable] = []
         self.indicator_callbacks: List[Callable] = []
+        self.tick_callbacks: List[Callable] = []  # cada actualización (vela abierta o cerrada)
         
-        # Control de conexiones
-        self.connections: Dict[str, Any] = {}  # stream_name -> websocket
+        # Control de suscripciones: stream_name -> (symbol, interval) y owners de este servicio
+        self.streams: Dict[str, Tuple[str, str]] = {}
+        self.stream_owners: Dict[str, Set[str]] = {}
         self.is_running = False
         
         # Smart Scalper Multi-Algorithm Engine
@@ -96,148 +110,219 @@ class BinanceWebSocketService:
         logger.info(f"✅ BinanceWebSocketService {'testnet' if use_testnet else 'mainnet'} inicializado")
         logger.info("🧠 Smart Scalper Multi-Algoritmo integrado")
 
-    async def subscribe_kline_stream(self, symbol: str, interval: str = "1m") -> str:
+    async def subscribe_kline_stream(self, symbol: str, interval: str = "1m", owner: str = "default") -> str:
         """
         Suscribirse a stream de klines en tiempo real
         
         Args:
             symbol: Par de trading (ej: BTCUSDT)
             interval: Intervalo (1m, 5m, 15m, 1h, etc.)
+            owner: Referencia que mantiene viva la suscripción (usuario, bot...)
             
         Returns:
             Stream name para control de la conexión
         """
         try:
             stream_name = f"{symbol.lower()}@kline_{interval}"
-            url = f"{self.base_url}{stream_name}"
-            
-            logger.info(f"🔗 Conectando WebSocket: {stream_name}")
             
             # Crear buffer para este símbolo si no existe
             buffer_key = f"{symbol}_{interval}"
             if buffer_key not in self.kline_buffers:
                 self.kline_buffers[buffer_key] = deque(maxlen=self.buffer_size)
+            if buffer_key not in self.indicator_states:
+                self.indicator_states[buffer_key] = StreamingIndicatorState(symbol, interval)
             
-            # Conectar WebSocket
-            websocket = await websockets.connect(url)
-            self.connections[stream_name] = websocket
+            # Registrar referencia en el socket combinado (se abre en Binance solo la primera vez)
+            self.streams[stream_name] = (symbol, interval)
+            self.stream_owners.setdefault(stream_name, set()).add(owner)
+            await self.stream_manager.subscribe(stream_name, owner)
+            self.is_running = True
             
-            # Iniciar task para manejar mensajes
-            asyncio.create_task(self._handle_kline_stream(websocket, symbol, interval))
-            
-            logger.info(f"✅ WebSocket conectado: {stream_name}")
+            logger.info(f"✅ Stream suscrito: {stream_name} (owner: {owner})")
             return stream_name
             
         except Exception as e:
-            logger.error(f"❌ Error conectando WebSocket {symbol}: {e}")
+            logger.error(f"❌ Error suscribiendo stream {symbol}: {e}")
             raise
 
-    async def _handle_kline_stream(self, websocket, symbol: str, interval: str):
-        """Manejar mensajes del stream de klines"""
-        buffer_key = f"{symbol}_{interval}"
+    async def _on_stream_message(self, stream_name: str, data: Dict[str, Any]):
+        """Procesar mensaje del socket combinado si corresponde a un stream de este servicio"""
+        subscription = self.streams.get(stream_name)
+        if subscription is None or 'k' not in data:
+            return
+        
+        symbol, interval = subscription
+        kline = self._parse_kline(data['k'])
         
+        # Precio en vivo para distribución push
+        if self.tick_callbacks:
+            await self._notify_tick_callbacks(kline)
+        
+        # Solo procesar velas cerradas para cálculos técnicos
+        if kline.is_closed:
+            if self.candle_store is not None:
+                # Escritura en el hilo del store: el procesado de la vela no espera al disco
+                future = self.candle_store.submit_stream_kline(symbol, interval, data['k'])
+                future.add_done_callback(lambda done: self._log_candle_append_error(stream_name, done))
+            await self._process_closed_kline(symbol, interval, kline)
+
+    @staticmethod
+    def _log_candle_append_error(stream_name: str, future):
+        error = future.exception()
+        if error is not None:
+            logger.warning(f"⚠️ CandleStore append {stream_name}: {error}")
+
+    def _parse_kline(self, kline_data: Dict[str, Any]) -> RealtimeKline:
+        return RealtimeKline(
+            symbol=kline_data['s'],
+            open_time=kline_data['t'],
+            close_time=kline_data['T'],
+            open_price=float(kline_data['o']),
+            high_price=float(kline_data['h']),
+            low_price=float(kline_data['l']),
+            close_price=float(kline_data['c']),
+            volume=float(kline_data['v']),
+            interval=kline_data['i'],
+            is_closed=kline_data['x'],
+            timestamp=datetime.utcnow().isoformat()
+        )
+
+    def _apply_closed_kline(self, symbol: str, interval: str, kline: RealtimeKline) -> bool:
+        """Agregar vela cerrada al buffer y al estado incremental; False si ya se había procesado"""
+        buffer_key = f"{symbol}_{interval}"
+        state = self.indicator_states[buffer_key]
+        if not state.update(kline.high_price, kline.low_price, kline.close_price,
+                            kline.volume, kline.open_time):
+            return False
+        self.kline_buffers[buffer_key].append(kline)
+        return True
+
+    async def _process_closed_kline(self, symbol: str, interval: str, kline: RealtimeKline):
+        """Actualizar indicadores en O(1) y notificar callbacks"""
         try:
-            async for message in websocket:
-                data = json.loads(message)
+            if not self._apply_closed_kline(symbol, interval, kline):
+                return
+            
+            # Calcular indicadores técnicos si tenemos suficientes datos
+            if self.indicator_states[f"{symbol}_{interval}"].is_ready:
+                indicators = await self._calculate_realtime_indicators(symbol, interval)
                 
-                # Extraer datos de kline
-                if 'k' in data:
-                    kline_data = data['k']
-                    
-                    kline = RealtimeKline(
-                        symbol=kline_data['s'],
-                        open_time=kline_data['t'],
-                        close_time=kline_data['T'],
-                        open_price=float(kline_data['o']),
-                        high_price=float(kline_data['h']),
-                        low_price=float(kline_data['l']),
-                        close_price=float(kline_data['c']),
-                        volume=float(kline_data['v']),
-                        interval=kline_data['i'],
-                        is_closed=kline_data['x'],
-                        timestamp=datetime.utcnow().isoformat()
-                    )
-                    
-                    # Solo procesar velas cerradas para cálculos técnicos
-                    if kline.is_closed:
-                        # Agregar al buffer
-                        self.kline_buffers[buffer_key].append(kline)
-                        
-                        # Calcular indicadores técnicos si tenemos suficientes datos
-                        if len(self.kline_buffers[buffer_key]) >= 50:
-                            indicators = await self._calculate_realtime_indicators(symbol, interval)
-                            
-                            # Notificar callbacks
-                            await self._notify_indicator_callbacks(indicators)
-                        
-                        # Notificar callbacks de kline
-                        await self._notify_kline_callbacks(kline)
-                        
-                        logger.debug(f"📊 {symbol} {interval}: {kline.close_price} (Vol: {kline.volume:.0f})")
-                    
-        except websockets.exceptions.ConnectionClosed:
-            logger.warning(f"⚠️ WebSocket desconectado: {symbol} {interval}")
+                # Notificar callbacks
+                await self._notify_indicator_callbacks(indicators)
+            
+            # Notificar callbacks de kline
+            await self._notify_kline_callbacks(kline)
+            
+            logger.debug(f"📊 {symbol} {interval}: {kline.close_price} (Vol: {kline.volume:.0f})")
+            
         except Exception as e:
             logger.error(f"❌ Error en stream {symbol}: {e}")
 
+    async def _backfill_gaps(self, stream_names: List[str]):
+        """
+        Recuperar vía REST las velas cerradas perdidas durante una reconexión.
+        Las velas ya procesadas se descartan por open_time en el estado incremental.
+        """
+        for stream_name in stream_names:
+            subscription = self.streams.get(stream_name)
+            if subscription is None:
+                continue
+            symbol, interval = subscription
+            state = self.indicator_states.get(f"{symbol}_{interval}")
+            if state is None or state.last_open_time is None:
+                continue
+            
+            try:
+                async with self.http_pool.client() as client:
+                    response = await client.get(
+                        f"{self.rest_url}/api/v3/klines",
+                        params={
+                            "symbol": symbol.upper(),
+                            "interval": interval,
+                            "startTime": state.last_open_time + 1,
+                            "limit": 1000
+                        },
+                        timeout=10.0
+                    )
+                    response.raise_for_status()
+                    rows = response.json()
+            except Exception as e:
+                logger.warning(f"⚠️ Backfill fallido {stream_name}: {e}")
+                continue
+            
+            now_ms = int(datetime.utcnow().timestamp() * 1000)
+            closed = [row for row in rows if int(row[6]) < now_ms]
+            applied = 0
+            last_kline = None
+            for row in closed:
+                kline = RealtimeKline(
+                    symbol=symbol.upper(),
+                    open_time=int(row[0]),
+                    close_time=int(row[6]),
+                    open_price=float(row[1]),
+                    high_price=float(row[2]),
+                    low_price=float(row[3]),
+                    close_price=float(row[4]),
+                    volume=float(row[5]),
+                    interval=interval,
+                    is_closed=True,
+                    timestamp=datetime.utcnow().isoformat()
+                )
+                if self._apply_closed_kline(symbol, interval, kline):
+                    applied += 1
+                    last_kline = kline
+            
+            # Un único recálculo/notificación con el estado ya al día
+            if last_kline is not None:
+                logger.info(f"🩹 Backfill {stream_name}: {applied} velas recuperadas")
+                if state.is_ready:
+                    await self._notify_indicator_callbacks(
+                        await self._calculate_realtime_indicators(symbol, interval)
+                    )
+                await self._notify_kline_callbacks(last_kline)
+
     async def _calculate_realtime_indicators(self, symbol: str, interval: str) -> RealtimeTechnicalIndicators:
         """Calcular indicadores técnicos con datos en tiempo real"""
         try:
             buffer_key = f"{symbol}_{interval}"
-            klines = list(self.kline_buffers[buffer_key])
+            state = self.indicator_states.get(buffer_key)
+            
+            if state is None or not state.is_ready:
+                raise ValueError(f"Insuficientes datos para cálculo: {state.candles if state else 0}")
             
-            if len(klines) < 50:
-                raise ValueError(f"Insuficientes datos para cálculo: {len(klines)}")
+            # Indicadores desde el estado incremental (sin recalcular el buffer)
+            snapshot = state.snapshot()
             
-            # Convertir a listas para funciones alternativas
+            # El motor Smart Scalper sigue trabajando sobre las velas del buffer
+            klines = list(self.kline_buffers[buffer_key])
+            opens = [k.open_price for k in klines]
             closes = [k.close_price for k in klines]
             highs = [k.high_price for k in klines]
             lows = [k.low_price for k in klines]
             volumes = [k.volume for k in klines]
-            
-            # Calcular indicadores usando funciones alternativas (Railway compatible)
-            rsi = calculate_rsi(closes, period=14)
-            volume_sma = calculate_volume_sma(volumes, period=20)
-            volume_ratio = volumes[-1] / volume_sma if volume_sma > 0 else 1.0
-            
-            # Simplificar MACD para Railway (usar EMAs)
-            ema_12 = calculate_ema(closes, 12)
-            ema_26 = calculate_ema(closes, 26)
-            macd = ema_12 - ema_26
-            macd_signal = calculate_ema([macd] * 9, 9)  # Aproximación simple
-            macd_hist = macd - macd_signal
-            
-            ema_9 = calculate_ema(closes, 9)
-            ema_21 = calculate_ema(closes, 21)
-            ema_50 = calculate_ema(closes, 50)
-            atr = calculate_atr(highs, lows, closes, period=14)
-            
-            # Determinar estado RSI usando función alternativa
-            rsi_status = get_rsi_status(rsi)
-            
-            # Detectar spike de volumen usando función alternativa
-            volume_spike, volume_ratio = detect_volume_spike(volumes)
+            features = get_feature_frame(symbol, interval, opens, highs, lows, closes, volumes,
+                                         last_candle_time=klines[-1].open_time)
             
             # 🧠 Generar señal usando Smart Scalper Multi-Algoritmo
             smart_signal = self.smart_scalper_engine.generate_signal(
-                symbol, highs, lows, closes, volumes
+                symbol, highs, lows, closes, volumes, features=features
             )
             
             return RealtimeTechnicalIndicators(
                 symbol=symbol,
                 timestamp=smart_signal.timestamp,
-                rsi=round(rsi, 2),
-                rsi_status=rsi_status,
-                volume_sma=round(volume_sma, 2),
-                volume_ratio=round(volume_ratio, 2),
-                volume_spike=volume_spike,
-                macd=round(macd, 6),
-                macd_signal=round(macd_signal, 6),
-                macd_histogram=round(macd_hist, 6),
-                ema_9=round(ema_9, 6),
-                ema_21=round(ema_21, 6),
-                ema_50=round(ema_50, 6),
-                atr=round(atr, 6),
+                rsi=round(snapshot.rsi, 2),
+                rsi_status=snapshot.rsi_status,
+                volume_sma=round(snapshot.volume_sma, 2),
+                volume_ratio=round(snapshot.volume_ratio, 2),
+                volume_spike=snapshot.volume_spike,
+                macd=round(snapshot.macd, 6),
+                macd_signal=round(snapshot.macd_signal, 6),
+                macd_histogram=round(snapshot.macd_histogram, 6),
+                ema_9=round(snapshot.ema[9], 6),
+                ema_21=round(snapshot.ema[21], 6),
+                ema_50=round(snapshot.ema[50], 6),
+                atr=round(snapshot.atr, 6),
                 smart_scalper_signal=smart_signal.signal,
                 confidence=round(smart_signal.confidence, 3),
                 # Smart Scalper Multi-Algorithm metadata
@@ -276,6 +361,21 @@ class BinanceWebSocketService:
         """Agregar callback para notificaciones de indicadores actualizados"""
         self.indicator_callbacks.append(callback)
 
+    def add_tick_callback(self, callback: Callable[[RealtimeKline], None]):
+        """Agregar callback para cada actualización de kline (incluida la vela en formación)"""
+        self.tick_callbacks.append(callback)
+
+    async def _notify_tick_callbacks(self, kline: RealtimeKline):
+        """Notificar callbacks de tick"""
+        for callback in self.tick_callbacks:
+            try:
+                if asyncio.iscoroutinefunction(callback):
+                    await callback(kline)
+                else:
+                    callback(kline)
+            except Exception as e:
+                logger.error(f"❌ Error en callback tick: {e}")
+
     async def _notify_kline_callbacks(self, kline: RealtimeKline):
         """Notificar callbacks de kline"""
         for callback in self.kline_callbacks:
@@ -306,21 +406,31 @@ class BinanceWebSocketService:
             logger.error(f"❌ Error obteniendo indicadores actuales {symbol}: {e}")
             return None
 
-    async def close_stream(self, stream_name: str):
-        """Cerrar stream específico"""
-        if stream_name in self.connections:
-            try:
-                await self.connections[stream_name].close()
-                del self.connections[stream_name]
+    async def close_stream(self, stream_name: str, owner: Optional[str] = None):
+        """Liberar referencia(s) de este servicio al stream; se cierra en Binance con la última"""
+        owners = self.stream_owners.get(stream_name)
+        if not owners:
+            return
+        try:
+            for stream_owner in ([owner] if owner else list(owners)):
+                if stream_owner in owners:
+                    owners.discard(stream_owner)
+                    await self.stream_manager.unsubscribe(stream_name, stream_owner)
+            
+            if not owners:
+                del self.stream_owners[stream_name]
+                symbol, interval = self.streams.pop(stream_name)
+                self.indicator_states.pop(f"{symbol}_{interval}", None)
+                self.kline_buffers.pop(f"{symbol}_{interval}", None)
                 logger.info(f"🔌 Stream cerrado: {stream_name}")
-            except Exception as e:
-                logger.error(f"❌ Error cerrando stream {stream_name}: {e}")
+        except Exception as e:
+            logger.error(f"❌ Error cerrando stream {stream_name}: {e}")
 
     async def close_all_streams(self):
-        """Cerrar todas las conexiones WebSocket"""
-        logger.info(f"🔌 Cerrando {len(self.connections)} conexiones WebSocket...")
+        """Liberar todas las suscripciones de este servicio"""
+        logger.info(f"🔌 Cerrando {len(self.stream_owners)} streams WebSocket...")
         
-        for stream_name in list(self.connections.keys()):
+        for stream_name in list(self.stream_owners.keys()):
             await self.close_stream(stream_name)
         
         self.is_running = False
@@ -333,7 +443,8 @@ class BinanceWebSocketService:
             status[buffer_key] = {
                 'size': len(buffer),
                 'max_size': buffer.maxlen,
-                'latest_timestamp': buffer[-1].timestamp if buffer else None
+                'latest_timestamp': buffer[-1].timestamp if buffer else None,
+                'indicator_candles': self.indicator_states[buffer_key].candles if buffer_key in self.indicator_states else 0
             }
         return status
 
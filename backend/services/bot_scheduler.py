@@ -0,0 +1,554 @@
+#!/usr/bin/env python3
+"""
+🎯 BotScheduler - Planificador central de bots en ejecución
+Agrupa los bots RUNNING por (símbolo, intervalo) y analiza cada grupo una única vez
+por cierre de vela: un loop por intervalo despierta en el cierre, descarga las velas
+cerradas de todos sus símbolos con concurrencia acotada (MarketScanner.fetch_matrix),
+calcula indicadores + señal para todos en una pasada vectorizada (scan_arrays) y
+reparte el resultado a las reglas de estrategia/riesgo de cada bot. Mide el lag por
+bot (cierre de vela -> decisión) y su distribución por intervalo.
+
+Eduard Guzmán - InteliBotX
+"""
+
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass, asdict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from services.market_data_cache import INTERVAL_SECONDS, next_candle_boundary
+from services.market_scanner import MarketScanner, scan_arrays, _CONDITION_NAMES, _SIGNAL_NAMES
+from services.quantile_sketch import QuantileSketch
+
+logger = logging.getLogger(__name__)
+
+BOT_SCHEDULER_ENABLED = os.getenv("BOT_SCHEDULER_ENABLED", "true").lower() == "true"
+BOT_SCHEDULER_CANDLES = int(os.getenv("BOT_SCHEDULER_CANDLES", "100"))
+BOT_SCHEDULER_SETTLE_SECONDS = float(os.getenv("BOT_SCHEDULER_SETTLE_SECONDS", "2"))
+BOT_SCHEDULER_DISPATCH_CONCURRENCY = int(os.getenv("BOT_SCHEDULER_DISPATCH_CONCURRENCY", "64"))
+BOT_SCHEDULER_MIN_CONFIDENCE = 0.7  # Mismo umbral que RealBotEngine.trading_loop
+
+
+@dataclass
+class ScheduledBot:
+    """Parámetros de estrategia/riesgo de un bot y sus métricas de planificación"""
+    bot_id: int
+    user_id: int
+    symbol: str
+    interval: str
+    strategy: str
+    stake: float
+    take_profit: float
+    stop_loss: float
+    risk_percentage: float = 1.0
+    cooldown_minutes: int = 0
+    min_volume: Optional[float] = None
+    min_entry_price: Optional[float] = None
+
+    last_signal: str = "HOLD"
+    last_confidence: float = 0.0
+    last_candle_close: Optional[float] = None
+    last_action_at: Optional[float] = None
+    last_lag_ms: Optional[float] = None
+    evaluations: int = 0
+    actions: int = 0
+    errors: int = 0
+
+    @classmethod
+    def from_config(cls, bot) -> "ScheduledBot":
+        """Construir desde un BotConfig (o cualquier objeto con los mismos atributos)"""
+        return cls(
+            bot_id=bot.id,
+            user_id=bot.user_id,
+            symbol=bot.symbol.upper(),
+            interval=bot.interval,
+            strategy=bot.strategy,
+            stake=float(bot.stake),
+            take_profit=float(bot.take_profit),
+            stop_loss=float(bot.stop_loss),
+            risk_percentage=float(bot.risk_percentage or 1.0),
+            cooldown_minutes=int(bot.cooldown_minutes or 0),
+            min_volume=bot.min_volume,
+            min_entry_price=bot.min_entry_price
+        )
+
+    @property
+    def group(self) -> Tuple[str, str]:
+        return self.symbol, self.interval
+
+
+@dataclass
+class SchedulerDecision:
+    """Orden propuesta para un bot tras el cierre de vela"""
+    bot_id: int
+    user_id: int
+    symbol: str
+    interval: str
+    strategy: str
+    signal: str
+    confidence: float
+    price: float
+    quantity: float
+    take_profit_price: float
+    stop_loss_price: float
+    candle_close: float
+    lag_ms: float
+
+
+# =================================================================
+# REGLAS POR ESTRATEGIA (sobre el análisis compartido del grupo)
+# =================================================================
+
+def _smart_scalper_rule(analysis: Dict[str, Any]) -> Tuple[str, float]:
+    return analysis["signal"], analysis["confidence"]
+
+
+def _trend_hunter_rule(analysis: Dict[str, Any]) -> Tuple[str, float]:
+    if analysis["condition"] == "trending_up":
+        return "BUY", 0.8
+    if analysis["condition"] == "trending_down":
+        return "SELL", 0.8
+    return "HOLD", 0.5
+
+
+def _volatility_master_rule(analysis: Dict[str, Any]) -> Tuple[str, float]:
+    rsi = analysis["rsi"]
+    # Alta volatilidad - umbrales conservadores; resto - más agresivos (RealBotEngine)
+    low, high = (25, 75) if analysis["condition"] == "high_volatility" else (35, 65)
+    if rsi < low:
+        return "BUY", 0.75
+    if rsi > high:
+        return "SELL", 0.75
+    return "HOLD", 0.5
+
+
+def _manipulation_detector_rule(analysis: Dict[str, Any]) -> Tuple[str, float]:
+    # Volumen anómalo con movimiento fuerte: no operar durante posible manipulación
+    if analysis["volume_ratio"] > 3 and abs(analysis["change_pct"]) > 5:
+        return "HOLD", 0.5
+    return analysis["signal"], analysis["confidence"]
+
+
+STRATEGY_RULES: Dict[str, Callable[[Dict[str, Any]], Tuple[str, float]]] = {
+    "Smart Scalper": _smart_scalper_rule,
+    "Trend Hunter": _trend_hunter_rule,
+    "Volatility Master": _volatility_master_rule,
+    "Manipulation Detector": _manipulation_detector_rule,
+}
+
+
+def evaluate_bot(bot: ScheduledBot, analysis: Dict[str, Any], candle_close: float,
+                 now: float) -> Optional[SchedulerDecision]:
+    """Aplicar estrategia + reglas de riesgo del bot; None si no hay acción"""
+    rule = STRATEGY_RULES.get(bot.strategy, _smart_scalper_rule)
+    signal, confidence = rule(analysis)
+    lag_ms = (now - candle_close) * 1000
+
+    bot.evaluations += 1
+    bot.last_signal, bot.last_confidence = signal, confidence
+    bot.last_candle_close, bot.last_lag_ms = candle_close, lag_ms
+
+    price = analysis["price"]
+    if signal == "HOLD" or confidence < BOT_SCHEDULER_MIN_CONFIDENCE or price <= 0:
+        return None
+    if bot.last_action_at is not None and now - bot.last_action_at < bot.cooldown_minutes * 60:
+        return None
+    if bot.min_entry_price is not None and price < bot.min_entry_price:
+        return None
+    if bot.min_volume is not None and analysis["volume"] < bot.min_volume:
+        return None
+
+    direction = 1 if signal == "BUY" else -1
+    bot.last_action_at = now
+    bot.actions += 1
+    return SchedulerDecision(
+        bot_id=bot.bot_id, user_id=bot.user_id, symbol=bot.symbol, interval=bot.interval,
+        strategy=bot.strategy, signal=signal, confidence=round(confidence, 4), price=price,
+        quantity=bot.stake * bot.risk_percentage / 100 / price,
+        take_profit_price=price * (1 + direction * bot.take_profit / 100),
+        stop_loss_price=price * (1 - direction * bot.stop_loss / 100),
+        candle_close=candle_close, lag_ms=round(lag_ms, 2)
+    )
+
+
+async def _log_decision(decision: SchedulerDecision):
+    logger.info(
+        f"🎯 Bot {decision.bot_id} {decision.signal} {decision.symbol} @ {decision.price:.6g} "
+        f"(conf {decision.confidence:.2f}, lag {decision.lag_ms:.0f}ms)"
+    )
+
+
+DecisionHandler = Callable[[SchedulerDecision], Awaitable[None]]
+
+
+class BotScheduler:
+    """
+    Un loop por intervalo con bots activos; cada cierre de vela produce un análisis
+    por (símbolo, intervalo) y una evaluación por bot. El handler de decisiones es el
+    punto de extensión hacia ejecución (por defecto solo registra la decisión).
+    """
+
+    def __init__(self, scanner: Optional[MarketScanner] = None, on_decision: Optional[DecisionHandler] = None,
+                 candles: Optional[int] = None, settle_seconds: Optional[float] = None,
+                 dispatch_concurrency: Optional[int] = None):
+        self.scanner = scanner or MarketScanner()
+        self.on_decision = on_decision or _log_decision
+        self.candles = candles or BOT_SCHEDULER_CANDLES
+        self.settle_seconds = settle_seconds if settle_seconds is not None else BOT_SCHEDULER_SETTLE_SECONDS
+        self._dispatch_semaphore = asyncio.Semaphore(dispatch_concurrency or BOT_SCHEDULER_DISPATCH_CONCURRENCY)
+
+        self.bots: Dict[int, ScheduledBot] = {}
+        self.groups: Dict[Tuple[str, str], Dict[int, ScheduledBot]] = {}
+        self._loops: Dict[str, asyncio.Task] = {}
+        self._lag: Dict[str, QuantileSketch] = {}
+        self._cycles: Dict[str, Dict[str, Any]] = {}
+        self.running = False
+
+    # ------------------------------------------------------------------
+    # Registro de bots
+    # ------------------------------------------------------------------
+
+    def add_bot(self, bot) -> ScheduledBot:
+        """Registrar (o actualizar) un bot; arranca el loop de su intervalo si hace falta"""
+        scheduled = bot if isinstance(bot, ScheduledBot) else ScheduledBot.from_config(bot)
+        if scheduled.interval not in INTERVAL_SECONDS:
+            raise ValueError(f"Intervalo no soportado: {scheduled.interval}")
+        self.remove_bot(scheduled.bot_id)
+        self.bots[scheduled.bot_id] = scheduled
+        self.groups.setdefault(scheduled.group, {})[scheduled.bot_id] = scheduled
+        if self.running:
+            self._ensure_loop(scheduled.interval)
+        return scheduled
+
+    def remove_bot(self, bot_id: int) -> bool:
+        scheduled = self.bots.pop(bot_id, None)
+        if scheduled is None:
+            return False
+        group = self.groups.get(scheduled.group)
+        if group is not None:
+            group.pop(bot_id, None)
+            if not group:
+                del self.groups[scheduled.group]
+        return True
+
+    def group_size(self, bot_id: int) -> int:
+        scheduled = self.bots.get(bot_id)
+        return len(self.groups.get(scheduled.group, {})) if scheduled else 0
+
+    def load_running_bots(self) -> int:
+        """Registrar los BotConfig activos en estado RUNNING"""
+        from sqlmodel import select
+        from db.database import get_session
+        from models.bot_config import BotConfig
+
+        with get_session() as session:
+            bots = session.exec(
+                select(BotConfig).where(BotConfig.status == "RUNNING", BotConfig.active == True)  # noqa: E712
+            ).all()
+        loaded = 0
+        for bot in bots:
+            try:
+                self.add_bot(bot)
+                loaded += 1
+            except ValueError as e:
+                logger.warning(f"⚠️ Bot {bot.id} no planificado: {e}")
+        return loaded
+
+    # ------------------------------------------------------------------
+    # Loops por intervalo
+    # ------------------------------------------------------------------
+
+    def start(self):
+        self.running = True
+        for interval in {interval for _, interval in self.groups}:
+            self._ensure_loop(interval)
+
+    async def stop(self):
+        self.running = False
+        loops, self._loops = list(self._loops.values()), {}
+        for task in loops:
+            task.cancel()
+        await asyncio.gather(*loops, return_exceptions=True)
+
+    def _ensure_loop(self, interval: str):
+        task = self._loops.get(interval)
+        if task is None or task.done():
+            self._loops[interval] = asyncio.create_task(self._run_interval(interval), name=f"bot-scheduler:{interval}")
+
+    def _symbols_for(self, interval: str) -> List[str]:
+        return sorted(symbol for symbol, group_interval in self.groups if group_interval == interval)
+
+    async def _run_interval(self, interval: str):
+        while self.running and self._symbols_for(interval):
+            candle_close = next_candle_boundary(interval)
+            await asyncio.sleep(max(0.0, candle_close - time.time() + self.settle_seconds))
+            try:
+                await self.run_cycle(interval, candle_close)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Error en ciclo del scheduler {interval}: {e}")
+        self._loops.pop(interval, None)
+
+    # ------------------------------------------------------------------
+    # Ciclo: un análisis por grupo, una evaluación por bot
+    # ------------------------------------------------------------------
+
+    async def analyze_interval(self, interval: str, symbols: List[str],
+                               candle_close: float) -> Tuple[Dict[str, Dict[str, Any]], List[str], Dict[str, float]]:
+        """Análisis sobre velas cerradas (hasta candle_close) para todos los símbolos del intervalo"""
+        from utils.analysis_pool import run_in_analysis_pool
+
+        timings = {}
+        start = time.perf_counter()
+        ok_symbols, failed, matrices = await self.scanner.fetch_matrix(symbols, interval, self.candles + 1)
+        timings["fetch_ms"] = (time.perf_counter() - start) * 1000
+        if not ok_symbols:
+            return {}, failed, timings
+
+        # Descartar la vela en formación (abierta en candle_close) o la más antigua si ya no viene
+        forming = matrices["times"][:, -1] >= candle_close * 1000
+        closed = {
+            name: np.where(forming[:, None], values[:, :-1], values[:, 1:])
+            for name, values in matrices.items()
+        }
+
+        start = time.perf_counter()
+        scan = await run_in_analysis_pool(
+            scan_arrays, closed["highs"], closed["lows"], closed["closes"], closed["volumes"]
+        )
+        timings["analysis_ms"] = (time.perf_counter() - start) * 1000
+
+        analyses = {}
+        for row, symbol in enumerate(ok_symbols):
+            analyses[symbol] = {
+                "price": float(scan["price"][row]),
+                "change_pct": float(scan["change_pct"][row]),
+                "rsi": float(scan["rsi"][row]),
+                "volume": float(closed["volumes"][row, -1]),
+                "volume_ratio": float(scan["volume_ratio"][row]),
+                "condition": _CONDITION_NAMES[scan["condition"][row]],
+                "signal": _SIGNAL_NAMES[scan["signal"][row]],
+                "confidence": float(scan["confidence"][row]),
+            }
+        return analyses, failed, timings
+
+    async def run_cycle(self, interval: str, candle_close: float) -> List[SchedulerDecision]:
+        symbols = self._symbols_for(interval)
+        if not symbols:
+            return []
+        cycle_start = time.perf_counter()
+        analyses, failed, timings = await self.analyze_interval(interval, symbols, candle_close)
+
+        now = time.time()
+        lag = self._lag.setdefault(interval, QuantileSketch())
+        decisions: List[SchedulerDecision] = []
+        bots_evaluated = 0
+        for symbol in symbols:
+            group = self.groups.get((symbol, interval), {})
+            analysis = analyses.get(symbol)
+            for bot in list(group.values()):
+                if analysis is None:
+                    bot.errors += 1
+                    continue
+                decision = evaluate_bot(bot, analysis, candle_close, now)
+                lag.add(bot.last_lag_ms)
+                bots_evaluated += 1
+                if decision is not None:
+                    decisions.append(decision)
+
+        await asyncio.gather(*(self._dispatch(decision) for decision in decisions))
+
+        timings["cycle_ms"] = (time.perf_counter() - cycle_start) * 1000
+        self._cycles[interval] = {
+            "candle_close": candle_close,
+            "symbols": len(symbols),
+            "failed_symbols": failed,
+            "bots_evaluated": bots_evaluated,
+            "decisions": len(decisions),
+            **{name: round(value, 2) for name, value in timings.items()}
+        }
+        return decisions
+
+    async def _dispatch(self, decision: SchedulerDecision):
+        async with self._dispatch_semaphore:
+            try:
+                await self.on_decision(decision)
+            except Exception as e:
+                bot = self.bots.get(decision.bot_id)
+                if bot is not None:
+                    bot.errors += 1
+                logger.error(f"❌ Error despachando decisión del bot {decision.bot_id}: {e}")
+
+    # ------------------------------------------------------------------
+    # Métricas
+    # ------------------------------------------------------------------
+
+    def bot_status(self, bot_id: int) -> Optional[Dict[str, Any]]:
+        scheduled = self.bots.get(bot_id)
+        return asdict(scheduled) if scheduled else None
+
+    def get_stats(self) -> Dict[str, Any]:
+        intervals = {}
+        for interval in sorted({interval for _, interval in self.groups} | set(self._cycles)):
+            lag = self._lag.get(interval)
+            intervals[interval] = {
+                "groups": sum(1 for _, group_interval in self.groups if group_interval == interval),
+                "bots": sum(len(group) for (_, group_interval), group in self.groups.items()
+                            if group_interval == interval),
+                "loop_running": interval in self._loops and not self._loops[interval].done(),
+                "last_cycle": self._cycles.get(interval),
+                "lag_ms": lag.summary(digits=2) if lag else None
+            }
+        return {
+            "running": self.running,
+            "bots": len(self.bots),
+            "groups": len(self.groups),
+            "intervals": intervals
+        }
+
+
+# Instancia global del scheduler (lazy: el MarketScanner crea cliente de Binance)
+bot_scheduler: Optional[BotScheduler] = None
+
+
+def get_bot_scheduler() -> BotScheduler:
+    global bot_scheduler
+    if bot_scheduler is None:
+        bot_scheduler = BotScheduler()
+    return bot_scheduler
+
+
+async def start_bot_scheduler() -> int:
+    """Cargar bots RUNNING y arrancar los loops (startup de la aplicación)"""
+    scheduler = get_bot_scheduler()
+    loaded = scheduler.load_running_bots()
+    scheduler.start()
+    return loaded
+
+
+async def stop_bot_scheduler():
+    if bot_scheduler is not None:
+        await bot_scheduler.stop()
+
+
+# =================================================================
+# TESTING & BENCHMARK
+# =================================================================
+
+class _SyntheticKlines:
+    """data_service en memoria con la interfaz get_klines de BinanceRealDataService"""
+
+    def __init__(self, n_bars: int = 200, seed: int = 7):
+        self.n_bars = n_bars
+        self.seed = seed
+        self.calls = 0
+
+    async def get_klines(self, symbol: str, interval: str = "15m", limit: int = 100, fallback: bool = True):
+        import pandas as pd
+
+        self.calls += 1
+        rng = np.random.default_rng(abs(hash((symbol, self.seed))) % 2 ** 32)
+        seconds = INTERVAL_SECONDS[interval]
+        # Última vela = la que está en formación ahora mismo
+        last_open = (time.time() // seconds) * seconds
+        opens_at = (last_open - seconds * np.arange(limit)[::-1]) * 1000
+        closes = rng.uniform(1, 500) * np.exp(np.cumsum(rng.normal(0, 0.006, limit)))
+        spread = np.abs(rng.normal(0, 0.003, limit)) * closes
+        return pd.DataFrame({
+            "timestamp": opens_at, "open": closes, "high": closes + spread, "low": closes - spread,
+            "close": closes, "volume": rng.lognormal(8, 0.7, limit)
+        })
+
+
+def _synthetic_bots(n_bots: int, n_symbols: int, intervals=("15m",)) -> List[ScheduledBot]:
+    strategies = list(STRATEGY_RULES)
+    return [
+        ScheduledBot(
+            bot_id=i + 1, user_id=1 + i % 20, symbol=f"SYM{i % n_symbols}USDT",
+            interval=intervals[i % len(intervals)], strategy=strategies[i % len(strategies)],
+            stake=100.0, take_profit=2.5, stop_loss=1.5
+        )
+        for i in range(n_bots)
+    ]
+
+
+async def test_bot_scheduler():
+    """Un fetch + un análisis por (símbolo, intervalo); evaluación por bot con el análisis del grupo"""
+    print("🧪 Testing BotScheduler...")
+    data = _SyntheticKlines()
+    decisions: List[SchedulerDecision] = []
+
+    async def collect(decision: SchedulerDecision):
+        decisions.append(decision)
+
+    scheduler = BotScheduler(scanner=MarketScanner(data_service=data), on_decision=collect, settle_seconds=0)
+    for bot in _synthetic_bots(300, 25, intervals=("15m", "1h")):
+        scheduler.add_bot(bot)
+    assert len(scheduler.groups) == 50
+
+    candle_close = next_candle_boundary("15m") - INTERVAL_SECONDS["15m"]
+    cycle_decisions = await scheduler.run_cycle("15m", candle_close)
+    assert data.calls == 25  # un fetch por símbolo, no por bot
+    assert scheduler.get_stats()["intervals"]["15m"]["last_cycle"]["bots_evaluated"] == 150
+    assert decisions == cycle_decisions
+
+    # Mismo análisis -> misma señal para todos los bots de un grupo con la misma estrategia
+    by_group: Dict[Tuple, set] = {}
+    for bot in scheduler.bots.values():
+        if bot.interval == "15m":
+            assert bot.last_candle_close == candle_close and bot.last_lag_ms >= 0
+            by_group.setdefault((bot.symbol, bot.strategy), set()).add(bot.last_signal)
+    assert all(len(signals) == 1 for signals in by_group.values())
+
+    # Las decisiones respetan el cooldown: un segundo ciclo inmediato no repite acciones con cooldown
+    for bot in scheduler.bots.values():
+        bot.cooldown_minutes = 60
+    assert await scheduler.run_cycle("15m", candle_close) == []
+
+    assert scheduler.remove_bot(1) and not scheduler.remove_bot(1)
+    print(f"✅ BotScheduler test completed: {len(decisions)} decisiones, stats={scheduler.get_stats()['intervals']['15m']['lag_ms']}")
+
+
+async def benchmark_bot_scheduler(n_bots: int = 5000, n_symbols: int = 200):
+    """Ciclo por cierre de vela: análisis por bot (loop previo) vs un análisis por grupo"""
+    logging.disable(logging.INFO)
+    bots = _synthetic_bots(n_bots, n_symbols)
+    candle_close = next_candle_boundary("15m") - INTERVAL_SECONDS["15m"]
+
+    async def noop(decision: SchedulerDecision):
+        return None
+
+    # Previo: cada bot descarga y analiza su propio símbolo
+    data = _SyntheticKlines()
+    per_bot = BotScheduler(scanner=MarketScanner(data_service=data), on_decision=noop)
+    start = time.perf_counter()
+    for bot in bots:
+        analyses, _, _ = await per_bot.analyze_interval("15m", [bot.symbol], candle_close)
+        evaluate_bot(bot, analyses[bot.symbol], candle_close, time.time())
+    per_bot_s = time.perf_counter() - start
+    per_bot_calls = data.calls
+
+    data = _SyntheticKlines()
+    scheduler = BotScheduler(scanner=MarketScanner(data_service=data), on_decision=noop)
+    for bot in _synthetic_bots(n_bots, n_symbols):
+        scheduler.add_bot(bot)
+    start = time.perf_counter()
+    await scheduler.run_cycle("15m", candle_close)
+    grouped_s = time.perf_counter() - start
+    cycle = scheduler.get_stats()["intervals"]["15m"]["last_cycle"]
+    logging.disable(logging.NOTSET)
+
+    print(f"🧪 BotScheduler: {n_bots} bots sobre {n_symbols} símbolos (klines sintéticas, sin red)")
+    print(f"   análisis por bot:   {per_bot_s * 1000:9.1f} ms/ciclo, {per_bot_calls} descargas")
+    print(f"   análisis por grupo: {grouped_s * 1000:9.1f} ms/ciclo, {data.calls} descargas "
+          f"(fetch {cycle['fetch_ms']} ms, análisis {cycle['analysis_ms']} ms)")
+
+
+if __name__ == "__main__":
+    asyncio.run(test_bot_scheduler())
+    asyncio.run(benchmark_bot_scheduler())
@@ -0,0 +1,546 @@
+#!/usr/bin/env python3
+"""
+🗄️ CandleStore - Histórico local de velas en columnas NumPy con lectura mmap
+Un directorio por (símbolo, intervalo) con un segmento por mes UTC; cada columna
+es un fichero binario plano de 8 bytes por vela (open_time int64, OHLCV float64...)
+que se lee con np.memmap: un rango dentro de un segmento se devuelve sin copiar.
+
+- Backfill paginado y concurrente desde /api/v3/klines (solo los huecos que faltan)
+- Append incremental de velas cerradas del websocket (O(vela), sin reescribir) en un
+  hilo escritor propio, fuera del event loop
+- Detección de huecos por diferencia de open_time frente al paso del intervalo
+
+Eduard Guzmán - InteliBotX
+"""
+
+import asyncio
+import logging
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from services.market_data_cache import INTERVAL_SECONDS, candle_open_time
+from utils.http_client_pool import HttpClientPool, http_client_pool
+
+logger = logging.getLogger(__name__)
+
+CANDLE_STORE_DIR = os.getenv("CANDLE_STORE_DIR", "data/candles")
+CANDLE_STORE_BACKFILL_CONCURRENCY = int(os.getenv("CANDLE_STORE_BACKFILL_CONCURRENCY", "4"))
+# Páginas de /klines por backfill (1000 velas cada una): acota el peso consumido en Binance
+CANDLE_STORE_MAX_BACKFILL_PAGES = int(os.getenv("CANDLE_STORE_MAX_BACKFILL_PAGES", "500"))
+CANDLE_STORE_STREAM_APPEND = os.getenv("CANDLE_STORE_STREAM_APPEND", "true").lower() == "true"
+
+# Columnas en el orden de la respuesta REST de klines (índices 0-10 salvo close_time)
+CANDLE_COLUMNS = (
+    "open_time", "open", "high", "low", "close", "volume",
+    "quote_volume", "count", "taker_buy_volume", "taker_buy_quote_volume"
+)
+_REST_INDEX = (0, 1, 2, 3, 4, 5, 7, 8, 9, 10)
+_STREAM_KEYS = ("t", "o", "h", "l", "c", "v", "q", "n", "V", "Q")
+_DTYPES = {name: np.int64 if name in ("open_time", "count") else np.float64 for name in CANDLE_COLUMNS}
+_ITEM_SIZE = 8
+KLINE_PAGE_LIMIT = 1000  # máximo de /api/v3/klines
+
+TimeBound = Union[int, float, str, datetime, pd.Timestamp, None]
+Columns = Dict[str, np.ndarray]
+
+
+def to_ms(value: TimeBound) -> Optional[int]:
+    """Epoch en ms desde int (ms), datetime/Timestamp o cadena ISO (UTC)"""
+    if value is None:
+        return None
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, float):
+        return int(value)
+    return int(pd.Timestamp(value).value // 1_000_000)
+
+
+def _month_of(open_time: np.ndarray) -> np.ndarray:
+    return open_time.astype("datetime64[ms]").astype("datetime64[M]")
+
+
+def _empty_columns() -> Columns:
+    return {name: np.empty(0, dtype=_DTYPES[name]) for name in CANDLE_COLUMNS}
+
+
+def rest_klines_to_columns(rows: List[List[Any]]) -> Columns:
+    """Respuesta de /klines (listas con strings) -> columnas tipadas"""
+    if not rows:
+        return _empty_columns()
+    table = np.array([[row[i] for i in _REST_INDEX] for row in rows], dtype=np.float64)
+    return {name: table[:, i].astype(_DTYPES[name]) for i, name in enumerate(CANDLE_COLUMNS)}
+
+
+class CandleStore:
+    """Almacén columnar por (símbolo, intervalo) con segmentos mensuales mapeados en memoria"""
+
+    def __init__(self, root: Union[str, Path] = CANDLE_STORE_DIR, use_testnet: bool = False,
+                 http_pool: Optional[HttpClientPool] = None):
+        self.use_testnet = use_testnet
+        self.root = Path(root) / ("testnet" if use_testnet else "mainnet")
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.base_url = "https://testnet.binance.vision/api/v3" if use_testnet else "https://api.binance.com/api/v3"
+        self.http_pool = http_pool or http_client_pool
+        self._write_lock = threading.Lock()
+        # segmento -> (filas, columnas memmap); se descarta si el fichero creció
+        self._maps: Dict[Path, Tuple[int, Columns]] = {}
+        self._stream_writer: Optional[ThreadPoolExecutor] = None
+        self.stream_appends = 0
+
+    # ------------------------------------------------------------------
+    # Layout
+    # ------------------------------------------------------------------
+
+    def _series_dir(self, symbol: str, interval: str) -> Path:
+        return self.root / symbol.upper() / interval
+
+    def segments(self, symbol: str, interval: str) -> List[Path]:
+        series_dir = self._series_dir(symbol, interval)
+        if not series_dir.exists():
+            return []
+        return sorted(p for p in series_dir.iterdir() if p.is_dir() and len(p.name) == 7)  # YYYY-MM
+
+    @staticmethod
+    def _segment_rows(segment: Path) -> int:
+        """Filas completas: mínimo entre columnas (un corte a mitad de append deja columnas más largas)"""
+        sizes = []
+        for name in CANDLE_COLUMNS:
+            try:
+                sizes.append(os.path.getsize(segment / name))
+            except FileNotFoundError:
+                return 0
+        return min(sizes) // _ITEM_SIZE
+
+    def _map_segment(self, segment: Path) -> Columns:
+        rows = self._segment_rows(segment)
+        cached = self._maps.get(segment)
+        if cached is not None and cached[0] == rows:
+            return cached[1]
+        if rows == 0:
+            columns = _empty_columns()
+        else:
+            columns = {
+                name: np.memmap(segment / name, dtype=_DTYPES[name], mode="r", shape=(rows,))
+                for name in CANDLE_COLUMNS
+            }
+        self._maps[segment] = (rows, columns)
+        return columns
+
+    # ------------------------------------------------------------------
+    # Escritura
+    # ------------------------------------------------------------------
+
+    def write(self, symbol: str, interval: str, columns: Columns) -> int:
+        """
+        Guardar velas (cualquier orden, con duplicados). Por segmento: si todas son
+        posteriores a la última guardada se añaden al final; si no, se fusiona y se
+        reescribe solo ese mes. Devuelve cuántas velas nuevas se incorporaron.
+        """
+        open_time = np.asarray(columns["open_time"], dtype=np.int64)
+        if open_time.size == 0:
+            return 0
+        # Orden estable y duplicados resueltos a favor de la última aparición
+        order = np.argsort(open_time, kind="stable")
+        open_time = open_time[order]
+        keep = np.r_[open_time[1:] != open_time[:-1], True]
+        rows = {name: np.asarray(columns[name], dtype=_DTYPES[name])[order][keep] for name in CANDLE_COLUMNS}
+
+        months = _month_of(rows["open_time"])
+        boundaries = np.flatnonzero(np.r_[True, months[1:] != months[:-1], True])
+        series_dir = self._series_dir(symbol, interval)
+        added = 0
+        with self._write_lock:
+            for begin, end in zip(boundaries[:-1], boundaries[1:]):
+                chunk = {name: values[begin:end] for name, values in rows.items()}
+                added += self._write_segment(series_dir / str(months[begin]), chunk)
+        return added
+
+    def _write_segment(self, segment: Path, chunk: Columns) -> int:
+        existing = self._map_segment(segment) if segment.exists() else _empty_columns()
+        stored = existing["open_time"]
+        if stored.size == 0 or chunk["open_time"][0] > stored[-1]:
+            segment.mkdir(parents=True, exist_ok=True)
+            rows = stored.size
+            for name in CANDLE_COLUMNS:
+                with open(segment / name, "r+b" if (segment / name).exists() else "wb") as f:
+                    f.truncate(rows * _ITEM_SIZE)  # descartar restos de un append interrumpido
+                    f.seek(rows * _ITEM_SIZE)
+                    f.write(chunk[name].tobytes())
+            return int(chunk["open_time"].size)
+
+        # Fusión: velas nuevas ganan a las guardadas con el mismo open_time
+        merged_time = np.concatenate((chunk["open_time"], stored))
+        unique_time, first_index = np.unique(merged_time, return_index=True)
+        added = int(unique_time.size - stored.size)
+        if added == 0:
+            positions = np.searchsorted(stored, chunk["open_time"])
+            if all(np.array_equal(np.asarray(existing[name])[positions], chunk[name]) for name in CANDLE_COLUMNS):
+                return 0  # velas ya guardadas e idénticas (p. ej. repetición del websocket)
+        staging = segment.with_name(segment.name + ".tmp")
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir(parents=True)
+        for name in CANDLE_COLUMNS:
+            merged = np.concatenate((chunk[name], np.asarray(existing[name])))[first_index]
+            merged.tofile(staging / name)
+        self._maps.pop(segment, None)
+        retired = segment.with_name(segment.name + ".old")
+        shutil.rmtree(retired, ignore_errors=True)
+        segment.rename(retired)
+        staging.rename(segment)
+        shutil.rmtree(retired, ignore_errors=True)
+        return added
+
+    def append_stream_kline(self, symbol: str, interval: str, kline: Dict[str, Any]) -> bool:
+        """Payload 'k' de un kline cerrado del websocket -> append al segmento del mes"""
+        if not kline.get("x"):
+            return False
+        columns = {name: np.array([kline[key]], dtype=np.float64).astype(_DTYPES[name])
+                   for name, key in zip(CANDLE_COLUMNS, _STREAM_KEYS)}
+        added = self.write(symbol, interval, columns)
+        self.stream_appends += added
+        return added > 0
+
+    def submit_stream_kline(self, symbol: str, interval: str, kline: Dict[str, Any]) -> "Future[bool]":
+        """append_stream_kline en el hilo escritor del store (FIFO): el websocket no espera al disco"""
+        with self._write_lock:
+            if self._stream_writer is None:
+                self._stream_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="candle-store")
+        return self._stream_writer.submit(self.append_stream_kline, symbol, interval, dict(kline))
+
+    def flush_stream_writes(self):
+        """Esperar a que el hilo escritor termine los appends encolados"""
+        if self._stream_writer is not None:
+            self._stream_writer.submit(lambda: None).result()
+
+    # ------------------------------------------------------------------
+    # Lectura
+    # ------------------------------------------------------------------
+
+    def read(self, symbol: str, interval: str, start: TimeBound = None, end: TimeBound = None) -> Columns:
+        """
+        Columnas de las velas con start <= open_time <= end. Si el rango cae en un solo
+        segmento son vistas de solo lectura sobre el memmap (sin copia); si cruza meses
+        se concatenan.
+        """
+        start_ms, end_ms = to_ms(start), to_ms(end)
+        first_month = str(_month_of(np.array([start_ms]))[0]) if start_ms is not None else None
+        last_month = str(_month_of(np.array([end_ms]))[0]) if end_ms is not None else None
+        pieces: List[Columns] = []
+        for segment in self.segments(symbol, interval):
+            if (first_month and segment.name < first_month) or (last_month and segment.name > last_month):
+                continue
+            columns = self._map_segment(segment)
+            open_time = columns["open_time"]
+            lo = int(np.searchsorted(open_time, start_ms, "left")) if start_ms is not None else 0
+            hi = int(np.searchsorted(open_time, end_ms, "right")) if end_ms is not None else open_time.size
+            if hi > lo:
+                pieces.append({name: values[lo:hi] for name, values in columns.items()})
+        if not pieces:
+            return _empty_columns()
+        if len(pieces) == 1:
+            return pieces[0]
+        return {name: np.concatenate([piece[name] for piece in pieces]) for name in CANDLE_COLUMNS}
+
+    def load_frame(self, symbol: str, interval: str, start: TimeBound = None, end: TimeBound = None) -> pd.DataFrame:
+        """DataFrame OHLCV (timestamp datetime UTC naive) como el de data/btcusdt_15m.csv"""
+        columns = self.read(symbol, interval, start, end)
+        return pd.DataFrame({
+            "timestamp": pd.to_datetime(columns["open_time"], unit="ms"),
+            "open": columns["open"],
+            "high": columns["high"],
+            "low": columns["low"],
+            "close": columns["close"],
+            "volume": columns["volume"]
+        })
+
+    def gaps(self, symbol: str, interval: str, start: TimeBound = None, end: TimeBound = None) -> List[Tuple[int, int]]:
+        """
+        Rangos [primer open_time ausente, último open_time ausente] dentro de [start, end].
+        Sin start/end solo se reportan los huecos entre la primera y la última vela guardadas.
+        """
+        step = INTERVAL_SECONDS[interval] * 1000
+        start_ms, end_ms = to_ms(start), to_ms(end)
+        if start_ms is not None:
+            start_ms = candle_open_time(interval, start_ms + step - 1, 1000)  # primera apertura >= start
+        if end_ms is not None:
+            end_ms = candle_open_time(interval, end_ms, 1000)
+        open_time = self.read(symbol, interval, start_ms, end_ms)["open_time"]
+
+        result: List[Tuple[int, int]] = []
+        if open_time.size == 0:
+            if start_ms is not None and end_ms is not None:
+                result.append((start_ms, end_ms))
+        else:
+            if start_ms is not None:
+                result.append((start_ms, int(open_time[0]) - step))
+            jumps = np.flatnonzero(np.diff(open_time) > step)
+            result.extend((int(open_time[i]) + step, int(open_time[i + 1]) - step) for i in jumps)
+            if end_ms is not None:
+                result.append((int(open_time[-1]) + step, end_ms))
+        # Descartar rangos vacíos (start > end), p. ej. un [start, end] sin ninguna apertura dentro
+        return [(gap_start, gap_end) for gap_start, gap_end in result if gap_start <= gap_end]
+
+    def coverage(self, symbol: str, interval: str) -> Dict[str, Any]:
+        open_time = self.read(symbol, interval)["open_time"]
+        if open_time.size == 0:
+            return {"symbol": symbol.upper(), "interval": interval, "candles": 0}
+        missing = sum((b - a) // (INTERVAL_SECONDS[interval] * 1000) + 1 for a, b in self.gaps(symbol, interval))
+        return {
+            "symbol": symbol.upper(),
+            "interval": interval,
+            "candles": int(open_time.size),
+            "first": pd.Timestamp(int(open_time[0]), unit="ms").isoformat(),
+            "last": pd.Timestamp(int(open_time[-1]), unit="ms").isoformat(),
+            "missing_candles": int(missing),
+            "segments": len(self.segments(symbol, interval))
+        }
+
+    # ------------------------------------------------------------------
+    # Backfill REST
+    # ------------------------------------------------------------------
+
+    async def _fetch_page(self, symbol: str, interval: str, start_ms: int, end_ms: int) -> Columns:
+        async with self.http_pool.client() as client:
+            response = await client.get(
+                f"{self.base_url}/klines",
+                params={
+                    "symbol": symbol.upper(),
+                    "interval": interval,
+                    "startTime": start_ms,
+                    "endTime": end_ms,
+                    "limit": KLINE_PAGE_LIMIT
+                },
+                timeout=10.0
+            )
+            if response.status_code != 200:
+                raise Exception(f"Binance API error: {response.status_code}")
+            return rest_klines_to_columns(response.json())
+
+    async def backfill(self, symbol: str, interval: str, start: TimeBound, end: TimeBound = None,
+                       concurrency: int = CANDLE_STORE_BACKFILL_CONCURRENCY,
+                       max_pages: int = CANDLE_STORE_MAX_BACKFILL_PAGES) -> Dict[str, Any]:
+        """
+        Descargar solo los huecos de [start, end] (por defecto hasta la última vela cerrada)
+        en páginas de 1000 velas con `concurrency` peticiones en vuelo. Cada página se
+        escribe al llegar; un fallo deja el hueco para el siguiente backfill.
+        ValueError si los huecos suman más de `max_pages` páginas.
+        """
+        step = INTERVAL_SECONDS[interval] * 1000
+        last_closed = candle_open_time(interval, int(time.time() * 1000), 1000) - step
+        end_ms = min(to_ms(end), last_closed) if end is not None else last_closed
+        missing = await asyncio.to_thread(self.gaps, symbol, interval, start, end_ms)
+        page_span = KLINE_PAGE_LIMIT * step
+        total_pages = sum((gap_end - gap_start) // page_span + 1 for gap_start, gap_end in missing)
+        if total_pages > max_pages:
+            raise ValueError(f"Máximo {max_pages} páginas por backfill ({total_pages} necesarias): acota start/end")
+
+        # Páginas generadas a demanda por `concurrency` workers (sin una corrutina por página)
+        pages = (
+            (page_start, min(page_start + page_span - step, gap_end))
+            for gap_start, gap_end in missing
+            for page_start in range(gap_start, gap_end + 1, page_span)
+        )
+        started = time.perf_counter()
+        written = 0
+        failed = 0
+
+        async def worker():
+            nonlocal written, failed
+            for page_start, page_end in pages:
+                try:
+                    columns = await self._fetch_page(symbol, interval, page_start, page_end)
+                except Exception as e:
+                    failed += 1
+                    logger.warning(f"⚠️ Backfill {symbol} {interval} página {page_start}: {e}")
+                    continue
+                added = await asyncio.to_thread(self.write, symbol, interval, columns)
+                written += added
+
+        await asyncio.gather(*(worker() for _ in range(max(1, min(concurrency, total_pages)))))
+        elapsed = time.perf_counter() - started
+        if total_pages:
+            logger.info(f"🗄️ Backfill {symbol} {interval}: {written} velas en {total_pages} páginas ({elapsed:.2f}s)")
+        remaining = await asyncio.to_thread(self.gaps, symbol, interval, start, end_ms)
+        return {
+            "symbol": symbol.upper(),
+            "interval": interval,
+            "pages": total_pages,
+            "failed_pages": failed,
+            "candles_written": written,
+            "seconds": round(elapsed, 3),
+            "remaining_gaps": len(remaining)
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        series = [(p.parent.name, p.name) for p in self.root.glob("*/*") if p.is_dir()]
+        return {
+            "root": str(self.root),
+            "series": [self.coverage(symbol, interval) for symbol, interval in sorted(series)],
+            "stream_appends": self.stream_appends
+        }
+
+
+# Instancias globales por red (histórico de mainnet por defecto)
+_candle_stores: Dict[bool, CandleStore] = {}
+
+
+def get_candle_store(use_testnet: bool = False) -> CandleStore:
+    store = _candle_stores.get(use_testnet)
+    if store is None:
+        store = _candle_stores[use_testnet] = CandleStore(use_testnet=use_testnet)
+    return store
+
+
+# =================================================================
+# TESTING & BENCHMARK
+# =================================================================
+
+_SYNTHETIC_ORIGIN_MS = to_ms("2024-01-01")
+
+
+def _synthetic_klines(start_ms: int, end_ms: int, step_ms: int, limit: int = KLINE_PAGE_LIMIT) -> List[List[Any]]:
+    """Filas /klines deterministas (precio función del open_time) como las devuelve Binance"""
+    first = max(start_ms, _SYNTHETIC_ORIGIN_MS)
+    first = _SYNTHETIC_ORIGIN_MS + -(-(first - _SYNTHETIC_ORIGIN_MS) // step_ms) * step_ms
+    times = np.arange(first, end_ms + 1, step_ms)[:limit]
+    price = 100 + np.sin(times / 3.6e6)
+    return [
+        [int(t), f"{p:.4f}", f"{p + 0.5:.4f}", f"{p - 0.5:.4f}", f"{p + 0.1:.4f}", "12.5",
+         int(t) + step_ms - 1, f"{p * 12.5:.4f}", 42, "6.0", f"{p * 6:.4f}", "0"]
+        for t, p in zip(times.tolist(), price.tolist())
+    ]
+
+
+def _mock_binance_pool(calls: List[Tuple[int, int]]) -> HttpClientPool:
+    import httpx
+
+    def handler(request: "httpx.Request") -> "httpx.Response":
+        params = request.url.params
+        start_ms, end_ms = int(params["startTime"]), int(params["endTime"])
+        calls.append((start_ms, end_ms))
+        step = INTERVAL_SECONDS[params["interval"]] * 1000
+        return httpx.Response(200, json=_synthetic_klines(start_ms, end_ms, step, int(params["limit"])))
+
+    pool = HttpClientPool()
+    pool._clients["https://api.binance.com"] = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return pool
+
+
+def test_candle_store():
+    """Backfill paginado solo de huecos, append del websocket, fusión fuera de orden y lecturas mmap"""
+    import tempfile
+
+    print("🧪 Testing CandleStore...")
+    step = 60_000
+    start, end = to_ms("2024-01-30"), to_ms("2024-02-02") - step  # cruza el cambio de mes
+    with tempfile.TemporaryDirectory() as tmp:
+        calls: List[Tuple[int, int]] = []
+        store = CandleStore(tmp, http_pool=_mock_binance_pool(calls))
+
+        result = asyncio.run(store.backfill("BTCUSDT", "1m", start, end, concurrency=3))
+        expected = rest_klines_to_columns(_synthetic_klines(start, end, step, limit=10**6))
+        assert result["candles_written"] == 3 * 1440 and result["pages"] == 5 and result["remaining_gaps"] == 0
+        columns = store.read("BTCUSDT", "1m")
+        for name in CANDLE_COLUMNS:
+            assert np.array_equal(columns[name], expected[name]), name
+        assert len(store.segments("BTCUSDT", "1m")) == 2
+
+        # Lectura dentro de un segmento: vista del memmap, sin copia
+        window = store.read("BTCUSDT", "1m", "2024-01-30T10:00", "2024-01-30T11:59")
+        assert window["close"].size == 120 and isinstance(window["close"].base, np.memmap)
+
+        # Hueco artificial: gaps() lo detecta y el siguiente backfill solo pide ese rango
+        hole = store.read("BTCUSDT", "1m", "2024-01-31T00:00", "2024-01-31T00:09")
+        survivors = {name: np.delete(np.asarray(columns[name]), np.s_[1440:1450]) for name in CANDLE_COLUMNS}
+        shutil.rmtree(store._series_dir("BTCUSDT", "1m"))
+        store.write("BTCUSDT", "1m", survivors)
+        assert store.gaps("BTCUSDT", "1m") == [(int(hole["open_time"][0]), int(hole["open_time"][-1]))]
+        calls.clear()
+        assert asyncio.run(store.backfill("BTCUSDT", "1m", start, end))["candles_written"] == 10
+        assert calls == [(int(hole["open_time"][0]), int(hole["open_time"][-1]))]
+        assert store.gaps("BTCUSDT", "1m", start, end) == []
+
+        # Websocket: vela abierta ignorada, cerrada añadida, repetida no duplica
+        kline = {"t": end + step, "o": "1", "h": "2", "l": "0.5", "c": "1.5", "v": "3", "q": "4", "n": 5,
+                 "V": "1", "Q": "1", "x": False}
+        assert not store.append_stream_kline("BTCUSDT", "1m", kline)
+        assert store.submit_stream_kline("BTCUSDT", "1m", {**kline, "x": True}).result()
+        assert not store.submit_stream_kline("BTCUSDT", "1m", {**kline, "x": True}).result()
+        frame = store.load_frame("BTCUSDT", "1m", start="2024-02-02")
+        assert len(frame) == 1 and frame["close"].iloc[0] == 1.5
+        assert store.coverage("BTCUSDT", "1m")["candles"] == 3 * 1440 + 1
+
+        # Append interrumpido (columna más larga que el resto): se ignora y se recorta
+        segment = store.segments("BTCUSDT", "1m")[-1]
+        with open(segment / "close", "ab") as f:
+            f.write(b"\x00" * 5)
+        assert store.read("BTCUSDT", "1m")["close"].size == 3 * 1440 + 1
+
+        # Límite de páginas: se rechaza antes de pedir nada a Binance
+        calls.clear()
+        try:
+            asyncio.run(store.backfill("BTCUSDT", "1m", "2023-01-01", "2023-03-01", max_pages=10))
+            raise AssertionError("backfill sin límite de páginas")
+        except ValueError:
+            assert calls == []
+
+        # Velas semanales: abren en lunes, no en múltiplos del epoch (jueves)
+        calls.clear()
+        result = asyncio.run(store.backfill("BTCUSDT", "1w", "2024-01-03", "2024-03-01"))
+        mondays = pd.date_range("2024-01-08", "2024-02-26", freq="W-MON")
+        assert calls == [(to_ms(mondays[0]), to_ms(mondays[-1]))] and result["remaining_gaps"] == 0
+        assert pd.to_datetime(store.read("BTCUSDT", "1w")["open_time"], unit="ms").equals(mondays)
+        assert store.gaps("BTCUSDT", "1w", "2024-01-03", "2024-03-01") == []
+        assert store.gaps("BTCUSDT", "1w", "2024-01-09", "2024-01-12") == []  # sin apertura dentro
+        assert store.gaps("BTCUSDT", "1w", "2024-03-01", "2024-03-12") == [(to_ms("2024-03-04"), to_ms("2024-03-11"))]
+    print("✅ CandleStore test completed")
+
+
+def benchmark_candle_store(months: int = 3):
+    """Lectura de meses de velas 1m: memmap frente a CSV (el formato de data/btcusdt_15m.csv)"""
+    import tempfile
+
+    step = 60_000
+    start = to_ms("2024-01-01")
+    n_candles = months * 30 * 1440
+    rows = _synthetic_klines(start, start + (n_candles - 1) * step, step, limit=n_candles)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = CandleStore(tmp)
+        columns = rest_klines_to_columns(rows)
+        t0 = time.perf_counter()
+        store.write("BTCUSDT", "1m", columns)
+        write_ms = (time.perf_counter() - t0) * 1000
+
+        csv_path = Path(tmp) / "btcusdt_1m.csv"
+        store.load_frame("BTCUSDT", "1m").to_csv(csv_path, index=False)
+        t0 = time.perf_counter()
+        pd.read_csv(csv_path, parse_dates=["timestamp"])
+        csv_ms = (time.perf_counter() - t0) * 1000
+
+        fresh = CandleStore(tmp)  # sin memmaps cacheados
+        t0 = time.perf_counter()
+        closes = fresh.read("BTCUSDT", "1m")["close"]
+        read_ms = (time.perf_counter() - t0) * 1000
+        t0 = time.perf_counter()
+        frame = fresh.load_frame("BTCUSDT", "1m")
+        frame_ms = (time.perf_counter() - t0) * 1000
+
+    print(f"🧪 CandleStore: {n_candles} velas 1m ({months} meses)")
+    print(f"   escritura columnar:         {write_ms:8.1f} ms")
+    print(f"   pd.read_csv:                {csv_ms:8.1f} ms")
+    print(f"   read() memmap ({closes.size} velas): {read_ms:8.1f} ms")
+    print(f"   load_frame() DataFrame:     {frame_ms:8.1f} ms ({len(frame)} filas)")
+
+
+if __name__ == "__main__":
+    test_candle_store()
+    benchmark_candle_store()
@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+"""
+📊 Dashboard Rollups - Agregados diarios de operaciones para el dashboard
+Mantiene trading_operation_daily_rollups (usuario/bot/símbolo/día: operaciones,
+ganadoras, PnL, última operación) de forma incremental en la misma transacción
+que inserta, modifica o borra cada TradingOperation.
+
+Los endpoints del dashboard leen O(días x símbolos) filas en lugar de todas las
+operaciones; si el rollup no está disponible se agrega en SQL (GROUP BY) sobre
+trading_operations con el mismo formato de salida.
+
+Eduard Guzmán - InteliBotX
+"""
+
+import logging
+import os
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import case, delete, event, func, insert, select, update
+from sqlalchemy.orm import attributes
+
+from models.trading_operation import TradeSide, TradingOperation, TradingOperationDailyRollup
+
+logger = logging.getLogger(__name__)
+
+DASHBOARD_ROLLUPS = os.getenv("DASHBOARD_ROLLUPS", "true").lower() == "true"
+
+_operations = TradingOperation.__table__
+_rollups = TradingOperationDailyRollup.__table__
+_KEY_COLUMNS = ("user_id", "bot_id", "symbol", "day")
+_TRACKED = ("user_id", "bot_id", "symbol", "created_at", "pnl")
+
+# El rollup solo se usa para lectura cuando está verificado/reconstruido en este proceso
+_rollups_ready = False
+
+
+def rollups_ready() -> bool:
+    return _rollups_ready
+
+
+# =================================================================
+# MANTENIMIENTO INCREMENTAL
+# =================================================================
+
+def _contribution(values: Dict[str, Any]) -> Tuple[Dict[str, Any], int, float, datetime]:
+    """(clave del rollup, win, pnl, created_at) de una operación"""
+    created_at = values["created_at"]
+    pnl = float(values["pnl"] or 0.0)
+    key = {
+        "user_id": values["user_id"],
+        "bot_id": values["bot_id"],
+        "symbol": values["symbol"],
+        "day": created_at.date()
+    }
+    return key, int(pnl > 0), pnl, created_at
+
+
+def _key_filter(key: Dict[str, Any]):
+    return [_rollups.c[column] == key[column] for column in _KEY_COLUMNS]
+
+
+def _latest(created_at: datetime):
+    return case(
+        (_rollups.c.last_operation_at.is_(None), created_at),
+        (_rollups.c.last_operation_at < created_at, created_at),
+        else_=_rollups.c.last_operation_at
+    )
+
+
+def _add(connection, values: Dict[str, Any]):
+    key, win, pnl, created_at = _contribution(values)
+    dialect = connection.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        # Upsert atómico: dos inserts concurrentes del mismo día no chocan en la PK
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as upsert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as upsert
+        statement = upsert(_rollups).values(**key, operations=1, wins=win, pnl=pnl, last_operation_at=created_at)
+        connection.execute(statement.on_conflict_do_update(
+            index_elements=list(_KEY_COLUMNS),
+            set_={
+                "operations": _rollups.c.operations + 1,
+                "wins": _rollups.c.wins + win,
+                "pnl": _rollups.c.pnl + pnl,
+                "last_operation_at": _latest(created_at)
+            }
+        ))
+        return
+
+    updated = connection.execute(
+        update(_rollups).where(*_key_filter(key)).values(
+            operations=_rollups.c.operations + 1,
+            wins=_rollups.c.wins + win,
+            pnl=_rollups.c.pnl + pnl,
+            last_operation_at=_latest(created_at)
+        )
+    )
+    if updated.rowcount == 0:
+        connection.execute(insert(_rollups).values(
+            **key, operations=1, wins=win, pnl=pnl, last_operation_at=created_at
+        ))
+
+
+def _remove(connection, values: Dict[str, Any]):
+    key, win, pnl, _ = _contribution(values)
+    start = datetime.combine(key["day"], datetime.min.time())
+    last_remaining = (
+        select(func.max(_operations.c.created_at))
+        .where(
+            _operations.c.user_id == key["user_id"],
+            _operations.c.bot_id == key["bot_id"],
+            _operations.c.symbol == key["symbol"],
+            _operations.c.created_at >= start,
+            _operations.c.created_at < start + timedelta(days=1)
+        )
+        .scalar_subquery()
+    )
+    connection.execute(
+        update(_rollups).where(*_key_filter(key)).values(
+            operations=_rollups.c.operations - 1,
+            wins=_rollups.c.wins - win,
+            pnl=_rollups.c.pnl - pnl,
+            last_operation_at=last_remaining
+        )
+    )
+    connection.execute(delete(_rollups).where(*_key_filter(key), _rollups.c.operations <= 0))
+
+
+def _current_values(target) -> Dict[str, Any]:
+    return {name: getattr(target, name) for name in _TRACKED}
+
+
+def _after_insert(mapper, connection, target):
+    _add(connection, _current_values(target))
+
+
+def _after_delete(mapper, connection, target):
+    _remove(connection, _current_values(target))
+
+
+def _after_update(mapper, connection, target):
+    previous, changed = {}, False
+    for name in _TRACKED:
+        history = attributes.get_history(target, name)
+        if history.deleted:
+            previous[name] = history.deleted[0]
+            changed = True
+        else:
+            previous[name] = getattr(target, name)
+    if changed:
+        _remove(connection, previous)
+        _add(connection, _current_values(target))
+
+
+def register_rollup_listeners():
+    """Engancha el mantenimiento del rollup a los flush de TradingOperation (idempotente)"""
+    for name, listener in (("after_insert", _after_insert), ("after_update", _after_update),
+                           ("after_delete", _after_delete)):
+        if not event.contains(TradingOperation, name, listener):
+            event.listen(TradingOperation, name, listener)
+
+
+# =================================================================
+# BACKFILL / VERIFICACIÓN
+# =================================================================
+
+def _day_expression():
+    return func.date(_operations.c.created_at)
+
+
+def _as_date(value) -> date:
+    return value if isinstance(value, date) else date.fromisoformat(str(value)[:10])
+
+
+def rebuild_rollups(connection, user_id: Optional[int] = None) -> int:
+    """Recalcular el rollup desde trading_operations con un único GROUP BY"""
+    day = _day_expression()
+    query = select(
+        _operations.c.user_id, _operations.c.bot_id, _operations.c.symbol, day,
+        func.count(), func.sum(case((_operations.c.pnl > 0, 1), else_=0)),
+        func.sum(_operations.c.pnl), func.max(_operations.c.created_at)
+    ).group_by(_operations.c.user_id, _operations.c.bot_id, _operations.c.symbol, day)
+
+    wipe = delete(_rollups)
+    if user_id is not None:
+        query = query.where(_operations.c.user_id == user_id)
+        wipe = wipe.where(_rollups.c.user_id == user_id)
+
+    rows = [
+        {"user_id": uid, "bot_id": bot_id, "symbol": symbol, "day": _as_date(row_day),
+         "operations": count, "wins": int(wins or 0), "pnl": float(pnl or 0.0), "last_operation_at": last}
+        for uid, bot_id, symbol, row_day, count, wins, pnl, last in connection.execute(query)
+    ]
+    connection.execute(wipe)
+    if rows:
+        connection.execute(insert(_rollups), rows)
+    return len(rows)
+
+
+def _totals_match(connection) -> bool:
+    ops_count, ops_pnl = connection.execute(
+        select(func.count(), func.coalesce(func.sum(_operations.c.pnl), 0.0))
+    ).one()
+    rollup_count, rollup_pnl = connection.execute(
+        select(func.coalesce(func.sum(_rollups.c.operations), 0), func.coalesce(func.sum(_rollups.c.pnl), 0.0))
+    ).one()
+    return int(ops_count) == int(rollup_count) and abs(float(ops_pnl) - float(rollup_pnl)) < 1e-6 * max(1.0, abs(float(ops_pnl)))
+
+
+def ensure_dashboard_rollups(engine=None) -> bool:
+    """
+    Crear la tabla de rollups, reconstruirla si no cuadra con trading_operations
+    (operaciones insertadas por procesos sin los listeners) y activar el
+    mantenimiento incremental. Llamar en el startup.
+    """
+    global _rollups_ready
+    if not DASHBOARD_ROLLUPS:
+        logger.info("📊 Dashboard rollups desactivados - agregación SQL directa")
+        return False
+
+    if engine is None:
+        from db.database import engine
+    try:
+        register_rollup_listeners()
+        _operations.create(engine, checkfirst=True)
+        _rollups.create(engine, checkfirst=True)
+        with engine.begin() as connection:
+            if not _totals_match(connection):
+                start = time.perf_counter()
+                rows = rebuild_rollups(connection)
+                logger.info(f"📊 Dashboard rollups reconstruidos: {rows} filas en "
+                            f"{(time.perf_counter() - start) * 1000:.0f} ms")
+        _rollups_ready = True
+    except Exception as e:
+        logger.error(f"❌ Error inicializando dashboard rollups: {e}")
+        _rollups_ready = False
+    return _rollups_ready
+
+
+# =================================================================
+# CONSULTAS
+# =================================================================
+
+def _aggregate(session, source, user_id: int, conditions: List[Any], group_by: Sequence[str],
+               symbol: Optional[str], bot_ids: Optional[Iterable[int]]) -> List[Tuple]:
+    if source is _rollups:
+        columns = {"day": source.c.day, "bot_id": source.c.bot_id, "symbol": source.c.symbol}
+        measures = [func.sum(source.c.operations), func.sum(source.c.wins),
+                    func.sum(source.c.pnl), func.max(source.c.last_operation_at)]
+    else:
+        columns = {"day": _day_expression(), "bot_id": source.c.bot_id, "symbol": source.c.symbol}
+        measures = [func.count(), func.sum(case((source.c.pnl > 0, 1), else_=0)),
+                    func.sum(source.c.pnl), func.max(source.c.created_at)]
+
+    group_columns = [columns[name] for name in group_by]
+    query = select(*group_columns, *measures).where(source.c.user_id == user_id, *conditions)
+    if symbol:
+        query = query.where(source.c.symbol == symbol)
+    if bot_ids is not None:
+        query = query.where(source.c.bot_id.in_(list(bot_ids)))
+    return session.execute(query.group_by(*group_columns)).all()
+
+
+def daily_aggregates(session, user_id: int, since: datetime,
+                     group_by: Sequence[str] = ("day",),
+                     symbol: Optional[str] = None,
+                     bot_ids: Optional[Iterable[int]] = None) -> List[Dict[str, Any]]:
+    """
+    Operaciones, ganadoras, PnL y última operación por `group_by` (day, bot_id, symbol)
+    para created_at >= since, ordenado por las columnas de agrupación.
+
+    Con rollup: días completos desde el rollup + el día parcial de `since` agregado
+    sobre trading_operations (acotado a un día). Sin rollup: GROUP BY sobre
+    trading_operations.
+    """
+    if _rollups_ready:
+        first_day_end = datetime.combine(since.date() + timedelta(days=1), datetime.min.time())
+        rows = _aggregate(session, _rollups, user_id, [_rollups.c.day > since.date()],
+                          group_by, symbol, bot_ids)
+        rows += _aggregate(session, _operations, user_id,
+                           [_operations.c.created_at >= since, _operations.c.created_at < first_day_end],
+                           group_by, symbol, bot_ids)
+    else:
+        rows = _aggregate(session, _operations, user_id, [_operations.c.created_at >= since],
+                          group_by, symbol, bot_ids)
+
+    merged: Dict[Tuple, Dict[str, Any]] = {}
+    for row in rows:
+        keys = tuple(_as_date(value) if name == "day" else value
+                     for name, value in zip(group_by, row[:len(group_by)]))
+        operations, wins, pnl, last = row[len(group_by):]
+        item = merged.get(keys)
+        if item is None:
+            merged[keys] = dict(zip(group_by, keys), operations=int(operations or 0), wins=int(wins or 0),
+                                pnl=float(pnl or 0.0), last_operation_at=last)
+            continue
+        item["operations"] += int(operations or 0)
+        item["wins"] += int(wins or 0)
+        item["pnl"] += float(pnl or 0.0)
+        if last is not None and (item["last_operation_at"] is None or last > item["last_operation_at"]):
+            item["last_operation_at"] = last
+    return [merged[keys] for keys in sorted(merged)]
+
+
+# =================================================================
+# TESTING & BENCHMARK
+# =================================================================
+
+def _memory_engine():
+    from sqlalchemy import create_engine
+    from sqlalchemy.pool import StaticPool
+    return create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+
+
+def _seed_operations(session, n_operations: int, user_id: int = 1, days: int = 60, seed: int = 3,
+                     orm: bool = True):
+    """Operaciones sintéticas; orm=False inserta en bloque sin pasar por los listeners"""
+    import random
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    operations = [
+        TradingOperation(
+            bot_id=rng.randint(1, 5), user_id=user_id, symbol=rng.choice(("BTCUSDT", "ETHUSDT", "SOLUSDT", "BNBUSDT")),
+            side=TradeSide.BUY, quantity=1.0, price=100.0, algorithm_used="rsi_oversold", pnl=round(rng.gauss(0.5, 10), 2),
+            created_at=now - timedelta(seconds=rng.uniform(0, days * 86400))
+        )
+        for _ in range(n_operations)
+    ]
+    if orm:
+        session.add_all(operations)
+    else:
+        session.execute(insert(_operations), [operation.model_dump() for operation in operations])
+    session.commit()
+
+
+def _python_daily(session, user_id: int, since: datetime) -> Dict[Tuple[date, str], Tuple[int, int, float]]:
+    """Agregación previa: cargar operaciones y agrupar en Python"""
+    from collections import defaultdict
+    operations = session.execute(select(TradingOperation).where(
+        TradingOperation.user_id == user_id,
+        TradingOperation.created_at >= since
+    )).scalars().all()
+    totals = defaultdict(lambda: [0, 0, 0.0])
+    for op in operations:
+        entry = totals[(op.created_at.date(), op.symbol)]
+        entry[0] += 1
+        entry[1] += op.pnl > 0
+        entry[2] += op.pnl
+    return {key: tuple(value) for key, value in totals.items()}
+
+
+def test_dashboard_rollups():
+    """Rollup incremental (insert/update/delete) == GROUP BY == agregación en Python"""
+    global _rollups_ready
+    from sqlmodel import Session
+
+    print("🧪 Testing dashboard rollups...")
+    engine = _memory_engine()
+    _operations.create(engine)
+    _rollups.create(engine)
+
+    with Session(engine) as session:
+        _seed_operations(session, 300, orm=False)  # sin listeners -> requiere backfill
+    assert ensure_dashboard_rollups(engine)
+
+    since = datetime.utcnow() - timedelta(days=30)
+    with Session(engine) as session:
+        _seed_operations(session, 200, seed=4)
+        operations = session.execute(select(TradingOperation)).scalars().all()
+        operations[0].pnl = -operations[0].pnl - 1
+        operations[1].symbol = "XRPUSDT"
+        operations[2].created_at = operations[2].created_at - timedelta(days=3)
+        session.delete(operations[3])
+        session.delete(operations[4])
+        session.commit()
+
+        expected = _python_daily(session, 1, since)
+
+        def as_map(rows):
+            return {(r["day"], r["symbol"]): (r["operations"], r["wins"], r["pnl"]) for r in rows}
+
+        for ready in (True, False):
+            _rollups_ready = ready
+            got = as_map(daily_aggregates(session, 1, since, group_by=("day", "symbol")))
+            assert got.keys() == expected.keys()
+            for key, (count, wins, pnl) in expected.items():
+                assert got[key][:2] == (count, wins) and abs(got[key][2] - pnl) < 1e-6
+
+    with engine.begin() as connection:
+        assert _totals_match(connection)
+    _rollups_ready = False
+    print("✅ Dashboard rollups test completed")
+
+
+def benchmark_dashboard_rollups(n_operations: int = 100_000):
+    """Resumen de 30 días: cargar operaciones vs GROUP BY vs rollup"""
+    global _rollups_ready
+    from sqlmodel import Session
+
+    engine = _memory_engine()
+    _operations.create(engine)
+    _rollups.create(engine)
+    with Session(engine) as session:
+        _seed_operations(session, n_operations, orm=False)
+    ensure_dashboard_rollups(engine)
+
+    since = datetime.utcnow() - timedelta(days=30)
+    print(f"🧪 Dashboard benchmark: {n_operations} operaciones, ventana 30 días")
+    with Session(engine) as session:
+        start = time.perf_counter()
+        _python_daily(session, 1, since)
+        python_ms = (time.perf_counter() - start) * 1000
+
+        for label, ready in (("GROUP BY operaciones", False), ("rollup diario", True)):
+            _rollups_ready = ready
+            start = time.perf_counter()
+            rows = daily_aggregates(session, 1, since, group_by=("day", "symbol"))
+            print(f"   {label:22s} {(time.perf_counter() - start) * 1000:8.1f} ms ({len(rows)} filas)")
+    print(f"   {'operaciones en Python':22s} {python_ms:8.1f} ms")
+    _rollups_ready = False
+
+
+if __name__ == "__main__":
+    test_dashboard_rollups()
+    benchmark_dashboard_rollups()
@@ -38,6 +38,25 @@ class TradeLogger:
         conn.commit()
         conn.close()
 
+    def log_trades(self, trades):
+        """Insertar un lote de trades (dicts symbol/direction/entry/exit) en una sola transacción"""
+        timestamp = datetime.utcnow().isoformat()
+        rows = []
+        for trade in trades:
+            direction = trade["direction"]
+            entry_price, exit_price = trade["entry"], trade["exit"]
+            profit_loss = exit_price - entry_price if direction.lower() == "long" else entry_price - exit_price
+            rows.append((trade["symbol"].upper(), direction.upper(), entry_price, exit_price, profit_loss, timestamp))
+
+        conn = sqlite3.connect(self.db_path)
+        with conn:
+            conn.executemany('''
+                INSERT INTO trade_logs (symbol, direction, entry_price, exit_price, profit_loss, timestamp)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', rows)
+        conn.close()
+        return len(rows)
+
     def get_all_trades(self):
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
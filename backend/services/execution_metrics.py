@@ -6,16 +6,21 @@ Tracking de: Slippage, Comisiones, Latencias para trading real
 Eduard Guzmán - InteliBotX
 """
 
+import os
 import time
 import asyncio
 import httpx
 import sqlite3
+import threading
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
 from dataclasses import dataclass, asdict
 import json
 import logging
 
+from utils.sqlite_batch_writer import get_sqlite_batch_writer
+from services.quantile_sketch import WindowedSketchStore
+
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -68,6 +73,146 @@ class ExecutionMetrics:
     success: bool
     error_msg: Optional[str] = None
 
+_INSERT_EXECUTION_METRICS = '''
+    INSERT OR REPLACE INTO execution_metrics (
+        timestamp, bot_id, symbol, side, strategy,
+        expected_price, executed_price, quantity,
+        total_latency_ms, api_latency_ms, latency_status,
+        slippage_points, slippage_percentage, slippage_cost_usd, market_impact,
+        commission_rate, commission_paid, trade_value, bnb_discount, vip_level,
+        execution_id, success, error_msg,
+        net_execution_cost, efficiency_percentage
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+def _execution_metrics_row(metrics: ExecutionMetrics) -> tuple:
+    """Fila de execution_metrics con las métricas derivadas calculadas"""
+    net_execution_cost = metrics.slippage.slippage_cost_usd + metrics.commission.commission_paid
+    efficiency = max(0, 100 - (net_execution_cost / (metrics.executed_price * metrics.quantity) * 100))
+    
+    return (
+        metrics.timestamp, metrics.bot_id, metrics.symbol, metrics.side, metrics.strategy,
+        metrics.expected_price, metrics.executed_price, metrics.quantity,
+        metrics.latency.total_execution_time, 
+        metrics.latency.api_to_exchange, 
+        metrics.latency.status,
+        metrics.slippage.slippage_points, 
+        metrics.slippage.slippage_percentage, 
+        metrics.slippage.slippage_cost_usd, 
+        metrics.slippage.market_impact,
+        metrics.commission.effective_rate, 
+        metrics.commission.commission_paid, 
+        metrics.commission.executed_volume,
+        1 if metrics.commission.bnb_discount else 0,
+        metrics.commission.vip_level,
+        metrics.execution_id, 
+        1 if metrics.success else 0, 
+        metrics.error_msg,
+        net_execution_cost, 
+        efficiency
+    )
+
+# Percentiles en streaming por bot/símbolo/estrategia (sketches por hora, retención 7 días)
+EXECUTION_SKETCH_ACCURACY = float(os.getenv("EXECUTION_SKETCH_ACCURACY", "0.01"))
+EXECUTION_SKETCH_PERSIST_SECONDS = float(os.getenv("EXECUTION_SKETCH_PERSIST_SECONDS", "60"))
+_SKETCH_METRICS = ("total_latency_ms", "api_latency_ms", "slippage_percentage")
+_SKETCH_BUCKET_SECONDS = 3600
+_SKETCH_RETENTION_BUCKETS = 169  # 168h del endpoint + la hora en curso
+
+_UPSERT_EXECUTION_SKETCH = '''
+    INSERT OR REPLACE INTO execution_metric_sketches (bucket_start, series, metric, sketch)
+    VALUES (?, ?, ?, ?)
+'''
+
+class ExecutionQualitySketches:
+    """
+    Sketches de latencia total, latencia API y slippage por (bot_id, symbol, strategy),
+    actualizados en cada ejecución. Las consultas combinan los buckets horarios de la
+    ventana (coste independiente del número de ejecuciones) y los sketches modificados
+    se persisten periódicamente en execution_metric_sketches para sobrevivir reinicios.
+    """
+    
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.store = WindowedSketchStore(
+            _SKETCH_METRICS,
+            bucket_seconds=_SKETCH_BUCKET_SECONDS,
+            retention_buckets=_SKETCH_RETENTION_BUCKETS,
+            relative_accuracy=EXECUTION_SKETCH_ACCURACY
+        )
+        self.writer = get_sqlite_batch_writer(db_path, _UPSERT_EXECUTION_SKETCH)
+        self._next_persist = time.monotonic() + EXECUTION_SKETCH_PERSIST_SECONDS
+    
+    def load(self):
+        """Restaurar los sketches persistidos dentro de la retención"""
+        oldest = int(time.time()) - _SKETCH_RETENTION_BUCKETS * _SKETCH_BUCKET_SECONDS
+        conn = sqlite3.connect(self.db_path)
+        try:
+            rows = conn.execute(
+                "SELECT bucket_start, series, metric, sketch FROM execution_metric_sketches WHERE bucket_start >= ?",
+                (oldest,)
+            ).fetchall()
+        finally:
+            conn.close()
+        self.store.load(rows)
+    
+    def record(self, metrics: ExecutionMetrics) -> bool:
+        """Añadir una ejecución (microsegundos); True si toca persistir"""
+        values = {
+            "total_latency_ms": metrics.latency.total_execution_time,
+            "api_latency_ms": metrics.latency.api_to_exchange
+        }
+        if metrics.success:  # Las órdenes fallidas no tienen precio ejecutado
+            values["slippage_percentage"] = abs(metrics.slippage.slippage_percentage)
+        self.store.add((metrics.bot_id, metrics.symbol, metrics.strategy), values)
+        
+        now = time.monotonic()
+        if now < self._next_persist:
+            return False
+        self._next_persist = now + EXECUTION_SKETCH_PERSIST_SECONDS
+        return True
+    
+    def persist(self):
+        """Encolar los sketches modificados desde la última persistencia"""
+        try:
+            for row in self.store.drain_dirty():
+                self.writer.submit(row)
+        except Exception as e:
+            logger.error(f"❌ Error persistiendo sketches de ejecución: {e}")
+    
+    def percentiles(self, timeframe_hours: int = 24, bot_id: Optional[int] = None,
+                    symbol: Optional[str] = None, strategy: Optional[str] = None) -> Dict[str, Any]:
+        """count/mean/max/p50/p90/p99/p99.9 por métrica (granularidad horaria)"""
+        def matches(key):
+            return ((bot_id is None or key[0] == bot_id)
+                    and (symbol is None or key[1] == symbol)
+                    and (strategy is None or key[2] == strategy))
+        
+        filtered = bot_id is not None or symbol is not None or strategy is not None
+        merged = self.store.merged(timeframe_hours * 3600, matches if filtered else None)
+        return {metric: sketch.summary() for metric, sketch in merged.items()}
+
+# Instancias globales por base de datos: todos los trackers de un mismo fichero comparten sketches
+_execution_sketches: Dict[str, ExecutionQualitySketches] = {}
+_execution_sketches_lock = threading.Lock()
+
+def get_execution_sketches(db_path: str) -> ExecutionQualitySketches:
+    key = os.path.abspath(db_path)
+    with _execution_sketches_lock:
+        sketches = _execution_sketches.get(key)
+        if sketches is None:
+            sketches = ExecutionQualitySketches(db_path)
+            sketches.load()
+            _execution_sketches[key] = sketches
+        return sketches
+
+def persist_execution_sketches():
+    """Persistir los sketches pendientes (shutdown, antes de cerrar los escritores)"""
+    with _execution_sketches_lock:
+        registered = list(_execution_sketches.values())
+    for sketches in registered:
+        sketches.persist()
+
 class ExecutionMetricsTracker:
     """Sistema principal de tracking de métricas de ejecución"""
     
@@ -97,6 +242,10 @@ class ExecutionMetricsTracker:
         
         self._init_database()
         
+        # Escritor compartido por base de datos: ring buffer + executemany por lotes (WAL)
+        self.writer = get_sqlite_batch_writer(self.db_path, _INSERT_EXECUTION_METRICS)
+        self.sketches = get_execution_sketches(self.db_path)
+        
     def _init_database(self):
         """Inicializar base de datos para métricas"""
         try:
@@ -152,6 +301,17 @@ class ExecutionMetricsTracker:
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_symbol_timestamp ON execution_metrics(symbol, timestamp)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_strategy ON execution_metrics(strategy)')
             
+            # Sketches de percentiles persistidos (bucket horario, serie JSON [bot_id, symbol, strategy])
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS execution_metric_sketches (
+                    bucket_start INTEGER NOT NULL,
+                    series TEXT NOT NULL,
+                    metric TEXT NOT NULL,
+                    sketch TEXT NOT NULL,
+                    PRIMARY KEY (bucket_start, series, metric)
+                )
+            ''')
+            
             conn.commit()
             conn.close()
             logger.info("✅ Base de datos de métricas inicializada correctamente")
@@ -358,54 +518,29 @@ class ExecutionMetricsTracker:
             return "EXTREME"
 
     async def _save_execution_metrics(self, metrics: ExecutionMetrics):
-        """Guardar métricas en base de datos"""
+        """Encolar métricas para el escritor en segundo plano (sin E/S en el camino de la orden)"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Calcular métricas derivadas
-            net_execution_cost = metrics.slippage.slippage_cost_usd + metrics.commission.commission_paid
-            efficiency = max(0, 100 - (net_execution_cost / (metrics.executed_price * metrics.quantity) * 100))
-            
-            cursor.execute('''
-                INSERT OR REPLACE INTO execution_metrics (
-                    timestamp, bot_id, symbol, side, strategy,
-                    expected_price, executed_price, quantity,
-                    total_latency_ms, api_latency_ms, latency_status,
-                    slippage_points, slippage_percentage, slippage_cost_usd, market_impact,
-                    commission_rate, commission_paid, trade_value, bnb_discount, vip_level,
-                    execution_id, success, error_msg,
-                    net_execution_cost, efficiency_percentage
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                metrics.timestamp, metrics.bot_id, metrics.symbol, metrics.side, metrics.strategy,
-                metrics.expected_price, metrics.executed_price, metrics.quantity,
-                metrics.latency.total_execution_time, 
-                metrics.latency.api_to_exchange, 
-                metrics.latency.status,
-                metrics.slippage.slippage_points, 
-                metrics.slippage.slippage_percentage, 
-                metrics.slippage.slippage_cost_usd, 
-                metrics.slippage.market_impact,
-                metrics.commission.effective_rate, 
-                metrics.commission.commission_paid, 
-                metrics.commission.executed_volume,
-                1 if metrics.commission.bnb_discount else 0,
-                metrics.commission.vip_level,
-                metrics.execution_id, 
-                1 if metrics.success else 0, 
-                metrics.error_msg,
-                net_execution_cost, 
-                efficiency
-            ))
-            
-            conn.commit()
-            conn.close()
-            
+            self.writer.submit(_execution_metrics_row(metrics))
+            if self.sketches.record(metrics):
+                # Serializar sketches fuera del camino de la orden
+                asyncio.get_running_loop().run_in_executor(None, self.sketches.persist)
         except Exception as e:
             logger.error(f"❌ Error guardando métricas: {e}")
             raise
 
+    async def query(self, sql: str, params: tuple = ()) -> List[tuple]:
+        """Consulta de lectura fuera del event loop, incluyendo métricas aún en buffer"""
+        return await self.writer.query_async(sql, params)
+
+    def writer_stats(self) -> Dict[str, Any]:
+        """Backpressure del escritor: pendientes, descartadas, lotes, high watermark"""
+        return self.writer.stats()
+
+    def get_execution_percentiles(self, timeframe_hours: int = 24, bot_id: Optional[int] = None,
+                                  symbol: Optional[str] = None, strategy: Optional[str] = None) -> Dict[str, Any]:
+        """Percentiles de latencia/slippage desde los sketches en memoria (sin consultar SQLite)"""
+        return self.sketches.percentiles(timeframe_hours, bot_id, symbol, strategy)
+
     async def get_bot_execution_summary(self, bot_id: int, timeframe_hours: int = 24) -> Dict[str, Any]:
         """
         Obtener resumen de métricas de ejecución para un bot
@@ -415,13 +550,10 @@ class ExecutionMetricsTracker:
             timeframe_hours: Ventana de tiempo en horas (default: 24h)
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
             # Calcular timestamp límite
             limit_time = datetime.utcnow() - timedelta(hours=timeframe_hours)
             
-            cursor.execute('''
+            rows = await self.query('''
                 SELECT 
                     COUNT(*) as total_executions,
                     AVG(total_latency_ms) as avg_latency,
@@ -437,8 +569,7 @@ class ExecutionMetricsTracker:
                 WHERE bot_id = ? AND timestamp > ?
             ''', (bot_id, limit_time.isoformat()))
             
-            result = cursor.fetchone()
-            conn.close()
+            result = rows[0] if rows else None
             
             if not result or result[0] == 0:
                 return {
@@ -468,7 +599,8 @@ class ExecutionMetricsTracker:
                 'quality_metrics': {
                     'low_slippage_rate': round((result[9] or 0) / total_executions * 100, 2),
                     'execution_quality_score': round((result[6] or 0), 2)  # Based on efficiency
-                }
+                },
+                'percentile_metrics': self.get_execution_percentiles(timeframe_hours, bot_id=bot_id)
             }
             
         except Exception as e:
@@ -478,10 +610,7 @@ class ExecutionMetricsTracker:
     async def get_recent_executions(self, bot_id: int, limit: int = 50) -> List[Dict[str, Any]]:
         """Obtener ejecuciones recientes para un bot"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
+            rows = await self.query('''
                 SELECT 
                     timestamp, symbol, side, strategy,
                     expected_price, executed_price, quantity,
@@ -493,9 +622,6 @@ class ExecutionMetricsTracker:
                 LIMIT ?
             ''', (bot_id, limit))
             
-            rows = cursor.fetchall()
-            conn.close()
-            
             executions = []
             for row in rows:
                 executions.append({
@@ -557,5 +683,139 @@ async def test_execution_metrics():
     print(f"Costo total ejecución: ${summary['cost_metrics']['total_execution_cost']:.4f}")
     print(f"Eficiencia promedio: {summary['cost_metrics']['avg_efficiency']:.2f}%")
 
+def _legacy_save(db_path: str, row: tuple):
+    """Escritura previa: conexión + commit síncrono por orden"""
+    conn = sqlite3.connect(db_path)
+    conn.execute(_INSERT_EXECUTION_METRICS, row)
+    conn.commit()
+    conn.close()
+
+async def benchmark_execution_metrics_writer(n_orders: int = 2000):
+    """Coste por orden de registrar métricas: sqlite3.connect + commit vs escritor por lotes"""
+    import os
+    import tempfile
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        tracker = ExecutionMetricsTracker(db_path=os.path.join(tmp, "bench_metrics.db"))
+        sample = ExecutionMetrics(
+            timestamp=datetime.utcnow().isoformat(), bot_id=1, symbol="BTCUSDT", side="BUY",
+            strategy="Smart Scalper", expected_price=65000.0, executed_price=65013.0, quantity=0.001,
+            latency=LatencyMetrics(5.0, 35.0, 10.0, 5.0, 55.0, "OPTIMAL"),
+            slippage=SlippageMetrics(65000.0, 65013.0, 13.0, 0.02, 0.013, "MEDIUM"),
+            commission=CommissionMetrics(0.001, 65.013, 0.0488, True, 0.00075, 0),
+            execution_id="", success=True
+        )
+        
+        legacy_db = os.path.join(tmp, "legacy_metrics.db")
+        ExecutionMetricsTracker(db_path=legacy_db)
+        start = time.perf_counter()
+        for i in range(n_orders):
+            sample.execution_id = f"legacy_{i}"
+            _legacy_save(legacy_db, _execution_metrics_row(sample))
+        legacy_us = (time.perf_counter() - start) * 1e6 / n_orders
+        
+        start = time.perf_counter()
+        for i in range(n_orders):
+            sample.execution_id = f"batched_{i}"
+            await tracker._save_execution_metrics(sample)
+        batched_us = (time.perf_counter() - start) * 1e6 / n_orders
+        
+        rows = await tracker.query("SELECT COUNT(*) FROM execution_metrics")
+        stats = tracker.writer_stats()
+        assert rows[0][0] == n_orders and stats["dropped"] == 0 and stats["failed"] == 0
+        tracker.writer.close()
+    
+    print(f"🧪 Execution metrics writer: {n_orders} órdenes")
+    print(f"   connect + commit por orden: {legacy_us:8.1f} µs/orden")
+    print(f"   ring buffer + lotes:        {batched_us:8.1f} µs/orden ({stats['batches']} lotes)")
+
+async def test_execution_percentiles(n_orders: int = 3000):
+    """Percentiles de los sketches vs numpy sobre las mismas ejecuciones, y restauración tras reinicio"""
+    import tempfile
+    import numpy as np
+    
+    print("🧪 Testing percentiles de ejecución...")
+    rng = np.random.default_rng(5)
+    latencies = rng.lognormal(4, 0.5, n_orders)
+    slippages = rng.exponential(0.02, n_orders)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "percentiles_metrics.db")
+        tracker = ExecutionMetricsTracker(db_path=db_path)
+        for i in range(n_orders):
+            latency = float(latencies[i])
+            await tracker._save_execution_metrics(ExecutionMetrics(
+                timestamp=datetime.utcnow().isoformat(), bot_id=1 + i % 2, symbol="BTCUSDT", side="BUY",
+                strategy="Smart Scalper", expected_price=65000.0, executed_price=65013.0, quantity=0.001,
+                latency=LatencyMetrics(5.0, latency * 0.6, 10.0, 5.0, latency, "OPTIMAL"),
+                slippage=SlippageMetrics(65000.0, 65013.0, 13.0, float(slippages[i]), 0.013, "LOW"),
+                commission=CommissionMetrics(0.001, 65.013, 0.0488, True, 0.00075, 0),
+                execution_id=f"pct_{i}", success=True
+            ))
+        
+        system = tracker.get_execution_percentiles(24)
+        assert system["total_latency_ms"]["count"] == n_orders
+        for key, q in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99)):
+            exact = np.quantile(latencies, q)
+            assert abs(system["total_latency_ms"][key] - exact) / exact < 0.02, (key, exact)
+        bot_1 = tracker.get_execution_percentiles(24, bot_id=1)
+        assert bot_1["slippage_percentage"]["count"] == (n_orders + 1) // 2
+        
+        summary = await tracker.get_bot_execution_summary(bot_id=1)
+        assert summary["percentile_metrics"]["total_latency_ms"]["count"] == (n_orders + 1) // 2
+        
+        # Reinicio: persistir, cerrar escritores y recargar desde SQLite
+        persist_execution_sketches()
+        tracker.sketches.writer.close()
+        tracker.writer.close()
+        _execution_sketches.clear()
+        restored = ExecutionMetricsTracker(db_path=db_path).get_execution_percentiles(24)
+        assert restored == system
+        restored_tracker = _execution_sketches.pop(os.path.abspath(db_path))
+        restored_tracker.writer.close()
+    
+    print(f"✅ Percentiles OK: p50={system['total_latency_ms']['p50']}ms "
+          f"p99={system['total_latency_ms']['p99']}ms p99.9={system['total_latency_ms']['p99_9']}ms")
+
+def benchmark_execution_percentiles(n_orders: int = 100_000, n_bots: int = 50):
+    """Coste de actualizar los sketches por orden y de consultar p50..p99.9 de un bot y del sistema"""
+    import tempfile
+    import numpy as np
+    
+    latencies = np.random.default_rng(9).lognormal(4, 0.5, n_orders).tolist()
+    with tempfile.TemporaryDirectory() as tmp:
+        sketches = ExecutionQualitySketches(os.path.join(tmp, "unused.db"))
+        sample = ExecutionMetrics(
+            timestamp="", bot_id=1, symbol="BTCUSDT", side="BUY", strategy="Smart Scalper",
+            expected_price=65000.0, executed_price=65013.0, quantity=0.001,
+            latency=LatencyMetrics(5.0, 35.0, 10.0, 5.0, 55.0, "OPTIMAL"),
+            slippage=SlippageMetrics(65000.0, 65013.0, 13.0, 0.02, 0.013, "MEDIUM"),
+            commission=CommissionMetrics(0.001, 65.013, 0.0488, True, 0.00075, 0),
+            execution_id="", success=True
+        )
+        start = time.perf_counter()
+        for i, latency in enumerate(latencies):
+            sample.bot_id = i % n_bots
+            sample.latency.total_execution_time = latency
+            sketches.record(sample)
+        record_us = (time.perf_counter() - start) * 1e6 / n_orders
+        
+        start = time.perf_counter()
+        for _ in range(100):
+            sketches.percentiles(24, bot_id=7)
+        bot_ms = (time.perf_counter() - start) * 10
+        start = time.perf_counter()
+        for _ in range(100):
+            sketches.percentiles(24)
+        system_ms = (time.perf_counter() - start) * 10
+    
+    print(f"🧪 Execution percentiles: {n_orders} órdenes, {n_bots} bots")
+    print(f"   record() por orden:       {record_us:8.2f} µs")
+    print(f"   percentiles de un bot:    {bot_ms:8.3f} ms")
+    print(f"   percentiles del sistema:  {system_ms:8.3f} ms")
+
 if __name__ == "__main__":
-    asyncio.run(test_execution_metrics())
\ No newline at end of file
+    asyncio.run(test_execution_metrics())
+    asyncio.run(test_execution_percentiles())
+    benchmark_execution_percentiles()
+    asyncio.run(benchmark_execution_metrics_writer())
\ No newline at end of file
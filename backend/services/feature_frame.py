@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+🧮 FeatureFrame - Frame de features inmutable compartido por el pipeline Smart Scalper
+OHLCV de un (símbolo, timeframe, última vela) como arrays float64 de solo lectura
+más indicadores memoizados: cada indicador/parámetro/ventana se calcula una única
+vez por frame aunque lo pidan SmartScalperEngine, create_timeframe_data,
+MultiTimeframeCoordinator, AdvancedAlgorithmSelector o SignalQualityAssessor.
+
+Los valores replican exactamente las funciones de services/ta_alternative
+(mismos kernels y mismos fallbacks con pocas velas).
+
+Eduard Guzmán - InteliBotX
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from services.ta_alternative import (
+    calculate_rsi, calculate_ema, calculate_sma, calculate_atr,
+    calculate_bollinger_bands, detect_volume_spike
+)
+
+logger = logging.getLogger(__name__)
+
+ArrayLike = Union[Sequence[float], np.ndarray]
+FeatureKey = Tuple[str, str, Optional[int]]
+
+_COLUMNS = ("opens", "highs", "lows", "closes", "volumes")
+
+
+def _readonly(values: ArrayLike) -> np.ndarray:
+    array = np.array(values, dtype=np.float64)
+    array.setflags(write=False)
+    return array
+
+
+@dataclass(frozen=True, eq=False)
+class FeatureFrame:
+    """
+    Velas + indicadores de un (symbol, timeframe, last_candle_time).
+
+    Los arrays no son modificables y los indicadores se memoizan por
+    (nombre, parámetros, ventana); `window=N` evalúa sobre las últimas N velas.
+    """
+    symbol: str
+    timeframe: str
+    last_candle_time: Optional[int]
+    opens: np.ndarray
+    highs: np.ndarray
+    lows: np.ndarray
+    closes: np.ndarray
+    volumes: np.ndarray
+    _memo: Dict[Hashable, Any] = field(default_factory=dict, repr=False)
+
+    @classmethod
+    def from_ohlcv(cls, symbol: str, timeframe: str, opens: ArrayLike, highs: ArrayLike,
+                   lows: ArrayLike, closes: ArrayLike, volumes: ArrayLike,
+                   last_candle_time: Optional[int] = None) -> "FeatureFrame":
+        return cls(symbol, timeframe, last_candle_time, _readonly(opens), _readonly(highs),
+                   _readonly(lows), _readonly(closes), _readonly(volumes))
+
+    @classmethod
+    def from_klines_df(cls, symbol: str, timeframe: str, df: pd.DataFrame) -> "FeatureFrame":
+        """Desde el DataFrame de BinanceRealDataService.get_klines (timestamp = open time ms)"""
+        last_candle_time = int(df["timestamp"].iloc[-1]) if "timestamp" in df.columns and len(df) else None
+        return cls.from_ohlcv(symbol, timeframe, df["open"].to_numpy(), df["high"].to_numpy(),
+                              df["low"].to_numpy(), df["close"].to_numpy(), df["volume"].to_numpy(),
+                              last_candle_time)
+
+    @property
+    def key(self) -> FeatureKey:
+        """Clave única de memoización del frame"""
+        return (self.symbol, self.timeframe, self.last_candle_time)
+
+    def __len__(self) -> int:
+        return self.closes.shape[0]
+
+    def matches(self, closes: ArrayLike, volumes: ArrayLike) -> bool:
+        """
+        La vela en curso de Binance conserva su open time mientras cambia: el frame
+        solo es reutilizable si longitud, primera/última close y último volumen coinciden.
+        """
+        n = len(closes)
+        return (n == len(self) and n > 0
+                and float(closes[0]) == self.closes[0]
+                and float(closes[-1]) == self.closes[-1]
+                and float(volumes[-1]) == self.volumes[-1])
+
+    def tail(self, column: str, window: Optional[int] = None) -> np.ndarray:
+        values = getattr(self, column)
+        return values if window is None else values[-window:]
+
+    def _memoized(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        try:
+            return self._memo[key]
+        except KeyError:
+            value = self._memo[key] = compute()
+            return value
+
+    # =================================================================
+    # INDICADORES (semántica de ta_alternative)
+    # =================================================================
+
+    def rsi(self, period: int = 14, window: Optional[int] = None) -> float:
+        return self._memoized(("rsi", period, window),
+                              lambda: float(calculate_rsi(self.tail("closes", window), period)))
+
+    def ema(self, period: int, window: Optional[int] = None) -> float:
+        return self._memoized(("ema", period, window),
+                              lambda: float(calculate_ema(self.tail("closes", window), period)))
+
+    def sma(self, period: int, window: Optional[int] = None, column: str = "closes") -> float:
+        return self._memoized(("sma", column, period, window),
+                              lambda: float(calculate_sma(self.tail(column, window), period)))
+
+    def atr(self, period: int = 14, window: Optional[int] = None) -> float:
+        return self._memoized(("atr", period, window), lambda: float(calculate_atr(
+            self.tail("highs", window), self.tail("lows", window), self.tail("closes", window), period)))
+
+    def bollinger(self, period: int = 20, std_dev: float = 2,
+                  window: Optional[int] = None) -> Tuple[float, float, float]:
+        def compute():
+            upper, middle, lower = calculate_bollinger_bands(self.tail("closes", window), period, std_dev)
+            return float(upper), float(middle), float(lower)
+        return self._memoized(("bollinger", period, std_dev, window), compute)
+
+    def volume_spike(self, threshold: float = 1.5, period: int = 20,
+                     window: Optional[int] = None) -> Tuple[bool, float]:
+        def compute():
+            spike, ratio = detect_volume_spike(self.tail("volumes", window), threshold, period)
+            return bool(spike), float(ratio)
+        return self._memoized(("volume_spike", threshold, period, window), compute)
+
+    # =================================================================
+    # VISTAS PARA CONSUMIDORES EXISTENTES
+    # =================================================================
+
+    def as_lists(self, window: Optional[int] = None) -> Dict[str, List[float]]:
+        """Columnas como listas (TimeframeData y servicios que trabajan con List[float])"""
+        return self._memoized(("lists", window),
+                              lambda: {column: self.tail(column, window).tolist() for column in _COLUMNS})
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """DataFrame OHLCV (open/high/low/close/volume) construido una vez por frame"""
+        return self._memoized("dataframe", lambda: pd.DataFrame({
+            "open": self.opens, "high": self.highs, "low": self.lows,
+            "close": self.closes, "volume": self.volumes
+        }))
+
+    @property
+    def computed_features(self) -> int:
+        return len(self._memo)
+
+
+# =================================================================
+# CACHE POR (symbol, timeframe, last_candle_time)
+# =================================================================
+
+class FeatureFrameCache:
+    """LRU acotado de frames; compartido entre requests y threads del pool de análisis"""
+
+    def __init__(self, max_size: Optional[int] = None):
+        self.max_size = max_size or int(os.getenv("FEATURE_FRAME_CACHE_SIZE", "512"))
+        self._frames: "OrderedDict[FeatureKey, FeatureFrame]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, symbol: str, timeframe: str, opens: ArrayLike, highs: ArrayLike, lows: ArrayLike,
+            closes: ArrayLike, volumes: ArrayLike, last_candle_time: Optional[int]) -> FeatureFrame:
+        if last_candle_time is None:
+            return FeatureFrame.from_ohlcv(symbol, timeframe, opens, highs, lows, closes, volumes)
+
+        key = (symbol, timeframe, int(last_candle_time))
+        with self._lock:
+            frame = self._frames.get(key)
+            if frame is not None and frame.matches(closes, volumes):
+                self._frames.move_to_end(key)
+                self.hits += 1
+                return frame
+            self.misses += 1
+
+        frame = FeatureFrame.from_ohlcv(symbol, timeframe, opens, highs, lows, closes, volumes, key[2])
+        with self._lock:
+            self._frames[key] = frame
+            self._frames.move_to_end(key)
+            while len(self._frames) > self.max_size:
+                self._frames.popitem(last=False)
+        return frame
+
+    def get_stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "frames": len(self._frames),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0
+        }
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+
+
+# Instancia global del cache de frames
+feature_frame_cache = FeatureFrameCache()
+
+
+def get_feature_frame(symbol: str, timeframe: str, opens: ArrayLike, highs: ArrayLike, lows: ArrayLike,
+                      closes: ArrayLike, volumes: ArrayLike,
+                      last_candle_time: Optional[int] = None) -> FeatureFrame:
+    """Frame memoizado por (symbol, timeframe, last_candle_time); sin tiempo no se cachea"""
+    return feature_frame_cache.get(symbol, timeframe, opens, highs, lows, closes, volumes, last_candle_time)
+
+
+# =================================================================
+# TESTING & BENCHMARK
+# =================================================================
+
+def _synthetic_ohlcv(n_bars: int, seed: int):
+    rng = np.random.default_rng(seed)
+    closes = (100 + np.cumsum(rng.normal(0, 0.5, n_bars))).tolist()
+    highs = [c + abs(rng.normal(0, 0.3)) for c in closes]
+    lows = [c - abs(rng.normal(0, 0.3)) for c in closes]
+    volumes = rng.lognormal(7, 0.6, n_bars).tolist()
+    opens = closes[:1] + closes[:-1]
+    return opens, highs, lows, closes, volumes
+
+
+def test_feature_frame():
+    """Valores idénticos a ta_alternative, memoización por clave e invalidación de la vela en curso"""
+    print("🧪 Testing FeatureFrame...")
+
+    for n_bars in (5, 30, 100):
+        opens, highs, lows, closes, volumes = _synthetic_ohlcv(n_bars, seed=n_bars)
+        frame = FeatureFrame.from_ohlcv("BTCUSDT", "1m", opens, highs, lows, closes, volumes, 1)
+        for window in (None, 50):
+            c = closes[-window:] if window else closes
+            h = highs[-window:] if window else highs
+            l = lows[-window:] if window else lows
+            v = volumes[-window:] if window else volumes
+            assert frame.rsi(14, window) == calculate_rsi(c)
+            for period in (9, 20, 21, 50, 200):
+                assert frame.ema(period, window) == calculate_ema(c, period)
+            assert frame.atr(14, window) == calculate_atr(h, l, c)
+            assert frame.bollinger(20, 2, window) == calculate_bollinger_bands(c, 20, 2)
+            assert frame.volume_spike(2.0, 20, window) == detect_volume_spike(v, threshold=2.0)
+            assert frame.sma(20, window, column="volumes") == calculate_sma(v, 20)
+
+        computed = frame.computed_features
+        frame.ema(9), frame.rsi(), frame.atr()
+        assert frame.computed_features == computed
+        try:
+            frame.closes[0] = 0.0
+            raise AssertionError("los arrays del frame deben ser de solo lectura")
+        except ValueError:
+            pass
+
+    cache = FeatureFrameCache(max_size=2)
+    opens, highs, lows, closes, volumes = _synthetic_ohlcv(100, seed=1)
+    first = cache.get("BTCUSDT", "1m", opens, highs, lows, closes, volumes, 1000)
+    assert cache.get("BTCUSDT", "1m", opens, highs, lows, closes, volumes, 1000) is first
+    # Misma vela abierta con nuevo precio -> frame nuevo
+    updated = closes[:-1] + [closes[-1] + 1]
+    assert cache.get("BTCUSDT", "1m", opens, highs, lows, updated, volumes, 1000) is not first
+    cache.get("ETHUSDT", "1m", opens, highs, lows, closes, volumes, 1000)
+    cache.get("SOLUSDT", "1m", opens, highs, lows, closes, volumes, 1000)
+    assert cache.get_stats()["frames"] == 2
+
+    print(f"📊 Cache stats: {cache.get_stats()}")
+    print("✅ FeatureFrame test completed")
+
+
+def benchmark_feature_frame(n_bars: int = 100, requests: int = 200):
+    """Indicadores de una request Smart Scalper (4 timeframes + motor) con y sin frame compartido"""
+    from services.smart_scalper_algorithms import SmartScalperEngine
+
+    logging.disable(logging.INFO)
+    engine = SmartScalperEngine()
+    opens, highs, lows, closes, volumes = _synthetic_ohlcv(n_bars, seed=3)
+
+    def recomputed():
+        # Cada consumidor recalcula sus indicadores a partir de las listas (flujo previo)
+        for _ in range(4):
+            calculate_rsi(closes[-50:]), calculate_atr(highs[-50:], lows[-50:], closes[-50:])
+            for period in (9, 21, 50):
+                calculate_ema(closes[-50:], period)
+            calculate_ema(closes, 200)
+        for _ in range(3):
+            calculate_rsi(closes), detect_volume_spike(volumes), calculate_atr(highs, lows, closes)
+            for period in (9, 21, 9, 21, 50):
+                calculate_ema(closes, period)
+        for period in (20, 50, 9, 21, 12, 26):
+            calculate_ema(closes, period)
+        calculate_atr(highs, lows, closes), calculate_atr(highs, lows, closes)
+
+    def shared():
+        frame = FeatureFrame.from_ohlcv("BTCUSDT", "1m", opens, highs, lows, closes, volumes)
+        for _ in range(4):
+            frame.rsi(14, 50), frame.atr(14, 50)
+            for period in (9, 21, 50):
+                frame.ema(period, 50)
+            frame.ema(200)
+        engine.generate_signal("BTCUSDT", highs, lows, closes, volumes, features=frame)
+        return frame
+
+    print(f"🧪 FeatureFrame benchmark: {n_bars} velas, {requests} requests")
+    for name, workload in (("recalculado", recomputed), ("frame compartido", shared)):
+        workload()
+        start = time.perf_counter()
+        for _ in range(requests):
+            workload()
+        print(f"   {name:17s}: {(time.perf_counter() - start) * 1000 / requests:6.3f} ms por request")
+    print(f"   indicadores distintos calculados por request con frame: {shared().computed_features}")
+    logging.disable(logging.NOTSET)
+
+
+if __name__ == "__main__":
+    test_feature_frame()
+    benchmark_feature_frame()
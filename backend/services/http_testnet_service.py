@@ -3,6 +3,7 @@ import time
 import os
 from dotenv import load_dotenv
 from utils.signature import sign_request
+from utils.http_client_pool import http_client_pool
 import hmac
 import hashlib
 from urllib.parse import urlencode
@@ -43,7 +44,7 @@ async def create_testnet_order(symbol: str, side: str, quantity: str, price: str
     print("📨 FULL URL:", f"{BASE_URL}/api/v3/order", full_params)
 
     # Enviar request
-    async with httpx.AsyncClient() as client:
+    async with http_client_pool.client() as client:
         try:
             response = await client.post(
                 f"{BASE_URL}/api/v3/order",
@@ -74,7 +75,7 @@ async def get_open_orders(symbol: str = None):
     params["signature"] = signature
     headers = {"X-MBX-APIKEY": API_KEY}
 
-    async with httpx.AsyncClient() as client:
+    async with http_client_pool.client() as client:
         try:
             response = await client.get(
                 f"{BASE_URL}/api/v3/openOrders",
@@ -99,7 +100,7 @@ async def get_testnet_order_status(symbol: str, order_id: int):
     params["signature"] = signature
     headers = {"X-MBX-APIKEY": API_KEY}
 
-    async with httpx.AsyncClient() as client:
+    async with http_client_pool.client() as client:
         try:
             response = await client.get(
                 f"{BASE_URL}/api/v3/order",
@@ -123,7 +124,7 @@ async def cancel_testnet_order(symbol: str, order_id: int):
     params["signature"] = signature
     headers = {"X-MBX-APIKEY": API_KEY}
 
-    async with httpx.AsyncClient() as client:
+    async with http_client_pool.client() as client:
         try:
             response = await client.delete(
                 f"{BASE_URL}/api/v3/order",
@@ -144,7 +145,7 @@ async def get_all_testnet_orders(symbol: str):
     params["signature"] = sign_request(params, API_SECRET)
     headers = {"X-MBX-APIKEY": API_KEY}
 
-    async with httpx.AsyncClient() as client:
+    async with http_client_pool.client() as client:
         try:
             response = await client.get(
                 f"{BASE_URL}/api/v3/allOrders",
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+⚡ Indicator Kernels - Indicadores técnicos vectorizados sobre arrays NumPy
+Calcula la serie completa de cada indicador sobre arrays float64 contiguos,
+sin construir DataFrames de pandas por llamada.
+
+Los resultados replican la semántica de pandas usada históricamente en
+services/ta_alternative.py (rolling().mean(), ewm(span).mean(), std ddof=1),
+de modo que las funciones de ta_alternative son wrappers delgados sobre estos kernels.
+
+Eduard Guzmán - InteliBotX
+"""
+
+import time
+import numpy as np
+from dataclasses import dataclass
+from typing import Dict, Sequence, Tuple, Union
+
+from services.rolling_extrema import rolling_max, rolling_min
+
+ArrayLike = Union[Sequence[float], np.ndarray]
+
+# Rango dinámico máximo permitido dentro de un bloque del filtro EMA (evita overflow de w^-k)
+_EWM_MAX_LOG_RANGE = 300.0
+
+
+def as_float_array(values: ArrayLike) -> np.ndarray:
+    """Convertir lista/array a ndarray float64 contiguo (sin copia si ya lo es)"""
+    return np.ascontiguousarray(values, dtype=np.float64)
+
+
+def _recursive_filter(values: np.ndarray, decay: float) -> np.ndarray:
+    """
+    Resolver s[t] = x[t] + decay * s[t-1] (s[-1] = 0) de forma vectorizada.
+
+    Dentro de cada bloque se usa s[t] = decay^t * cumsum(x[j] * decay^-j); el tamaño
+    de bloque se limita para que decay^-j no desborde float64 y el estado se arrastra
+    entre bloques.
+    """
+    n = values.shape[0]
+    result = np.empty(n, dtype=np.float64)
+    if n == 0:
+        return result
+    if decay == 0.0:
+        result[:] = values
+        return result
+
+    log_decay = np.log(decay)
+    block = max(1, min(n, int(_EWM_MAX_LOG_RANGE / -log_decay)))
+    exponents = np.arange(block, dtype=np.float64)
+    growth = np.exp(-log_decay * exponents)      # decay^-j
+    shrink = np.exp(log_decay * exponents)       # decay^j
+
+    carry = 0.0
+    for start in range(0, n, block):
+        stop = min(start + block, n)
+        size = stop - start
+        partial = np.cumsum(values[start:stop] * growth[:size]) * shrink[:size]
+        if carry:
+            partial += carry * decay * shrink[:size]
+        result[start:stop] = partial
+        carry = partial[-1]
+    return result
+
+
+def sma_series(values: ArrayLike, period: int) -> np.ndarray:
+    """Media móvil simple (NaN hasta completar la ventana), equivalente a rolling(period).mean()"""
+    data = as_float_array(values)
+    n = data.shape[0]
+    result = np.full(n, np.nan)
+    if period <= 0 or n < period:
+        return result
+
+    # Centrar antes de acumular reduce la cancelación numérica de cumsum
+    offset = data[:period].mean()
+    csum = np.cumsum(data - offset)
+    result[period - 1] = csum[period - 1] / period + offset
+    result[period:] = (csum[period:] - csum[:-period]) / period + offset
+    return result
+
+
+def rolling_std_series(values: ArrayLike, period: int, ddof: int = 1) -> np.ndarray:
+    """Desviación estándar móvil, equivalente a rolling(period).std(ddof)"""
+    data = as_float_array(values)
+    n = data.shape[0]
+    result = np.full(n, np.nan)
+    if period <= ddof or n < period:
+        return result
+
+    centered = data - data.mean()
+    csum = np.concatenate(([0.0], np.cumsum(centered)))
+    csq = np.concatenate(([0.0], np.cumsum(centered * centered)))
+    window_sum = csum[period:] - csum[:-period]
+    window_sq = csq[period:] - csq[:-period]
+    variance = (window_sq - window_sum * window_sum / period) / (period - ddof)
+    result[period - 1:] = np.sqrt(np.maximum(variance, 0.0))
+    return result
+
+
+def ema_series(values: ArrayLike, period: int) -> np.ndarray:
+    """EMA ajustada, equivalente a pandas ewm(span=period, adjust=True).mean()"""
+    data = as_float_array(values)
+    if data.shape[0] == 0:
+        return data.copy()
+
+    alpha = 2.0 / (period + 1.0)
+    decay = 1.0 - alpha
+    numerator = _recursive_filter(data, decay)
+    # Suma de pesos en forma cerrada: (1 - decay^(t+1)) / (1 - decay)
+    steps = np.arange(1, data.shape[0] + 1, dtype=np.float64)
+    denominator = (1.0 - np.power(decay, steps)) / alpha
+    return numerator / denominator
+
+
+def rsi_series(closes: ArrayLike, period: int = 14) -> np.ndarray:
+    """RSI con medias simples de ganancias/pérdidas (semántica histórica de ta_alternative)"""
+    data = as_float_array(closes)
+    if data.shape[0] == 0:
+        return data.copy()
+
+    # El primer delta es 0 (pandas: NaN.where(...) -> 0)
+    delta = np.diff(data, prepend=data[0])
+    gain = sma_series(np.where(delta > 0, delta, 0.0), period)
+    loss = sma_series(np.where(delta < 0, -delta, 0.0), period)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = gain / loss
+        rsi = 100.0 - 100.0 / (1.0 + rs)
+    return rsi
+
+
+def true_range_series(highs: ArrayLike, lows: ArrayLike, closes: ArrayLike) -> np.ndarray:
+    """True Range; la primera vela usa high - low"""
+    high = as_float_array(highs)
+    low = as_float_array(lows)
+    close = as_float_array(closes)
+    if high.shape[0] == 0:
+        return high.copy()
+
+    prev_close = np.empty_like(close)
+    prev_close[0] = np.nan
+    prev_close[1:] = close[:-1]
+
+    true_range = high - low
+    np.fmax(true_range, np.abs(high - prev_close), out=true_range)
+    np.fmax(true_range, np.abs(low - prev_close), out=true_range)
+    return true_range
+
+
+def atr_series(highs: ArrayLike, lows: ArrayLike, closes: ArrayLike, period: int = 14) -> np.ndarray:
+    """ATR como media simple del True Range"""
+    return sma_series(true_range_series(highs, lows, closes), period)
+
+
+def bollinger_series(closes: ArrayLike, period: int = 20,
+                     std_dev: float = 2) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Bandas de Bollinger (upper, middle, lower) como series completas"""
+    middle = sma_series(closes, period)
+    deviation = rolling_std_series(closes, period) * std_dev
+    return middle + deviation, middle, middle - deviation
+
+
+def last_valid(series: np.ndarray, default: float) -> float:
+    """Último valor de una serie o default si no existe o es NaN"""
+    if series.shape[0] == 0:
+        return default
+    value = series[-1]
+    return default if np.isnan(value) else float(value)
+
+
+_WINDOW_REDUCERS = {"mean": np.mean, "sum": np.sum}
+_WINDOW_EXTREMA = {"max": rolling_max, "min": rolling_min}
+
+
+def rolling_window_reduce(values: ArrayLike, window: int, how: str = "mean") -> np.ndarray:
+    """
+    Reducción sobre ventanas deslizantes: out[j] = how(values[j:j + window]).
+
+    mean/sum operan sobre una vista sin copia y recorren cada ventana en el mismo orden
+    que ndarray.mean() sobre el slice, por lo que el resultado es idéntico bit a bit al
+    de los bucles por vela que reemplaza; max/min usan el motor O(n) de rolling_extrema.
+    """
+    data = np.asarray(values)
+    if window <= 0 or data.shape[0] < window:
+        return np.empty(0, dtype=np.float64)
+    if how in _WINDOW_EXTREMA:
+        return _WINDOW_EXTREMA[how](data, window)
+    windows = np.lib.stride_tricks.sliding_window_view(data, window)
+    return _WINDOW_REDUCERS[how](windows, axis=1)
+
+
+def trailing_window(values: ArrayLike, window: int, how: str = "mean") -> np.ndarray:
+    """out[i] = how(values[i - window:i]) (velas previas, sin la actual); NaN si i < window"""
+    data = np.asarray(values)
+    result = np.full(data.shape[0], np.nan)
+    if data.shape[0] > window:
+        result[window:] = rolling_window_reduce(data[:-1], window, how)
+    return result
+
+
+def leading_window(values: ArrayLike, window: int, how: str = "min") -> np.ndarray:
+    """out[i] = how(values[i + 1:i + 1 + window]) (velas siguientes); NaN si no hay suficientes"""
+    data = np.asarray(values)
+    n = data.shape[0]
+    result = np.full(n, np.nan)
+    if n > window:
+        result[:n - window] = rolling_window_reduce(data[1:], window, how)
+    return result
+
+
+@dataclass(frozen=True)
+class IndicatorSeries:
+    """Series completas de indicadores calculadas en una sola pasada"""
+    closes: np.ndarray
+    rsi: np.ndarray
+    ema: Dict[int, np.ndarray]
+    true_range: np.ndarray
+    atr: np.ndarray
+    bb_upper: np.ndarray
+    bb_middle: np.ndarray
+    bb_lower: np.ndarray
+    volume_sma: np.ndarray
+    macd: np.ndarray
+    macd_signal: np.ndarray
+    macd_histogram: np.ndarray
+
+
+def compute_indicator_series(highs: ArrayLike, lows: ArrayLike, closes: ArrayLike,
+                             volumes: ArrayLike,
+                             ema_periods: Sequence[int] = (9, 12, 21, 26, 50),
+                             rsi_period: int = 14, atr_period: int = 14,
+                             bb_period: int = 20, bb_std: float = 2,
+                             volume_period: int = 20) -> IndicatorSeries:
+    """
+    Calcular todas las series de indicadores sobre los mismos arrays float64.
+
+    Los arrays de entrada se convierten una sola vez y cada kernel trabaja sobre ellos
+    (el True Range y las EMAs se reutilizan para ATR y MACD).
+    """
+    high = as_float_array(highs)
+    low = as_float_array(lows)
+    close = as_float_array(closes)
+    volume = as_float_array(volumes)
+
+    emas = {period: ema_series(close, period) for period in set(ema_periods) | {12, 26}}
+    macd = emas[12] - emas[26]
+    macd_signal = ema_series(macd, 9)
+
+    true_range = true_range_series(high, low, close)
+    bb_upper, bb_middle, bb_lower = bollinger_series(close, bb_period, bb_std)
+
+    return IndicatorSeries(
+        closes=close,
+        rsi=rsi_series(close, rsi_period),
+        ema=emas,
+        true_range=true_range,
+        atr=sma_series(true_range, atr_period),
+        bb_upper=bb_upper,
+        bb_middle=bb_middle,
+        bb_lower=bb_lower,
+        volume_sma=sma_series(volume, volume_period),
+        macd=macd,
+        macd_signal=macd_signal,
+        macd_histogram=macd - macd_signal
+    )
+
+
+# =================================================================
+# BENCHMARK
+# =================================================================
+
+def _pandas_signal_workload(highs, lows, closes, volumes):
+    """Carga de indicadores de una señal Smart Scalper con la implementación pandas previa"""
+    import pandas as pd
+
+    def rsi(values, period=14):
+        delta = pd.DataFrame({'close': values})['close'].diff()
+        gain = delta.where(delta > 0, 0).rolling(window=period).mean()
+        loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
+        return float((100 - (100 / (1 + gain / loss))).iloc[-1])
+
+    def ema(values, period):
+        return float(pd.DataFrame({'close': values})['close'].ewm(span=period).mean().iloc[-1])
+
+    def atr(period=14):
+        df = pd.DataFrame({'high': highs, 'low': lows, 'close': closes})
+        df['prev_close'] = df['close'].shift(1)
+        df['tr1'] = df['high'] - df['low']
+        df['tr2'] = abs(df['high'] - df['prev_close'])
+        df['tr3'] = abs(df['low'] - df['prev_close'])
+        tr = df[['tr1', 'tr2', 'tr3']].max(axis=1)
+        return float(tr.rolling(window=period).mean().iloc[-1])
+
+    def bollinger(period=20):
+        series = pd.DataFrame({'close': closes})['close']
+        middle = series.rolling(window=period).mean()
+        std = series.rolling(window=period).std()
+        return float((middle + 2 * std).iloc[-1]), float(middle.iloc[-1]), float((middle - 2 * std).iloc[-1])
+
+    for _ in range(2):
+        rsi(closes)
+    for period in (20, 50, 9, 21, 9, 21, 50, 12, 26, 20):
+        ema(closes, period)
+    for _ in range(4):
+        atr()
+    bollinger()
+
+
+def _kernel_signal_workload(highs, lows, closes, volumes):
+    """Misma carga usando los wrappers de ta_alternative respaldados por kernels"""
+    from services.ta_alternative import calculate_rsi, calculate_ema, calculate_atr, calculate_bollinger_bands
+
+    for _ in range(2):
+        calculate_rsi(closes)
+    for period in (20, 50, 9, 21, 9, 21, 50, 12, 26, 20):
+        calculate_ema(closes, period)
+    for _ in range(4):
+        calculate_atr(highs, lows, closes)
+    calculate_bollinger_bands(closes)
+
+
+def benchmark_indicator_kernels(n_bars: int = 100, iterations: int = 200) -> Dict[str, float]:
+    """
+    Micro-benchmark del coste de indicadores por señal: pandas previo vs kernels NumPy.
+
+    Returns:
+        Dict con microsegundos por señal para cada implementación y el speedup.
+    """
+    rng = np.random.default_rng(42)
+    closes = (100 + np.cumsum(rng.normal(0, 0.5, n_bars))).tolist()
+    highs = [c + abs(rng.normal(0, 0.3)) for c in closes]
+    lows = [c - abs(rng.normal(0, 0.3)) for c in closes]
+    volumes = rng.uniform(500, 2000, n_bars).tolist()
+
+    results = {}
+    for name, workload in (("pandas_us", _pandas_signal_workload), ("kernels_us", _kernel_signal_workload)):
+        workload(highs, lows, closes, volumes)  # warm-up
+        start = time.perf_counter()
+        for _ in range(iterations):
+            workload(highs, lows, closes, volumes)
+        results[name] = (time.perf_counter() - start) / iterations * 1e6
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        compute_indicator_series(highs, lows, closes, volumes)
+    results["single_pass_us"] = (time.perf_counter() - start) / iterations * 1e6
+    results["speedup"] = results["pandas_us"] / results["kernels_us"]
+    return results
+
+
+if __name__ == "__main__":
+    print("⏱️ Benchmark indicadores por señal (pandas vs kernels NumPy)")
+    for bars in (100, 1000):
+        stats = benchmark_indicator_kernels(n_bars=bars)
+        print(f"  {bars:>5} velas: pandas={stats['pandas_us']:.0f}µs | kernels={stats['kernels_us']:.0f}µs | "
+              f"single-pass={stats['single_pass_us']:.0f}µs | speedup={stats['speedup']:.1f}x")
@@ -8,6 +8,10 @@ from typing import List, Dict
 from dataclasses import dataclass
 from enum import Enum
 
+import numpy as np
+
+from services.indicator_kernels import trailing_window
+
 class ManipulationType(Enum):
     NONE = "none"
     STOP_HUNT = "stop_hunt"
@@ -116,18 +120,23 @@ class InstitutionalDetector:
     def _detect_events(self, highs: List[float], lows: List[float], 
                       volumes: List[float]) -> List[Dict]:
         """Detectar eventos de manipulación"""
-        events = []
-        
-        for i in range(5, len(highs)):
-            # Breakout + immediate reversal
-            if highs[i] > max(highs[i-5:i]):
-                if i < len(highs) - 1 and highs[i+1] < highs[i] * 0.998:
-                    events.append({
-                        "type": "fake_breakout",
-                        "price": highs[i],
-                        "direction": "up"
-                    })
-                    
+        highs = np.asarray(highs, dtype=float)
+        if highs.shape[0] < 7:
+            return []
+
+        # Breakout (high > máximo de las 5 velas previas) + reversión inmediata en la siguiente
+        previous_max = trailing_window(highs, 5, "max")
+        breakout = highs[:-1] > previous_max[:-1]
+        reversal = highs[1:] < highs[:-1] * 0.998
+        events = [
+            {
+                "type": "fake_breakout",
+                "price": price,
+                "direction": "up"
+            }
+            for price in highs[:-1][breakout & reversal].tolist()
+        ]
+
         return events[-5:]  # Last 5 events
     
     def _calculate_manipulation_risk(self, manipulation_events: List[Dict], 
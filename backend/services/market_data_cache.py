@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+🗄️ MarketDataCache - Cache de klines compartido por todo el proceso
+LRU acotado en memoria, TTL por intervalo alineado al cierre de vela y
+coalescencia de peticiones concurrentes (single-flight) hacia Binance.
+
+Eduard Guzmán - InteliBotX
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Duración de cada intervalo de Binance en segundos
+INTERVAL_SECONDS: Dict[str, int] = {
+    '1s': 1, '1m': 60, '3m': 180, '5m': 300, '15m': 900, '30m': 1800,
+    '1h': 3600, '2h': 7200, '4h': 14400, '6h': 21600, '8h': 28800, '12h': 43200,
+    '1d': 86400, '3d': 259200, '1w': 604800
+}
+
+# TTL máximo por intervalo: la vela en formación cambia, pero no hace falta pedirla en cada request
+DEFAULT_INTERVAL_TTLS: Dict[str, float] = {
+    '1s': 1.0, '1m': 5.0, '3m': 10.0, '5m': 15.0, '15m': 30.0, '30m': 45.0,
+    '1h': 60.0, '2h': 90.0, '4h': 120.0, '6h': 180.0, '8h': 180.0, '12h': 300.0,
+    '1d': 600.0, '3d': 900.0, '1w': 1800.0
+}
+
+CacheKey = Tuple[Hashable, ...]
+
+
+# Desfase de la primera apertura respecto al epoch: las velas semanales de Binance
+# abren el lunes 00:00 UTC (el epoch fue jueves)
+INTERVAL_OFFSETS: Dict[str, int] = {'1w': 4 * 86400}
+
+
+def candle_open_time(interval: str, timestamp, scale: int = 1):
+    """
+    Apertura de la vela que contiene `timestamp` (scale=1 en segundos, 1000 en ms;
+    con enteros el resultado es entero). None si el intervalo es desconocido.
+    """
+    seconds = INTERVAL_SECONDS.get(interval)
+    if not seconds:
+        return None
+    step, offset = seconds * scale, INTERVAL_OFFSETS.get(interval, 0) * scale
+    return (timestamp - offset) // step * step + offset
+
+
+def next_candle_boundary(interval: str, now: Optional[float] = None) -> Optional[float]:
+    """Epoch (s) del próximo cierre de vela para el intervalo, None si es desconocido"""
+    now = time.time() if now is None else now
+    open_time = candle_open_time(interval, now)
+    if open_time is None:
+        return None
+    return open_time + INTERVAL_SECONDS[interval]
+
+
+@dataclass
+class CacheEntry:
+    """Entrada del cache con su instante de expiración"""
+    value: Any
+    stored_at: float
+    expires_at: float
+
+
+class MarketDataCache:
+    """
+    Cache LRU de datos de mercado con TTL alineado a velas y single-flight.
+
+    Las claves son tuplas (origen, symbol, interval, limit). Una entrada expira al
+    cumplirse su TTL por intervalo o al cerrar la vela en curso, lo que ocurra antes.
+    Peticiones concurrentes para la misma clave comparten una única llamada upstream.
+    """
+
+    def __init__(self, max_entries: int = 512, interval_ttls: Optional[Dict[str, float]] = None,
+                 default_ttl: float = 30.0):
+        self.max_entries = max_entries
+        self.interval_ttls = dict(DEFAULT_INTERVAL_TTLS)
+        if interval_ttls:
+            self.interval_ttls.update(interval_ttls)
+        self.default_ttl = default_ttl
+
+        self._entries: "OrderedDict[CacheKey, CacheEntry]" = OrderedDict()
+        self._inflight: Dict[CacheKey, asyncio.Task] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.load_errors = 0
+
+    def _expiry_for(self, interval: str, now: float) -> float:
+        expires_at = now + self.interval_ttls.get(interval, self.default_ttl)
+        boundary = next_candle_boundary(interval, now)
+        return min(expires_at, boundary) if boundary else expires_at
+
+    def get(self, key: CacheKey) -> Optional[Any]:
+        """Valor vigente para la clave o None; actualiza el orden LRU"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.time() >= entry.expires_at:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry.value
+
+    def set(self, key: CacheKey, value: Any, interval: str):
+        """Guardar valor con expiración según el intervalo, expulsando el LRU si hace falta"""
+        now = time.time()
+        self._entries[key] = CacheEntry(value=value, stored_at=now, expires_at=self._expiry_for(interval, now))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get_or_load(self, key: CacheKey, interval: str,
+                          loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Devolver el valor cacheado o cargarlo una sola vez aunque haya N llamadas concurrentes.
+
+        Si quien espera se cancela (p.ej. asyncio.wait_for), la carga upstream continúa
+        para el resto de solicitantes. Los errores del loader no se cachean.
+        """
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.create_task(self._load(key, interval, loader))
+            self._inflight[key] = task
+
+        return await asyncio.shield(task)
+
+    async def _load(self, key: CacheKey, interval: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            value = await loader()
+            self.set(key, value, interval)
+            return value
+        except Exception:
+            self.load_errors += 1
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    def invalidate(self, symbol: Optional[str] = None, interval: Optional[str] = None) -> int:
+        """Invalidar entradas por símbolo y/o intervalo (todas si no se indica nada)"""
+        removed = 0
+        for key in list(self._entries.keys()):
+            if (symbol is None or symbol.upper() in key) and (interval is None or interval in key):
+                del self._entries[key]
+                removed += 1
+        return removed
+
+    def clear(self):
+        self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estadísticas de uso del cache"""
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "inflight": len(self._inflight),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "load_errors": self.load_errors,
+            "hit_rate": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0
+        }
+
+
+# Instancia global del cache (compartida por rutas y motores de bots)
+market_data_cache = MarketDataCache()
+
+
+# =================================================================
+# TESTING
+# =================================================================
+
+async def test_market_data_cache():
+    """Test de coalescencia: 50 peticiones concurrentes -> 1 llamada upstream"""
+    print("🧪 Testing MarketDataCache...")
+
+    cache = MarketDataCache(max_entries=2)
+    upstream_calls = 0
+
+    async def loader():
+        nonlocal upstream_calls
+        upstream_calls += 1
+        await asyncio.sleep(0.05)
+        return [1.0, 2.0, 3.0]
+
+    key = ("mainnet", "BTCUSDT", "1m", 100)
+    results = await asyncio.gather(*(cache.get_or_load(key, "1m", loader) for _ in range(50)))
+    assert upstream_calls == 1 and all(r == [1.0, 2.0, 3.0] for r in results)
+
+    await cache.get_or_load(key, "1m", loader)
+    assert upstream_calls == 1
+
+    for symbol in ("ETHUSDT", "SOLUSDT"):
+        await cache.get_or_load(("mainnet", symbol, "1m", 100), "1m", loader)
+    assert cache.get(key) is None  # expulsado por LRU
+
+    print(f"📊 Stats: {cache.get_stats()}")
+    print("✅ MarketDataCache test completed")
+
+
+if __name__ == "__main__":
+    asyncio.run(test_market_data_cache())
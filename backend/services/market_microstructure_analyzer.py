@@ -2,12 +2,24 @@
 """
 🔬 MarketMicrostructureAnalyzer - Análisis real de microestructura
 SPEC_REF: SMART_SCALPER_STRATEGY.md#market-microstructure
+
+Volume profile por bins de precio (ancho consciente del tick size) sobre arrays
+NumPy, combinable entre ventanas y actualizable vela a vela.
 """
 
-from typing import List, Dict
+import math
+import os
+from collections import deque
+from typing import Deque, List, Dict, Optional, Tuple
 from dataclasses import dataclass
 from enum import Enum
 
+import numpy as np
+
+# Ancho de bin por defecto en puntos básicos del precio de referencia
+VOLUME_PROFILE_BIN_BPS = float(os.getenv("VOLUME_PROFILE_BIN_BPS", "5"))
+VALUE_AREA_FRACTION = 0.70
+
 class VolumeType(Enum):
     BUY = "buy"
     SELL = "sell"
@@ -25,72 +37,275 @@ class MarketMicrostructure:
     order_flow_imbalance: float = 0.0
     institutional_footprint: float = 0.4
 
+
+def profile_bin_size(reference_price: float, tick_size: Optional[float] = None,
+                     bin_bps: Optional[float] = None) -> float:
+    """
+    Ancho de bin para un símbolo: `bin_bps` puntos básicos del precio de referencia,
+    redondeado a múltiplo del tick size (o a 1/2/5 x 10^k si no se conoce el tick).
+    Sirve igual para BTC a 60000 que para tokens por debajo de 0.001.
+    """
+    bps = bin_bps if bin_bps is not None else VOLUME_PROFILE_BIN_BPS
+    raw = abs(reference_price) * bps / 10_000
+    if not math.isfinite(raw) or raw <= 0:
+        return tick_size or 1e-8
+    if tick_size:
+        return max(1, round(raw / tick_size)) * tick_size
+
+    base = 10.0 ** math.floor(math.log10(raw))
+    for multiple in (5, 2, 1):
+        if multiple * base <= raw:
+            return multiple * base
+    return base
+
+
+class VolumeProfile:
+    """
+    Volumen acumulado por bin de precio: bin k cubre [k*bin_size, (k+1)*bin_size).
+
+    Los perfiles con el mismo bin_size se combinan sumando bins (merge), de modo que
+    una ventana larga se mantiene con add/subtract por vela en lugar de reconstruirse.
+    """
+
+    __slots__ = ("bin_size", "offset", "volumes")
+
+    def __init__(self, bin_size: float, offset: int = 0, volumes: Optional[np.ndarray] = None):
+        self.bin_size = float(bin_size)
+        self.offset = int(offset)
+        self.volumes = np.zeros(0, dtype=float) if volumes is None else np.asarray(volumes, dtype=float)
+
+    @classmethod
+    def from_candles(cls, highs, lows, closes, volumes, bin_size: Optional[float] = None,
+                     tick_size: Optional[float] = None) -> "VolumeProfile":
+        """Perfil de un bloque de velas asignando su volumen al precio típico (H+L+C)/3"""
+        typical = (np.asarray(highs, dtype=float) + np.asarray(lows, dtype=float)
+                   + np.asarray(closes, dtype=float)) / 3
+        if bin_size is None:
+            bin_size = profile_bin_size(float(typical[-1]) if typical.size else 0.0, tick_size)
+        profile = cls(bin_size)
+        profile.add(typical, volumes)
+        return profile
+
+    def bin_index(self, prices) -> np.ndarray:
+        return np.floor(np.asarray(prices, dtype=float) / self.bin_size).astype(np.int64)
+
+    def _ensure_range(self, low_bin: int, high_bin: int):
+        if self.volumes.size == 0:
+            self.offset = low_bin
+            self.volumes = np.zeros(high_bin - low_bin + 1, dtype=float)
+            return
+        new_low = min(low_bin, self.offset)
+        new_high = max(high_bin, self.offset + self.volumes.size - 1)
+        if new_low == self.offset and new_high == self.offset + self.volumes.size - 1:
+            return
+        grown = np.zeros(new_high - new_low + 1, dtype=float)
+        grown[self.offset - new_low:self.offset - new_low + self.volumes.size] = self.volumes
+        self.offset, self.volumes = new_low, grown
+
+    def add(self, prices, volumes, sign: float = 1.0):
+        """Acumular volumen en los bins de `prices` (sign=-1 para retirarlo)"""
+        bins = self.bin_index(prices)
+        weights = np.asarray(volumes, dtype=float) * sign
+        # Velas sin volumen no ocupan bin: así el rango coincide con el de la ventana rodante
+        traded = weights != 0
+        bins, weights = bins[traded], weights[traded]
+        if bins.size == 0:
+            return
+        self._ensure_range(int(bins.min()), int(bins.max()))
+        self.volumes += np.bincount(bins - self.offset, weights=weights, minlength=self.volumes.size)
+        if sign < 0:
+            self._trim()
+
+    def subtract(self, prices, volumes):
+        self.add(prices, volumes, sign=-1.0)
+
+    def add_one(self, price: float, volume: float):
+        """Ruta escalar de add para actualizar vela a vela sin overhead de arrays"""
+        if volume <= 0:
+            return
+        index = math.floor(price / self.bin_size)
+        self._ensure_range(index, index)
+        self.volumes[index - self.offset] += volume
+
+    def subtract_one(self, price: float, volume: float):
+        if volume <= 0:
+            return
+        position = math.floor(price / self.bin_size) - self.offset
+        if not 0 <= position < self.volumes.size:
+            # Bin ya recortado: solo quedaba un residuo por debajo de 1e-12
+            return
+        self.volumes[position] -= volume
+        if self.volumes[position] < 1e-12:
+            self.volumes[position] = 0.0
+            if position == 0 or position == self.volumes.size - 1:
+                self._trim()
+
+    def _crop(self, low_bin: int, high_bin: int):
+        """Conservar solo los bins [low_bin, high_bin]"""
+        start, stop = low_bin - self.offset, high_bin - self.offset + 1
+        self.offset, self.volumes = low_bin, self.volumes[start:stop].copy()
+
+    def _trim(self):
+        # Residuos de coma flotante tras restar y bins vacíos en los extremos
+        self.volumes[self.volumes < 1e-12] = 0.0
+        occupied = np.flatnonzero(self.volumes)
+        if occupied.size == 0:
+            self.offset, self.volumes = 0, np.zeros(0, dtype=float)
+        elif occupied[0] > 0 or occupied[-1] < self.volumes.size - 1:
+            self.offset += int(occupied[0])
+            self.volumes = self.volumes[occupied[0]:occupied[-1] + 1].copy()
+
+    def merge(self, other: "VolumeProfile") -> "VolumeProfile":
+        """Sumar otro perfil con el mismo bin_size (in place)"""
+        if not math.isclose(self.bin_size, other.bin_size, rel_tol=1e-9):
+            raise ValueError(f"bin_size incompatible: {self.bin_size} vs {other.bin_size}")
+        if other.volumes.size:
+            self._ensure_range(other.offset, other.offset + other.volumes.size - 1)
+            start = other.offset - self.offset
+            self.volumes[start:start + other.volumes.size] += other.volumes
+        return self
+
+    def copy(self) -> "VolumeProfile":
+        return VolumeProfile(self.bin_size, self.offset, self.volumes.copy())
+
+    @property
+    def prices(self) -> np.ndarray:
+        """Precio central de cada bin"""
+        return (self.offset + np.arange(self.volumes.size) + 0.5) * self.bin_size
+
+    @property
+    def total_volume(self) -> float:
+        return float(self.volumes.sum())
+
+    def value_area(self, fraction: float = VALUE_AREA_FRACTION) -> Tuple[float, float, float]:
+        """
+        (POC, VAH, VAL): bins de mayor volumen hasta cubrir `fraction` del total,
+        incluyendo el bin que cruza el umbral.
+        """
+        occupied = np.flatnonzero(self.volumes > 0)
+        if occupied.size == 0:
+            return 0.0, 0.0, 0.0
+        volumes = self.volumes[occupied]
+        prices = self.prices[occupied]
+
+        order = np.argsort(-volumes, kind="stable")
+        cumulative = np.cumsum(volumes[order])
+        count = min(int(np.searchsorted(cumulative, cumulative[-1] * fraction, side="left")) + 1, order.size)
+        selected = prices[order[:count]]
+        return float(prices[order[0]]), float(selected.max()), float(selected.min())
+
+
+class RollingVolumeProfile:
+    """
+    Perfil de las últimas `window` velas: O(1) por vela nueva (suma la nueva, resta la que sale).
+
+    Cuenta las velas con volumen de cada bin: un bin solo se vacía (y se recorta de los
+    extremos) cuando sale su última vela, nunca por residuos de coma flotante.
+    """
+
+    def __init__(self, window: int, bin_size: float):
+        self.window = window
+        self.profile = VolumeProfile(bin_size)
+        self._candles: Deque[Tuple[Optional[int], float]] = deque()
+        self._counts: Dict[int, int] = {}
+
+    def push(self, high: float, low: float, close: float, volume: float) -> VolumeProfile:
+        index = None
+        if volume > 0:
+            index = math.floor((high + low + close) / 3 / self.profile.bin_size)
+            self.profile._ensure_range(index, index)
+            self.profile.volumes[index - self.profile.offset] += volume
+            self._counts[index] = self._counts.get(index, 0) + 1
+        self._candles.append((index, volume))
+        if len(self._candles) > self.window:
+            self._expire(*self._candles.popleft())
+        return self.profile
+
+    def _expire(self, index: Optional[int], volume: float):
+        if index is None:
+            return
+        profile = self.profile
+        position = index - profile.offset
+        remaining = self._counts[index] - 1
+        if remaining:
+            self._counts[index] = remaining
+            profile.volumes[position] = max(profile.volumes[position] - volume, 0.0)
+            return
+
+        del self._counts[index]
+        profile.volumes[position] = 0.0
+        if not self._counts:
+            profile.offset, profile.volumes = 0, np.zeros(0, dtype=float)
+        elif position == 0 or position == profile.volumes.size - 1:
+            profile._crop(min(self._counts), max(self._counts))
+
+
 class MarketMicrostructureAnalyzer:
-    def analyze_market_microstructure(self, symbol: str, timeframe: str, 
+    def __init__(self, tick_sizes: Optional[Dict[str, float]] = None):
+        self.tick_sizes = tick_sizes or {}
+
+    def analyze_market_microstructure(self, symbol: str, timeframe: str,
                                     highs: List[float], lows: List[float],
-                                    closes: List[float], volumes: List[float]) -> MarketMicrostructure:
-        """Análisis real de microestructura con datos de Binance"""
-        
-        # Volume Profile real
-        volume_profile = {}
-        for i in range(len(closes)):
-            price = round((highs[i] + lows[i] + closes[i]) / 3, 2)
-            volume_profile[price] = volume_profile.get(price, 0) + volumes[i]
-        
-        # Point of Control (precio con más volumen)
-        poc = max(volume_profile.keys(), key=lambda x: volume_profile[x])
-        
-        # Value Area (70% del volumen)
-        total_volume = sum(volume_profile.values())
-        target_volume = total_volume * 0.70
-        sorted_prices = sorted(volume_profile.keys(), key=lambda x: volume_profile[x], reverse=True)
-        
-        cumulative = 0
-        value_prices = []
-        for price in sorted_prices:
-            cumulative += volume_profile[price]
-            value_prices.append(price)
-            if cumulative >= target_volume:
-                break
-        
-        va_high = max(value_prices) if value_prices else poc * 1.01
-        va_low = min(value_prices) if value_prices else poc * 0.99
-        
+                                    closes: List[float], volumes: List[float],
+                                    profile: Optional[VolumeProfile] = None) -> MarketMicrostructure:
+        """
+        Análisis real de microestructura con datos de Binance.
+        `profile` permite reutilizar un perfil mantenido incrementalmente (RollingVolumeProfile)
+        en lugar de reconstruirlo desde las velas.
+        """
+        highs = np.asarray(highs, dtype=float)
+        lows = np.asarray(lows, dtype=float)
+        closes = np.asarray(closes, dtype=float)
+        volumes = np.asarray(volumes, dtype=float)
+
+        # Volume Profile por bins (tick-size aware)
+        if profile is None:
+            profile = VolumeProfile.from_candles(highs, lows, closes, volumes,
+                                                 tick_size=self.tick_sizes.get(symbol))
+
+        # Point of Control + Value Area (70% del volumen)
+        poc, va_high, va_low = profile.value_area(VALUE_AREA_FRACTION)
+        if va_high == 0.0 and va_low == 0.0:
+            va_high, va_low = poc * 1.01, poc * 0.99
+
         # Order Flow real
-        buy_volume = sum(volumes[i] for i in range(1, len(closes)) if closes[i] > closes[i-1])
-        sell_volume = sum(volumes[i] for i in range(1, len(closes)) if closes[i] < closes[i-1])
-        
+        close_change = np.diff(closes)
+        buy_volume = float(volumes[1:][close_change > 0].sum())
+        sell_volume = float(volumes[1:][close_change < 0].sum())
+
         if buy_volume > sell_volume * 1.2:
             dominant_side = VolumeType.BUY
         elif sell_volume > buy_volume * 1.2:
             dominant_side = VolumeType.SELL
         else:
             dominant_side = VolumeType.NEUTRAL
-            
+
         # SPEC_REF: DL-001 Real Data Calculations - No hardcode
         # Volume Anomaly Score: Detecta manipulación por volumen anormal
-        volume_mean = sum(volumes) / len(volumes) if volumes else 1
-        volume_std = (sum((v - volume_mean) ** 2 for v in volumes) / len(volumes)) ** 0.5 if volumes else 1
-        recent_volume = volumes[-3:] if len(volumes) >= 3 else volumes
-        volume_anomaly_score = min(1.0, max(0.0, 
-            sum(abs(v - volume_mean) / volume_std for v in recent_volume) / len(recent_volume) / 2
-        ))
-        
+        volume_mean = float(volumes.mean()) if volumes.size else 1.0
+        volume_std = float(volumes.std()) if volumes.size else 1.0
+        recent_volume = volumes[-3:]
+        if recent_volume.size and volume_std > 0:
+            volume_anomaly_score = min(1.0, max(0.0,
+                float(np.abs(recent_volume - volume_mean).mean()) / volume_std / 2
+            ))
+        else:
+            volume_anomaly_score = 0.0
+
         # Liquidity Score: Basado en dispersión de precios (proxy bid-ask spread)
-        price_range = max(highs) - min(lows) if highs and lows else 0.001
-        current_price = closes[-1] if closes else 1
+        price_range = float(highs.max() - lows.min()) if highs.size and lows.size else 0.001
+        current_price = float(closes[-1]) if closes.size else 1
         spread_proxy = price_range / current_price if current_price > 0 else 0.001
         liquidity_score = max(0.1, min(1.0, 1 - (spread_proxy * 100)))  # Mejor liquidez = menor spread
-        
+
         # Order Flow Imbalance: Diferencia real buy/sell volume
         total_volume = buy_volume + sell_volume if (buy_volume + sell_volume) > 0 else 1
         order_flow_imbalance = (buy_volume - sell_volume) / total_volume
-        
+
         # Institutional Footprint: Detecta órdenes grandes vs promedio
         volume_threshold = volume_mean * 2  # Órdenes 2x promedio = institucionales
-        institutional_trades = sum(1 for v in volumes if v > volume_threshold)
-        institutional_footprint = institutional_trades / len(volumes) if volumes else 0
-        
+        institutional_footprint = float(np.count_nonzero(volumes > volume_threshold)) / volumes.size if volumes.size else 0
+
         return MarketMicrostructure(
             point_of_control=poc,
             value_area_high=va_high,
@@ -100,4 +315,120 @@ class MarketMicrostructureAnalyzer:
             liquidity_score=liquidity_score,
             order_flow_imbalance=order_flow_imbalance,
             institutional_footprint=institutional_footprint
-        )
\ No newline at end of file
+        )
+
+
+# =================================================================
+# TESTING & BENCHMARK
+# =================================================================
+
+def _synthetic_candles(n_bars: int, price: float, seed: int = 3):
+    rng = np.random.default_rng(seed)
+    closes = price * np.exp(np.cumsum(rng.normal(0, 0.001, n_bars)))
+    spread = np.abs(rng.normal(0, 0.0008, n_bars)) * closes
+    return closes + spread, closes - spread, closes, rng.lognormal(3, 1, n_bars)
+
+
+def test_volume_profile():
+    """Bins estables en precios bajos, merge equivalente al perfil completo y ventana rodante exacta"""
+    print("🧪 Testing VolumeProfile...")
+
+    # Token de precio bajo: el redondeo a 2 decimales colapsaba todo en 0.0
+    highs, lows, closes, volumes = _synthetic_candles(500, price=0.00042)
+    micro = MarketMicrostructureAnalyzer().analyze_market_microstructure(
+        "PEPEUSDT", "1m", highs, lows, closes, volumes)
+    assert 0 < micro.value_area_low <= micro.point_of_control <= micro.value_area_high
+    assert micro.value_area_high < closes.max() * 1.01 and micro.value_area_low > closes.min() * 0.99
+
+    # Merge de dos mitades == perfil de todo el bloque
+    highs, lows, closes, volumes = _synthetic_candles(2000, price=65000.0)
+    bin_size = profile_bin_size(closes[-1], tick_size=0.01)
+    full = VolumeProfile.from_candles(highs, lows, closes, volumes, bin_size=bin_size)
+    merged = VolumeProfile.from_candles(highs[:700], lows[:700], closes[:700], volumes[:700], bin_size=bin_size)
+    merged.merge(VolumeProfile.from_candles(highs[700:], lows[700:], closes[700:], volumes[700:], bin_size=bin_size))
+    assert full.offset == merged.offset and np.allclose(full.volumes, merged.volumes)
+    assert full.value_area() == merged.value_area()
+
+    # Ventana rodante por vela == reconstrucción de las últimas `window` velas
+    window = 300
+    rolling = RollingVolumeProfile(window, bin_size)
+    for candle in zip(highs, lows, closes, volumes):
+        rolling.push(*candle)
+    rebuilt = VolumeProfile.from_candles(highs[-window:], lows[-window:], closes[-window:], volumes[-window:],
+                                         bin_size=bin_size)
+    assert rolling.profile.offset == rebuilt.offset
+    assert np.allclose(rolling.profile.volumes, rebuilt.volumes)
+    assert rolling.profile.value_area() == rebuilt.value_area()
+
+    # Fuzz: velas sin volumen y velas en los extremos del rango no deben romper la ventana
+    rng = np.random.default_rng(11)
+    for trial in range(200):
+        n, window = int(rng.integers(5, 120)), int(rng.integers(1, 30))
+        highs, lows, closes, volumes = _synthetic_candles(n, price=100.0, seed=trial)
+        volumes = volumes.copy()
+        volumes[rng.random(n) < 0.3] = 0.0
+        spikes = rng.random(n) < 0.1
+        closes = closes.copy()
+        highs, lows = highs.copy(), lows.copy()
+        closes[spikes] *= rng.choice([0.9, 1.1], spikes.sum())
+        highs[spikes], lows[spikes] = closes[spikes], closes[spikes]
+        rolling = RollingVolumeProfile(window, 0.01)
+        for i, candle in enumerate(zip(highs, lows, closes, volumes)):
+            rolling.push(*candle)
+            start = max(0, i + 1 - window)
+            fresh = VolumeProfile.from_candles(highs[start:i + 1], lows[start:i + 1], closes[start:i + 1],
+                                               volumes[start:i + 1], bin_size=0.01)
+            assert rolling.profile.offset == fresh.offset, (trial, i)
+            assert np.allclose(rolling.profile.volumes, fresh.volumes), (trial, i)
+
+    print(f"📊 POC {full.value_area()[0]:.2f} | bins {full.volumes.size} | bin_size {bin_size}")
+    print("✅ VolumeProfile test completed")
+
+
+def benchmark_microstructure(n_bars: int = 100_000, window: int = 1440, repeats: int = 5):
+    """Perfil por dict + bucles previo frente a bins NumPy, y reconstrucción frente a ventana rodante"""
+    import time
+
+    highs, lows, closes, volumes = _synthetic_candles(n_bars, price=65000.0)
+    h, l, c, v = highs.tolist(), lows.tolist(), closes.tolist(), volumes.tolist()
+
+    def legacy_profile():
+        volume_profile = {}
+        for i in range(len(c)):
+            price = round((h[i] + l[i] + c[i]) / 3, 2)
+            volume_profile[price] = volume_profile.get(price, 0) + v[i]
+        sorted_prices = sorted(volume_profile.keys(), key=lambda x: volume_profile[x], reverse=True)
+        buy = sum(v[i] for i in range(1, len(c)) if c[i] > c[i - 1])
+        return sorted_prices[0], buy
+
+    analyzer = MarketMicrostructureAnalyzer()
+    print(f"🧪 Microstructure benchmark: {n_bars} velas")
+    for name, func in (("legacy dict", legacy_profile),
+                       ("numpy bins", lambda: analyzer.analyze_market_microstructure("BTCUSDT", "1m", h, l, c, v))):
+        start = time.perf_counter()
+        for _ in range(repeats):
+            func()
+        print(f"   {name:12s}: {(time.perf_counter() - start) * 1000 / repeats:8.2f} ms")
+
+    # Actualización por vela de un perfil de `window` velas
+    bin_size = profile_bin_size(closes[-1], tick_size=0.01)
+    steps = 2000
+    start = time.perf_counter()
+    for i in range(n_bars - steps, n_bars):
+        VolumeProfile.from_candles(highs[i - window:i], lows[i - window:i], closes[i - window:i],
+                                   volumes[i - window:i], bin_size=bin_size).value_area()
+    rebuild_us = (time.perf_counter() - start) * 1e6 / steps
+
+    rolling = RollingVolumeProfile(window, bin_size)
+    for candle in zip(highs[:n_bars - steps], lows[:n_bars - steps], closes[:n_bars - steps], volumes[:n_bars - steps]):
+        rolling.push(*candle)
+    start = time.perf_counter()
+    for candle in zip(highs[n_bars - steps:], lows[n_bars - steps:], closes[n_bars - steps:], volumes[n_bars - steps:]):
+        rolling.push(*candle).value_area()
+    rolling_us = (time.perf_counter() - start) * 1e6 / steps
+    print(f"   ventana {window}: rebuild {rebuild_us:8.1f} µs/vela | rolling {rolling_us:8.1f} µs/vela")
+
+
+if __name__ == "__main__":
+    test_volume_profile()
+    benchmark_microstructure()
@@ -0,0 +1,437 @@
+#!/usr/bin/env python3
+"""
+🛰️ MarketScanner - Escaneo multi-símbolo para el Smart Scalper
+Descarga concurrente de klines para N pares, apilado en matrices (símbolos x velas)
+e indicadores + condición de mercado + señal para todos los símbolos en una sola
+pasada vectorizada; ranking de oportunidades y refinamiento opcional del top con
+SmartScalperEngine sobre su FeatureFrame.
+
+Eduard Guzmán - InteliBotX
+"""
+
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, asdict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from services.smart_scalper_algorithms import MarketCondition
+
+logger = logging.getLogger(__name__)
+
+SCANNER_FETCH_CONCURRENCY = int(os.getenv("SCANNER_FETCH_CONCURRENCY", "16"))
+SCANNER_CACHE_TTL = float(os.getenv("SCANNER_CACHE_TTL", "30"))
+SCANNER_MAX_SYMBOLS = int(os.getenv("SCANNER_MAX_SYMBOLS", "300"))
+SCANNER_UNIVERSE_TTL = 3600.0
+
+_CONDITION_NAMES = np.array([condition.value for condition in (
+    MarketCondition.SIDEWAYS, MarketCondition.HIGH_VOLATILITY, MarketCondition.LOW_VOLATILITY,
+    MarketCondition.TRENDING_UP, MarketCondition.TRENDING_DOWN
+)], dtype=object)
+_SIGNAL_NAMES = np.array(["HOLD", "BUY", "SELL"], dtype=object)
+
+
+# =================================================================
+# KERNELS 2-D (una fila por símbolo, último valor de cada indicador)
+# =================================================================
+
+def _last_ema(closes: np.ndarray, period: int) -> np.ndarray:
+    """Último valor de la EMA ajustada (pandas ewm(span, adjust=True)) por fila"""
+    n = closes.shape[1]
+    decay = 1.0 - 2.0 / (period + 1.0)
+    weights = decay ** np.arange(n - 1, -1, -1, dtype=np.float64)
+    return closes @ weights / weights.sum()
+
+
+def _last_rsi(closes: np.ndarray, period: int = 14) -> np.ndarray:
+    """RSI con medias simples de las últimas `period` variaciones; 50 si no está definido"""
+    delta = np.diff(closes[:, -(period + 1):], axis=1)
+    gain = np.where(delta > 0, delta, 0.0).mean(axis=1)
+    loss = np.where(delta < 0, -delta, 0.0).mean(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = 100.0 - 100.0 / (1.0 + gain / loss)
+    return np.where(np.isnan(rsi), 50.0, rsi)
+
+
+def _last_atr(highs: np.ndarray, lows: np.ndarray, closes: np.ndarray, period: int = 14) -> np.ndarray:
+    high, low = highs[:, -period:], lows[:, -period:]
+    prev_close = closes[:, -(period + 1):-1]
+    true_range = np.maximum(high - low, np.maximum(np.abs(high - prev_close), np.abs(low - prev_close)))
+    return true_range.mean(axis=1)
+
+
+def scan_arrays(highs: np.ndarray, lows: np.ndarray, closes: np.ndarray,
+                volumes: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Indicadores, condición de mercado, señal y score para todas las filas a la vez.
+
+    Mismos umbrales que SmartScalperEngine: condición (EMA20/EMA50/ATR14), reglas
+    RSI + volumen de _rsi_oversold_algorithm y alineación de medias de
+    _ma_alignment_algorithm en tendencia.
+    """
+    highs, lows, closes, volumes = (np.asarray(a, dtype=np.float64) for a in (highs, lows, closes, volumes))
+    price = closes[:, -1]
+
+    ema = {period: _last_ema(closes, period) for period in (9, 20, 21, 50)}
+    rsi = _last_rsi(closes)
+    atr = _last_atr(highs, lows, closes)
+
+    avg_volume = volumes[:, -21:-1].mean(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        volume_ratio = np.where(avg_volume > 0, volumes[:, -1] / avg_volume, 1.0)
+    volume_spike = volume_ratio >= 1.5
+
+    # Condición de mercado (analyze_market_conditions)
+    volatility = atr / price
+    price_vs_ema20 = (price - ema[20]) / ema[20]
+    ema_spread = (ema[20] - ema[50]) / ema[50]
+    condition = np.select(
+        [volatility > 0.03, volatility < 0.01,
+         (ema_spread > 0.02) & (price_vs_ema20 > 0.01),
+         (ema_spread < -0.02) & (price_vs_ema20 < -0.01)],
+        [1, 2, 3, 4], default=0
+    )
+    if closes.shape[1] < 50:
+        condition[:] = 0
+
+    # Reglas RSI + volumen (1 = BUY, 2 = SELL)
+    rsi_signal = np.select(
+        [(rsi < 30) & volume_spike, (rsi > 70) & volume_spike, rsi < 35, rsi > 65],
+        [1, 2, 1, 2], default=0
+    )
+    rsi_confidence = np.select(
+        [(rsi < 30) & volume_spike, (rsi > 70) & volume_spike, rsi < 35, rsi > 65],
+        [0.85, 0.85, 0.65, 0.65], default=0.5
+    )
+
+    # Alineación de medias en tendencia
+    bullish = (price > ema[9]) & (ema[9] > ema[21]) & (ema[21] > ema[50])
+    bearish = (price < ema[9]) & (ema[9] < ema[21]) & (ema[21] < ema[50])
+    trending = (condition == 3) | (condition == 4)
+    use_alignment = trending & (bullish | bearish)
+
+    signal = np.where(use_alignment, np.where(bullish, 1, 2), rsi_signal)
+    confidence = np.where(use_alignment, 0.85, rsi_confidence)
+
+    # Score de oportunidad: confianza de la señal, reforzada por volumen relativo
+    score = np.where(signal > 0, confidence * (1.0 + 0.1 * np.minimum(volume_ratio, 3.0)), 0.0)
+
+    return {
+        "price": price,
+        "change_pct": (price / closes[:, 0] - 1.0) * 100.0,
+        "rsi": rsi,
+        "ema_20": ema[20],
+        "ema_50": ema[50],
+        "atr": atr,
+        "volatility": volatility,
+        "volume_ratio": volume_ratio,
+        "volume_spike": volume_spike,
+        "condition": condition,
+        "signal": signal,
+        "confidence": confidence,
+        "score": score
+    }
+
+
+def scan_arrays_parallel(highs: np.ndarray, lows: np.ndarray, closes: np.ndarray, volumes: np.ndarray,
+                         executor: ProcessPoolExecutor, chunks: int) -> Dict[str, np.ndarray]:
+    """scan_arrays repartido por bloques de filas en un pool de procesos"""
+    bounds = np.linspace(0, closes.shape[0], chunks + 1, dtype=int)
+    futures = [
+        executor.submit(scan_arrays, highs[start:stop], lows[start:stop], closes[start:stop], volumes[start:stop])
+        for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start
+    ]
+    parts = [future.result() for future in futures]
+    return {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
+
+
+def rank_scan(symbols: Sequence[str], scan: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+    """Filas ordenadas por score y, a igualdad, por volumen relativo"""
+    order = np.lexsort((-scan["volume_ratio"], -scan["score"]))
+    columns = {key: values[order].tolist() for key, values in scan.items()}
+    conditions = _CONDITION_NAMES[scan["condition"][order]].tolist()
+    signals = _SIGNAL_NAMES[scan["signal"][order]].tolist()
+    symbol_names = np.asarray(symbols, dtype=object)[order].tolist()
+
+    return [
+        {
+            "rank": rank + 1,
+            "symbol": symbol,
+            "signal": signals[rank],
+            "confidence": round(columns["confidence"][rank], 3),
+            "score": round(columns["score"][rank], 4),
+            "market_condition": conditions[rank],
+            "price": columns["price"][rank],
+            "change_pct": round(columns["change_pct"][rank], 3),
+            "rsi": round(columns["rsi"][rank], 2),
+            "ema_20": columns["ema_20"][rank],
+            "ema_50": columns["ema_50"][rank],
+            "atr": columns["atr"][rank],
+            "volatility": round(columns["volatility"][rank], 5),
+            "volume_ratio": round(columns["volume_ratio"][rank], 3),
+            "volume_spike": columns["volume_spike"][rank]
+        }
+        for rank, symbol in enumerate(symbol_names)
+    ]
+
+
+# =================================================================
+# SERVICIO
+# =================================================================
+
+@dataclass
+class ScanReport:
+    interval: str
+    limit: int
+    generated_at: float
+    symbols_requested: int
+    symbols_scanned: int
+    failed_symbols: List[str]
+    results: List[Dict[str, Any]]
+    timings_ms: Dict[str, float] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class MarketScanner:
+    """
+    Escáner de mercado multi-símbolo.
+
+    Los scans se cachean por (interval, limit, símbolos) durante SCANNER_CACHE_TTL
+    segundos para que la paginación no vuelva a descargar; scans concurrentes con la
+    misma clave comparten una única ejecución.
+    """
+
+    def __init__(self, data_service=None, concurrency: Optional[int] = None,
+                 cache_ttl: Optional[float] = None):
+        if data_service is None:
+            from services.binance_real_data import BinanceRealDataService
+            data_service = BinanceRealDataService(use_testnet=False)
+        self.data_service = data_service
+        self.concurrency = concurrency or SCANNER_FETCH_CONCURRENCY
+        self.cache_ttl = cache_ttl if cache_ttl is not None else SCANNER_CACHE_TTL
+
+        self._reports: Dict[Tuple, ScanReport] = {}
+        self._inflight: Dict[Tuple, asyncio.Future] = {}
+        self._universe: Dict[str, Tuple[float, List[str]]] = {}
+
+    async def get_universe(self, quote_asset: str = "USDT") -> List[str]:
+        """Pares TRADING del quote asset (exchangeInfo cacheado una hora)"""
+        cached = self._universe.get(quote_asset)
+        if cached and time.time() - cached[0] < SCANNER_UNIVERSE_TTL:
+            return cached[1]
+        symbols = await self.data_service.get_trading_symbols(quote_asset)
+        self._universe[quote_asset] = (time.time(), symbols)
+        return symbols
+
+    async def fetch_matrix(self, symbols: Sequence[str], interval: str, limit: int):
+        """
+        Descargar klines con concurrencia acotada y apilar en matrices (símbolos x velas).
+        Se descartan los pares con error o con menos de `limit` velas (listados recientes).
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def fetch(symbol: str):
+            async with semaphore:
+                try:
+                    return await self.data_service.get_klines(symbol, interval, limit, fallback=False)
+                except Exception:
+                    return None
+
+        frames = await asyncio.gather(*(fetch(symbol) for symbol in symbols))
+        ok_symbols, failed, rows = [], [], []
+        for symbol, df in zip(symbols, frames):
+            if df is None or len(df) < limit:
+                failed.append(symbol)
+                continue
+            ok_symbols.append(symbol)
+            rows.append(df[["open", "high", "low", "close", "volume", "timestamp"]].to_numpy(dtype=np.float64)[-limit:])
+
+        if not rows:
+            empty = np.empty((0, limit))
+            return ok_symbols, failed, {name: empty for name in ("opens", "highs", "lows", "closes", "volumes", "times")}
+        stacked = np.stack(rows)  # (símbolos, velas, columnas)
+        matrices = {
+            name: np.ascontiguousarray(stacked[:, :, index])
+            for index, name in enumerate(("opens", "highs", "lows", "closes", "volumes", "times"))
+        }
+        return ok_symbols, failed, matrices
+
+    async def scan(self, symbols: Optional[Sequence[str]] = None, interval: str = "15m", limit: int = 100,
+                   quote_asset: str = "USDT", max_symbols: Optional[int] = None,
+                   refine_top: int = 0) -> ScanReport:
+        if symbols is None:
+            symbols = await self.get_universe(quote_asset)
+        symbols = [symbol.upper() for symbol in symbols][:max_symbols or SCANNER_MAX_SYMBOLS]
+        key = (interval, limit, refine_top, tuple(symbols))
+
+        report = self._reports.get(key)
+        if report and time.time() - report.generated_at < self.cache_ttl:
+            return report
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            report = await self._run_scan(symbols, interval, limit, refine_top)
+            self._reports = {k: r for k, r in self._reports.items()
+                             if time.time() - r.generated_at < self.cache_ttl}
+            self._reports[key] = report
+            future.set_result(report)
+            return report
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # marcar como recuperada si nadie más espera
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _run_scan(self, symbols: List[str], interval: str, limit: int, refine_top: int) -> ScanReport:
+        from utils.analysis_pool import StageTimer, timed
+
+        timer = StageTimer()
+        with timer.stage("fetch_klines"):
+            ok_symbols, failed, matrices = await self.fetch_matrix(symbols, interval, limit)
+
+        results: List[Dict[str, Any]] = []
+        if ok_symbols:
+            scan = await timed(timer, "vectorized_scan", scan_arrays,
+                               matrices["highs"], matrices["lows"], matrices["closes"], matrices["volumes"])
+            results = rank_scan(ok_symbols, scan)
+            if refine_top > 0:
+                await timed(timer, "refine_top", self._refine, results[:refine_top],
+                            ok_symbols, matrices, interval)
+
+        logger.info(f"🛰️ Scanner {interval}: {len(ok_symbols)}/{len(symbols)} símbolos en "
+                    f"{timer.to_dict()['total']:.0f} ms")
+        return ScanReport(
+            interval=interval,
+            limit=limit,
+            generated_at=time.time(),
+            symbols_requested=len(symbols),
+            symbols_scanned=len(ok_symbols),
+            failed_symbols=failed,
+            results=results,
+            timings_ms=timer.to_dict()
+        )
+
+    def _refine(self, top_rows: List[Dict[str, Any]], symbols: List[str],
+                matrices: Dict[str, np.ndarray], interval: str):
+        """Señal completa de SmartScalperEngine para el top, reutilizando su FeatureFrame"""
+        from services.feature_frame import get_feature_frame
+        from services.smart_scalper_algorithms import SmartScalperEngine
+
+        engine = SmartScalperEngine()
+        index = {symbol: row for row, symbol in enumerate(symbols)}
+        for result in top_rows:
+            row = index[result["symbol"]]
+            columns = [matrices[name][row] for name in ("opens", "highs", "lows", "closes", "volumes")]
+            features = get_feature_frame(result["symbol"], interval, *columns,
+                                         last_candle_time=int(matrices["times"][row, -1]))
+            lists = features.as_lists()
+            signal = engine.generate_signal(result["symbol"], lists["highs"], lists["lows"],
+                                            lists["closes"], lists["volumes"], features=features)
+            result["engine_signal"] = signal.signal
+            result["engine_confidence"] = round(signal.confidence, 3)
+            result["engine_algorithm"] = signal.algorithm_used
+
+
+# Instancia global del escáner
+market_scanner: Optional[MarketScanner] = None
+
+
+def get_market_scanner() -> MarketScanner:
+    global market_scanner
+    if market_scanner is None:
+        market_scanner = MarketScanner()
+    return market_scanner
+
+
+# =================================================================
+# BENCHMARK
+# =================================================================
+
+def _synthetic_universe(n_symbols: int, n_bars: int, seed: int = 21):
+    rng = np.random.default_rng(seed)
+    base = rng.uniform(0.01, 500, (n_symbols, 1))
+    closes = base * np.exp(np.cumsum(rng.normal(0, 0.006, (n_symbols, n_bars)), axis=1))
+    spread = np.abs(rng.normal(0, 0.003, (n_symbols, n_bars))) * closes
+    volumes = rng.lognormal(8, 0.7, (n_symbols, n_bars))
+    return closes + spread, closes - spread, closes, volumes
+
+
+def test_market_scanner():
+    """Kernels 2-D vs ta_alternative/SmartScalperEngine por símbolo"""
+    from services.ta_alternative import calculate_rsi, calculate_ema, calculate_atr, detect_volume_spike
+    from services.smart_scalper_algorithms import SmartScalperEngine
+
+    print("🧪 Testing MarketScanner kernels...")
+    logging.disable(logging.INFO)
+    highs, lows, closes, volumes = _synthetic_universe(40, 100)
+    scan = scan_arrays(highs, lows, closes, volumes)
+    engine = SmartScalperEngine()
+    for row in range(closes.shape[0]):
+        h, l, c, v = highs[row].tolist(), lows[row].tolist(), closes[row].tolist(), volumes[row].tolist()
+        assert np.isclose(scan["rsi"][row], calculate_rsi(c), rtol=1e-9)
+        assert np.isclose(scan["ema_50"][row], calculate_ema(c, 50), rtol=1e-9)
+        assert np.isclose(scan["atr"][row], calculate_atr(h, l, c), rtol=1e-9)
+        assert np.isclose(scan["volume_ratio"][row], detect_volume_spike(v)[1], rtol=1e-9)
+        condition = engine.analyze_market_conditions(h, l, c, v)
+        assert _CONDITION_NAMES[scan["condition"][row]] == condition.value
+
+    ranked = rank_scan([f"SYM{i}USDT" for i in range(40)], scan)
+    assert [r["score"] for r in ranked] == sorted((r["score"] for r in ranked), reverse=True)
+    logging.disable(logging.NOTSET)
+    print("✅ MarketScanner test completed")
+
+
+def benchmark_market_scanner(n_symbols: int = 500, n_bars: int = 100, workers: Optional[int] = None):
+    """Símbolos/segundo: SmartScalperEngine por símbolo vs pasada vectorizada (1 core) vs pool de procesos"""
+    from services.smart_scalper_algorithms import SmartScalperEngine
+
+    logging.disable(logging.INFO)
+    workers = workers or min(4, os.cpu_count() or 1)
+    highs, lows, closes, volumes = _synthetic_universe(n_symbols, n_bars)
+    print(f"🧪 Scanner benchmark: {n_symbols} símbolos x {n_bars} velas")
+
+    engine = SmartScalperEngine()
+    sample = min(n_symbols, 100)
+    start = time.perf_counter()
+    for row in range(sample):
+        engine.generate_signal("SYM", highs[row].tolist(), lows[row].tolist(),
+                               closes[row].tolist(), volumes[row].tolist())
+    per_symbol_rate = sample / (time.perf_counter() - start)
+
+    scan_arrays(highs, lows, closes, volumes)
+    start = time.perf_counter()
+    repeats = 20
+    for _ in range(repeats):
+        scan_arrays(highs, lows, closes, volumes)
+    vectorized_rate = n_symbols * repeats / (time.perf_counter() - start)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        scan_arrays_parallel(highs, lows, closes, volumes, executor, workers)
+        start = time.perf_counter()
+        for _ in range(repeats):
+            scan_arrays_parallel(highs, lows, closes, volumes, executor, workers)
+        pool_rate = n_symbols * repeats / (time.perf_counter() - start)
+
+    logging.disable(logging.NOTSET)
+    print(f"   SmartScalperEngine por símbolo: {per_symbol_rate:10.0f} símbolos/s")
+    print(f"   vectorizado (1 core):           {vectorized_rate:10.0f} símbolos/s")
+    print(f"   pool de {workers} procesos:            {pool_rate:10.0f} símbolos/s")
+    return {"per_symbol": per_symbol_rate, "vectorized": vectorized_rate, "process_pool": pool_rate}
+
+
+if __name__ == "__main__":
+    test_market_scanner()
+    benchmark_market_scanner()
+    benchmark_market_scanner(n_symbols=5000)
@@ -8,6 +8,8 @@ from typing import List, Dict, Optional
 from dataclasses import dataclass
 from enum import Enum
 
+from services.feature_frame import FeatureFrame
+
 class TimeframeAlignment(Enum):
     BULLISH = "bullish"
     BEARISH = "bearish"
@@ -40,6 +42,7 @@ class TimeframeData:
     momentum: float
     data_quality: float  # 🔧 DL-004: Mantener robustez algoritmo institucional
     reliability: float   # 🔧 DL-004: Evaluación confianza datos Binance
+    features: Optional[FeatureFrame] = None  # Frame de indicadores del que se derivó
 
 @dataclass
 class MultiTimeframeSignal:
@@ -0,0 +1,506 @@
+#!/usr/bin/env python3
+"""
+🎯 ParameterOptimizer - Barrido paralelo de umbrales de estrategia y TP/SL
+Evalúa rejillas o muestras aleatorias de parámetros Smart Scalper (periodo y
+umbrales RSI, multiplicador de volumen, TP/SL %, velas máximas en posición)
+sobre velas históricas y devuelve un ranking con Sharpe / profit factor / drawdown.
+
+- Indicadores precalculados una vez por periodo distinto y compartidos por
+  todos los sets (se envían a cada proceso una sola vez, en el initializer)
+- Señales memoizadas por combinación de umbrales: variar TP/SL no las recalcula
+- ProcessPoolExecutor por bloques de sets; resultados en streaming
+
+Eduard Guzmán - InteliBotX
+"""
+
+import itertools
+import logging
+import math
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from services.indicator_kernels import rsi_series, sma_series
+
+logger = logging.getLogger(__name__)
+
+OPTIMIZER_WORKERS = int(os.getenv("OPTIMIZER_WORKERS", str(os.cpu_count() or 1)))
+OPTIMIZER_CHUNK_SIZE = int(os.getenv("OPTIMIZER_CHUNK_SIZE", "64"))
+OPTIMIZER_MAX_PARAMETER_SETS = int(os.getenv("OPTIMIZER_MAX_PARAMETER_SETS", "20000"))
+
+# Valores actuales de analyze_smart_scalper / BotConfig (RSI 30/70, volumen 1.5x SMA20, TP 2.5% / SL 1.5%)
+DEFAULT_PARAMETERS: Dict[str, Any] = {
+    "rsi_period": 14,
+    "rsi_oversold": 30.0,
+    "rsi_overbought": 70.0,
+    "volume_period": 20,
+    "volume_multiplier": 1.5,
+    "take_profit_pct": 2.5,
+    "stop_loss_pct": 1.5,
+    "max_hold_bars": 96,
+    "allow_short": True,
+    "fee_pct": 0.1,
+}
+
+DEFAULT_GRID: Dict[str, Sequence[Any]] = {
+    "rsi_period": [7, 14, 21],
+    "rsi_oversold": [25, 30, 35, 40, 45],
+    "rsi_overbought": [55, 60, 65, 70, 75],
+    "volume_multiplier": [0.0, 1.2, 1.5, 2.0],
+    "take_profit_pct": [1.0, 1.5, 2.5, 4.0],
+    "stop_loss_pct": [0.5, 1.0, 1.5, 2.5],
+}
+
+RANKING_METRICS = ("sharpe_ratio", "total_return_pct", "profit_factor", "win_rate", "max_drawdown_pct")
+_SIGNAL_KEYS = ("rsi_period", "rsi_oversold", "rsi_overbought", "volume_period", "volume_multiplier", "allow_short")
+
+ParameterSet = Dict[str, Any]
+SpaceValue = Union[Sequence[Any], Tuple[float, float]]
+
+
+# =================================================================
+# Espacio de parámetros
+# =================================================================
+
+def grid_parameter_sets(grid: Dict[str, Sequence[Any]], base: Optional[ParameterSet] = None) -> List[ParameterSet]:
+    """Producto cartesiano de la rejilla sobre los parámetros por defecto"""
+    base = {**DEFAULT_PARAMETERS, **(base or {})}
+    names = list(grid)
+    return [{**base, **dict(zip(names, values))} for values in itertools.product(*(grid[n] for n in names))]
+
+
+def parameter_set_count(grid: Dict[str, Sequence[Any]], samples: Optional[int] = None) -> int:
+    """Sets que generaría el barrido, sin construirlos (para validar límites antes)"""
+    if samples:
+        return samples
+    return math.prod(len(values) for values in grid.values())
+
+
+def random_parameter_sets(space: Dict[str, SpaceValue], n_samples: int, seed: Optional[int] = None,
+                          base: Optional[ParameterSet] = None) -> List[ParameterSet]:
+    """
+    Muestras aleatorias: una lista se muestrea por elección; una tupla (min, max)
+    uniformemente (entera si ambos extremos son int).
+    """
+    rng = random.Random(seed)
+    base = {**DEFAULT_PARAMETERS, **(base or {})}
+
+    def draw(value: SpaceValue):
+        if isinstance(value, tuple) and len(value) == 2:
+            low, high = value
+            if isinstance(low, int) and isinstance(high, int):
+                return rng.randint(low, high)
+            return rng.uniform(low, high)
+        return rng.choice(list(value))
+
+    return [{**base, **{name: draw(value) for name, value in space.items()}} for _ in range(n_samples)]
+
+
+# =================================================================
+# Evaluación
+# =================================================================
+
+class IndicatorBank:
+    """OHLCV + indicadores memoizados por periodo (RSI y ratio de volumen)"""
+
+    def __init__(self, highs: np.ndarray, lows: np.ndarray, closes: np.ndarray, volumes: np.ndarray):
+        self.highs = np.ascontiguousarray(highs, dtype=np.float64)
+        self.lows = np.ascontiguousarray(lows, dtype=np.float64)
+        self.closes = np.ascontiguousarray(closes, dtype=np.float64)
+        self.volumes = np.ascontiguousarray(volumes, dtype=np.float64)
+        self._rsi: Dict[int, np.ndarray] = {}
+        self._volume_ratio: Dict[int, np.ndarray] = {}
+        self._signals: Dict[Tuple[Any, ...], Tuple[np.ndarray, np.ndarray]] = {}
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "IndicatorBank":
+        return cls(df["high"].to_numpy(), df["low"].to_numpy(), df["close"].to_numpy(), df["volume"].to_numpy())
+
+    def __len__(self) -> int:
+        return self.closes.size
+
+    def __getstate__(self):
+        # Al proceso worker solo viajan OHLCV e indicadores; las señales se memoizan allí
+        state = self.__dict__.copy()
+        state["_signals"] = {}
+        return state
+
+    def rsi(self, period: int) -> np.ndarray:
+        values = self._rsi.get(period)
+        if values is None:
+            values = self._rsi[period] = rsi_series(self.closes, period)
+        return values
+
+    def volume_ratio(self, period: int) -> np.ndarray:
+        """Volumen de la vela / media de las `period` anteriores (semántica de detect_volume_spike)"""
+        values = self._volume_ratio.get(period)
+        if values is None:
+            average = np.r_[np.nan, sma_series(self.volumes, period)[:-1]]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                values = np.where(average > 0, self.volumes / average, np.nan)
+            self._volume_ratio[period] = values
+        return values
+
+    def prepare(self, parameter_sets: Iterable[ParameterSet]):
+        """Precalcular todos los periodos que usará el barrido (antes de repartir a procesos)"""
+        for params in parameter_sets:
+            self.rsi(int(params["rsi_period"]))
+            if params["volume_multiplier"] > 0:
+                self.volume_ratio(int(params["volume_period"]))
+
+    def signals(self, params: ParameterSet) -> Tuple[np.ndarray, np.ndarray]:
+        """(velas con señal, dirección +1/-1) para la combinación de umbrales"""
+        key = tuple(params[name] for name in _SIGNAL_KEYS)
+        cached = self._signals.get(key)
+        if cached is not None:
+            return cached
+        rsi = self.rsi(int(params["rsi_period"]))
+        buy = rsi < params["rsi_oversold"]
+        sell = rsi > params["rsi_overbought"] if params["allow_short"] else np.zeros_like(buy)
+        if params["volume_multiplier"] > 0:
+            confirmed = self.volume_ratio(int(params["volume_period"])) >= params["volume_multiplier"]
+            buy &= confirmed
+            sell &= confirmed
+        direction = buy.astype(np.int8) - (sell & ~buy).astype(np.int8)
+        bars = np.flatnonzero(direction[:-1])  # en la última vela no se puede abrir
+        if len(self._signals) > 4096:
+            self._signals.clear()
+        cached = self._signals[key] = (bars, direction[bars])
+        return cached
+
+
+def _resolve_exits(bank: IndicatorBank, bars: np.ndarray, directions: np.ndarray, tp_pct: float,
+                   sl_pct: float, max_hold: Optional[int]):
+    """
+    Salida de una hipotética posición abierta en cada vela con señal, para todas a la vez:
+    bloques crecientes de velas futuras (posiciones x velas) y primera vela que toca TP
+    o SL. Si ambos se tocan en la misma vela se asume SL. Motivo 1=TP / -1=SL / 0=tiempo.
+    """
+    n = len(bank)
+    price = bank.closes[bars]
+    take_profit = price * (1 + directions * tp_pct)
+    stop_loss = price * (1 - directions * sl_pct)
+    limit = np.minimum(n, bars + 1 + int(max_hold)) if max_hold else np.full(bars.size, n)
+    exit_bar = limit - 1
+    exit_price = bank.closes[exit_bar].copy()
+    reason = np.zeros(bars.size, dtype=np.int8)
+
+    for side in (1, -1):
+        # Largos: SL por mínimos y TP por máximos; cortos al revés
+        adverse, favorable = (bank.lows, bank.highs) if side == 1 else (bank.highs, bank.lows)
+        active = np.flatnonzero(directions == side)
+        offset, width = 1, 8
+        while active.size:
+            candle = bars[active, None] + np.arange(offset, offset + width)
+            within = candle < limit[active, None]
+            candle = np.minimum(candle, n - 1)
+            if side == 1:
+                sl_hit = adverse[candle] <= stop_loss[active, None]
+                tp_hit = favorable[candle] >= take_profit[active, None]
+            else:
+                sl_hit = adverse[candle] >= stop_loss[active, None]
+                tp_hit = favorable[candle] <= take_profit[active, None]
+            hit = (sl_hit | tp_hit) & within
+            rows = np.flatnonzero(hit.any(axis=1))
+            columns = hit[rows].argmax(axis=1)
+            done = active[rows]
+            stopped = sl_hit[rows, columns]
+            exit_bar[done] = candle[rows, columns]
+            exit_price[done] = np.where(stopped, stop_loss[done], take_profit[done])
+            reason[done] = np.where(stopped, -1, 1)
+
+            pending = np.ones(active.size, dtype=bool)
+            pending[rows] = False
+            active = active[pending & within[:, -1]]  # sin toque y aún dentro del límite
+            offset, width = offset + width, min(width * 2, 256)
+    return exit_bar, exit_price, reason
+
+
+def simulate_trades(bank: IndicatorBank, params: ParameterSet) -> Dict[str, np.ndarray]:
+    """Una posición a la vez: entrada al cierre de la vela con señal, salida por TP/SL/tiempo"""
+    bars, directions = bank.signals(params)
+    fee = 2 * params.get("fee_pct", 0.0) / 100
+    exit_bar, exit_price, reason = _resolve_exits(
+        bank, bars, directions, params["take_profit_pct"] / 100, params["stop_loss_pct"] / 100,
+        params.get("max_hold_bars")
+    )
+
+    # Encadenar: tras cada salida, la siguiente señal posterior (saltos enteros, sin NumPy por trade)
+    next_signal = np.searchsorted(bars, exit_bar, side="right").tolist()
+    taken = []
+    position = 0
+    while position < bars.size:
+        taken.append(position)
+        position = next_signal[position]
+    taken = np.asarray(taken, dtype=np.int64)
+
+    entries = bars[taken]
+    sides = directions[taken]
+    entry_prices = bank.closes[entries]
+    return {
+        "entry_bars": entries,
+        "exit_bars": exit_bar[taken],
+        "directions": sides,
+        "exit_reasons": reason[taken],
+        "returns": sides * (exit_price[taken] - entry_prices) / entry_prices - fee,
+    }
+
+
+def trade_metrics(returns: np.ndarray) -> Dict[str, Any]:
+    """Métricas por trade (Sharpe anualizado con la convención de BacktestBot.summary)"""
+    n = returns.size
+    if n == 0:
+        return {"trades": 0, "win_rate": 0.0, "total_return_pct": 0.0, "avg_return_pct": 0.0,
+                "sharpe_ratio": 0.0, "profit_factor": 0.0, "max_drawdown_pct": 0.0}
+    equity = np.cumprod(1 + returns)
+    peaks = np.maximum.accumulate(np.r_[1.0, equity])[1:]
+    gross_profit = float(returns[returns > 0].sum())
+    gross_loss = float(-returns[returns < 0].sum())
+    std = float(returns.std(ddof=1)) if n > 1 else 0.0
+    return {
+        "trades": int(n),
+        "win_rate": round(float(np.count_nonzero(returns > 0)) / n * 100, 2),
+        "total_return_pct": round(float(equity[-1] - 1) * 100, 3),
+        "avg_return_pct": round(float(returns.mean()) * 100, 4),
+        "sharpe_ratio": round(float(returns.mean()) / std * math.sqrt(252), 3) if std > 0 else 0.0,
+        # None = sin trades perdedores (infinito, no serializable en JSON)
+        "profit_factor": round(gross_profit / gross_loss, 3) if gross_loss > 0 else None,
+        "max_drawdown_pct": round(float(np.max(1 - equity / peaks)) * 100, 3),
+    }
+
+
+def evaluate_parameter_set(bank: IndicatorBank, params: ParameterSet) -> Dict[str, Any]:
+    trades = simulate_trades(bank, params)
+    reasons = trades["exit_reasons"]
+    return {
+        "params": params,
+        **trade_metrics(trades["returns"]),
+        "take_profit_exits": int(np.count_nonzero(reasons == 1)),
+        "stop_loss_exits": int(np.count_nonzero(reasons == -1)),
+        "avg_hold_bars": round(float((trades["exit_bars"] - trades["entry_bars"]).mean()), 2) if reasons.size else 0.0,
+    }
+
+
+# Estado por proceso worker (se inicializa una vez con el banco de indicadores)
+_worker_bank: Optional[IndicatorBank] = None
+
+
+def _init_worker(bank: IndicatorBank):
+    global _worker_bank
+    _worker_bank = bank
+
+
+def _evaluate_chunk(chunk: List[ParameterSet]) -> List[Dict[str, Any]]:
+    return [evaluate_parameter_set(_worker_bank, params) for params in chunk]
+
+
+# =================================================================
+# Optimizador
+# =================================================================
+
+class ParameterOptimizer:
+    """Barrido de sets de parámetros sobre un histórico fijo, en serie o en procesos"""
+
+    def __init__(self, candles: Union[pd.DataFrame, IndicatorBank], workers: int = OPTIMIZER_WORKERS,
+                 chunk_size: int = OPTIMIZER_CHUNK_SIZE):
+        self.bank = candles if isinstance(candles, IndicatorBank) else IndicatorBank.from_frame(candles)
+        self.workers = max(1, workers)
+        self.chunk_size = max(1, chunk_size)
+        self.last_stats: Dict[str, Any] = {}
+
+    def _chunks(self, parameter_sets: List[ParameterSet]) -> List[List[ParameterSet]]:
+        # Agrupar por combinación de señal: cada bloque reutiliza las señales memoizadas del worker
+        ordered = sorted(parameter_sets, key=lambda p: tuple(str(p[name]) for name in _SIGNAL_KEYS))
+        return [ordered[i:i + self.chunk_size] for i in range(0, len(ordered), self.chunk_size)]
+
+    def iter_results(self, parameter_sets: Sequence[ParameterSet]) -> Iterator[Dict[str, Any]]:
+        """Resultados según van terminando los bloques (orden no determinista en paralelo)"""
+        parameter_sets = [{**DEFAULT_PARAMETERS, **params} for params in parameter_sets]
+        if len(parameter_sets) > OPTIMIZER_MAX_PARAMETER_SETS:
+            raise ValueError(f"Máximo {OPTIMIZER_MAX_PARAMETER_SETS} sets por barrido ({len(parameter_sets)} pedidos)")
+        started = time.perf_counter()
+        self.bank.prepare(parameter_sets)
+        chunks = self._chunks(parameter_sets)
+        workers = min(self.workers, len(chunks))
+        evaluated = 0
+
+        if workers <= 1:
+            for chunk in chunks:
+                for params in chunk:
+                    evaluated += 1
+                    yield evaluate_parameter_set(self.bank, params)
+        else:
+            # spawn: seguro con los hilos del servidor; el banco viaja una vez por proceso
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                     initializer=_init_worker, initargs=(self.bank,)) as executor:
+                futures = [executor.submit(_evaluate_chunk, chunk) for chunk in chunks]
+                try:
+                    for future in as_completed(futures):
+                        for result in future.result():
+                            evaluated += 1
+                            yield result
+                finally:
+                    # Consumidor que abandona (close/error): no esperar a los bloques pendientes
+                    for future in futures:
+                        future.cancel()
+
+        seconds = time.perf_counter() - started
+        self.last_stats = {
+            "parameter_sets": evaluated,
+            "candles": len(self.bank),
+            "workers": workers,
+            "seconds": round(seconds, 3),
+            "sets_per_second": round(evaluated / seconds, 1) if seconds > 0 else None,
+        }
+
+    def optimize(self, parameter_sets: Sequence[ParameterSet], metric: str = "sharpe_ratio", top: int = 20,
+                 min_trades: int = 10) -> Dict[str, Any]:
+        """Ranking por métrica (max_drawdown_pct ascendente, el resto descendente)"""
+        if metric not in RANKING_METRICS:
+            raise ValueError(f"Métrica no soportada: {metric} (disponibles: {', '.join(RANKING_METRICS)})")
+        report = rank_results(self.iter_results(parameter_sets), metric, top, min_trades)
+        return {**report, "stats": self.last_stats}
+
+
+def rank_results(results: Iterable[Dict[str, Any]], metric: str = "sharpe_ratio", top: int = 20,
+                 min_trades: int = 10) -> Dict[str, Any]:
+    """Top `top` resultados con al menos `min_trades` trades ordenados por `metric`"""
+    qualified = [r for r in results if r["trades"] >= min_trades]
+
+    def sort_key(result: Dict[str, Any]):
+        value = result[metric]
+        if value is None:  # profit_factor sin pérdidas
+            value = math.inf
+        return value if metric == "max_drawdown_pct" else -value
+
+    qualified.sort(key=sort_key)
+    ranking = [{"rank": i + 1, **result} for i, result in enumerate(qualified[:top])]
+    return {
+        "metric": metric,
+        "min_trades": min_trades,
+        "qualified": len(qualified),
+        "ranking": ranking,
+    }
+
+
+# =================================================================
+# TESTING & BENCHMARK
+# =================================================================
+
+def _synthetic_candles(n_bars: int, seed: int = 3) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.004, n_bars)))
+    spread = np.abs(rng.normal(0, 0.003, n_bars))
+    return pd.DataFrame({
+        "timestamp": pd.date_range("2024-01-01", periods=n_bars, freq="15min"),
+        "open": np.r_[close[0], close[:-1]],
+        "high": close * (1 + spread),
+        "low": close * (1 - spread),
+        "close": close,
+        "volume": rng.lognormal(3, 0.6, n_bars),
+    })
+
+
+def _reference_evaluate(df: pd.DataFrame, params: ParameterSet) -> List[Tuple[int, int, int, float]]:
+    """Bucle vela a vela con indicadores recalculados (pandas) como referencia del motor"""
+    params = {**DEFAULT_PARAMETERS, **params}
+    close = df["close"]
+    delta = close.diff().fillna(0)
+    period = int(params["rsi_period"])
+    gain = delta.where(delta > 0, 0.0).rolling(period).mean()
+    loss = (-delta.where(delta < 0, 0.0)).rolling(period).mean()
+    rsi = (100 - 100 / (1 + gain / loss)).to_numpy()
+    average = df["volume"].rolling(int(params["volume_period"])).mean().shift(1).to_numpy()
+    volume = df["volume"].to_numpy()
+    highs, lows, closes = df["high"].to_numpy(), df["low"].to_numpy(), close.to_numpy()
+    fee = 2 * params["fee_pct"] / 100
+
+    trades, i, n = [], 0, len(df)
+    while i < n - 1:
+        confirmed = params["volume_multiplier"] <= 0 or volume[i] / average[i] >= params["volume_multiplier"]
+        direction = 0
+        if rsi[i] < params["rsi_oversold"] and confirmed:
+            direction = 1
+        elif params["allow_short"] and rsi[i] > params["rsi_overbought"] and confirmed:
+            direction = -1
+        if direction == 0:
+            i += 1
+            continue
+        entry = closes[i]
+        tp = entry * (1 + direction * params["take_profit_pct"] / 100)
+        sl = entry * (1 - direction * params["stop_loss_pct"] / 100)
+        limit = min(n, i + 1 + params["max_hold_bars"]) if params["max_hold_bars"] else n
+        exit_bar, exit_price = limit - 1, closes[limit - 1]
+        for j in range(i + 1, limit):
+            sl_hit = lows[j] <= sl if direction == 1 else highs[j] >= sl
+            tp_hit = highs[j] >= tp if direction == 1 else lows[j] <= tp
+            if sl_hit or tp_hit:
+                exit_bar, exit_price = j, (sl if sl_hit else tp)
+                break
+        trades.append((i, exit_bar, direction, direction * (exit_price - entry) / entry - fee))
+        i = exit_bar + 1
+    return trades
+
+
+def test_parameter_optimizer():
+    """Motor vectorizado = bucle de referencia; serie y procesos dan el mismo ranking"""
+    print("🧪 Testing ParameterOptimizer...")
+    df = _synthetic_candles(6000)
+    bank = IndicatorBank.from_frame(df)
+
+    samples = random_parameter_sets({
+        "rsi_period": (5, 25), "rsi_oversold": (20.0, 48.0), "rsi_overbought": (52.0, 80.0),
+        "volume_multiplier": [0.0, 1.0, 1.5], "take_profit_pct": (0.3, 4.0), "stop_loss_pct": (0.3, 3.0),
+        "max_hold_bars": [0, 24, 96], "allow_short": [True, False]
+    }, 40, seed=5)
+    for params in samples:
+        trades = simulate_trades(bank, params)
+        reference = _reference_evaluate(df, params)
+        assert len(reference) == trades["returns"].size, params
+        assert [(e, x, d) for e, x, d, _ in reference] == list(zip(
+            trades["entry_bars"].tolist(), trades["exit_bars"].tolist(), trades["directions"].tolist()))
+        assert np.allclose([r for *_, r in reference], trades["returns"])
+
+    grid = {"rsi_oversold": [30, 40], "rsi_overbought": [60, 70], "take_profit_pct": [1.0, 2.0],
+            "stop_loss_pct": [0.5, 1.0]}
+    parameter_sets = grid_parameter_sets(grid)
+    assert len(parameter_sets) == 16
+    serial = ParameterOptimizer(df, workers=1).optimize(parameter_sets, min_trades=1, top=16)
+    parallel = ParameterOptimizer(df, workers=2, chunk_size=3).optimize(parameter_sets, min_trades=1, top=16)
+    assert [r["params"] for r in serial["ranking"]] == [r["params"] for r in parallel["ranking"]]
+    sharpes = [r["sharpe_ratio"] for r in serial["ranking"]]
+    assert sharpes == sorted(sharpes, reverse=True)
+    assert parallel["stats"]["workers"] == 2 and parallel["stats"]["parameter_sets"] == 16
+    print(f"✅ ParameterOptimizer test completed: top={serial['ranking'][0]['params']} "
+          f"sharpe={serial['ranking'][0]['sharpe_ratio']}")
+
+
+def benchmark_parameter_optimizer(n_bars: int = 35_040, n_sets: int = 1000, reference_sets: int = 20):
+    """Un año de velas 15m: bucle con indicadores por set frente al barrido con indicadores compartidos"""
+    df = _synthetic_candles(n_bars)
+    parameter_sets = random_parameter_sets(DEFAULT_GRID, n_sets, seed=1)
+
+    start = time.perf_counter()
+    for params in parameter_sets[:reference_sets]:
+        _reference_evaluate(df, params)
+    reference_rate = reference_sets / (time.perf_counter() - start)
+
+    print(f"🧪 Parameter sweep: {n_sets} sets x {n_bars} velas (CPUs: {os.cpu_count()})")
+    print(f"   bucle por set (referencia):  {reference_rate:10.1f} sets/s")
+    for workers in sorted({1, OPTIMIZER_WORKERS}):
+        report = ParameterOptimizer(df, workers=workers).optimize(parameter_sets, min_trades=5)
+        stats = report["stats"]
+        print(f"   optimizador ({workers} procesos):    {stats['sets_per_second']:10.1f} sets/s "
+              f"| {stats['seconds']:.2f}s | top sharpe {report['ranking'][0]['sharpe_ratio'] if report['ranking'] else '-'}")
+
+
+if __name__ == "__main__":
+    test_parameter_optimizer()
+    benchmark_parameter_optimizer()
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+🎯 PrincipalCache - Caché de usuarios autenticados por token
+Evita jwt.decode + Session + SELECT de User en cada request autenticada:
+la entrada se indexa por SHA-256 del token (nunca el token en claro), caduca
+con min(TTL, exp del JWT) y se invalida por usuario (cambio de contraseña,
+API keys, verificación) o por token revocado (logout).
+
+Eduard Guzmán - InteliBotX
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+AUTH_PRINCIPAL_CACHE_TTL = float(os.getenv("AUTH_PRINCIPAL_CACHE_TTL", "60"))
+AUTH_PRINCIPAL_CACHE_SIZE = int(os.getenv("AUTH_PRINCIPAL_CACHE_SIZE", "10000"))
+
+
+def token_digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode("utf-8")).digest()
+
+
+class PrincipalCache:
+    """LRU acotado de (usuario desvinculado de sesión, token_data) por hash de token"""
+
+    def __init__(self, ttl_seconds: float = AUTH_PRINCIPAL_CACHE_TTL, max_entries: int = AUTH_PRINCIPAL_CACHE_SIZE):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        # digest -> (expires_at, user_id, generación del usuario, user, token_data)
+        self._entries: "OrderedDict[bytes, Tuple[float, int, int, Any, Dict[str, Any]]]" = OrderedDict()
+        # Generación por usuario: invalidar = incrementar (O(1), las entradas viejas dejan de valer)
+        self._generations: Dict[int, int] = {}
+        # Tokens revocados (logout) hasta su exp en epoch
+        self._revoked: Dict[bytes, float] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def get(self, digest: bytes) -> Optional[Tuple[Any, Dict[str, Any]]]:
+        if not self.enabled:
+            return None
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, user_id, generation, user, token_data = entry
+            if now >= expires_at or generation != self._generations.get(user_id, 0):
+                del self._entries[digest]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(digest)
+            self.hits += 1
+            return user, token_data
+
+    def put(self, digest: bytes, user: Any, token_data: Dict[str, Any]):
+        if not self.enabled:
+            return
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+        token_exp = token_data.get("exp")
+        if token_exp:
+            expires_at = min(expires_at, float(token_exp))
+        if expires_at <= now:
+            return
+        with self._lock:
+            self._entries[digest] = (expires_at, user.id, self._generations.get(user.id, 0), user, token_data)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_user(self, user_id: int):
+        """Descartar todas las entradas de un usuario (datos o credenciales modificados)"""
+        with self._lock:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            self.invalidations += 1
+
+    def revoke(self, digest: bytes, token_exp: Optional[float] = None):
+        """Logout: el token deja de aceptarse en este proceso hasta su expiración"""
+        now = time.time()
+        with self._lock:
+            self._entries.pop(digest, None)
+            self._revoked[digest] = float(token_exp) if token_exp else now + 24 * 3600
+            if len(self._revoked) > self.max_entries:
+                self._revoked = {d: exp for d, exp in self._revoked.items() if exp > now}
+            self.invalidations += 1
+
+    def is_revoked(self, digest: bytes) -> bool:
+        if not self._revoked:
+            return False
+        exp = self._revoked.get(digest)
+        return exp is not None and exp > time.time()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total * 100, 2) if total else 0.0,
+            "invalidations": self.invalidations,
+            "revoked_tokens": len(self._revoked)
+        }
+
+
+# Instancia global del caché de principals
+principal_cache = PrincipalCache()
+
+
+# =================================================================
+# TESTING & BENCHMARK
+# =================================================================
+
+def _memory_user_engine():
+    from sqlalchemy import create_engine
+    from sqlalchemy.pool import StaticPool
+    from sqlmodel import SQLModel
+    from models.user import User
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine, tables=[User.__table__])
+    return engine
+
+
+def test_principal_cache():
+    """Un único SELECT por token mientras la entrada es válida; invalidación y revocación"""
+    from sqlalchemy import event
+    from sqlmodel import Session
+    from models.user import User
+    from services.auth_service import auth_service, _authenticate_token
+    from services.principal_cache import principal_cache  # la instancia que usa auth_service
+    from utils.exceptions import AuthenticationError
+
+    print("🧪 Testing PrincipalCache...")
+    engine = _memory_user_engine()
+    queries = []
+    event.listen(engine, "before_cursor_execute", lambda *args: queries.append(args[2]))
+
+    with Session(engine) as session:
+        user = User(email="cache@intelibotx.com", password_hash="x")
+        session.add(user)
+        session.commit()
+        session.refresh(user)
+        user_id = user.id
+    token = auth_service.create_jwt_token(user_id, "cache@intelibotx.com")["access_token"]
+
+    principal_cache.clear()
+    queries.clear()
+    for _ in range(5):
+        with Session(engine) as session:
+            assert _authenticate_token(token, session).id == user_id
+    assert len(queries) == 1, queries
+
+    principal_cache.invalidate_user(user_id)
+    with Session(engine) as session:
+        cached_user = _authenticate_token(token, session)
+    assert len(queries) == 2
+    assert cached_user.email == "cache@intelibotx.com"  # usable tras cerrar la sesión
+
+    auth_service.revoke_token(token)
+    try:
+        _authenticate_token(token)
+        raise AssertionError("El token revocado no debe autenticar")
+    except AuthenticationError:
+        pass
+
+    short_lived = PrincipalCache(ttl_seconds=60)
+    short_lived.put(b"expired", cached_user, {"exp": time.time() - 1})
+    assert short_lived.get(b"expired") is None
+    print(f"✅ PrincipalCache test completed: {principal_cache.stats()}")
+
+
+def benchmark_principal_cache(n_requests: int = 5000):
+    """jwt.decode + Session + SELECT por request frente a acierto en caché"""
+    from sqlmodel import Session
+    from models.user import User
+    from services.auth_service import auth_service, _authenticate_token
+    from services.principal_cache import principal_cache
+
+    engine = _memory_user_engine()
+    with Session(engine) as session:
+        user = User(email="bench@intelibotx.com", password_hash="x")
+        session.add(user)
+        session.commit()
+        session.refresh(user)
+        user_id = user.id
+    token = auth_service.create_jwt_token(user_id, "bench@intelibotx.com")["access_token"]
+
+    start = time.perf_counter()
+    for _ in range(n_requests):
+        token_data = auth_service.verify_jwt_token(token)
+        with Session(engine) as session:
+            auth_service.get_user_by_id(token_data["user_id"], session)
+    uncached_us = (time.perf_counter() - start) * 1e6 / n_requests
+
+    principal_cache.clear()
+    with Session(engine) as session:
+        _authenticate_token(token, session)
+    start = time.perf_counter()
+    for _ in range(n_requests):
+        _authenticate_token(token)
+    cached_us = (time.perf_counter() - start) * 1e6 / n_requests
+
+    print(f"🧪 Principal cache: {n_requests} requests autenticadas (SQLite en memoria, sin red)")
+    print(f"   jwt.decode + SELECT User: {uncached_us:8.1f} µs/request")
+    print(f"   acierto en caché:         {cached_us:8.1f} µs/request")
+
+
+if __name__ == "__main__":
+    test_principal_cache()
+    benchmark_principal_cache()
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+📐 Quantile Sketch - Percentiles en streaming con error relativo acotado
+Sketch de buckets logarítmicos (estilo DDSketch / HDR histogram): cada valor cae en
+el bucket ceil(log_gamma(x)) y cualquier percentil se estima con error relativo
+<= relative_accuracy. Los sketches se combinan sumando buckets, así que se pueden
+mantener por serie (bot/símbolo/estrategia) y por hora y mezclarse al consultar.
+
+WindowedSketchStore guarda un sketch por (bucket temporal, serie, métrica) con
+retención acotada, una serie agregada () para consultas globales O(buckets) y
+seguimiento de sketches modificados para persistirlos periódicamente.
+
+Eduard Guzmán - InteliBotX
+"""
+
+import json
+import math
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+DEFAULT_QUANTILES = (0.5, 0.9, 0.99, 0.999)
+_MIN_INDEXABLE = 1e-9
+
+
+class QuantileSketch:
+    """Sketch mergeable de buckets logarítmicos para valores >= 0"""
+
+    __slots__ = ("relative_accuracy", "_gamma", "_log_gamma", "bins", "zero_count",
+                 "count", "sum", "min", "max")
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy debe estar en (0, 1)")
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self.bins: Dict[int, int] = {}
+        self.zero_count = 0  # valores <= _MIN_INDEXABLE (negativos incluidos)
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float):
+        if value > _MIN_INDEXABLE:
+            index = math.ceil(math.log(value) / self._log_gamma)
+            self.bins[index] = self.bins.get(index, 0) + 1
+        else:
+            self.zero_count += 1
+        self.count += 1
+        self.sum += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("No se pueden combinar sketches con distinta precisión")
+        for index, count in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def quantiles(self, qs: Sequence[float] = DEFAULT_QUANTILES) -> List[Optional[float]]:
+        """Varios percentiles en una única pasada por los buckets (coste independiente de count)"""
+        if self.count == 0:
+            return [None] * len(qs)
+        ranks = sorted((q * (self.count - 1), position) for position, q in enumerate(qs))
+        results: List[Optional[float]] = [None] * len(qs)
+        pending = iter(ranks)
+        rank, position = next(pending)
+
+        cumulative = self.zero_count
+        try:
+            while rank < cumulative:
+                results[position] = max(self.min, 0.0)
+                rank, position = next(pending)
+            for index in sorted(self.bins):
+                cumulative += self.bins[index]
+                representative = 2 * self._gamma ** index / (self._gamma + 1)
+                value = min(max(representative, self.min), self.max)
+                while rank < cumulative:
+                    results[position] = value
+                    rank, position = next(pending)
+        except StopIteration:
+            return results
+        for _, position in [(rank, position), *pending]:
+            results[position] = self.max
+        return results
+
+    def quantile(self, q: float) -> Optional[float]:
+        return self.quantiles((q,))[0]
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.sum / self.count if self.count else None
+
+    def summary(self, qs: Sequence[float] = DEFAULT_QUANTILES, digits: int = 4) -> Dict[str, Optional[float]]:
+        """{'count', 'mean', 'max', 'p50', 'p90', 'p99', 'p99_9'}"""
+        def rounded(value):
+            return round(value, digits) if value is not None else None
+
+        values = self.quantiles(qs)
+        result = {"count": self.count, "mean": rounded(self.mean),
+                  "max": rounded(self.max) if self.count else None}
+        for q, value in zip(qs, values):
+            result["p" + f"{q * 100:g}".replace(".", "_")] = rounded(value)
+        return result
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "a": self.relative_accuracy, "bins": self.bins, "zero": self.zero_count,
+            "count": self.count, "sum": self.sum,
+            "min": self.min if self.count else None, "max": self.max if self.count else None
+        })
+
+    @classmethod
+    def from_json(cls, payload: str) -> "QuantileSketch":
+        data = json.loads(payload)
+        sketch = cls(data["a"])
+        sketch.bins = {int(index): count for index, count in data["bins"].items()}
+        sketch.zero_count = data["zero"]
+        sketch.count = data["count"]
+        sketch.sum = data["sum"]
+        if sketch.count:
+            sketch.min, sketch.max = data["min"], data["max"]
+        return sketch
+
+
+SeriesKey = Tuple
+ALL_SERIES: SeriesKey = ()
+
+
+class WindowedSketchStore:
+    """
+    Sketches por (bucket temporal, serie, métrica) con retención acotada.
+
+    add() actualiza la serie y el agregado global (); merged() combina los buckets de
+    la ventana pedida (granularidad bucket_seconds) para las series que cumplan `match`.
+    """
+
+    def __init__(self, metrics: Sequence[str], bucket_seconds: int = 3600, retention_buckets: int = 169,
+                 relative_accuracy: float = 0.01):
+        self.metrics = tuple(metrics)
+        self.bucket_seconds = bucket_seconds
+        self.retention_buckets = retention_buckets
+        self.relative_accuracy = relative_accuracy
+        self._buckets: Dict[int, Dict[SeriesKey, Dict[str, QuantileSketch]]] = {}
+        self._dirty: set = set()
+        self._lock = threading.Lock()
+
+    def _bucket(self, timestamp: float) -> int:
+        return int(timestamp // self.bucket_seconds) * self.bucket_seconds
+
+    def _series(self, bucket: int, key: SeriesKey) -> Dict[str, QuantileSketch]:
+        series = self._buckets.setdefault(bucket, {})
+        sketches = series.get(key)
+        if sketches is None:
+            sketches = series[key] = {metric: QuantileSketch(self.relative_accuracy) for metric in self.metrics}
+        return sketches
+
+    def add(self, key: SeriesKey, values: Dict[str, float], timestamp: Optional[float] = None):
+        bucket = self._bucket(time.time() if timestamp is None else timestamp)
+        with self._lock:
+            if bucket not in self._buckets:
+                self._evict(bucket)
+            for series_key in (key, ALL_SERIES):
+                sketches = self._series(bucket, series_key)
+                for metric, value in values.items():
+                    sketches[metric].add(value)
+            self._dirty.add((bucket, key))
+
+    def _evict(self, newest_bucket: int):
+        oldest = newest_bucket - (self.retention_buckets - 1) * self.bucket_seconds
+        for bucket in [b for b in self._buckets if b < oldest]:
+            del self._buckets[bucket]
+        self._dirty = {(bucket, key) for bucket, key in self._dirty if bucket >= oldest}
+
+    def merged(self, window_seconds: float, match: Optional[Callable[[SeriesKey], bool]] = None,
+               now: Optional[float] = None) -> Dict[str, QuantileSketch]:
+        """Sketch combinado por métrica sobre los buckets de la ventana"""
+        first_bucket = self._bucket((time.time() if now is None else now) - window_seconds + self.bucket_seconds)
+        result = {metric: QuantileSketch(self.relative_accuracy) for metric in self.metrics}
+        with self._lock:
+            for bucket, series in self._buckets.items():
+                if bucket < first_bucket:
+                    continue
+                if match is None:
+                    selected = [series[ALL_SERIES]] if ALL_SERIES in series else []
+                else:
+                    selected = [sketches for key, sketches in series.items() if key != ALL_SERIES and match(key)]
+                for sketches in selected:
+                    for metric, sketch in sketches.items():
+                        result[metric].merge(sketch)
+        return result
+
+    def series_keys(self) -> List[SeriesKey]:
+        with self._lock:
+            return sorted({key for series in self._buckets.values() for key in series if key != ALL_SERIES})
+
+    def drain_dirty(self) -> List[Tuple[int, str, str, str]]:
+        """Filas (bucket_start, serie JSON, métrica, sketch JSON) modificadas desde el último drain"""
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            return [
+                (bucket, json.dumps(list(key)), metric, sketch.to_json())
+                for bucket, key in dirty if key in self._buckets.get(bucket, {})
+                for metric, sketch in self._buckets[bucket][key].items()
+            ]
+
+    def load(self, rows: Iterable[Tuple[int, str, str, str]]):
+        """Restaurar sketches persistidos (reconstruye el agregado global)"""
+        with self._lock:
+            for bucket, series_json, metric, payload in rows:
+                if metric not in self.metrics:
+                    continue
+                key = tuple(json.loads(series_json))
+                sketch = QuantileSketch.from_json(payload)
+                self._series(bucket, key)[metric] = sketch
+                self._series(bucket, ALL_SERIES)[metric].merge(sketch)
+
+
+# =================================================================
+# TESTING & BENCHMARK
+# =================================================================
+
+def test_quantile_sketch():
+    """Error relativo <= 1% frente a np.quantile, merge y serialización exactos"""
+    import numpy as np
+
+    print("🧪 Testing QuantileSketch...")
+    rng = np.random.default_rng(11)
+    qs = (0.0, 0.5, 0.9, 0.99, 0.999, 1.0)
+    for data in (rng.lognormal(4, 0.6, 50_000), rng.exponential(0.02, 20_000),
+                 np.concatenate([np.zeros(500), rng.uniform(10, 500, 5000)]), np.array([42.0])):
+        sketch = QuantileSketch(0.01)
+        for value in data.tolist():
+            sketch.add(value)
+        estimates = sketch.quantiles(qs)
+        # Rango de rangos válidos por percentil: el valor exacto en el orden estadístico
+        exact = np.quantile(data, qs, method="lower")
+        exact_upper = np.quantile(data, qs, method="higher")
+        for estimate, low, high in zip(estimates, exact, exact_upper):
+            assert low * 0.99 - 1e-12 <= estimate <= high * 1.01 + 1e-12, (estimate, low, high)
+
+        half = len(data) // 2
+        left, right = QuantileSketch(0.01), QuantileSketch(0.01)
+        for value in data[:half].tolist():
+            left.add(value)
+        for value in data[half:].tolist():
+            right.add(value)
+        assert left.merge(right).quantiles(qs) == estimates
+        assert QuantileSketch.from_json(sketch.to_json()).quantiles(qs) == estimates
+
+    store = WindowedSketchStore(("latency",), bucket_seconds=60, retention_buckets=3)
+    now = 1_000_000.0
+    store.add((1, "BTCUSDT"), {"latency": 10.0}, now - 200)  # expirado al llegar los nuevos
+    store.add((1, "BTCUSDT"), {"latency": 20.0}, now - 90)
+    store.add((2, "ETHUSDT"), {"latency": 40.0}, now)
+    assert store.merged(180, now=now)["latency"].count == 2
+    assert store.merged(60, now=now)["latency"].count == 1
+    assert store.merged(180, match=lambda key: key[0] == 1, now=now)["latency"].max == 20.0
+    restored = WindowedSketchStore(("latency",), bucket_seconds=60, retention_buckets=3)
+    restored.load(store.drain_dirty())
+    assert restored.merged(180, now=now)["latency"].count == 2
+    print("✅ QuantileSketch test completed")
+
+
+def benchmark_quantile_sketch(n_values: int = 1_000_000):
+    """Coste de add() y de consultar percentiles vs np.percentile sobre todos los valores"""
+    import numpy as np
+
+    values = np.random.default_rng(3).lognormal(4, 0.6, n_values)
+    as_list = values.tolist()
+    sketch = QuantileSketch(0.01)
+    start = time.perf_counter()
+    for value in as_list:
+        sketch.add(value)
+    add_us = (time.perf_counter() - start) * 1e6 / n_values
+
+    start = time.perf_counter()
+    for _ in range(100):
+        sketch.quantiles()
+    query_us = (time.perf_counter() - start) * 1e6 / 100
+
+    start = time.perf_counter()
+    np.percentile(values, [50, 90, 99, 99.9])
+    exact_ms = (time.perf_counter() - start) * 1000
+
+    print(f"🧪 QuantileSketch benchmark: {n_values} valores, {len(sketch.bins)} buckets")
+    print(f"   add():                      {add_us:8.3f} µs/valor")
+    print(f"   p50/p90/p99/p99.9 (sketch): {query_us:8.1f} µs")
+    print(f"   np.percentile (exacto):     {exact_ms * 1000:8.1f} µs")
+
+
+if __name__ == "__main__":
+    test_quantile_sketch()
+    benchmark_quantile_sketch()
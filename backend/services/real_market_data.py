@@ -3,7 +3,6 @@ Servicio para obtener datos reales de mercado desde Binance
 Integra precios en tiempo real para los bots de trading
 """
 
-import httpx
 import asyncio
 import time
 import os
@@ -12,20 +11,23 @@ from dotenv import load_dotenv
 import pandas as pd
 import numpy as np
 
+from utils.http_client_pool import HttpClientPool, http_client_pool
+
 load_dotenv()
 
 class RealMarketDataService:
     """Servicio para datos de mercado reales desde Binance"""
     
-    def __init__(self, use_testnet: bool = True):
+    def __init__(self, use_testnet: bool = True, http_pool: Optional[HttpClientPool] = None):
         self.use_testnet = use_testnet
+        self.http_pool = http_pool or http_client_pool
         self.base_url = "https://testnet.binance.vision" if use_testnet else "https://api.binance.com"
         self.api_key = os.getenv("BINANCE_TESTNET_API_KEY" if use_testnet else "BINANCE_API_KEY")
         
     async def get_current_price(self, symbol: str) -> float:
         """Obtener precio actual de un símbolo"""
         try:
-            async with httpx.AsyncClient() as client:
+            async with self.http_pool.client() as client:
                 response = await client.get(f"{self.base_url}/api/v3/ticker/price", params={"symbol": symbol.upper()})
                 response.raise_for_status()
                 data = response.json()
@@ -37,7 +39,7 @@ class RealMarketDataService:
     async def get_24hr_ticker(self, symbol: str) -> Dict:
         """Obtener estadísticas 24h de un símbolo"""
         try:
-            async with httpx.AsyncClient() as client:
+            async with self.http_pool.client() as client:
                 response = await client.get(f"{self.base_url}/api/v3/ticker/24hr", params={"symbol": symbol.upper()})
                 response.raise_for_status()
                 data = response.json()
@@ -60,7 +62,7 @@ class RealMarketDataService:
     async def get_klines(self, symbol: str, interval: str = "15m", limit: int = 100) -> pd.DataFrame:
         """Obtener datos históricos (candlesticks) reales"""
         try:
-            async with httpx.AsyncClient() as client:
+            async with self.http_pool.client() as client:
                 params = {
                     "symbol": symbol.upper(),
                     "interval": interval,
@@ -95,7 +97,7 @@ class RealMarketDataService:
     async def get_order_book(self, symbol: str, limit: int = 20) -> Dict:
         """Obtener libro de órdenes actual"""
         try:
-            async with httpx.AsyncClient() as client:
+            async with self.http_pool.client() as client:
                 params = {
                     "symbol": symbol.upper(),
                     "limit": limit
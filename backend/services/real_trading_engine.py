@@ -7,7 +7,6 @@ Eduard Guzmán - InteliBotX
 """
 
 import asyncio
-import httpx
 import hmac
 import hashlib
 import time
@@ -20,6 +19,7 @@ from urllib.parse import urlencode
 
 from services.execution_metrics import ExecutionMetricsTracker
 from services.technical_analysis_service import TechnicalAnalysisService
+from utils.http_client_pool import HttpClientPool, http_client_pool
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
@@ -61,12 +61,14 @@ class RealTradingEngine:
         api_key: str, 
         api_secret: str, 
         use_testnet: bool = True,
-        enable_real_trading: bool = False
+        enable_real_trading: bool = False,
+        http_pool: Optional[HttpClientPool] = None
     ):
         self.api_key = api_key
         self.api_secret = api_secret
         self.use_testnet = use_testnet
         self.enable_real_trading = enable_real_trading
+        self.http_pool = http_pool or http_client_pool
         
         # URLs de Binance
         if use_testnet:
@@ -76,7 +78,7 @@ class RealTradingEngine:
             
         # Servicios auxiliares
         self.metrics_tracker = ExecutionMetricsTracker()
-        self.technical_analysis = TechnicalAnalysisService(use_testnet=use_testnet)
+        self.technical_analysis = TechnicalAnalysisService(use_testnet=use_testnet, http_pool=self.http_pool)
         
         # Estado del motor
         self.active_orders = {}  # symbol -> order_info
@@ -124,7 +126,7 @@ class RealTradingEngine:
             
             url = f"{self.base_url}/account?{query_string}&signature={signature}"
             
-            async with httpx.AsyncClient() as client:
+            async with self.http_pool.client() as client:
                 response = await client.get(url, headers=self._get_headers(), timeout=10.0)
                 
                 if response.status_code == 200:
@@ -209,7 +211,7 @@ class RealTradingEngine:
             # Ejecutar orden
             execution_start = time.perf_counter()
             
-            async with httpx.AsyncClient() as client:
+            async with self.http_pool.client() as client:
                 response = await client.post(
                     f"{self.base_url}/order",
                     data=order_params,
@@ -467,7 +469,7 @@ class RealTradingEngine:
             
             url = f"{self.base_url}/openOrders"
             
-            async with httpx.AsyncClient() as client:
+            async with self.http_pool.client() as client:
                 response = await client.get(
                     url, 
                     params=params, 
@@ -501,7 +503,7 @@ class RealTradingEngine:
             signature = self._generate_signature(query_string)
             params['signature'] = signature
             
-            async with httpx.AsyncClient() as client:
+            async with self.http_pool.client() as client:
                 response = await client.delete(
                     f"{self.base_url}/order",
                     data=params,
@@ -22,6 +22,7 @@ from services.binance_websocket_service import (
 )
 from services.user_trading_service import UserTradingService
 from services.technical_analysis_service import TechnicalAnalysisService
+from utils.tick_scheduler import CoalescingTickScheduler
 from models.user import User
 from models.user_exchange import UserExchange
 from sqlmodel import Session
@@ -34,8 +35,9 @@ class RealtimeDataManager:
     """Gestor central para datos en tiempo real y WebSockets basado en usuarios"""
     
     def __init__(self):
-        # WebSocket services por usuario (testnet/mainnet según configuración)
-        self.user_websocket_services: Dict[str, BinanceWebSocketService] = {}
+        # Un WebSocket service compartido por red; los usuarios solo aportan referencias
+        self.network_services: Dict[bool, BinanceWebSocketService] = {}  # use_testnet -> service
+        self.user_websocket_services: Dict[str, BinanceWebSocketService] = {}  # user_id -> service de su red
         self.user_trading_service = UserTradingService()
         
         # Configurar Redis para caché (opcional)
@@ -58,6 +60,9 @@ class RealtimeDataManager:
         # Clients conectados por usuario
         self.connected_users: Dict[str, Set[str]] = {}  # user_id -> client_ids
         
+        # Distribución push: símbolos con datos nuevos se entregan coalescidos al callback
+        self.tick_scheduler: Optional[CoalescingTickScheduler] = None
+        
         logger.info("✅ RealtimeDataManager inicializado (modo usuario)")
 
     async def get_user_websocket_service(self, user_id: int, session: Session) -> Optional[BinanceWebSocketService]:
@@ -69,7 +74,7 @@ class RealtimeDataManager:
             session: Sesión de base de datos
             
         Returns:
-            BinanceWebSocketService configurado según exchanges del usuario
+            BinanceWebSocketService compartido de la red (testnet/mainnet) del usuario
         """
         try:
             user_key = str(user_id)
@@ -83,88 +88,87 @@ class RealtimeDataManager:
             
             if not exchanges:
                 logger.warning(f"⚠️ Usuario {user_id} no tiene exchanges configurados")
-                # Crear servicio testnet por defecto (seguro)
-                websocket_service = BinanceWebSocketService(use_testnet=True)
-                self.user_websocket_services[user_key] = websocket_service
-                return websocket_service
-            
-            # Usar configuración del primer exchange activo
-            primary_exchange = exchanges[0]
-            use_testnet = primary_exchange.is_testnet
+                # Servicio testnet por defecto (seguro)
+                use_testnet = True
+            else:
+                # Usar configuración del primer exchange activo
+                use_testnet = exchanges[0].is_testnet
             
             logger.info(f"📊 Usuario {user_id}: Usando {'testnet' if use_testnet else 'mainnet'}")
             
-            # Crear servicio WebSocket con configuración correcta
-            websocket_service = BinanceWebSocketService(use_testnet=use_testnet)
-            
-            # Configurar callbacks específicos del usuario
-            await self._setup_user_callbacks(websocket_service, user_id)
-            
-            # Almacenar servicio
-            self.user_websocket_services[user_key] = websocket_service
-            
-            return websocket_service
-            
         except Exception as e:
             logger.error(f"❌ Error obteniendo WebSocket service para usuario {user_id}: {e}")
             # Fallback a testnet seguro
-            websocket_service = BinanceWebSocketService(use_testnet=True)
-            self.user_websocket_services[str(user_id)] = websocket_service
-            return websocket_service
-
-    async def _setup_user_callbacks(self, websocket_service: BinanceWebSocketService, user_id: int):
-        """Configurar callbacks específicos por usuario"""
+            use_testnet = True
         
-        async def on_kline_update(kline: RealtimeKline):
-            """Callback para actualizaciones de kline del usuario"""
-            if kline.is_closed:
-                # Caché específico por usuario
-                cache_key = f"user:{user_id}:kline:{kline.symbol}:{kline.interval}"
-                await self._cache_set(cache_key, asdict(kline), ttl=self.cache_ttl)
-                
-                logger.debug(f"💾 Cached kline usuario {user_id}: {kline.symbol} @ {kline.close_price}")
-        
-        async def on_indicators_update(indicators: RealtimeTechnicalIndicators):
-            """Callback para actualizaciones de indicadores del usuario"""
-            # Caché específico por usuario
-            cache_key = f"user:{user_id}:indicators:{indicators.symbol}"
-            await self._cache_set(cache_key, asdict(indicators), ttl=self.cache_ttl)
-            
-            # Log señales importantes
-            if indicators.smart_scalper_signal in ['BUY', 'SELL'] and indicators.confidence > 0.75:
-                logger.info(f"🎯 SEÑAL FUERTE Usuario {user_id}: {indicators.symbol} {indicators.smart_scalper_signal} "
-                           f"({indicators.confidence:.0%}) - RSI: {indicators.rsi:.1f}")
-        
-        # Registrar callbacks
-        websocket_service.add_kline_callback(on_kline_update)
-        websocket_service.add_indicator_callback(on_indicators_update)
+        websocket_service = self._get_network_service(use_testnet)
+        self.user_websocket_services[str(user_id)] = websocket_service
+        return websocket_service
 
-    def _setup_callbacks(self):
-        """Configurar callbacks para WebSocket"""
+    def _get_network_service(self, use_testnet: bool) -> BinanceWebSocketService:
+        """Servicio único por red: los streams se multiplexan y se cuentan referencias por usuario"""
+        websocket_service = self.network_services.get(use_testnet)
+        if websocket_service is None:
+            websocket_service = BinanceWebSocketService(use_testnet=use_testnet)
+            self._setup_network_callbacks(websocket_service, use_testnet)
+            self.network_services[use_testnet] = websocket_service
+        return websocket_service
+
+    def _setup_network_callbacks(self, websocket_service: BinanceWebSocketService, use_testnet: bool):
+        """Configurar callbacks de caché una sola vez por red (los datos de mercado no dependen del usuario)"""
+        network = 'testnet' if use_testnet else 'mainnet'
         
         async def on_kline_update(kline: RealtimeKline):
             """Callback para actualizaciones de kline"""
             if kline.is_closed:
-                # Actualizar caché con nueva vela cerrada
-                cache_key = f"kline:{kline.symbol}:{kline.interval}"
+                cache_key = f"{network}:kline:{kline.symbol}:{kline.interval}"
                 await self._cache_set(cache_key, asdict(kline), ttl=self.cache_ttl)
                 
-                logger.debug(f"💾 Cached kline: {kline.symbol} @ {kline.close_price}")
+                logger.debug(f"💾 Cached kline {network}: {kline.symbol} @ {kline.close_price}")
         
         async def on_indicators_update(indicators: RealtimeTechnicalIndicators):
             """Callback para actualizaciones de indicadores"""
-            # Actualizar caché con nuevos indicadores
-            cache_key = f"indicators:{indicators.symbol}"
+            cache_key = f"{network}:indicators:{indicators.symbol}"
             await self._cache_set(cache_key, asdict(indicators), ttl=self.cache_ttl)
             
             # Log señales importantes
             if indicators.smart_scalper_signal in ['BUY', 'SELL'] and indicators.confidence > 0.75:
-                logger.info(f"🎯 SEÑAL FUERTE: {indicators.symbol} {indicators.smart_scalper_signal} "
+                logger.info(f"🎯 SEÑAL FUERTE {network}: {indicators.symbol} {indicators.smart_scalper_signal} "
                            f"({indicators.confidence:.0%}) - RSI: {indicators.rsi:.1f}")
         
+        def on_tick(kline: RealtimeKline):
+            """Marcar símbolo con precio nuevo para el próximo flush (O(1), sin I/O)"""
+            if self.tick_scheduler is not None:
+                self.tick_scheduler.mark_dirty(kline.symbol, {
+                    'success': True,
+                    'symbol': kline.symbol,
+                    'interval': kline.interval,
+                    'price': kline.close_price,
+                    'open': kline.open_price,
+                    'high': kline.high_price,
+                    'low': kline.low_price,
+                    'volume': kline.volume,
+                    'open_time': kline.open_time,
+                    'is_closed': kline.is_closed,
+                    'network': network
+                })
+        
         # Registrar callbacks
-        self.websocket_service.add_kline_callback(on_kline_update)
-        self.websocket_service.add_indicator_callback(on_indicators_update)
+        websocket_service.add_kline_callback(on_kline_update)
+        websocket_service.add_indicator_callback(on_indicators_update)
+        websocket_service.add_tick_callback(on_tick)
+
+    async def set_data_callback(self, callback, max_rate_hz: Optional[float] = None):
+        """
+        Registrar callback(symbol, market_data) para distribución push.
+        Cada tick upstream marca el símbolo; el callback recibe solo los símbolos que
+        cambiaron, como máximo max_rate_hz veces por segundo (WS_MAX_PUSH_HZ).
+        """
+        if self.tick_scheduler is not None:
+            await self.tick_scheduler.stop()
+        self.tick_scheduler = CoalescingTickScheduler(callback, max_rate_hz)
+        self.tick_scheduler.start()
+        logger.info(f"📡 Distribución push activa (máx {self.tick_scheduler.max_rate_hz:g} Hz)")
 
     async def subscribe_symbol_for_user(self, user_id: int, symbol: str, interval: str = "1m", 
                                        client_id: str = None, session: Session = None) -> bool:
@@ -211,8 +215,8 @@ class RealtimeDataManager:
                 logger.debug(f"🔄 Renovada suscripción usuario {user_id}: {subscription_key}")
                 return True
             
-            # Crear nueva suscripción
-            stream_name = await websocket_service.subscribe_kline_stream(symbol, interval)
+            # Crear nueva suscripción (referencia del usuario sobre el stream compartido)
+            stream_name = await websocket_service.subscribe_kline_stream(symbol, interval, owner=f"user:{user_key}")
             
             if stream_name:
                 self.user_subscriptions[user_key][subscription_key] = datetime.utcnow()
@@ -248,23 +252,23 @@ class RealtimeDataManager:
                 logger.error("❌ Sesión de BD requerida para indicadores por usuario")
                 return None
             
-            # Intentar desde caché específico del usuario primero
-            cache_key = f"user:{user_id}:indicators:{symbol}"
+            websocket_service = await self.get_user_websocket_service(user_id, session)
+            if not websocket_service:
+                return None
+            
+            # Intentar desde caché de la red del usuario primero
+            network = 'testnet' if websocket_service.use_testnet else 'mainnet'
+            cache_key = f"{network}:indicators:{symbol}"
             cached_data = await self._cache_get(cache_key)
             
             if cached_data:
-                logger.debug(f"📊 Indicadores desde caché usuario {user_id}: {symbol}")
+                logger.debug(f"📊 Indicadores desde caché {network} usuario {user_id}: {symbol}")
                 return cached_data
             
-            # Si no están en caché, calcular usando WebSocket service del usuario
-            websocket_service = await self.get_user_websocket_service(user_id, session)
-            if not websocket_service:
-                return None
-            
+            # Si no están en caché, calcular desde el estado incremental del servicio
             indicators = await websocket_service.get_current_indicators(symbol, interval)
             
             if indicators:
-                # Guardar en caché específico del usuario
                 await self._cache_set(cache_key, asdict(indicators), ttl=self.cache_ttl)
                 return asdict(indicators)
             
@@ -343,25 +347,60 @@ class RealtimeDataManager:
         
         return conditions
 
+    async def unsubscribe_symbol_for_user(self, user_id: int, symbol: str, interval: str = "1m") -> bool:
+        """Liberar la referencia del usuario; el stream se cierra cuando ningún usuario lo usa"""
+        user_key = str(user_id)
+        subscriptions = self.user_subscriptions.get(user_key, {})
+        subscription_key = f"{symbol}_{interval}"
+        if subscriptions.pop(subscription_key, None) is None:
+            return False
+        
+        websocket_service = self.user_websocket_services.get(user_key)
+        if websocket_service:
+            stream_name = f"{symbol.lower()}@kline_{interval}"
+            await websocket_service.close_stream(stream_name, owner=f"user:{user_key}")
+        
+        logger.info(f"🔌 Suscripción liberada usuario {user_id}: {subscription_key}")
+        return True
+
+    async def release_client(self, user_id: Optional[int], client_id: str):
+        """Quitar cliente desconectado; sin clientes restantes se liberan las suscripciones del usuario"""
+        if user_id is None:
+            return
+        user_key = str(user_id)
+        clients = self.connected_users.get(user_key)
+        if clients is None:
+            return
+        clients.discard(client_id)
+        if clients:
+            return
+        
+        del self.connected_users[user_key]
+        for subscription_key in list(self.user_subscriptions.get(user_key, {})):
+            symbol, interval = subscription_key.split('_', 1)
+            await self.unsubscribe_symbol_for_user(user_id, symbol, interval)
+        self.user_subscriptions.pop(user_key, None)
+
     async def cleanup_inactive_subscriptions(self):
         """Limpiar suscripciones inactivas para optimizar recursos"""
         try:
             current_time = datetime.utcnow()
             inactive_subscriptions = []
             
-            for subscription_key, last_activity in self.active_subscriptions.items():
-                if (current_time - last_activity).seconds > self.subscription_cleanup_interval:
-                    inactive_subscriptions.append(subscription_key)
+            for user_key, subscriptions in self.user_subscriptions.items():
+                # Usuarios con clientes conectados mantienen sus suscripciones
+                if self.connected_users.get(user_key):
+                    continue
+                for subscription_key, last_activity in subscriptions.items():
+                    if (current_time - last_activity).total_seconds() > self.subscription_cleanup_interval:
+                        inactive_subscriptions.append((user_key, subscription_key))
             
-            # Cerrar suscripciones inactivas
-            for subscription_key in inactive_subscriptions:
+            # Liberar referencias inactivas (el stream se cierra con la última)
+            for user_key, subscription_key in inactive_subscriptions:
                 symbol, interval = subscription_key.split('_', 1)
-                stream_name = f"{symbol.lower()}@kline_{interval}"
+                await self.unsubscribe_symbol_for_user(int(user_key), symbol, interval)
                 
-                await self.websocket_service.close_stream(stream_name)
-                del self.active_subscriptions[subscription_key]
-                
-                logger.info(f"🧹 Suscripción inactiva eliminada: {subscription_key}")
+                logger.info(f"🧹 Suscripción inactiva eliminada: usuario {user_key} {subscription_key}")
             
             if inactive_subscriptions:
                 logger.info(f"✅ Limpiadas {len(inactive_subscriptions)} suscripciones inactivas")
@@ -382,13 +421,19 @@ class RealtimeDataManager:
     async def get_subscription_stats(self) -> Dict[str, Any]:
         """Obtener estadísticas de suscripciones activas"""
         total_user_subscriptions = sum(len(subs) for subs in self.user_subscriptions.values())
-        total_websocket_connections = sum(len(services) for services in self.user_websocket_services.values())
+        streams = {
+            ('testnet' if use_testnet else 'mainnet'): service.stream_manager.get_stats()
+            for use_testnet, service in self.network_services.items()
+        }
         
         return {
             'total_subscriptions': total_user_subscriptions,
             'active_users': len(self.user_subscriptions),
             'connected_users': len(self.connected_users),
-            'websocket_services': total_websocket_connections,
+            'websocket_services': len(self.network_services),
+            'binance_sockets': sum(stats['sockets_open'] for stats in streams.values()),
+            'binance_streams': streams,
+            'push_distribution': self.tick_scheduler.get_stats() if self.tick_scheduler else None,
             'cache_type': 'redis' if self.redis_client else 'memory',
             'cache_size': len(self.memory_cache),
             'uptime': datetime.utcnow().isoformat()
@@ -437,13 +482,18 @@ class RealtimeDataManager:
         """Cerrar todas las conexiones y limpiar recursos"""
         logger.info("🔌 Cerrando RealtimeDataManager...")
         
-        await self.websocket_service.close_all_streams()
+        if self.tick_scheduler is not None:
+            await self.tick_scheduler.stop()
+        
+        for websocket_service in self.network_services.values():
+            await websocket_service.close_all_streams()
         
         if self.redis_client:
             self.redis_client.close()
         
         self.memory_cache.clear()
-        self.active_subscriptions.clear()
+        self.user_subscriptions.clear()
+        self.user_websocket_services.clear()
         
         logger.info("✅ RealtimeDataManager cerrado")
 
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+📏 Rolling Extrema - Máximos/mínimos deslizantes en O(n)
+Motor compartido por los detectores de estructura (breakouts, fake breakouts,
+liquidity grabs, stop hunts):
+
+- Batch: algoritmo van Herk / Gil-Werman sobre bloques de tamaño `window` con
+  np.maximum.accumulate (prefijo y sufijo por bloque): coste constante por vela,
+  independiente del tamaño de ventana, y resultado exacto.
+- Streaming: deque monótona por símbolo, O(1) amortizado por vela nueva.
+
+Eduard Guzmán - InteliBotX
+"""
+
+import time
+from collections import deque
+from typing import Deque, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+ArrayLike = Union[Sequence[float], np.ndarray]
+
+
+def _rolling_extreme(values: ArrayLike, window: int, ufunc: np.ufunc, identity: float) -> np.ndarray:
+    """out[j] = extremo de values[j:j + window] (longitud n - window + 1)"""
+    data = np.asarray(values, dtype=np.float64)
+    n = data.shape[0]
+    if window <= 0 or n < window:
+        return np.empty(0, dtype=np.float64)
+    if window == 1:
+        return data.copy()
+
+    # Rellenar hasta múltiplo de window con el neutro de la operación
+    pad = (-n) % window
+    blocks = np.concatenate((data, np.full(pad, identity))).reshape(-1, window)
+    prefix = ufunc.accumulate(blocks, axis=1).ravel()
+    suffix = ufunc.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].ravel()
+
+    # La ventana [j, j + window) = cola del bloque de j + cabeza del bloque siguiente
+    count = n - window + 1
+    return ufunc(suffix[:count], prefix[window - 1:window - 1 + count])
+
+
+def rolling_max(values: ArrayLike, window: int) -> np.ndarray:
+    """out[j] = max(values[j:j + window])"""
+    return _rolling_extreme(values, window, np.maximum, -np.inf)
+
+
+def rolling_min(values: ArrayLike, window: int) -> np.ndarray:
+    """out[j] = min(values[j:j + window])"""
+    return _rolling_extreme(values, window, np.minimum, np.inf)
+
+
+class RollingExtrema:
+    """
+    Máximo y mínimo de las últimas `window` velas en modo streaming.
+
+    max/min antes de push() dan el extremo de las velas previas (p.ej. breakout si
+    high > max); push(value) incorpora la vela nueva y expira la que sale.
+    """
+
+    __slots__ = ("window", "_index", "_max", "_min")
+
+    def __init__(self, window: int):
+        if window <= 0:
+            raise ValueError("window debe ser positivo")
+        self.window = window
+        self._index = 0
+        self._max: Deque[Tuple[int, float]] = deque()  # valores decrecientes
+        self._min: Deque[Tuple[int, float]] = deque()  # valores crecientes
+
+    def push(self, value: float) -> Tuple[float, float]:
+        index = self._index
+        self._index += 1
+
+        while self._max and self._max[-1][1] <= value:
+            self._max.pop()
+        self._max.append((index, value))
+        while self._min and self._min[-1][1] >= value:
+            self._min.pop()
+        self._min.append((index, value))
+
+        expired = index - self.window
+        if self._max[0][0] <= expired:
+            self._max.popleft()
+        if self._min[0][0] <= expired:
+            self._min.popleft()
+        return self._max[0][1], self._min[0][1]
+
+    @property
+    def max(self) -> Optional[float]:
+        return self._max[0][1] if self._max else None
+
+    @property
+    def min(self) -> Optional[float]:
+        return self._min[0][1] if self._min else None
+
+    @property
+    def ready(self) -> bool:
+        """True cuando la ventana está completa"""
+        return self._index >= self.window
+
+    def __len__(self) -> int:
+        return min(self._index, self.window)
+
+
+# =================================================================
+# TESTING & BENCHMARK
+# =================================================================
+
+def test_rolling_extrema():
+    """Batch y streaming coinciden con max()/min() por slice, incluidos NaN y longitudes no múltiplo"""
+    print("🧪 Testing rolling extrema...")
+    rng = np.random.default_rng(5)
+
+    for n in (0, 1, 7, 64, 257):
+        values = np.round(rng.normal(100, 5, n), 1)  # redondeo -> empates frecuentes
+        for window in (1, 2, 3, 5, 10, 64, 300):
+            expected_max = np.array([values[j:j + window].max() for j in range(n - window + 1)])
+            expected_min = np.array([values[j:j + window].min() for j in range(n - window + 1)])
+            assert np.array_equal(rolling_max(values, window), expected_max)
+            assert np.array_equal(rolling_min(values, window), expected_min)
+
+            stream = RollingExtrema(window)
+            for j, value in enumerate(values):
+                high, low = stream.push(float(value))
+                start = max(0, j - window + 1)
+                assert high == values[start:j + 1].max() and low == values[start:j + 1].min()
+
+    with_nan = rng.normal(0, 1, 50)
+    with_nan[[3, 30]] = np.nan
+    expected = np.array([with_nan[j:j + 5].max() for j in range(46)])
+    assert np.array_equal(rolling_max(with_nan, 5), expected, equal_nan=True)
+
+    print("✅ Rolling extrema test completed")
+
+
+def benchmark_rolling_extrema(n_bars: int = 100_000, windows=(5, 10, 50, 200), repeats: int = 5):
+    """Bucle max(slice) previo vs sliding_window_view vs van Herk / Gil-Werman"""
+    rng = np.random.default_rng(9)
+    values = 100 + np.cumsum(rng.normal(0, 0.5, n_bars))
+    as_list = values.tolist()
+
+    print(f"🧪 Rolling extrema benchmark: {n_bars} velas")
+    for window in windows:
+        start = time.perf_counter()
+        [max(as_list[i - window:i]) for i in range(window, n_bars)]
+        loop_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            np.lib.stride_tricks.sliding_window_view(values, window).max(axis=1)
+        view_ms = (time.perf_counter() - start) * 1000 / repeats
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            rolling_max(values, window)
+        vhgw_ms = (time.perf_counter() - start) * 1000 / repeats
+
+        stream = RollingExtrema(window)
+        start = time.perf_counter()
+        for value in as_list:
+            stream.push(value)
+        stream_us = (time.perf_counter() - start) * 1e6 / n_bars
+
+        print(f"   window {window:4d}: loop {loop_ms:8.1f} ms | sliding view {view_ms:7.2f} ms | "
+              f"vHGW {vhgw_ms:6.2f} ms | streaming {stream_us:.2f} µs/vela")
+
+
+if __name__ == "__main__":
+    test_rolling_extrema()
+    benchmark_rolling_extrema()
@@ -7,6 +7,9 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 
+# Ventanas deslizantes vectorizadas (mismo resultado que los slices por vela)
+from services.indicator_kernels import trailing_window, leading_window
+
 @dataclass
 class InstitutionalSignalQuality:
     """Resultado de evaluación de calidad INSTITUCIONAL"""
@@ -268,33 +271,32 @@ class SignalQualityAssessor:
             
             current_price = closes[-1]
             
+            n = len(closes)
+            candidates = np.zeros(n, dtype=bool)
+            candidates[2:max(2, n - 5)] = True  # Leave room for confirmation
+            
+            volume_mean_5 = trailing_window(volumes, 5, "mean")
+            volume_mean_10 = trailing_window(volumes, 10, "mean")
+            above_average_volume = volumes > volume_mean_5 * 1.2
+            
             # Identify Bullish Order Blocks (last bearish candle before strong bullish move)
-            bullish_blocks = []
-            for i in range(2, len(closes) - 5):  # Leave room for confirmation
-                if (closes[i] < opens[i] and  # Bearish candle
-                    volumes[i] > volumes[i-5:i].mean() * 1.2 and  # Above average volume
-                    closes[i+1:i+4].min() > highs[i]):  # Price never returned to this level
-                    
-                    block_strength = volumes[i] / volumes[i-10:i].mean() if i >= 10 else 1
-                    bullish_blocks.append({
-                        'price_level': highs[i],
-                        'strength': block_strength,
-                        'age': len(closes) - i
-                    })
+            # Price never returned to this level: min of the next 3 closes stays above the high
+            bullish_mask = (candidates & (closes < opens) & above_average_volume &
+                            (leading_window(closes, 3, "min") > highs))
+            bullish_blocks = [{
+                'price_level': highs[i],
+                'strength': volumes[i] / volume_mean_10[i] if i >= 10 else 1,
+                'age': n - i
+            } for i in np.flatnonzero(bullish_mask).tolist()]
             
             # Identify Bearish Order Blocks (last bullish candle before strong bearish move)
-            bearish_blocks = []
-            for i in range(2, len(closes) - 5):
-                if (closes[i] > opens[i] and  # Bullish candle
-                    volumes[i] > volumes[i-5:i].mean() * 1.2 and  # Above average volume
-                    closes[i+1:i+4].max() < lows[i]):  # Price never returned to this level
-                    
-                    block_strength = volumes[i] / volumes[i-10:i].mean() if i >= 10 else 1
-                    bearish_blocks.append({
-                        'price_level': lows[i],
-                        'strength': block_strength,
-                        'age': len(closes) - i
-                    })
+            bearish_mask = (candidates & (closes > opens) & above_average_volume &
+                            (leading_window(closes, 3, "max") < lows))
+            bearish_blocks = [{
+                'price_level': lows[i],
+                'strength': volumes[i] / volume_mean_10[i] if i >= 10 else 1,
+                'age': n - i
+            } for i in np.flatnonzero(bearish_mask).tolist()]
             
             # Evaluate current price position relative to order blocks
             relevant_bullish = [b for b in bullish_blocks if b['price_level'] <= current_price * 1.02]
@@ -382,41 +384,32 @@ class SignalQualityAssessor:
             closes = price_data['close'].values
             volumes = np.array(volume_data[-len(closes):]) if len(volume_data) >= len(closes) else np.array(volume_data)
             
+            n = len(highs)
+            local_high = trailing_window(highs, 10, "max")  # Recent high (previous 10 candles)
+            local_low = trailing_window(lows, 10, "min")  # Recent low
+            volume_mean = trailing_window(volumes, 5, "mean")
+            breaks_high = highs > local_high * 1.001  # Break above high
+            breaks_low = lows < local_low * 0.999  # Break below low
+            
             # Detect Buy Side Liquidity Grabs (stop hunts above resistance)
-            buy_side_grabs = 0
-            for i in range(10, len(highs) - 2):
-                # Find recent high
-                local_high = max(highs[i-10:i])
-                if (highs[i] > local_high * 1.001 and  # Break above high
-                    volumes[i] > volumes[i-5:i].mean() * 1.3 and  # High volume
-                    closes[i] < highs[i] * 0.995):  # But close below the break
-                    buy_side_grabs += 1
+            # High volume, but close below the break
+            window = slice(10, max(10, n - 2))
+            buy_side_grabs = int(np.count_nonzero(
+                breaks_high[window] & (volumes[window] > volume_mean[window] * 1.3) &
+                (closes[window] < highs[window] * 0.995)
+            ))
             
             # Detect Sell Side Liquidity Grabs (stop hunts below support)  
-            sell_side_grabs = 0
-            for i in range(10, len(lows) - 2):
-                # Find recent low
-                local_low = min(lows[i-10:i])
-                if (lows[i] < local_low * 0.999 and  # Break below low
-                    volumes[i] > volumes[i-5:i].mean() * 1.3 and  # High volume
-                    closes[i] > lows[i] * 1.005):  # But close above the break
-                    sell_side_grabs += 1
-            
-            # Recent liquidity grab activity
-            recent_buy_grabs = 0
-            recent_sell_grabs = 0
-            
-            for i in range(max(0, len(highs) - 10), len(highs)):
-                if i >= 10:
-                    local_high = max(highs[i-10:i])
-                    if (highs[i] > local_high * 1.001 and
-                        volumes[i] > volumes[max(0, i-5):i].mean() * 1.2):
-                        recent_buy_grabs += 1
-                        
-                    local_low = min(lows[i-10:i])  
-                    if (lows[i] < local_low * 0.999 and
-                        volumes[i] > volumes[max(0, i-5):i].mean() * 1.2):
-                        recent_sell_grabs += 1
+            sell_side_grabs = int(np.count_nonzero(
+                breaks_low[window] & (volumes[window] > volume_mean[window] * 1.3) &
+                (closes[window] > lows[window] * 1.005)
+            ))
+            
+            # Recent liquidity grab activity (last 10 candles)
+            recent = slice(max(10, n - 10), n)
+            recent_high_volume = volumes[recent] > volume_mean[recent] * 1.2
+            recent_buy_grabs = int(np.count_nonzero(breaks_high[recent] & recent_high_volume))
+            recent_sell_grabs = int(np.count_nonzero(breaks_low[recent] & recent_high_volume))
             
             # Scoring liquidity grab activity
             total_grabs = buy_side_grabs + sell_side_grabs
@@ -512,43 +505,30 @@ class SignalQualityAssessor:
             volumes = np.array(volume_data[-len(closes):]) if len(volume_data) >= len(closes) else np.array(volume_data)
             
             # Detect Stop Hunt Patterns (wicks that quickly reverse)
-            stop_hunts_up = 0  # Upward stop hunts (hunt buy stops, then reverse down)
-            stop_hunts_down = 0  # Downward stop hunts (hunt sell stops, then reverse up)
-            
-            for i in range(5, len(highs) - 1):
-                # Upward Stop Hunt Pattern
-                wick_size_up = highs[i] - max(opens[i], closes[i])
-                body_size = abs(closes[i] - opens[i])
-                
-                if (wick_size_up > body_size * 2 and  # Long upper wick
-                    highs[i] > max(highs[i-5:i]) and  # New high
-                    volumes[i] > volumes[i-3:i].mean() * 1.5 and  # High volume
-                    closes[i+1] < closes[i] * 0.98):  # Reversal next candle
-                    stop_hunts_up += 1
-                
-                # Downward Stop Hunt Pattern
-                wick_size_down = min(opens[i], closes[i]) - lows[i]
-                
-                if (wick_size_down > body_size * 2 and  # Long lower wick
-                    lows[i] < min(lows[i-5:i]) and  # New low
-                    volumes[i] > volumes[i-3:i].mean() * 1.5 and  # High volume
-                    closes[i+1] > closes[i] * 1.02):  # Reversal next candle
-                    stop_hunts_down += 1
+            n = len(highs)
+            wick_up = highs - np.maximum(opens, closes)
+            wick_down = np.minimum(opens, closes) - lows
+            body = np.abs(closes - opens)
+            new_high = highs > trailing_window(highs, 5, "max")
+            new_low = lows < trailing_window(lows, 5, "min")
+            high_volume = volumes > trailing_window(volumes, 3, "mean") * 1.5
+            next_close = np.append(closes[1:], np.nan)
+            
+            window = slice(5, max(5, n - 1))
+            # Upward stop hunts (hunt buy stops, then reverse down): long upper wick,
+            # new high, high volume and reversal next candle
+            stop_hunts_up = int(np.count_nonzero(
+                ((wick_up > body * 2) & new_high & high_volume & (next_close < closes * 0.98))[window]
+            ))
+            # Downward stop hunts (hunt sell stops, then reverse up)
+            stop_hunts_down = int(np.count_nonzero(
+                ((wick_down > body * 2) & new_low & high_volume & (next_close > closes * 1.02))[window]
+            ))
             
             # Recent stop hunting activity (last 10 candles)
-            recent_hunts_up = 0
-            recent_hunts_down = 0
-            
-            start_idx = max(5, len(highs) - 10)
-            for i in range(start_idx, len(highs) - 1):
-                wick_up = highs[i] - max(opens[i], closes[i])
-                wick_down = min(opens[i], closes[i]) - lows[i]
-                body = abs(closes[i] - opens[i])
-                
-                if wick_up > body * 1.5 and highs[i] > max(highs[max(0, i-5):i]):
-                    recent_hunts_up += 1
-                if wick_down > body * 1.5 and lows[i] < min(lows[max(0, i-5):i]):
-                    recent_hunts_down += 1
+            recent = slice(max(5, n - 10), max(5, n - 1))
+            recent_hunts_up = int(np.count_nonzero(((wick_up > body * 1.5) & new_high)[recent]))
+            recent_hunts_down = int(np.count_nonzero(((wick_down > body * 1.5) & new_low)[recent]))
             
             # Scoring stop hunting activity
             total_hunts = stop_hunts_up + stop_hunts_down
@@ -648,45 +628,38 @@ class SignalQualityAssessor:
             closes = price_data['close'].values
             current_price = closes[-1]
             
-            # Detect Bullish Fair Value Gaps
-            bullish_fvgs = []
-            for i in range(1, len(highs) - 1):
-                # Bullish FVG: Gap between candle[i-1].high and candle[i+1].low
-                if lows[i+1] > highs[i-1]:
-                    gap_size = lows[i+1] - highs[i-1]
-                    gap_percentage = gap_size / highs[i-1] * 100
-                    
-                    bullish_fvgs.append({
-                        'gap_low': highs[i-1],
-                        'gap_high': lows[i+1],
-                        'gap_size': gap_size,
-                        'gap_percentage': gap_percentage,
-                        'candle_index': i,
-                        'age': len(highs) - i - 1,
-                        'filled': current_price < highs[i-1]  # Has price returned to fill gap?
-                    })
-            
-            # Detect Bearish Fair Value Gaps
-            bearish_fvgs = []
-            for i in range(1, len(lows) - 1):
-                # Bearish FVG: Gap between candle[i-1].low and candle[i+1].high
-                if highs[i+1] < lows[i-1]:
-                    gap_size = lows[i-1] - highs[i+1]
-                    gap_percentage = gap_size / lows[i-1] * 100
-                    
-                    bearish_fvgs.append({
-                        'gap_low': highs[i+1],
-                        'gap_high': lows[i-1], 
-                        'gap_size': gap_size,
-                        'gap_percentage': gap_percentage,
-                        'candle_index': i,
-                        'age': len(lows) - i - 1,
-                        'filled': current_price > lows[i-1]  # Has price returned to fill gap?
-                    })
-            
-            # Filter significant gaps (> 0.1% for crypto)
-            significant_bullish = [fvg for fvg in bullish_fvgs if fvg['gap_percentage'] > 0.1]
-            significant_bearish = [fvg for fvg in bearish_fvgs if fvg['gap_percentage'] > 0.1]
+            n = len(highs)
+            prev_high, next_low = highs[:-2], lows[2:]  # candle[i-1].high, candle[i+1].low
+            prev_low, next_high = lows[:-2], highs[2:]  # candle[i-1].low, candle[i+1].high
+            
+            # Bullish FVG: Gap between candle[i-1].high and candle[i+1].low
+            bullish_gap = next_low - prev_high
+            bullish_pct = bullish_gap / prev_high * 100
+            
+            # Bearish FVG: Gap between candle[i-1].low and candle[i+1].high
+            bearish_gap = prev_low - next_high
+            bearish_pct = bearish_gap / prev_low * 100
+            
+            # Filter significant gaps (> 0.1% for crypto); position k corresponds to candle i = k + 1
+            significant_bullish = [{
+                'gap_low': prev_high[k],
+                'gap_high': next_low[k],
+                'gap_size': bullish_gap[k],
+                'gap_percentage': bullish_pct[k],
+                'candle_index': k + 1,
+                'age': n - k - 2,
+                'filled': current_price < prev_high[k]  # Has price returned to fill gap?
+            } for k in np.flatnonzero((next_low > prev_high) & (bullish_pct > 0.1)).tolist()]
+            
+            significant_bearish = [{
+                'gap_low': next_high[k],
+                'gap_high': prev_low[k],
+                'gap_size': bearish_gap[k],
+                'gap_percentage': bearish_pct[k],
+                'candle_index': k + 1,
+                'age': n - k - 2,
+                'filled': current_price > prev_low[k]  # Has price returned to fill gap?
+            } for k in np.flatnonzero((next_high < prev_low) & (bearish_pct > 0.1)).tolist()]
             
             # Find unfilled gaps near current price
             nearby_bullish = [fvg for fvg in significant_bullish 
@@ -1029,4 +1002,93 @@ class SignalQualityAssessor:
             for alert in quality.manipulation_alerts[:3]:  # Top 3 alerts
                 summary += f"  • {alert}\n"
         
-        return summary
\ No newline at end of file
+        return summary
+
+# =================================================================
+# TESTING
+# =================================================================
+
+# Huella (sha256, 16 hex) de las confirmaciones de la implementación original por vela sobre
+# datos sintéticos deterministas: (velas, seed) -> [order_blocks, liquidity_grabs, stop_hunting, fvg].
+# Serializa details con repr() de NumPy 2.x, por lo que también detecta cambios de tipo.
+_GOLDEN_CONFIRMATION_DIGESTS = {
+    (12, 1): ['e4ee45e16313a72b', 'c1999bc5a368a54c', '3084e1638f88543d', '3af5321deaf31d4c'],
+    (25, 2): ['e4ee45e16313a72b', '118b8631d77f3ffe', '2811c239d0903261', '95531e84ccfc2bd4'],
+    (40, 3): ['a9cd1ac40c457936', '23bb456585411f8a', 'f9704e27d514a18d', '73a130c48ffb59d5'],
+    (100, 4): ['80b4bbf42fbbf697', 'b9648ed778e757bd', '1a7d8b1a6e320a14', 'c44684fd196457db'],
+    (500, 5): ['b3b6d51cb5cc5471', 'da5b1b1ea2fdc092', '26e238d84a246cc9', 'f70ce33726314981'],
+    (2000, 6): ['030e1c6826102683', 'd5e0f960e295f7a1', 'e727ee9c5e7fd666', '70dd5aca67276c0e'],
+}
+
+
+def _synthetic_ohlcv(n_bars: int, seed: int):
+    """OHLCV sintético reproducible con gaps, mechas largas y picos de volumen"""
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0, 0.004, n_bars) + np.where(rng.random(n_bars) < 0.05, rng.normal(0, 0.02, n_bars), 0.0)
+    closes = 100 * np.exp(np.cumsum(returns))
+    opens = np.concatenate(([closes[0]], closes[:-1])) * (1 + rng.normal(0, 0.001, n_bars))
+    wick = np.where(rng.random(n_bars) < 0.08, 5.0, 1.0)
+    highs = np.maximum(opens, closes) * (1 + np.abs(rng.normal(0, 0.003, n_bars)) * wick)
+    lows = np.minimum(opens, closes) * (1 - np.abs(rng.normal(0, 0.003, n_bars)) * wick[::-1])
+    volumes = rng.lognormal(10, 0.5, n_bars) * np.where(rng.random(n_bars) < 0.1, 3.0, 1.0)
+    price_data = pd.DataFrame({"open": opens, "high": highs, "low": lows, "close": closes, "volume": volumes})
+    return price_data, volumes.tolist()
+
+
+def _confirmation_digest(confirmation: InstitutionalConfirmation) -> str:
+    import hashlib
+    import json
+    payload = {"name": confirmation.name, "score": confirmation.score,
+               "bias": confirmation.bias, "details": confirmation.details}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=repr).encode()).hexdigest()[:16]
+
+
+def test_signal_quality_golden():
+    """Regresión: las detecciones vectorizadas deben reproducir exactamente las confirmaciones originales"""
+    print("🧪 Testing SignalQualityAssessor golden outputs...")
+    assessor = SignalQualityAssessor()
+
+    for (n_bars, seed), expected in _GOLDEN_CONFIRMATION_DIGESTS.items():
+        price_data, volumes = _synthetic_ohlcv(n_bars, seed)
+        actual = [
+            _confirmation_digest(assessor._evaluate_order_blocks(price_data, volumes)),
+            _confirmation_digest(assessor._evaluate_liquidity_grabs(price_data, volumes)),
+            _confirmation_digest(assessor._evaluate_stop_hunting(price_data, volumes)),
+            _confirmation_digest(assessor._evaluate_fair_value_gaps(price_data)),
+        ]
+        assert actual == expected, f"Golden mismatch ({n_bars} velas, seed {seed}): {actual} != {expected}"
+
+    print(f"✅ {len(_GOLDEN_CONFIRMATION_DIGESTS)} datasets idénticos a la implementación original")
+
+
+def benchmark_signal_quality(bar_counts=(100, 1000, 10000)):
+    """Tiempo por evaluación (ms) de cada detector y de assess_signal_quality completo"""
+    import time
+    assessor = SignalQualityAssessor()
+    print("🧪 SignalQualityAssessor benchmark (ms por llamada)")
+
+    results = {}
+    for n_bars in bar_counts:
+        price_data, volumes = _synthetic_ohlcv(n_bars, 7)
+        repeats = max(3, 5000 // n_bars)
+        evaluators = {
+            "order_blocks": lambda: assessor._evaluate_order_blocks(price_data, volumes),
+            "liquidity_grabs": lambda: assessor._evaluate_liquidity_grabs(price_data, volumes),
+            "stop_hunting": lambda: assessor._evaluate_stop_hunting(price_data, volumes),
+            "fair_value_gaps": lambda: assessor._evaluate_fair_value_gaps(price_data),
+            "assess_signal_quality": lambda: assessor.assess_signal_quality(price_data, volumes, {}, {}),
+        }
+        timings = {}
+        for name, evaluate in evaluators.items():
+            start = time.perf_counter()
+            for _ in range(repeats):
+                evaluate()
+            timings[name] = (time.perf_counter() - start) / repeats * 1000
+        results[n_bars] = timings
+        print(f"   {n_bars:6d} velas: " + " | ".join(f"{name} {ms:.2f}" for name, ms in timings.items()))
+    return results
+
+
+if __name__ == "__main__":
+    test_signal_quality_golden()
+    benchmark_signal_quality()
@@ -14,11 +14,8 @@ import logging
 from datetime import datetime
 
 # Import TA functions
-from services.ta_alternative import (
-    calculate_rsi, get_rsi_status, calculate_sma, calculate_ema,
-    calculate_atr, detect_volume_spike, calculate_volume_sma,
-    calculate_bollinger_bands
-)
+from services.ta_alternative import calculate_ema
+from services.feature_frame import FeatureFrame
 
 logger = logging.getLogger(__name__)
 
@@ -63,16 +60,26 @@ class SmartScalperEngine:
         
         logger.info("🧠 Smart Scalper Multi-Algoritmo inicializado")
 
+    def _features(self, highs: List[float], lows: List[float], closes: List[float],
+                  volumes: List[float], features: Optional[FeatureFrame]) -> FeatureFrame:
+        """Frame compartido por la llamada: el recibido o uno nuevo sobre las listas"""
+        if features is not None:
+            return features
+        # El motor no usa aperturas: se pasan los cierres para no copiar otra lista
+        return FeatureFrame.from_ohlcv("", "", closes, highs, lows, closes, volumes)
+
     def analyze_market_conditions(self, highs: List[float], lows: List[float], 
-                                closes: List[float], volumes: List[float]) -> MarketCondition:
+                                closes: List[float], volumes: List[float],
+                                features: Optional[FeatureFrame] = None) -> MarketCondition:
         """Analizar condiciones actuales del mercado"""
         if len(closes) < 50:
             return MarketCondition.SIDEWAYS
         
         # Calcular indicadores para análisis de mercado
-        ema_20 = calculate_ema(closes, 20)
-        ema_50 = calculate_ema(closes, 50)
-        atr = calculate_atr(highs, lows, closes, 14)
+        features = self._features(highs, lows, closes, volumes, features)
+        ema_20 = features.ema(20)
+        ema_50 = features.ema(50)
+        atr = features.atr(14)
         current_price = closes[-1]
         
         # Detectar tendencia
@@ -96,8 +103,10 @@ class SmartScalperEngine:
 
     def select_best_algorithm(self, market_condition: MarketCondition, 
                             highs: List[float], lows: List[float], 
-                            closes: List[float], volumes: List[float]) -> str:
+                            closes: List[float], volumes: List[float],
+                            features: Optional[FeatureFrame] = None) -> str:
         """Seleccionar el mejor algoritmo según condiciones del mercado"""
+        features = self._features(highs, lows, closes, volumes, features)
         
         # Mapeo de condiciones a algoritmos más efectivos
         algorithm_map = {
@@ -116,7 +125,7 @@ class SmartScalperEngine:
         best_score = 0
         
         for algo in preferred_algorithms:
-            score = self._evaluate_algorithm_fitness(algo, highs, lows, closes, volumes)
+            score = self._evaluate_algorithm_fitness(algo, highs, lows, closes, volumes, features)
             if score > best_score:
                 best_score = score
                 best_algorithm = algo
@@ -125,45 +134,52 @@ class SmartScalperEngine:
 
     def _evaluate_algorithm_fitness(self, algorithm: str, highs: List[float], 
                                   lows: List[float], closes: List[float], 
-                                  volumes: List[float]) -> float:
+                                  volumes: List[float],
+                                  features: Optional[FeatureFrame] = None) -> float:
         """Evaluar qué tan adecuado es un algoritmo para las condiciones actuales"""
         
         if len(closes) < 20:
             return 0.0
         
-        rsi = calculate_rsi(closes)
-        volume_spike, volume_ratio = detect_volume_spike(volumes)
-        atr = calculate_atr(highs, lows, closes)
-        volatility = atr / closes[-1]
+        # Solo se evalúa el scoring del algoritmo pedido; los indicadores salen del frame
+        features = self._features(highs, lows, closes, volumes, features)
         
         fitness_scores = {
-            "ema_crossover": self._score_ema_conditions(closes),
-            "rsi_oversold": self._score_rsi_conditions(rsi),
-            "macd_divergence": self._score_macd_conditions(closes),
-            "support_bounce": self._score_support_conditions(highs, lows, closes),
-            "moving_average_alignment": self._score_ma_alignment(closes),
-            "higher_high_formation": self._score_higher_high(highs, closes),
-            "volume_breakout": volume_ratio if volume_spike else 0.3,
-            "bollinger_squeeze": self._score_bollinger_squeeze(closes, volatility)
+            "ema_crossover": lambda: self._score_ema_conditions(closes, features),
+            "rsi_oversold": lambda: self._score_rsi_conditions(features.rsi()),
+            "macd_divergence": lambda: self._score_macd_conditions(closes),
+            "support_bounce": lambda: self._score_support_conditions(highs, lows, closes),
+            "moving_average_alignment": lambda: self._score_ma_alignment(closes, features),
+            "higher_high_formation": lambda: self._score_higher_high(highs, closes),
+            "volume_breakout": lambda: self._score_volume_breakout(features),
+            "bollinger_squeeze": lambda: self._score_bollinger_squeeze(closes, features.atr() / closes[-1])
         }
         
-        return fitness_scores.get(algorithm, 0.5)
+        score = fitness_scores.get(algorithm)
+        return score() if score else 0.5
 
     def generate_signal(self, symbol: str, highs: List[float], lows: List[float], 
-                       closes: List[float], volumes: List[float]) -> ScalperSignal:
-        """Generar señal inteligente usando el mejor algoritmo"""
+                       closes: List[float], volumes: List[float],
+                       features: Optional[FeatureFrame] = None) -> ScalperSignal:
+        """
+        Generar señal inteligente usando el mejor algoritmo.
+        `features` (FeatureFrame del mismo símbolo/timeframe) evita recalcular indicadores.
+        """
         
         if len(closes) < 50:
             return self._fallback_signal(symbol, closes[-1] if closes else 0)
         
+        # 0. Frame único de indicadores para toda la evaluación
+        features = self._features(highs, lows, closes, volumes, features)
+        
         # 1. Analizar condiciones del mercado
-        market_condition = self.analyze_market_conditions(highs, lows, closes, volumes)
+        market_condition = self.analyze_market_conditions(highs, lows, closes, volumes, features)
         
         # 2. Seleccionar mejor algoritmo
-        best_algorithm = self.select_best_algorithm(market_condition, highs, lows, closes, volumes)
+        best_algorithm = self.select_best_algorithm(market_condition, highs, lows, closes, volumes, features)
         
         # 3. Ejecutar algoritmo seleccionado
-        signal = self.algorithms[best_algorithm](symbol, highs, lows, closes, volumes)
+        signal = self.algorithms[best_algorithm](symbol, highs, lows, closes, volumes, features)
         
         # 4. Enriquecer señal con contexto
         signal.market_condition = market_condition
@@ -171,7 +187,7 @@ class SmartScalperEngine:
         signal.timestamp = datetime.utcnow().isoformat()
         
         # 5. Calcular scores de riesgo y volatilidad
-        atr = calculate_atr(highs, lows, closes)
+        atr = features.atr()
         signal.volatility_score = min(atr / closes[-1] * 10, 1.0)
         signal.risk_score = self._calculate_risk_score(signal, market_condition)
         
@@ -186,12 +202,14 @@ class SmartScalperEngine:
     
     def _ema_crossover_algorithm(self, symbol: str, highs: List[float], 
                                lows: List[float], closes: List[float], 
-                               volumes: List[float]) -> ScalperSignal:
+                               volumes: List[float],
+                               features: Optional[FeatureFrame] = None) -> ScalperSignal:
         """EMA Crossover + Low Volatility"""
+        features = self._features(highs, lows, closes, volumes, features)
         
-        ema_9 = calculate_ema(closes, 9)
-        ema_21 = calculate_ema(closes, 21)
-        atr = calculate_atr(highs, lows, closes)
+        ema_9 = features.ema(9)
+        ema_21 = features.ema(21)
+        atr = features.atr()
         current_price = closes[-1]
         
         # Condiciones
@@ -223,11 +241,13 @@ class SmartScalperEngine:
     
     def _rsi_oversold_algorithm(self, symbol: str, highs: List[float], 
                               lows: List[float], closes: List[float], 
-                              volumes: List[float]) -> ScalperSignal:
+                              volumes: List[float],
+                              features: Optional[FeatureFrame] = None) -> ScalperSignal:
         """RSI Oversold/Overbought con Volume Confirmation"""
+        features = self._features(highs, lows, closes, volumes, features)
         
-        rsi = calculate_rsi(closes)
-        volume_spike, volume_ratio = detect_volume_spike(volumes)
+        rsi = features.rsi()
+        volume_spike, volume_ratio = features.volume_spike()
         current_price = closes[-1]
         
         conditions_met = []
@@ -261,12 +281,14 @@ class SmartScalperEngine:
     
     def _macd_divergence_algorithm(self, symbol: str, highs: List[float], 
                                  lows: List[float], closes: List[float], 
-                                 volumes: List[float]) -> ScalperSignal:
+                                 volumes: List[float],
+                                 features: Optional[FeatureFrame] = None) -> ScalperSignal:
         """MACD Divergence Detection"""
+        features = self._features(highs, lows, closes, volumes, features)
         
         # Calcular MACD simplificado
-        ema_12 = calculate_ema(closes, 12)
-        ema_26 = calculate_ema(closes, 26)
+        ema_12 = features.ema(12)
+        ema_26 = features.ema(26)
         macd = ema_12 - ema_26
         
         # Aproximar signal line
@@ -298,8 +320,10 @@ class SmartScalperEngine:
     
     def _support_bounce_algorithm(self, symbol: str, highs: List[float], 
                                 lows: List[float], closes: List[float], 
-                                volumes: List[float]) -> ScalperSignal:
+                                volumes: List[float],
+                                features: Optional[FeatureFrame] = None) -> ScalperSignal:
         """Support Bounce + MACD Divergence"""
+        features = self._features(highs, lows, closes, volumes, features)
         
         current_price = closes[-1]
         
@@ -339,12 +363,14 @@ class SmartScalperEngine:
     
     def _ma_alignment_algorithm(self, symbol: str, highs: List[float], 
                               lows: List[float], closes: List[float], 
-                              volumes: List[float]) -> ScalperSignal:
+                              volumes: List[float],
+                              features: Optional[FeatureFrame] = None) -> ScalperSignal:
         """Moving Average Alignment"""
+        features = self._features(highs, lows, closes, volumes, features)
         
-        ema_9 = calculate_ema(closes, 9)
-        ema_21 = calculate_ema(closes, 21) 
-        ema_50 = calculate_ema(closes, 50)
+        ema_9 = features.ema(9)
+        ema_21 = features.ema(21)
+        ema_50 = features.ema(50)
         current_price = closes[-1]
         
         # Alineación alcista: precio > EMA9 > EMA21 > EMA50
@@ -374,8 +400,10 @@ class SmartScalperEngine:
     
     def _higher_high_algorithm(self, symbol: str, highs: List[float], 
                              lows: List[float], closes: List[float], 
-                             volumes: List[float]) -> ScalperSignal:
+                             volumes: List[float],
+                             features: Optional[FeatureFrame] = None) -> ScalperSignal:
         """Higher High Formation"""
+        features = self._features(highs, lows, closes, volumes, features)
         
         if len(highs) < 10:
             return self._fallback_signal(symbol, closes[-1])
@@ -396,7 +424,7 @@ class SmartScalperEngine:
             signal = "BUY"  # Continuación alcista
             confidence = 0.8
             conditions_met = ["HIGHER_HIGH", "INCREASING_TREND"]
-        elif not higher_high and current_price < calculate_ema(closes, 20):
+        elif not higher_high and current_price < features.ema(20):
             signal = "SELL"  # Reversión bajista
             confidence = 0.7
             conditions_met = ["FAILED_HIGHER_HIGH", "BELOW_EMA"]
@@ -411,10 +439,12 @@ class SmartScalperEngine:
     
     def _volume_breakout_algorithm(self, symbol: str, highs: List[float], 
                                  lows: List[float], closes: List[float], 
-                                 volumes: List[float]) -> ScalperSignal:
+                                 volumes: List[float],
+                                 features: Optional[FeatureFrame] = None) -> ScalperSignal:
         """Volume Breakout Strategy"""
+        features = self._features(highs, lows, closes, volumes, features)
         
-        volume_spike, volume_ratio = detect_volume_spike(volumes, threshold=2.0)
+        volume_spike, volume_ratio = features.volume_spike(threshold=2.0)
         current_price = closes[-1]
         
         # Detectar breakout con volumen
@@ -443,15 +473,16 @@ class SmartScalperEngine:
     
     def _bollinger_squeeze_algorithm(self, symbol: str, highs: List[float], 
                                    lows: List[float], closes: List[float], 
-                                   volumes: List[float]) -> ScalperSignal:
+                                   volumes: List[float],
+                                   features: Optional[FeatureFrame] = None) -> ScalperSignal:
         """Bollinger Squeeze Strategy"""
+        features = self._features(highs, lows, closes, volumes, features)
         
-        upper, middle, lower = calculate_bollinger_bands(closes, period=20, std_dev=2)
+        upper, middle, lower = features.bollinger(period=20, std_dev=2)
         current_price = closes[-1]
         
         # Calcular ancho de las bandas (squeeze detection)
         band_width = (upper - lower) / middle
-        atr = calculate_atr(highs, lows, closes)
         squeeze = band_width < 0.1  # Bandas muy estrechas
         
         conditions_met = []
@@ -485,10 +516,10 @@ class SmartScalperEngine:
     # FUNCIONES DE APOYO
     # =================================================================
     
-    def _score_ema_conditions(self, closes: List[float]) -> float:
+    def _score_ema_conditions(self, closes: List[float], features: FeatureFrame) -> float:
         """Scoring para condiciones EMA"""
-        ema_9 = calculate_ema(closes, 9)
-        ema_21 = calculate_ema(closes, 21)
+        ema_9 = features.ema(9)
+        ema_21 = features.ema(21)
         spread = abs(ema_9 - ema_21) / closes[-1]
         return min(spread * 20, 1.0)  # Mejor cuando hay divergencia clara
     
@@ -514,11 +545,11 @@ class SmartScalperEngine:
         distance_to_support = (current_price - recent_low) / recent_low
         return max(0, 1.0 - distance_to_support * 10)  # Mejor cerca de soportes
     
-    def _score_ma_alignment(self, closes: List[float]) -> float:
+    def _score_ma_alignment(self, closes: List[float], features: FeatureFrame) -> float:
         """Scoring para alineación de MAs"""
-        ema_9 = calculate_ema(closes, 9)
-        ema_21 = calculate_ema(closes, 21)
-        ema_50 = calculate_ema(closes, 50)
+        ema_9 = features.ema(9)
+        ema_21 = features.ema(21)
+        ema_50 = features.ema(50)
         
         # Verificar alineación
         bullish_align = closes[-1] > ema_9 > ema_21 > ema_50
@@ -536,6 +567,11 @@ class SmartScalperEngine:
         
         return 0.8 if recent_max > previous_max else 0.3
     
+    def _score_volume_breakout(self, features: FeatureFrame) -> float:
+        """Scoring para breakout de volumen"""
+        volume_spike, volume_ratio = features.volume_spike()
+        return volume_ratio if volume_spike else 0.3
+    
     def _score_bollinger_squeeze(self, closes: List[float], volatility: float) -> float:
         """Scoring para Bollinger Squeeze"""
         return max(0, 1.0 - volatility * 20)  # Mejor con baja volatilidad
@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+"""
+📡 Streaming Indicators - Estado incremental O(1) por (symbol, interval)
+Cada vela cerrada actualiza RSI (Wilder), EMAs, ATR (Wilder), SMA/desviación
+móvil y MACD con signal line real en tiempo constante, sin recalcular el buffer.
+
+Eduard Guzmán - InteliBotX
+"""
+
+import math
+import time
+from collections import deque
+from dataclasses import dataclass, asdict
+from itertools import repeat
+from typing import Dict, Any, Iterable, Optional, Sequence
+
+from services.ta_alternative import get_rsi_status
+
+
+class StreamingEMA:
+    """EMA ajustada incremental (mismo resultado que ewm(span, adjust=True))"""
+    __slots__ = ("period", "decay", "_numerator", "_denominator", "count")
+
+    def __init__(self, period: int):
+        self.period = period
+        self.decay = 1.0 - 2.0 / (period + 1.0)
+        self._numerator = 0.0
+        self._denominator = 0.0
+        self.count = 0
+
+    def update(self, value: float) -> float:
+        self._numerator = value + self.decay * self._numerator
+        self._denominator = 1.0 + self.decay * self._denominator
+        self.count += 1
+        return self._numerator / self._denominator
+
+    @property
+    def value(self) -> Optional[float]:
+        return self._numerator / self._denominator if self.count else None
+
+    @property
+    def is_ready(self) -> bool:
+        return self.count >= self.period
+
+
+class WilderRSI:
+    """RSI con suavizado de Wilder (semilla = media simple de los primeros `period` deltas)"""
+    __slots__ = ("period", "_prev_close", "_avg_gain", "_avg_loss", "_seed_gain", "_seed_loss", "count")
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self._prev_close: Optional[float] = None
+        self._avg_gain = 0.0
+        self._avg_loss = 0.0
+        self._seed_gain = 0.0
+        self._seed_loss = 0.0
+        self.count = 0  # deltas procesados
+
+    def update(self, close: float) -> Optional[float]:
+        if self._prev_close is None:
+            self._prev_close = close
+            return None
+
+        delta = close - self._prev_close
+        self._prev_close = close
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+        self.count += 1
+
+        if self.count < self.period:
+            self._seed_gain += gain
+            self._seed_loss += loss
+            return None
+        if self.count == self.period:
+            self._avg_gain = (self._seed_gain + gain) / self.period
+            self._avg_loss = (self._seed_loss + loss) / self.period
+        else:
+            self._avg_gain = (self._avg_gain * (self.period - 1) + gain) / self.period
+            self._avg_loss = (self._avg_loss * (self.period - 1) + loss) / self.period
+        return self.value
+
+    @property
+    def value(self) -> Optional[float]:
+        if self.count < self.period:
+            return None
+        if self._avg_loss == 0.0:
+            return 50.0 if self._avg_gain == 0.0 else 100.0
+        return 100.0 - 100.0 / (1.0 + self._avg_gain / self._avg_loss)
+
+
+class WilderATR:
+    """ATR con suavizado de Wilder"""
+    __slots__ = ("period", "_prev_close", "_atr", "_seed", "count")
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self._prev_close: Optional[float] = None
+        self._atr = 0.0
+        self._seed = 0.0
+        self.count = 0
+
+    def update(self, high: float, low: float, close: float) -> Optional[float]:
+        true_range = high - low
+        if self._prev_close is not None:
+            true_range = max(true_range, abs(high - self._prev_close), abs(low - self._prev_close))
+        self._prev_close = close
+        self.count += 1
+
+        if self.count < self.period:
+            self._seed += true_range
+            return None
+        if self.count == self.period:
+            self._atr = (self._seed + true_range) / self.period
+        else:
+            self._atr = (self._atr * (self.period - 1) + true_range) / self.period
+        return self._atr
+
+    @property
+    def value(self) -> Optional[float]:
+        return self._atr if self.count >= self.period else None
+
+
+class RollingWindowStats:
+    """
+    Media y desviación estándar (ddof=1) sobre ventana deslizante en O(1).
+
+    Mantiene sumas acumuladas relativas a un pivote y las recalcula desde la ventana
+    cada `window` actualizaciones para acotar el error acumulado de punto flotante.
+    """
+    __slots__ = ("window", "_values", "_pivot", "_sum", "_sum_sq", "_since_resync")
+
+    def __init__(self, window: int):
+        self.window = window
+        self._values: deque = deque(maxlen=window)
+        self._pivot: Optional[float] = None
+        self._sum = 0.0
+        self._sum_sq = 0.0
+        self._since_resync = 0
+
+    def update(self, value: float):
+        if self._pivot is None:
+            self._pivot = value
+        if len(self._values) == self.window:
+            evicted = self._values[0] - self._pivot
+            self._sum -= evicted
+            self._sum_sq -= evicted * evicted
+
+        self._values.append(value)
+        shifted = value - self._pivot
+        self._sum += shifted
+        self._sum_sq += shifted * shifted
+
+        self._since_resync += 1
+        if self._since_resync >= self.window:
+            self._resync()
+
+    def _resync(self):
+        self._pivot = self._values[-1]
+        self._sum = sum(v - self._pivot for v in self._values)
+        self._sum_sq = sum((v - self._pivot) ** 2 for v in self._values)
+        self._since_resync = 0
+
+    @property
+    def is_ready(self) -> bool:
+        return len(self._values) == self.window
+
+    @property
+    def mean(self) -> Optional[float]:
+        if not self.is_ready:
+            return None
+        return self._pivot + self._sum / self.window
+
+    @property
+    def std(self) -> Optional[float]:
+        if not self.is_ready or self.window < 2:
+            return None
+        variance = (self._sum_sq - self._sum * self._sum / self.window) / (self.window - 1)
+        return math.sqrt(variance) if variance > 0 else 0.0
+
+
+class StreamingMACD:
+    """MACD (EMA rápida - EMA lenta) con signal line EMA sobre la propia serie MACD"""
+    __slots__ = ("fast", "slow", "signal")
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.fast = StreamingEMA(fast)
+        self.slow = StreamingEMA(slow)
+        self.signal = StreamingEMA(signal)
+
+    def update(self, close: float):
+        macd = self.fast.update(close) - self.slow.update(close)
+        self.signal.update(macd)
+
+    @property
+    def macd(self) -> float:
+        return (self.fast.value or 0.0) - (self.slow.value or 0.0)
+
+    @property
+    def macd_signal(self) -> float:
+        return self.signal.value or 0.0
+
+    @property
+    def is_ready(self) -> bool:
+        return self.slow.is_ready and self.signal.count >= self.signal.period
+
+
+@dataclass(frozen=True)
+class IndicatorSnapshot:
+    """Foto inmutable del estado de indicadores tras la última vela cerrada"""
+    symbol: str
+    interval: str
+    candles: int
+    close: float
+    open_time: Optional[int]
+    rsi: float
+    rsi_status: str
+    ema: Dict[int, float]
+    atr: float
+    sma: float
+    stddev: float
+    bb_upper: float
+    bb_lower: float
+    volume_sma: float
+    volume_ratio: float
+    volume_spike: bool
+    macd: float
+    macd_signal: float
+    macd_histogram: float
+    is_ready: bool
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class StreamingIndicatorState:
+    """
+    Estado incremental de indicadores para un stream (symbol, interval).
+
+    update() es O(1) por vela cerrada; snapshot() devuelve una copia inmutable
+    que puede publicarse a callbacks/clientes sin bloquear nuevas actualizaciones.
+    """
+
+    def __init__(self, symbol: str, interval: str,
+                 ema_periods: Sequence[int] = (9, 21, 50),
+                 rsi_period: int = 14, atr_period: int = 14,
+                 sma_period: int = 20, bb_std: float = 2.0,
+                 volume_period: int = 20, volume_spike_threshold: float = 1.5,
+                 warmup: int = 50):
+        self.symbol = symbol
+        self.interval = interval
+        self.emas = {period: StreamingEMA(period) for period in ema_periods}
+        self.rsi = WilderRSI(rsi_period)
+        self.atr = WilderATR(atr_period)
+        self.price_stats = RollingWindowStats(sma_period)
+        self.volume_stats = RollingWindowStats(volume_period)
+        self.macd = StreamingMACD()
+        self.bb_std = bb_std
+        self.volume_spike_threshold = volume_spike_threshold
+        self.warmup = warmup
+
+        self.candles = 0
+        self.last_close = 0.0
+        self.last_volume = 0.0
+        self.last_open_time: Optional[int] = None
+        self._prior_volume_sma: Optional[float] = None
+
+    def update(self, high: float, low: float, close: float, volume: float,
+               open_time: Optional[int] = None) -> bool:
+        """
+        Incorporar una vela cerrada. Las velas repetidas (mismo open_time) se ignoran.
+
+        Returns:
+            True si la vela se aplicó al estado
+        """
+        if open_time is not None and self.last_open_time is not None and open_time <= self.last_open_time:
+            return False
+
+        # Volumen medio de la ventana previa (sin la vela actual) para detectar spikes
+        self._prior_volume_sma = self.volume_stats.mean
+
+        for ema in self.emas.values():
+            ema.update(close)
+        self.rsi.update(close)
+        self.atr.update(high, low, close)
+        self.price_stats.update(close)
+        self.volume_stats.update(volume)
+        self.macd.update(close)
+
+        self.candles += 1
+        self.last_close = close
+        self.last_volume = volume
+        self.last_open_time = open_time
+        return True
+
+    def update_many(self, highs: Iterable[float], lows: Iterable[float],
+                    closes: Iterable[float], volumes: Iterable[float],
+                    open_times: Optional[Iterable[int]] = None) -> int:
+        """Alimentar velas históricas (warm-up o backfill de gaps); devuelve velas aplicadas"""
+        times = open_times if open_times is not None else repeat(None)
+        applied = 0
+        for high, low, close, volume, open_time in zip(highs, lows, closes, volumes, times):
+            applied += self.update(high, low, close, volume, open_time)
+        return applied
+
+    @property
+    def is_ready(self) -> bool:
+        return self.candles >= self.warmup
+
+    def snapshot(self) -> IndicatorSnapshot:
+        close = self.last_close
+        rsi = self.rsi.value if self.rsi.value is not None else 50.0
+        sma = self.price_stats.mean if self.price_stats.mean is not None else close
+        stddev = self.price_stats.std or 0.0
+        volume_sma = self.volume_stats.mean if self.volume_stats.mean is not None else self.last_volume
+
+        prior = self._prior_volume_sma
+        volume_ratio = self.last_volume / prior if prior else 1.0
+        macd = self.macd.macd
+        macd_signal = self.macd.macd_signal
+
+        return IndicatorSnapshot(
+            symbol=self.symbol,
+            interval=self.interval,
+            candles=self.candles,
+            close=close,
+            open_time=self.last_open_time,
+            rsi=rsi,
+            rsi_status=get_rsi_status(rsi),
+            ema={period: (ema.value if ema.value is not None else close) for period, ema in self.emas.items()},
+            atr=self.atr.value or 0.0,
+            sma=sma,
+            stddev=stddev,
+            bb_upper=sma + self.bb_std * stddev,
+            bb_lower=sma - self.bb_std * stddev,
+            volume_sma=volume_sma,
+            volume_ratio=volume_ratio,
+            volume_spike=volume_ratio >= self.volume_spike_threshold,
+            macd=macd,
+            macd_signal=macd_signal,
+            macd_histogram=macd - macd_signal,
+            is_ready=self.is_ready
+        )
+
+
+# =================================================================
+# TESTING
+# =================================================================
+
+def test_streaming_indicators():
+    """Test del estado incremental contra los kernels vectorizados"""
+    import numpy as np
+    from services.indicator_kernels import ema_series, sma_series, rolling_std_series
+
+    print("🧪 Testing Streaming Indicators...")
+
+    rng = np.random.default_rng(7)
+    closes = 100 + np.cumsum(rng.normal(0, 0.5, 5000))
+    highs = closes + np.abs(rng.normal(0, 0.3, closes.size))
+    lows = closes - np.abs(rng.normal(0, 0.3, closes.size))
+    volumes = rng.uniform(500, 2000, closes.size)
+
+    state = StreamingIndicatorState("TESTUSDT", "1m")
+    start = time.perf_counter()
+    state.update_many(highs, lows, closes, volumes, range(closes.size))
+    elapsed_us = (time.perf_counter() - start) / closes.size * 1e6
+    snap = state.snapshot()
+
+    ema_error = abs(snap.ema[21] - ema_series(closes, 21)[-1])
+    sma_error = abs(snap.sma - sma_series(closes, 20)[-1])
+    std_error = abs(snap.stddev - rolling_std_series(closes, 20)[-1])
+    print(f"📐 Error EMA21={ema_error:.2e} | SMA20={sma_error:.2e} | STD20={std_error:.2e}")
+    print(f"📊 RSI={snap.rsi:.2f} ({snap.rsi_status}) | ATR={snap.atr:.4f} | MACD={snap.macd:.4f}/{snap.macd_signal:.4f}")
+    print(f"⏱️ Update: {elapsed_us:.1f}µs por vela")
+
+    assert ema_error < 1e-9 and sma_error < 1e-9 and std_error < 1e-9
+    assert not state.update(highs[-1], lows[-1], closes[-1], volumes[-1], closes.size - 1)
+    print("✅ Streaming indicators test completed")
+
+
+if __name__ == "__main__":
+    test_streaming_indicators()
@@ -4,87 +4,60 @@
 Implementaciones ligeras de indicadores técnicos sin TA-Lib
 """
 
-import pandas as pd
 import numpy as np
 from typing import List, Tuple, Optional
 
+from services.indicator_kernels import (
+    rsi_series, ema_series, atr_series, bollinger_series, last_valid
+)
+
 def calculate_rsi(closes: List[float], period: int = 14) -> float:
-    """Calcular RSI usando pandas (sin TA-Lib)"""
+    """Calcular RSI (kernel NumPy, sin TA-Lib)"""
     if len(closes) < period + 1:
         return 50.0
     
-    df = pd.DataFrame({'close': closes})
-    delta = df['close'].diff()
-    
-    gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-    
-    rs = gain / loss
-    rsi = 100 - (100 / (1 + rs))
-    
-    return float(rsi.iloc[-1]) if not pd.isna(rsi.iloc[-1]) else 50.0
+    return last_valid(rsi_series(closes, period), 50.0)
 
 def calculate_sma(closes: List[float], period: int) -> float:
     """Calcular Simple Moving Average"""
     if len(closes) < period:
-        return closes[-1] if closes else 0.0
+        return closes[-1] if len(closes) else 0.0
     
     return float(np.mean(closes[-period:]))
 
 def calculate_ema(closes: List[float], period: int) -> float:
     """Calcular Exponential Moving Average"""
     if len(closes) < period:
-        return closes[-1] if closes else 0.0
+        return closes[-1] if len(closes) else 0.0
     
-    df = pd.DataFrame({'close': closes})
-    ema = df['close'].ewm(span=period).mean()
-    return float(ema.iloc[-1])
+    return float(ema_series(closes, period)[-1])
 
 def calculate_atr(highs: List[float], lows: List[float], closes: List[float], period: int = 14) -> float:
     """Calcular Average True Range"""
     if len(highs) < period + 1:
         return 0.0
     
-    df = pd.DataFrame({
-        'high': highs,
-        'low': lows,
-        'close': closes
-    })
-    
-    df['prev_close'] = df['close'].shift(1)
-    df['tr1'] = df['high'] - df['low']
-    df['tr2'] = abs(df['high'] - df['prev_close'])
-    df['tr3'] = abs(df['low'] - df['prev_close'])
-    
-    df['true_range'] = df[['tr1', 'tr2', 'tr3']].max(axis=1)
-    atr = df['true_range'].rolling(window=period).mean()
-    
-    return float(atr.iloc[-1]) if not pd.isna(atr.iloc[-1]) else 0.0
+    return last_valid(atr_series(highs, lows, closes, period), 0.0)
 
 def calculate_bollinger_bands(closes: List[float], period: int = 20, std_dev: int = 2) -> Tuple[float, float, float]:
     """Calcular Bandas de Bollinger (upper, middle, lower)"""
     if len(closes) < period:
-        last_price = closes[-1] if closes else 0.0
+        last_price = closes[-1] if len(closes) else 0.0
         return last_price, last_price, last_price
     
-    df = pd.DataFrame({'close': closes})
-    
-    middle = df['close'].rolling(window=period).mean()
-    std = df['close'].rolling(window=period).std()
-    
-    upper = middle + (std * std_dev)
-    lower = middle - (std * std_dev)
+    upper, middle, lower = bollinger_series(closes, period, std_dev)
+    last_price = float(closes[-1])
     
     return (
-        float(upper.iloc[-1]) if not pd.isna(upper.iloc[-1]) else closes[-1],
-        float(middle.iloc[-1]) if not pd.isna(middle.iloc[-1]) else closes[-1],
-        float(lower.iloc[-1]) if not pd.isna(lower.iloc[-1]) else closes[-1]
+        last_valid(upper, last_price),
+        last_valid(middle, last_price),
+        last_valid(lower, last_price)
     )
 
 def calculate_volume_sma(volumes: List[float], period: int = 20) -> float:
     """Calcular promedio de volumen"""
     if len(volumes) < period:
-        return volumes[-1] if volumes else 0.0
+        return volumes[-1] if len(volumes) else 0.0
     
     return float(np.mean(volumes[-period:]))
 
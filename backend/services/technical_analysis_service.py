@@ -59,8 +59,8 @@ class TrendHunterSignal:
 class TechnicalAnalysisService:
     """Servicio principal de análisis técnico para todas las estrategias"""
     
-    def __init__(self, use_testnet: bool = True):
-        self.binance_service = BinanceRealDataService(use_testnet=use_testnet)
+    def __init__(self, use_testnet: bool = True, http_pool=None):
+        self.binance_service = BinanceRealDataService(use_testnet=use_testnet, http_pool=http_pool)
         self.strategies = {
             'Smart Scalper': self.analyze_smart_scalper,
             'Trend Hunter': self.analyze_trend_hunter,
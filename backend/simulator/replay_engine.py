@@ -0,0 +1,305 @@
+# simulator/replay_engine.py
+"""
+⏯️ ReplayEngine - Reproducción vela a vela para los simuladores SmartTrade
+Los simuladores reanalizaban df.iloc[:i + 1] completo en cada vela (O(n²) en velas).
+El motor recorre el histórico una sola vez y pide a un analizador el resultado de
+la vela i, con la misma forma que SmartTradeIntelligence.analyze()
+({"signal", "auto_decision": {"action", "reason", "score", "score_components"}}):
+
+- StreamingSmartTradeAnalyzer: estado incremental O(1) por vela (StreamingIndicatorState)
+- IntelligenceWindowAnalyzer: SmartTradeIntelligence sobre el prefijo completo (por
+  defecto, mismas decisiones que antes) o, opcionalmente, sobre las últimas `lookback`
+  velas. La ventana solo ahorra el coste que el análisis dedica a velas antiguas; la
+  mejora de orden de magnitud viene del analizador streaming.
+"""
+
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from services.streaming_indicators import StreamingIndicatorState
+
+# Ventana opcional de los simuladores (vacío = prefijo completo)
+SIMULATOR_LOOKBACK_BARS: Optional[int] = int(os.getenv("SIMULATOR_LOOKBACK_BARS") or 0) or None
+
+
+@dataclass
+class BarEvent:
+    """Vela i ya cerrada y el análisis hecho solo con datos <= i"""
+    index: int
+    timestamp: Any
+    close: float
+    result: Dict[str, Any]
+
+    @property
+    def signal(self) -> str:
+        return self.result.get("signal", "")
+
+    @property
+    def decision(self) -> Dict[str, Any]:
+        return self.result.get("auto_decision", {})
+
+
+class StreamingSmartTradeAnalyzer:
+    """Puntuación RSI / cruce EMA 9-21 / MACD / volumen sobre el estado incremental"""
+
+    def __init__(self, symbol: str = "", interval: str = "15m", min_score: int = 2, **indicator_kwargs):
+        self.symbol = symbol
+        self.interval = interval
+        self.min_score = min_score
+        self.indicator_kwargs = indicator_kwargs
+        self.state = StreamingIndicatorState(symbol, interval, **indicator_kwargs)
+
+    def reset(self, df: pd.DataFrame):
+        self.state = StreamingIndicatorState(self.symbol, self.interval, **self.indicator_kwargs)
+        self._highs = df["high"].to_numpy(dtype=float)
+        self._lows = df["low"].to_numpy(dtype=float)
+        self._closes = df["close"].to_numpy(dtype=float)
+        self._volumes = df["volume"].to_numpy(dtype=float)
+
+    def analyze_bar(self, index: int) -> Dict[str, Any]:
+        self.state.update(self._highs[index], self._lows[index], self._closes[index], self._volumes[index])
+        if not self.state.is_ready:
+            return {"signal": "", "auto_decision": {"action": "hold", "reason": "warmup", "score": 0,
+                                                    "score_components": []}}
+        snapshot = self.state.snapshot()
+
+        components: List[str] = []
+        score = 0
+        if snapshot.rsi < 30:
+            score += 1
+            components.append(f"RSI oversold ({snapshot.rsi:.1f})")
+        elif snapshot.rsi > 70:
+            score -= 1
+            components.append(f"RSI overbought ({snapshot.rsi:.1f})")
+        fast, slow = snapshot.ema[min(snapshot.ema)], snapshot.ema[sorted(snapshot.ema)[1]]
+        score += 1 if fast > slow else -1
+        components.append("EMA fast above slow" if fast > slow else "EMA fast below slow")
+        score += 1 if snapshot.macd_histogram > 0 else -1
+        components.append("MACD bullish" if snapshot.macd_histogram > 0 else "MACD bearish")
+        if snapshot.volume_spike and score != 0:
+            score += 1 if score > 0 else -1
+            components.append(f"Volume spike ({snapshot.volume_ratio:.1f}x)")
+
+        action = "long" if score >= self.min_score else "short" if score <= -self.min_score else "hold"
+        return {
+            "signal": action if action != "hold" else "",
+            "score": score,
+            "indicators": snapshot.to_dict(),
+            "auto_decision": {
+                "action": action,
+                "reason": components[0] if action != "hold" else "score neutral",
+                "score": score,
+                "score_components": components
+            }
+        }
+
+
+class IntelligenceWindowAnalyzer:
+    """
+    Adaptador de SmartTradeIntelligence.analyze(): se le sirve como velas una copia del
+    prefijo hasta i (lookback=None, por defecto) o de las últimas `lookback` velas.
+    Con ventana, las decisiones solo coinciden con el prefijo completo si el análisis
+    no mira más atrás que `lookback` (como en vivo, donde fetch_candles trae un número
+    fijo de velas).
+    """
+
+    def __init__(self, intelligence: Any, lookback: Optional[int] = None, **analyze_kwargs):
+        self.intelligence = intelligence
+        self.lookback = lookback
+        self.analyze_kwargs = {"show_dashboard": False, **analyze_kwargs}
+
+    def reset(self, df: pd.DataFrame):
+        self._df = df
+
+    def analyze_bar(self, index: int) -> Dict[str, Any]:
+        start = 0 if self.lookback is None else max(0, index + 1 - self.lookback)
+        # Copia como el bucle previo: analyze() puede añadir columnas sin tocar el histórico
+        window = self._df.iloc[start:index + 1].copy()
+        self.intelligence.fetch_candles = lambda: window
+        return self.intelligence.analyze(**self.analyze_kwargs)
+
+
+class ReplayEngine:
+    """Recorre las velas una vez; on_bar(evento) devuelve False para detener la simulación"""
+
+    def __init__(self, df: pd.DataFrame, analyzer: Any):
+        self.df = df
+        self.analyzer = analyzer
+        self.stats: Dict[str, Any] = {}
+
+    def run(self, on_bar: Callable[[BarEvent], Optional[bool]], skip_last: bool = True) -> Dict[str, Any]:
+        """skip_last: la última vela no se analiza (no hay vela siguiente para simular salidas)"""
+        closes = self.df["close"].to_numpy(dtype=float)
+        index = self.df.index
+        n_bars = len(self.df) - 1 if skip_last else len(self.df)
+
+        self.analyzer.reset(self.df)
+        analyze_seconds = 0.0
+        started = time.perf_counter()
+        replayed = 0
+        for i in range(max(0, n_bars)):
+            t0 = time.perf_counter()
+            result = self.analyzer.analyze_bar(i)
+            analyze_seconds += time.perf_counter() - t0
+            replayed += 1
+            if on_bar(BarEvent(i, index[i], float(closes[i]), result)) is False:
+                break
+
+        seconds = time.perf_counter() - started
+        self.stats = {
+            "bars": replayed,
+            "seconds": round(seconds, 4),
+            "analyze_seconds": round(analyze_seconds, 4),
+            "bars_per_second": round(replayed / seconds, 1) if seconds > 0 else None
+        }
+        return self.stats
+
+
+# =================================================================
+# TESTING & BENCHMARK
+# =================================================================
+
+class _WindowedRSIIntelligence:
+    """
+    Sustituto determinista de SmartTradeIntelligence: RSI(14) y EMA(21) sobre las últimas
+    `history` velas recibidas (None = todas, como un análisis que recalcula el frame completo)
+    """
+
+    def __init__(self, df: pd.DataFrame, history: Optional[int] = 100):
+        self._df = df
+        self.history = history
+        self.fetch_candles = lambda: self._df
+
+    def analyze(self, show_dashboard: bool = False, auto_decision: bool = False) -> Dict[str, Any]:
+        close = self.fetch_candles()["close"]
+        if self.history is not None:
+            close = close.iloc[-self.history:]
+        delta = close.diff().fillna(0)
+        gain = delta.clip(lower=0).rolling(14).mean().iloc[-1]
+        loss = (-delta.clip(upper=0)).rolling(14).mean().iloc[-1]
+        rsi = 100 - 100 / (1 + gain / loss) if loss and not np.isnan(loss) else 50.0
+        trend = close.ewm(span=21).mean().iloc[-1]
+        action = "long" if rsi < 40 and close.iloc[-1] < trend else "short" if rsi > 60 else "hold"
+        result = {"signal": action if action != "hold" else ""}
+        if auto_decision:
+            result["auto_decision"] = {"action": action, "reason": f"RSI {rsi:.1f}", "score": round(50 - rsi),
+                                       "score_components": [f"RSI {rsi:.1f}"]}
+        return result
+
+
+def _synthetic_candles(n_bars: int, seed: int = 21) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.004, n_bars)))
+    spread = np.abs(rng.normal(0, 0.004, n_bars))
+    return pd.DataFrame({
+        "open": np.r_[close[0], close[:-1]],
+        "high": close * (1 + spread),
+        "low": close * (1 - spread),
+        "close": close,
+        "volume": rng.lognormal(3, 0.5, n_bars)
+    }, index=pd.date_range("2024-01-01", periods=n_bars, freq="15min"))
+
+
+def _legacy_simulate(df: pd.DataFrame, intelligence, order_sizes, tp_targets, sl_ratio, capital):
+    """Bucle previo de SmartTradeSimulator.simulate (prefijo creciente + copia por vela)"""
+    remaining, operations = capital, []
+    for i in range(len(df) - 1):
+        slice_df = df.iloc[:i + 1].copy()
+        intelligence.fetch_candles = lambda: slice_df
+        result = intelligence.analyze(show_dashboard=False)
+        close_price = slice_df["close"].iloc[-1]
+        if result.get("signal", "") == "long" and remaining >= min(order_sizes):
+            for order_size, tp in zip(order_sizes, tp_targets):
+                if remaining >= order_size:
+                    tp_price, sl_price = close_price * (1 + tp), close_price * (1 - tp * sl_ratio)
+                    if any(h >= tp_price for h in df.iloc[i + 1:i + 4]["high"]):
+                        operations.append((close_price, "TP", order_size * tp))
+                        remaining += order_size * tp
+                    elif any(low <= sl_price for low in df.iloc[i + 1:i + 4]["low"]):
+                        operations.append((close_price, "SL", -order_size * tp * sl_ratio))
+                        remaining -= order_size * tp * sl_ratio
+                    else:
+                        continue
+                    remaining -= order_size
+                    if remaining <= 0:
+                        break
+        if remaining <= 0:
+            break
+    return remaining, operations
+
+
+def test_replay_engine():
+    """Ventana acotada = prefijo completo cuando el análisis mira <= lookback velas; streaming sin look-ahead"""
+    from simulator.smart_trade_simulator import SmartTradeSimulator
+
+    print("🧪 Testing ReplayEngine...")
+    df = _synthetic_candles(1500)
+    intelligence = _WindowedRSIIntelligence(df)
+    order_sizes, tp_targets = [15, 20, 30], [0.004, 0.006, 0.01]
+
+    legacy_capital, legacy_ops = _legacy_simulate(df, intelligence, order_sizes, tp_targets, 1.0, 5000.0)
+    simulator = SmartTradeSimulator("BTCUSDT", capital=5000.0, df=df,
+                                    analyzer=IntelligenceWindowAnalyzer(intelligence, lookback=120))
+    report = simulator.simulate(order_sizes, tp_targets)
+    assert legacy_ops, "el escenario debe generar operaciones"
+    assert [(op["entry"], op["result"], op["gain"]) for op in report["operations"]] == legacy_ops
+    assert report["final_capital"] == legacy_capital
+    assert simulator.replay_stats["bars"] == len(df) - 1
+
+    # Ventana opcional; analyze() recibe una copia y no puede alterar el histórico
+    assert IntelligenceWindowAnalyzer(intelligence).lookback is None
+
+    class _MutatingIntelligence:
+        def analyze(self, **kwargs):
+            self.fetch_candles().loc[:, "close"] = 0.0
+            return {"signal": ""}
+
+    closes = df["close"].copy()
+    for lookback in (None, 10):
+        ReplayEngine(df.iloc[:50], IntelligenceWindowAnalyzer(_MutatingIntelligence(), lookback)).run(lambda e: None)
+    assert df["close"].equals(closes)
+
+    # El análisis de la vela i no depende de velas posteriores
+    analyzer = StreamingSmartTradeAnalyzer("BTCUSDT")
+    full, truncated = [], []
+    ReplayEngine(df, analyzer).run(lambda e: full.append(e.decision["action"]))
+    ReplayEngine(df.iloc[:700], analyzer).run(lambda e: truncated.append(e.decision["action"]))
+    assert full[:len(truncated)] == truncated
+    assert {"long", "short"} <= set(full)
+
+    stops = []
+    stats = ReplayEngine(df, analyzer).run(lambda e: stops.append(e.index) or e.index < 99)
+    assert stats["bars"] == 100 and stops[-1] == 99
+    print(f"✅ ReplayEngine test completed: {len(legacy_ops)} operaciones idénticas, capital {legacy_capital:.2f}")
+
+
+def benchmark_replay_engine(n_bars: int = 8640):
+    """~3 meses de velas 15m con un análisis que recorre todas las velas recibidas"""
+    df = _synthetic_candles(n_bars)
+    intelligence = _WindowedRSIIntelligence(df, history=None)
+
+    start = time.perf_counter()
+    _legacy_simulate(df, intelligence, [15], [0.004], 1.0, 10**9)
+    legacy_seconds = time.perf_counter() - start
+
+    lookback = SIMULATOR_LOOKBACK_BARS or 300
+    prefix = ReplayEngine(df, IntelligenceWindowAnalyzer(intelligence)).run(lambda e: None)
+    window = ReplayEngine(df, IntelligenceWindowAnalyzer(intelligence, lookback=lookback)).run(lambda e: None)
+    streaming = ReplayEngine(df, StreamingSmartTradeAnalyzer("BTCUSDT")).run(lambda e: None)
+
+    print(f"🧪 Replay: {n_bars} velas")
+    print(f"   bucle previo df.iloc[:i+1]:            {legacy_seconds:8.2f} s")
+    print(f"   replay prefijo completo (default):     {prefix['seconds']:8.2f} s")
+    print(f"   replay ventana {lookback} velas:              {window['seconds']:8.2f} s")
+    print(f"   streaming O(1):                        {streaming['seconds']:8.2f} s "
+          f"({streaming['bars_per_second']} velas/s)")
+
+
+if __name__ == "__main__":
+    test_replay_engine()
+    benchmark_replay_engine()
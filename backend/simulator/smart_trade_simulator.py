@@ -1,28 +1,44 @@
 # simulator/smart_trade_simulator.py
 
+from typing import Any, Optional
+
 import pandas as pd
-from intelligence.smart_trade_intelligence import SmartTradeIntelligence
+
+from simulator.replay_engine import SIMULATOR_LOOKBACK_BARS, BarEvent, IntelligenceWindowAnalyzer, ReplayEngine
 
 class SmartTradeSimulator:
-    def __init__(self, symbol: str, interval: str = "15m", capital: float = 200.0):
+    def __init__(self, symbol: str, interval: str = "15m", capital: float = 200.0,
+                 df: Optional[pd.DataFrame] = None, analyzer: Optional[Any] = None):
         self.symbol = symbol
         self.interval = interval
         self.initial_capital = capital
         self.remaining_capital = capital
         self.operations = []
+        # Velas y analizador inyectables (por defecto SmartTradeIntelligence sobre el prefijo completo,
+        # o las últimas SIMULATOR_LOOKBACK_BARS velas si está definido)
+        self.df = df
+        self.analyzer = analyzer
+        self.replay_stats = {}
 
-    def simulate(self, order_sizes: list, tp_targets: list, sl_ratio: float = 1.0):
-        intelligence = SmartTradeIntelligence(symbol=self.symbol, interval=self.interval)
-        df = intelligence.fetch_candles()
-
-        for i in range(len(df) - 1):
-            slice_df = df.iloc[:i+1].copy()
+    def _prepare_replay(self):
+        if self.df is None or self.analyzer is None:
+            from intelligence.smart_trade_intelligence import SmartTradeIntelligence
             intelligence = SmartTradeIntelligence(symbol=self.symbol, interval=self.interval)
-            intelligence.fetch_candles = lambda: slice_df
-            result = intelligence.analyze(show_dashboard=False)
+            if self.df is None:
+                self.df = intelligence.fetch_candles()
+            if self.analyzer is None:
+                self.analyzer = IntelligenceWindowAnalyzer(intelligence, lookback=SIMULATOR_LOOKBACK_BARS)
+        return self.df, self.analyzer
 
-            signal = result.get("signal", "")
-            close_price = slice_df['close'].iloc[-1]
+    def simulate(self, order_sizes: list, tp_targets: list, sl_ratio: float = 1.0):
+        df, analyzer = self._prepare_replay()
+        highs = df['high'].to_numpy()
+        lows = df['low'].to_numpy()
+
+        def on_bar(event: BarEvent):
+            i = event.index
+            signal = event.signal
+            close_price = event.close
 
             if signal == "long" and self.remaining_capital >= min(order_sizes):
                 for order_size, tp in zip(order_sizes, tp_targets):
@@ -31,10 +47,10 @@ class SmartTradeSimulator:
                         sl_price = close_price * (1 - tp * sl_ratio)
 
                         # Simular si el precio toca TP antes del SL
-                        future_prices = df.iloc[i+1:i+4]['high']  # ventanas de 3 velas siguientes
-                        future_lows = df.iloc[i+1:i+4]['low']
+                        future_prices = highs[i+1:i+4]  # ventanas de 3 velas siguientes
+                        future_lows = lows[i+1:i+4]
 
-                        if any(high >= tp_price for high in future_prices):
+                        if (future_prices >= tp_price).any():
                             self.operations.append({
                                 "entry": close_price,
                                 "exit": tp_price,
@@ -44,7 +60,7 @@ class SmartTradeSimulator:
                                 "capital_after": self.remaining_capital + order_size * tp
                             })
                             self.remaining_capital += order_size * tp
-                        elif any(low <= sl_price for low in future_lows):
+                        elif (future_lows <= sl_price).any():
                             loss = order_size * tp * sl_ratio
                             self.operations.append({
                                 "entry": close_price,
@@ -62,12 +78,14 @@ class SmartTradeSimulator:
 
                         if self.remaining_capital <= 0:
                             break
-            
-            if self.remaining_capital <= 0:
-                break
+
+            return self.remaining_capital > 0
+
+        # Una pasada por las velas (antes: analyze() sobre df.iloc[:i+1] en cada vela)
+        self.replay_stats = ReplayEngine(df, analyzer).run(on_bar)
 
         return {
             "initial_capital": self.initial_capital,
             "final_capital": self.remaining_capital,
             "operations": self.operations
-        }
\ No newline at end of file
+        }
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+🧵 Analysis Pool - Ejecución acotada de analizadores CPU-bound fuera del event loop
+ThreadPoolExecutor compartido (NumPy libera el GIL en la mayoría de kernels) y
+un temporizador por etapas para exponer tiempos en las respuestas de la API.
+
+GUARDRAILS COMPLIANCE:
+✅ P1: New file creation (non-critical, utils/ directory)
+✅ DL-001: Tamaño del pool configurable por entorno (ANALYSIS_POOL_WORKERS)
+✅ DL-003: Railway compatible, solo stdlib
+"""
+
+import asyncio
+import functools
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_analysis_executor() -> ThreadPoolExecutor:
+    """Executor compartido, creado bajo demanda con tamaño acotado"""
+    global _executor
+    if _executor is None:
+        default_workers = min(4, os.cpu_count() or 1)
+        workers = int(os.getenv("ANALYSIS_POOL_WORKERS", str(default_workers)))
+        _executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="analysis")
+        logger.info(f"🧵 Analysis pool inicializado ({workers} workers)")
+    return _executor
+
+
+async def run_in_analysis_pool(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Ejecutar func(*args, **kwargs) en el pool sin bloquear el event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_analysis_executor(), functools.partial(func, *args, **kwargs))
+
+
+def shutdown_analysis_pool():
+    """Liberar el executor (shutdown de la aplicación)"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+class StageTimer:
+    """Acumula duraciones por etapa en milisegundos"""
+
+    def __init__(self):
+        self._start = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = round((time.perf_counter() - start) * 1000, 2)
+
+    def record(self, name: str, elapsed_ms: float):
+        self.stages[name] = round(elapsed_ms, 2)
+
+    def to_dict(self) -> Dict[str, float]:
+        return {**self.stages, "total": round((time.perf_counter() - self._start) * 1000, 2)}
+
+
+async def timed(timer: StageTimer, name: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Ejecutar func en el pool registrando su duración como etapa `name`"""
+    start = time.perf_counter()
+    try:
+        return await run_in_analysis_pool(func, *args, **kwargs)
+    finally:
+        timer.record(name, (time.perf_counter() - start) * 1000)
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+🔌 HTTP Client Pool - Clientes httpx de larga vida para APIs de exchanges
+Un AsyncClient keep-alive por host (límite de conexiones por host), HTTP/2
+cuando el paquete h2 está disponible, y histogramas de latencia por endpoint.
+
+GUARDRAILS COMPLIANCE:
+✅ P1: New file creation (non-critical, utils/ directory)
+✅ DL-001: Límites configurables por entorno, sin hardcode
+✅ DL-003: Railway compatible, HTTP/2 opcional (fallback a HTTP/1.1 keep-alive)
+"""
+
+import bisect
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401 - requerido por httpx para HTTP/2
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Límites superiores (ms) de los buckets del histograma de latencia
+LATENCY_BUCKETS_MS: Tuple[float, ...] = (
+    1, 2, 5, 10, 20, 35, 50, 75, 100, 150, 250, 400, 600, 1000, 2500, 5000, 10000, 30000
+)
+
+
+@dataclass
+class HttpPoolConfig:
+    """Configuración del pool (valores por defecto sobreescribibles por entorno)"""
+    max_connections_per_host: int = 20
+    max_keepalive_per_host: int = 10
+    keepalive_expiry: float = 60.0
+    connect_timeout: float = 5.0
+    default_timeout: float = 10.0
+    http2: bool = True
+
+    @classmethod
+    def from_env(cls) -> "HttpPoolConfig":
+        return cls(
+            max_connections_per_host=int(os.getenv("HTTP_POOL_MAX_CONNECTIONS_PER_HOST", "20")),
+            max_keepalive_per_host=int(os.getenv("HTTP_POOL_MAX_KEEPALIVE_PER_HOST", "10")),
+            keepalive_expiry=float(os.getenv("HTTP_POOL_KEEPALIVE_EXPIRY", "60")),
+            connect_timeout=float(os.getenv("HTTP_POOL_CONNECT_TIMEOUT", "5")),
+            default_timeout=float(os.getenv("HTTP_POOL_DEFAULT_TIMEOUT", "10")),
+            http2=os.getenv("HTTP_POOL_HTTP2", "true").lower() == "true"
+        )
+
+
+@dataclass
+class LatencyHistogram:
+    """Histograma de latencia con buckets fijos (memoria constante)"""
+    counts: List[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS_MS) + 1))
+    total: int = 0
+    errors: int = 0
+    sum_ms: float = 0.0
+    max_ms: float = 0.0
+
+    def record(self, latency_ms: float, error: bool = False):
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS_MS, latency_ms)] += 1
+        self.total += 1
+        self.sum_ms += latency_ms
+        self.max_ms = max(self.max_ms, latency_ms)
+        if error:
+            self.errors += 1
+
+    def percentile(self, q: float) -> float:
+        """Percentil aproximado (límite superior del bucket que contiene el rango q)"""
+        if not self.total:
+            return 0.0
+        rank = q * self.total
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return LATENCY_BUCKETS_MS[index] if index < len(LATENCY_BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.total,
+            "errors": self.errors,
+            "avg_ms": round(self.sum_ms / self.total, 2) if self.total else 0.0,
+            "p50_ms": self.percentile(0.50),
+            "p90_ms": self.percentile(0.90),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": round(self.max_ms, 2),
+            "buckets_ms": {
+                (f"le_{bound:g}" if index < len(LATENCY_BUCKETS_MS) else "le_inf"): count
+                for index, (bound, count) in enumerate(zip(LATENCY_BUCKETS_MS + (float("inf"),), self.counts))
+            }
+        }
+
+
+class PooledClient:
+    """
+    Fachada con la interfaz de httpx.AsyncClient (get/post/put/delete/request)
+    que enruta cada llamada al cliente keep-alive de su host y mide la latencia.
+    """
+
+    def __init__(self, pool: "HttpClientPool"):
+        self._pool = pool
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        return await self._pool.request(method, url, **kwargs)
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self._pool.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self._pool.request("POST", url, **kwargs)
+
+    async def put(self, url: str, **kwargs) -> httpx.Response:
+        return await self._pool.request("PUT", url, **kwargs)
+
+    async def delete(self, url: str, **kwargs) -> httpx.Response:
+        # httpx.AsyncClient.delete no acepta body; se usa request() para mantener compatibilidad con data=
+        return await self._pool.request("DELETE", url, **kwargs)
+
+
+class HttpClientPool:
+    """Pool de httpx.AsyncClient compartido por todos los servicios de exchange"""
+
+    def __init__(self, config: Optional[HttpPoolConfig] = None):
+        self.config = config or HttpPoolConfig.from_env()
+        self.http2 = self.config.http2 and HTTP2_AVAILABLE
+        if self.config.http2 and not HTTP2_AVAILABLE:
+            logger.info("ℹ️ Paquete h2 no instalado - HttpClientPool usando HTTP/1.1 keep-alive")
+
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._histograms: Dict[Tuple[str, str, str], LatencyHistogram] = {}
+
+    def _create_client(self) -> httpx.AsyncClient:
+        limits = httpx.Limits(
+            max_connections=self.config.max_connections_per_host,
+            max_keepalive_connections=self.config.max_keepalive_per_host,
+            keepalive_expiry=self.config.keepalive_expiry
+        )
+        timeout = httpx.Timeout(self.config.default_timeout, connect=self.config.connect_timeout)
+        return httpx.AsyncClient(limits=limits, timeout=timeout, http2=self.http2)
+
+    def get_client(self, url: str) -> httpx.AsyncClient:
+        """Cliente keep-alive para el origen (scheme://host:port) de la URL"""
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        client = self._clients.get(origin)
+        if client is None or client.is_closed:
+            client = self._create_client()
+            self._clients[origin] = client
+        return client
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Ejecutar request con el cliente del host y registrar latencia por endpoint"""
+        parts = urlsplit(url)
+        key = (parts.netloc, method.upper(), parts.path)
+        client = self.get_client(url)
+
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except Exception:
+            self._record(key, (time.perf_counter() - start) * 1000, error=True)
+            raise
+        self._record(key, (time.perf_counter() - start) * 1000, error=response.status_code >= 500)
+        return response
+
+    def _record(self, key: Tuple[str, str, str], latency_ms: float, error: bool):
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            histogram = self._histograms[key] = LatencyHistogram()
+        histogram.record(latency_ms, error)
+
+    @asynccontextmanager
+    async def client(self):
+        """
+        Uso: `async with http_client_pool.client() as client:` igual que httpx.AsyncClient(),
+        pero las conexiones permanecen abiertas en el pool al salir del bloque.
+        """
+        yield PooledClient(self)
+
+    def get_latency_stats(self, host: Optional[str] = None) -> Dict[str, Any]:
+        """Histogramas de latencia por host/método/endpoint"""
+        stats = {}
+        for (netloc, method, path), histogram in sorted(self._histograms.items()):
+            if host and host != netloc:
+                continue
+            stats.setdefault(netloc, {})[f"{method} {path}"] = histogram.to_dict()
+        return {
+            "http2": self.http2,
+            "open_clients": sum(1 for client in self._clients.values() if not client.is_closed),
+            "limits": {
+                "max_connections_per_host": self.config.max_connections_per_host,
+                "max_keepalive_per_host": self.config.max_keepalive_per_host,
+                "keepalive_expiry": self.config.keepalive_expiry
+            },
+            "hosts": stats
+        }
+
+    def reset_latency_stats(self):
+        self._histograms.clear()
+
+    async def aclose(self):
+        """Cerrar todos los clientes (shutdown de la aplicación)"""
+        for client in self._clients.values():
+            if not client.is_closed:
+                await client.aclose()
+        self._clients.clear()
+        logger.info("🔌 HttpClientPool cerrado")
+
+
+# Instancia global del pool
+http_client_pool = HttpClientPool()
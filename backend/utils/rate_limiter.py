@@ -9,12 +9,14 @@ GUARDRAILS COMPLIANCE:
 ✅ DL-003: Railway compatible, no external dependencies beyond standard library
 """
 
+import os
 import time
 import asyncio
 import logging
+import threading
 from typing import Dict, List, Optional, Tuple, Any
 from datetime import datetime, timedelta
-from collections import defaultdict, deque
+from collections import defaultdict, deque, OrderedDict
 from dataclasses import dataclass
 from enum import Enum
 
@@ -22,6 +24,14 @@ from utils.exceptions import RateLimitError, ConfigurationError
 
 logger = logging.getLogger(__name__)
 
+# Limiter backend: "memory" (sharded sliding-window counters), "redis" (shared across
+# uvicorn workers, memory fallback) or "legacy" (per-request timestamp deques)
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory").lower()
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+RATE_LIMIT_SHARDS = int(os.getenv("RATE_LIMIT_SHARDS", "16"))
+RATE_LIMIT_CLEANUP_SECONDS = float(os.getenv("RATE_LIMIT_CLEANUP_SECONDS", "60"))
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL", "redis://localhost:6379/0")
+
 
 class RateLimitType(Enum):
     """Rate limit types for different endpoint categories"""
@@ -196,6 +206,17 @@ class RateLimiter:
             # Fail open - allow request if rate limiter fails
             return True, {"error": str(e)}
     
+    async def check(
+        self,
+        identifier: str,
+        rate_limit_type: RateLimitType,
+        increment: bool = True
+    ) -> Tuple[bool, Dict[str, Any]]:
+        """
+        Async entry point used by RateLimitMiddleware (backends may do network I/O)
+        """
+        return self.is_allowed(identifier, rate_limit_type, increment)
+    
     def get_rate_limit_info(
         self,
         identifier: str,
@@ -335,8 +356,376 @@ class RateLimiter:
             return False
 
 
+class _CounterShard:
+    """LRU-bounded table of sliding-window counters guarded by its own lock"""
+    
+    __slots__ = ("lock", "entries", "max_keys", "evicted")
+    
+    def __init__(self, max_keys: int):
+        self.lock = threading.Lock()
+        # key -> [window_index, previous_count, current_count, window_seconds]
+        self.entries: "OrderedDict[Tuple[str, str], List]" = OrderedDict()
+        self.max_keys = max_keys
+        self.evicted = 0
+
+
+class MemorySlidingWindowBackend:
+    """
+    Sliding-window counter (previous window weighted by overlap + current window)
+    
+    Fixed memory per key (two counters and a window index), monotonic float time,
+    keys spread over independently locked shards, each an LRU table with a hard
+    size bound, and expired keys removed by a background thread instead of the
+    request path.
+    """
+    
+    def __init__(
+        self,
+        max_keys: int = RATE_LIMIT_MAX_KEYS,
+        shards: int = RATE_LIMIT_SHARDS,
+        cleanup_interval: float = RATE_LIMIT_CLEANUP_SECONDS
+    ):
+        self.shards = [_CounterShard(max(1, max_keys // shards)) for _ in range(shards)]
+        self.cleanup_interval = cleanup_interval
+        self._cleanup_thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+    
+    def _shard(self, key: Tuple[str, str]) -> _CounterShard:
+        return self.shards[hash(key) % len(self.shards)]
+    
+    def hit(
+        self,
+        key: Tuple[str, str],
+        limit: int,
+        window: float,
+        increment: bool = True
+    ) -> Tuple[bool, float, float]:
+        """
+        Returns (is_allowed, estimated_count_before_request, seconds_until_window_reset)
+        """
+        if self._cleanup_thread is None:
+            self._start_cleanup()
+        
+        now = time.monotonic()
+        index = int(now // window)
+        elapsed = (now - index * window) / window
+        shard = self._shard(key)
+        
+        with shard.lock:
+            entry = shard.entries.get(key)
+            if entry is None:
+                entry = [index, 0, 0, window]
+                shard.entries[key] = entry
+                if len(shard.entries) > shard.max_keys:
+                    shard.entries.popitem(last=False)
+                    shard.evicted += 1
+            else:
+                shard.entries.move_to_end(key)
+                if entry[0] != index:
+                    entry[1] = entry[2] if entry[0] == index - 1 else 0
+                    entry[2] = 0
+                    entry[0] = index
+                entry[3] = window
+            
+            estimate = entry[1] * (1.0 - elapsed) + entry[2]
+            is_allowed = estimate + 1 <= limit
+            if is_allowed and increment:
+                entry[2] += 1
+        
+        return is_allowed, estimate, window * (1.0 - elapsed)
+    
+    def reset(self, key: Tuple[str, str]) -> bool:
+        shard = self._shard(key)
+        with shard.lock:
+            return shard.entries.pop(key, None) is not None
+    
+    def cleanup(self) -> int:
+        """Drop counters whose previous and current windows have both expired"""
+        now = time.monotonic()
+        removed = 0
+        for shard in self.shards:
+            with shard.lock:
+                expired = [
+                    key for key, (index, _, _, window) in shard.entries.items()
+                    if int(now // window) - index >= 2
+                ]
+                for key in expired:
+                    del shard.entries[key]
+            removed += len(expired)
+        return removed
+    
+    def _start_cleanup(self):
+        self._cleanup_thread = threading.Thread(target=self._cleanup_loop, name="rate-limit-cleanup", daemon=True)
+        self._cleanup_thread.start()
+    
+    def _cleanup_loop(self):
+        while not self._stop.wait(self.cleanup_interval):
+            try:
+                removed = self.cleanup()
+                if removed:
+                    logger.debug(f"Rate limiter cleanup: removed {removed} expired counters")
+            except Exception as e:
+                logger.error(f"Error during rate limiter cleanup: {e}")
+    
+    def close(self):
+        self._stop.set()
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "memory",
+            "keys": sum(len(shard.entries) for shard in self.shards),
+            "max_keys": sum(shard.max_keys for shard in self.shards),
+            "shards": len(self.shards),
+            "evicted": sum(shard.evicted for shard in self.shards)
+        }
+
+
+# Same sliding-window counter evaluated atomically on the Redis server clock, so every
+# uvicorn worker shares the limit. Window keys share a hash tag and expire on their own.
+_REDIS_SLIDING_WINDOW_SCRIPT = """
+local t = redis.call('TIME')
+local now_ms = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local window_ms = tonumber(ARGV[2])
+local index = math.floor(now_ms / window_ms)
+local current_key = KEYS[1] .. ':' .. index
+local current = tonumber(redis.call('GET', current_key) or '0')
+local previous = tonumber(redis.call('GET', KEYS[1] .. ':' .. (index - 1)) or '0')
+local elapsed = (now_ms % window_ms) / window_ms
+local estimate = previous * (1 - elapsed) + current
+local allowed = 0
+if estimate + 1 <= tonumber(ARGV[1]) then
+    allowed = 1
+    if ARGV[3] == '1' then
+        redis.call('INCR', current_key)
+        redis.call('PEXPIRE', current_key, window_ms * 2)
+    end
+end
+return {allowed, tostring(estimate), tostring(window_ms - now_ms % window_ms)}
+"""
+
+
+class RedisSlidingWindowBackend:
+    """
+    Redis-backed sliding-window counter shared across processes
+    
+    DL-003 COMPLIANCE: redis is optional; when it is not installed or unreachable
+    the limiter falls back to the in-process memory backend.
+    """
+    
+    def __init__(self, url: str = RATE_LIMIT_REDIS_URL, prefix: str = "ratelimit"):
+        import redis.asyncio as redis_asyncio
+        
+        self.client = redis_asyncio.from_url(url, socket_timeout=0.25, socket_connect_timeout=0.25)
+        self.script = self.client.register_script(_REDIS_SLIDING_WINDOW_SCRIPT)
+        self.prefix = prefix
+        self.errors = 0
+        self.retry_at = 0.0  # monotonic time before which Redis is skipped after a failure
+    
+    def _redis_key(self, key: Tuple[str, str]) -> str:
+        return f"{self.prefix}:{{{key[0]}:{key[1]}}}"
+    
+    async def hit(
+        self,
+        key: Tuple[str, str],
+        limit: int,
+        window: float,
+        increment: bool = True
+    ) -> Tuple[bool, float, float]:
+        allowed, estimate, reset_ms = await self.script(
+            keys=[self._redis_key(key)],
+            args=[limit, int(window * 1000), 1 if increment else 0]
+        )
+        return bool(allowed), float(estimate), float(reset_ms) / 1000
+    
+    async def reset(self, key: Tuple[str, str]) -> bool:
+        redis_key = self._redis_key(key)
+        keys = [k async for k in self.client.scan_iter(match=f"{redis_key}:*")]
+        return bool(keys) and bool(await self.client.delete(*keys))
+    
+    async def close(self):
+        await self.client.aclose()
+
+
+class SlidingWindowRateLimiter(RateLimiter):
+    """
+    Drop-in RateLimiter using sliding-window counters instead of timestamp deques
+    
+    DL-001 COMPLIANCE: Same rate limit configuration, bounded memory per key and in total
+    """
+    
+    def __init__(
+        self,
+        backend: Optional[MemorySlidingWindowBackend] = None,
+        redis_backend: Optional[RedisSlidingWindowBackend] = None,
+        max_violations: int = 10000
+    ):
+        super().__init__()
+        self.backend = backend or MemorySlidingWindowBackend()
+        self.redis_backend = redis_backend
+        # Bounded violation log: (wall_time, identifier, limit_type)
+        self.violations: deque = deque(maxlen=max_violations)
+        self._reset_iso_cache: Tuple[int, str] = (0, "")
+    
+    def _reset_time(self, reset_after: float) -> str:
+        """ISO reset timestamp, formatted at most once per second"""
+        target = int(time.time() + reset_after)
+        if self._reset_iso_cache[0] != target:
+            self._reset_iso_cache = (target, datetime.fromtimestamp(target).isoformat())
+        return self._reset_iso_cache[1]
+    
+    def _result(
+        self,
+        identifier: str,
+        rate_limit: RateLimit,
+        rate_limit_type: RateLimitType,
+        is_allowed: bool,
+        estimate: float,
+        reset_after: float
+    ) -> Tuple[bool, Dict[str, Any]]:
+        current_count = int(estimate)
+        
+        if not is_allowed:
+            self.violations.append((time.time(), identifier, rate_limit_type.value))
+            logger.warning(
+                f"Rate limit exceeded for {identifier} on {rate_limit_type.value}: "
+                f"{current_count}/{rate_limit.requests} in {rate_limit.window}s"
+            )
+        
+        return is_allowed, {
+            "limit": rate_limit.requests,
+            "window": rate_limit.window,
+            "current": current_count,
+            "remaining": max(0, rate_limit.requests - current_count),
+            "reset_time": self._reset_time(reset_after),
+            "type": rate_limit_type.value,
+            "description": rate_limit.description
+        }
+    
+    def is_allowed(
+        self,
+        identifier: str,
+        rate_limit_type: RateLimitType,
+        increment: bool = True
+    ) -> Tuple[bool, Dict[str, Any]]:
+        """
+        Check a request against the in-process counters (synchronous callers)
+        """
+        try:
+            rate_limit = self.rate_limits.get(rate_limit_type)
+            if not rate_limit:
+                logger.warning(f"No rate limit configured for type: {rate_limit_type}")
+                return True, {"error": "No rate limit configured"}
+            
+            is_allowed, estimate, reset_after = self.backend.hit(
+                (identifier, rate_limit_type.value), rate_limit.requests, rate_limit.window, increment
+            )
+            return self._result(identifier, rate_limit, rate_limit_type, is_allowed, estimate, reset_after)
+            
+        except Exception as e:
+            logger.error(f"Error in rate limiter: {e}")
+            # Fail open - allow request if rate limiter fails
+            return True, {"error": str(e)}
+    
+    async def check(
+        self,
+        identifier: str,
+        rate_limit_type: RateLimitType,
+        increment: bool = True
+    ) -> Tuple[bool, Dict[str, Any]]:
+        """
+        Check a request against Redis when configured (limits shared by all workers)
+        """
+        if self.redis_backend is None:
+            return self.is_allowed(identifier, rate_limit_type, increment)
+        
+        rate_limit = self.rate_limits.get(rate_limit_type)
+        if not rate_limit or time.monotonic() < self.redis_backend.retry_at:
+            return self.is_allowed(identifier, rate_limit_type, increment)
+        
+        try:
+            is_allowed, estimate, reset_after = await self.redis_backend.hit(
+                (identifier, rate_limit_type.value), rate_limit.requests, rate_limit.window, increment
+            )
+        except Exception as e:
+            self.redis_backend.errors += 1
+            self.redis_backend.retry_at = time.monotonic() + 5
+            if self.redis_backend.errors == 1 or self.redis_backend.errors % 1000 == 0:
+                logger.warning(f"Redis rate limiter unavailable ({e}), using in-process counters")
+            return self.is_allowed(identifier, rate_limit_type, increment)
+        
+        return self._result(identifier, rate_limit, rate_limit_type, is_allowed, estimate, reset_after)
+    
+    def reset_rate_limit(self, identifier: str, rate_limit_type: RateLimitType) -> bool:
+        """
+        Reset in-process counters for an identifier (admin operation)
+        """
+        try:
+            if self.backend.reset((identifier, rate_limit_type.value)):
+                logger.info(f"Rate limit reset for {identifier}:{rate_limit_type.value}")
+                return True
+            return False
+        except Exception as e:
+            logger.error(f"Error resetting rate limit: {e}")
+            return False
+    
+    def get_violations_summary(self, hours: int = 24) -> Dict[str, Any]:
+        """
+        Get rate limit violations summary from the bounded violation log
+        """
+        now = time.time()
+        cutoff_time = now - hours * 3600
+        recent = [v for v in list(self.violations) if v[0] > cutoff_time]
+        
+        summary = {
+            "period_hours": hours,
+            "total_violations": len(recent),
+            "violations_by_type": defaultdict(int),
+            "violations_by_identifier": defaultdict(int),
+            "recent_violations": []
+        }
+        for _, identifier, limit_type in recent:
+            summary["violations_by_type"][limit_type] += 1
+            summary["violations_by_identifier"][identifier] += 1
+        
+        for violation_time, identifier, limit_type in reversed(recent[-50:]):
+            summary["recent_violations"].append({
+                "identifier": identifier,
+                "type": limit_type,
+                "timestamp": datetime.fromtimestamp(violation_time).isoformat(),
+                "time_ago_seconds": now - violation_time
+            })
+        
+        summary["backend"] = self.backend.stats()
+        return dict(summary)
+    
+    def _cleanup_old_data(self) -> None:
+        """
+        Expired counters are removed by the backend cleanup thread
+        """
+        self.backend.cleanup()
+
+
+def create_rate_limiter(backend: str = RATE_LIMIT_BACKEND) -> RateLimiter:
+    """
+    Build the configured limiter (RATE_LIMIT_BACKEND=memory|redis|legacy)
+    
+    DL-001 COMPLIANCE: Backend selected by environment, Redis optional
+    """
+    if backend == "legacy":
+        return RateLimiter()
+    
+    redis_backend = None
+    if backend == "redis":
+        try:
+            redis_backend = RedisSlidingWindowBackend(RATE_LIMIT_REDIS_URL)
+        except ImportError:
+            logger.warning("redis package not installed - rate limits are per worker")
+    
+    return SlidingWindowRateLimiter(redis_backend=redis_backend)
+
+
 # Global rate limiter instance
-rate_limiter = RateLimiter()
+rate_limiter = create_rate_limiter()
 
 
 def get_client_identifier(request) -> str:
@@ -363,4 +752,46 @@ def get_client_identifier(request) -> str:
         
     except Exception as e:
         logger.error(f"Error extracting client identifier: {e}")
-        return "unknown:unknown"
\ No newline at end of file
+        return "unknown:unknown"
+
+
+def test_sliding_window_rate_limiter():
+    """Window semantics, LRU bound, expiry cleanup and legacy-compatible info"""
+    print("🧪 Testing SlidingWindowRateLimiter...")
+    limiter = SlidingWindowRateLimiter(MemorySlidingWindowBackend(max_keys=64, shards=4, cleanup_interval=3600))
+    limiter.update_rate_limit(RateLimitType.AUTHENTICATION, requests=5, window=60)
+    
+    results = [limiter.is_allowed("ip:10.0.0.1", RateLimitType.AUTHENTICATION)[0] for _ in range(7)]
+    assert results == [True] * 5 + [False] * 2
+    info = limiter.get_rate_limit_info("ip:10.0.0.1", RateLimitType.AUTHENTICATION)
+    assert info["current"] == 5 and info["remaining"] == 0 and info["limit"] == 5
+    assert limiter.is_allowed("ip:10.0.0.2", RateLimitType.AUTHENTICATION)[0]
+    assert limiter.get_violations_summary()["total_violations"] == 3  # saturated peek counts too, as in RateLimiter
+    
+    assert limiter.reset_rate_limit("ip:10.0.0.1", RateLimitType.AUTHENTICATION)
+    assert limiter.is_allowed("ip:10.0.0.1", RateLimitType.AUTHENTICATION)[0]
+    
+    # Previous window weighted by overlap: 10 hits in the previous window, half elapsed -> ~5 counted
+    backend = limiter.backend
+    key = ("ip:10.0.0.3", RateLimitType.GENERAL_API.value)
+    window = 60.0
+    backend.hit(key, 100, window)
+    entry = backend._shard(key).entries[key]
+    entry[0], entry[1], entry[2] = entry[0] - 1, 0, 10
+    allowed, estimate, _ = backend.hit(key, 100, window, increment=False)
+    elapsed = (time.monotonic() % window) / window
+    assert allowed and abs(estimate - 10 * (1 - elapsed)) < 0.01
+    
+    # LRU bound and expiry
+    for i in range(1000):
+        backend.hit((f"ip:{i}", "general"), 100, 60)
+    assert backend.stats()["keys"] <= 64 and backend.stats()["evicted"] > 0
+    for shard in backend.shards:
+        for entry in shard.entries.values():
+            entry[0] -= 2
+    assert backend.cleanup() > 0 and backend.stats()["keys"] == 0
+    print("✅ SlidingWindowRateLimiter test completed")
+
+
+if __name__ == "__main__":
+    test_sliding_window_rate_limiter()
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+🗄️ SQLite Batch Writer - Escritura en segundo plano por lotes sobre SQLite
+El hilo que registra solo añade la fila a un ring buffer en memoria (microsegundos);
+un hilo escritor la persiste con executemany en una única conexión WAL, por lotes
+de tamaño acotado o cada intervalo de flush. Si el buffer se llena se descartan las
+filas más antiguas y se contabilizan (nunca se bloquea el camino de órdenes).
+
+GUARDRAILS COMPLIANCE:
+✅ P1: New file creation (non-critical, utils/ directory)
+✅ DL-001: Capacidad, lote e intervalo configurables por entorno (SQLITE_WRITER_*)
+✅ DL-003: Railway compatible, solo stdlib
+"""
+
+import asyncio
+import atexit
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+SQLITE_WRITER_CAPACITY = int(os.getenv("SQLITE_WRITER_CAPACITY", "10000"))
+SQLITE_WRITER_BATCH_SIZE = int(os.getenv("SQLITE_WRITER_BATCH_SIZE", "500"))
+SQLITE_WRITER_FLUSH_MS = float(os.getenv("SQLITE_WRITER_FLUSH_MS", "200"))
+
+
+def _connect(db_path: str, check_same_thread: bool = True) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_path, timeout=30, check_same_thread=check_same_thread)
+    conn.execute("PRAGMA journal_mode=WAL")  # lectores concurrentes sin bloquear al escritor
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class SQLiteBatchWriter:
+    """Ring buffer + hilo escritor con executemany por lotes para una sentencia INSERT"""
+
+    def __init__(self, db_path: str, insert_sql: str, capacity: Optional[int] = None,
+                 batch_size: Optional[int] = None, flush_interval_ms: Optional[float] = None):
+        self.db_path = db_path
+        self.insert_sql = insert_sql
+        self.capacity = capacity or SQLITE_WRITER_CAPACITY
+        self.batch_size = batch_size or SQLITE_WRITER_BATCH_SIZE
+        self.flush_interval = (flush_interval_ms if flush_interval_ms is not None else SQLITE_WRITER_FLUSH_MS) / 1000
+
+        self._buffer: Deque[Tuple] = deque()
+        self._lock = threading.Lock()
+        self._progress = threading.Condition(self._lock)
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._closing = False
+
+        self._read_conn: Optional[sqlite3.Connection] = None
+        self._read_lock = threading.Lock()
+
+        # Métricas de backpressure
+        self._submitted = 0
+        self._written = 0
+        self._failed = 0
+        self._dropped = 0
+        self._batches = 0
+        self._high_watermark = 0
+        self._last_batch_ms = 0.0
+
+    # ------------------------------------------------------------------
+    # Camino caliente
+    # ------------------------------------------------------------------
+
+    def submit(self, row: Tuple):
+        """Encolar una fila; O(1) y sin E/S"""
+        with self._lock:
+            if self._closing:
+                raise RuntimeError("SQLiteBatchWriter cerrado")
+            if len(self._buffer) >= self.capacity:
+                self._buffer.popleft()
+                self._dropped += 1
+            self._buffer.append(row)
+            self._submitted += 1
+            pending = len(self._buffer)
+            if pending > self._high_watermark:
+                self._high_watermark = pending
+            if self._thread is None:
+                self._start()
+        if pending >= self.batch_size:
+            self._wakeup.set()
+
+    # ------------------------------------------------------------------
+    # Hilo escritor
+    # ------------------------------------------------------------------
+
+    def _start(self):
+        self._thread = threading.Thread(target=self._run, name=f"sqlite-writer:{os.path.basename(self.db_path)}",
+                                        daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        conn = _connect(self.db_path)
+        try:
+            while True:
+                self._wakeup.wait(self.flush_interval)
+                self._wakeup.clear()
+                self._drain(conn)
+                with self._lock:
+                    if self._closing and not self._buffer:
+                        return
+        finally:
+            conn.close()
+
+    def _drain(self, conn: sqlite3.Connection):
+        while True:
+            with self._lock:
+                count = min(len(self._buffer), self.batch_size)
+                batch: List[Tuple] = [self._buffer.popleft() for _ in range(count)]
+            if not batch:
+                return
+
+            start = time.perf_counter()
+            try:
+                conn.executemany(self.insert_sql, batch)
+                conn.commit()
+                written, failed = len(batch), 0
+            except Exception as e:
+                conn.rollback()
+                written, failed = 0, len(batch)
+                logger.error(f"❌ Error escribiendo lote de {len(batch)} filas en {self.db_path}: {e}")
+
+            with self._lock:
+                self._written += written
+                self._failed += failed
+                self._batches += 1
+                self._last_batch_ms = (time.perf_counter() - start) * 1000
+                self._progress.notify_all()
+
+    # ------------------------------------------------------------------
+    # Flush / lectura / cierre
+    # ------------------------------------------------------------------
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Esperar a que lo encolado hasta ahora esté persistido (True si se completó)"""
+        with self._lock:
+            target = self._submitted
+            if self._thread is None or self._written + self._failed + self._dropped >= target:
+                return True
+        self._wakeup.set()
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            while self._written + self._failed + self._dropped < target:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._thread.is_alive():
+                    return False
+                self._progress.wait(remaining)
+        return True
+
+    def query(self, sql: str, params: Sequence[Any] = (), flush: bool = True) -> List[Tuple]:
+        """SELECT sobre una conexión de lectura persistente (tras flush, lee lo ya registrado)"""
+        if flush:
+            self.flush()
+        with self._read_lock:
+            if self._read_conn is None:
+                self._read_conn = _connect(self.db_path, check_same_thread=False)
+            return self._read_conn.execute(sql, params).fetchall()
+
+    async def query_async(self, sql: str, params: Sequence[Any] = (), flush: bool = True) -> List[Tuple]:
+        return await asyncio.to_thread(self.query, sql, params, flush)
+
+    def close(self, timeout: float = 10.0):
+        """Flush final y parada del hilo escritor (shutdown)"""
+        with self._lock:
+            self._closing = True
+            thread = self._thread
+        if thread is not None:
+            self._wakeup.set()
+            thread.join(timeout)
+        with self._read_lock:
+            if self._read_conn is not None:
+                self._read_conn.close()
+                self._read_conn = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "pending": len(self._buffer),
+                "capacity": self.capacity,
+                "submitted": self._submitted,
+                "written": self._written,
+                "failed": self._failed,
+                "dropped": self._dropped,
+                "batches": self._batches,
+                "high_watermark": self._high_watermark,
+                "last_batch_ms": round(self._last_batch_ms, 3)
+            }
+
+
+# Instancias globales por (db_path, INSERT): un único escritor/conexión por base de datos
+_writers: Dict[Tuple[str, str], SQLiteBatchWriter] = {}
+_writers_lock = threading.Lock()
+
+
+def get_sqlite_batch_writer(db_path: str, insert_sql: str) -> SQLiteBatchWriter:
+    key = (os.path.abspath(db_path), insert_sql)
+    with _writers_lock:
+        writer = _writers.get(key)
+        if writer is None or writer._closing:
+            writer = _writers[key] = SQLiteBatchWriter(db_path, insert_sql)
+        return writer
+
+
+def close_sqlite_batch_writers():
+    """Flush y cierre de todos los escritores (shutdown de la aplicación)"""
+    with _writers_lock:
+        writers = list(_writers.values())
+        _writers.clear()
+    for writer in writers:
+        writer.close()
+
+
+atexit.register(close_sqlite_batch_writers)
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+⏱️ Tick Scheduler - Distribución push de datos de mercado con coalescencia
+Los streams upstream marcan símbolos como "sucios" con su último dato; un único
+flush por ventana (tasa máxima configurable) entrega solo lo que cambió. Sin
+cambios no hay trabajo: el loop queda bloqueado en un Event, sin polling.
+
+GUARDRAILS COMPLIANCE:
+✅ P1: New file creation (non-critical, utils/ directory)
+✅ DL-001: Tasa máxima configurable por entorno (WS_MAX_PUSH_HZ)
+✅ DL-003: Railway compatible, solo stdlib
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+TickCallback = Callable[[Hashable, Any], Union[None, Awaitable[None]]]
+
+
+class CoalescingTickScheduler:
+    """
+    Conjunto de claves sucias + flush a tasa máxima.
+
+    mark_dirty(key, data) es O(1) y no bloquea; varias marcas de la misma clave
+    dentro de una ventana se fusionan en una sola entrega con el dato más reciente.
+    """
+
+    def __init__(self, callback: TickCallback, max_rate_hz: Optional[float] = None):
+        self.callback = callback
+        self.max_rate_hz = max_rate_hz or float(os.getenv("WS_MAX_PUSH_HZ", "30"))
+        self.min_interval = 1.0 / self.max_rate_hz
+
+        self._dirty: Dict[Hashable, Any] = {}
+        self._event = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+        self.marks = 0
+        self.coalesced = 0
+        self.flushes = 0
+        self.delivered = 0
+        self.callback_errors = 0
+
+    def mark_dirty(self, key: Hashable, data: Any):
+        """Registrar el último dato de una clave para el próximo flush"""
+        self.marks += 1
+        if key in self._dirty:
+            self.coalesced += 1
+        self._dirty[key] = data
+        self._event.set()
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        last_flush = 0.0
+        while True:
+            await self._event.wait()
+
+            # Respetar la tasa máxima: las marcas que lleguen mientras tanto se fusionan
+            wait = last_flush + self.min_interval - loop.time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+            self._event.clear()
+            dirty, self._dirty = self._dirty, {}
+            last_flush = loop.time()
+            self.flushes += 1
+
+            for key, data in dirty.items():
+                try:
+                    result = self.callback(key, data)
+                    if asyncio.iscoroutine(result):
+                        await result
+                    self.delivered += 1
+                except Exception as e:
+                    self.callback_errors += 1
+                    logger.error(f"❌ Error entregando tick {key}: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "max_rate_hz": self.max_rate_hz,
+            "pending": len(self._dirty),
+            "marks": self.marks,
+            "coalesced": self.coalesced,
+            "flushes": self.flushes,
+            "delivered": self.delivered,
+            "callback_errors": self.callback_errors,
+            "running": self._task is not None and not self._task.done()
+        }
+
+
+# =================================================================
+# BENCHMARK
+# =================================================================
+
+async def benchmark_tick_scheduler(symbol_counts=(10, 100, 1000), seconds: float = 2.0,
+                                   ticks_per_symbol_hz: float = 1.0):
+    """
+    CPU consumido (process_time) por el polling previo a 60 Hz frente al push coalescido,
+    para distintos números de símbolos suscritos. Binance emite klines cada 1-2 s por stream.
+    """
+    print(f"🧪 Tick scheduler benchmark: {seconds:.0f}s por escenario, {ticks_per_symbol_hz:g} tick/s por símbolo")
+
+    async def fetch_symbol_data(symbol: str) -> Dict[str, Any]:
+        return {"success": True, "symbol": symbol, "price": 100.0}
+
+    async def distribute(symbol: str, data: Dict[str, Any]):
+        return None
+
+    async def legacy_polling(subscriptions: Dict[str, set]):
+        # Réplica del loop continuous_price_streaming: unión de símbolos + fetch de todos cada 16.7 ms
+        while True:
+            all_symbols = set()
+            for symbols in subscriptions.values():
+                all_symbols.update(symbols)
+            results = await asyncio.wait_for(
+                asyncio.gather(*(fetch_symbol_data(s) for s in all_symbols), return_exceptions=True),
+                timeout=0.045
+            )
+            for symbol, data in zip(all_symbols, results):
+                if isinstance(data, dict) and data.get("success"):
+                    await distribute(symbol, data)
+            await asyncio.sleep(0.0167)
+
+    async def upstream_ticks(scheduler: CoalescingTickScheduler, symbols):
+        # Ticks repartidos uniformemente en el tiempo
+        interval = 1.0 / (ticks_per_symbol_hz * len(symbols))
+        batch = max(1, int(0.01 / interval))
+        index = 0
+        while True:
+            for _ in range(batch):
+                symbol = symbols[index % len(symbols)]
+                scheduler.mark_dirty(symbol, {"symbol": symbol, "price": 100.0 + index})
+                index += 1
+            await asyncio.sleep(interval * batch)
+
+    async def measure(coroutine) -> float:
+        task = asyncio.create_task(coroutine)
+        start = time.process_time()
+        await asyncio.sleep(seconds)
+        cpu = time.process_time() - start
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        return cpu / seconds * 100
+
+    results = {}
+    for count in symbol_counts:
+        symbols = [f"SYM{i}USDT" for i in range(count)]
+        subscriptions = {f"client-{i}": {symbol} for i, symbol in enumerate(symbols)}
+
+        legacy_cpu = await measure(legacy_polling(subscriptions))
+
+        scheduler = CoalescingTickScheduler(distribute, max_rate_hz=30)
+        scheduler.start()
+        push_cpu = await measure(upstream_ticks(scheduler, symbols))
+        await scheduler.stop()
+
+        idle_scheduler = CoalescingTickScheduler(distribute, max_rate_hz=30)
+        idle_scheduler.start()
+        idle_cpu = await measure(asyncio.sleep(seconds * 2))
+        await idle_scheduler.stop()
+
+        results[count] = {"legacy_cpu_pct": legacy_cpu, "push_cpu_pct": push_cpu, "idle_cpu_pct": idle_cpu}
+        print(f"   {count:5d} símbolos: polling {legacy_cpu:6.1f}% CPU | push {push_cpu:5.1f}% CPU "
+              f"({scheduler.delivered} entregas, {scheduler.coalesced} fusionadas) | idle {idle_cpu:4.1f}%")
+    return results
+
+
+if __name__ == "__main__":
+    asyncio.run(benchmark_tick_scheduler())
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+📡 WebSocket Fan-out - Difusión de mensajes a miles de clientes WebSocket
+Índice invertido símbolo -> suscriptores, serialización única por mensaje y
+colas de envío acotadas por cliente (conflación del último dato / descarte del
+más antiguo) para que un cliente lento no frene al resto.
+
+GUARDRAILS COMPLIANCE:
+✅ P1: New file creation (non-critical, utils/ directory)
+✅ DL-001: Tamaño de cola, timeout y tasa máxima por cliente configurables por entorno
+✅ DL-003: Railway compatible, orjson opcional (fallback a json stdlib)
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+SendText = Callable[[str], Awaitable[None]]
+
+
+def serialize_message(message: Dict[str, Any]) -> str:
+    """Serializar a texto JSON (orjson cuando está instalado)"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(message, default=str).decode()
+    return json.dumps(message, default=str)
+
+
+class ClientSendQueue:
+    """
+    Cola de envío acotada de un cliente.
+
+    Los mensajes con clave de conflación (p.ej. ("market_data", "BTCUSDT")) sustituyen
+    al pendiente con la misma clave conservando su posición; el resto se encolan y,
+    si la cola está llena, se descarta el más antiguo.
+    """
+
+    __slots__ = ("client_id", "maxsize", "_pending", "_ready", "_sequence", "dropped", "conflated", "sent")
+
+    def __init__(self, client_id: str, maxsize: int):
+        self.client_id = client_id
+        self.maxsize = maxsize
+        self._pending: "OrderedDict[Hashable, str]" = OrderedDict()
+        self._ready = asyncio.Event()
+        self._sequence = itertools.count()
+        self.dropped = 0
+        self.conflated = 0
+        self.sent = 0
+
+    def put(self, payload: str, conflate_key: Optional[Hashable] = None) -> str:
+        """Encolar sin bloquear; devuelve 'queued', 'conflated' o 'dropped_oldest'"""
+        key = conflate_key if conflate_key is not None else next(self._sequence)
+        if key in self._pending:
+            self._pending[key] = payload
+            self.conflated += 1
+            return "conflated"
+
+        outcome = "queued"
+        if len(self._pending) >= self.maxsize:
+            self._pending.popitem(last=False)
+            self.dropped += 1
+            outcome = "dropped_oldest"
+        self._pending[key] = payload
+        self._ready.set()
+        return outcome
+
+    async def get(self) -> str:
+        while not self._pending:
+            self._ready.clear()
+            await self._ready.wait()
+        return self._pending.popitem(last=False)[1]
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+
+class FanoutHub:
+    """
+    Difusión de mensajes a clientes WebSocket.
+
+    publish(symbol, message) serializa una vez y encola el mismo payload en la cola
+    de cada suscriptor del símbolo (índice invertido, sin recorrer todos los clientes).
+    Un writer por cliente vacía su cola a lo sumo `max_rate_per_client` mensajes/s (los
+    datos de mercado se fusionan mientras tanto); si un envío supera `send_timeout` o
+    falla, el cliente se da de baja vía `on_client_error`.
+    """
+
+    def __init__(self, queue_size: Optional[int] = None, send_timeout: Optional[float] = None,
+                 on_client_error: Optional[Callable[[str], None]] = None,
+                 max_rate_per_client: Optional[float] = None):
+        self.queue_size = queue_size or int(os.getenv("WS_CLIENT_QUEUE_SIZE", "64"))
+        self.send_timeout = send_timeout or float(os.getenv("WS_SEND_TIMEOUT", "5"))
+        rate = max_rate_per_client if max_rate_per_client is not None else float(os.getenv("WS_MAX_CLIENT_HZ", "30"))
+        self.min_send_interval = 1.0 / rate if rate > 0 else 0.0
+        self.on_client_error = on_client_error
+
+        self.symbol_subscribers: Dict[str, Set[str]] = {}  # symbol -> client_ids
+        self.client_symbols: Dict[str, Set[str]] = {}  # client_id -> symbols
+        self._queues: Dict[str, ClientSendQueue] = {}
+        self._writers: Dict[str, asyncio.Task] = {}
+
+        self.published = 0
+        self.serializations = 0
+        self.enqueued = 0
+        self.send_errors = 0
+        self._retired = {"sent": 0, "dropped": 0, "conflated": 0}
+
+    def register(self, client_id: str, send_text: SendText):
+        """Alta de cliente con su función de envío (websocket.send_text)"""
+        self.unregister(client_id)
+        queue = ClientSendQueue(client_id, self.queue_size)
+        self._queues[client_id] = queue
+        self.client_symbols[client_id] = set()
+        self._writers[client_id] = asyncio.create_task(self._writer(queue, send_text))
+
+    def unregister(self, client_id: str):
+        """Baja de cliente: cancela su writer y lo quita del índice"""
+        for symbol in self.client_symbols.pop(client_id, ()):
+            subscribers = self.symbol_subscribers.get(symbol)
+            if subscribers is not None:
+                subscribers.discard(client_id)
+                if not subscribers:
+                    del self.symbol_subscribers[symbol]
+
+        queue = self._queues.pop(client_id, None)
+        if queue is not None:
+            self._retired["sent"] += queue.sent
+            self._retired["dropped"] += queue.dropped
+            self._retired["conflated"] += queue.conflated
+
+        writer = self._writers.pop(client_id, None)
+        if writer is not None and writer is not asyncio.current_task():
+            writer.cancel()
+
+    def subscribe(self, client_id: str, symbol: str):
+        if client_id not in self.client_symbols:
+            return
+        self.client_symbols[client_id].add(symbol)
+        self.symbol_subscribers.setdefault(symbol, set()).add(client_id)
+
+    def unsubscribe(self, client_id: str, symbol: str):
+        self.client_symbols.get(client_id, set()).discard(symbol)
+        subscribers = self.symbol_subscribers.get(symbol)
+        if subscribers is not None:
+            subscribers.discard(client_id)
+            if not subscribers:
+                del self.symbol_subscribers[symbol]
+
+    def subscribed_symbols(self) -> Set[str]:
+        """Símbolos con al menos un suscriptor"""
+        return set(self.symbol_subscribers)
+
+    def publish(self, symbol: str, message: Dict[str, Any], conflate: bool = True) -> int:
+        """
+        Difundir a los suscriptores del símbolo sin esperar a los envíos.
+        Con conflate=True cada cliente conserva solo el último mensaje pendiente por (tipo, símbolo).
+        """
+        subscribers = self.symbol_subscribers.get(symbol)
+        if not subscribers:
+            return 0
+
+        payload = serialize_message(message)
+        self.serializations += 1
+        self.published += 1
+        conflate_key = (message.get("type"), symbol) if conflate else None
+
+        for client_id in subscribers:
+            queue = self._queues.get(client_id)
+            if queue is not None:
+                queue.put(payload, conflate_key)
+        self.enqueued += len(subscribers)
+        return len(subscribers)
+
+    def send_to(self, client_id: str, message: Dict[str, Any]) -> bool:
+        """Encolar mensaje directo a un cliente (se preserva el orden con los broadcasts)"""
+        queue = self._queues.get(client_id)
+        if queue is None:
+            return False
+        queue.put(serialize_message(message))
+        self.serializations += 1
+        self.enqueued += 1
+        return True
+
+    async def _writer(self, queue: ClientSendQueue, send_text: SendText):
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                payload = await queue.get()
+                started = loop.time()
+                await asyncio.wait_for(send_text(payload), timeout=self.send_timeout)
+                queue.sent += 1
+                if self.min_send_interval:
+                    remaining = self.min_send_interval - (loop.time() - started)
+                    if remaining > 0:
+                        await asyncio.sleep(remaining)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.send_errors += 1
+            logger.warning(f"⚠️ Cliente WebSocket {queue.client_id} eliminado por error de envío: {e!r}")
+            if self.on_client_error:
+                self.on_client_error(queue.client_id)
+            else:
+                self.unregister(queue.client_id)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Contadores de difusión (incluye clientes ya desconectados)"""
+        queues = self._queues.values()
+        return {
+            "clients": len(self._queues),
+            "symbols": len(self.symbol_subscribers),
+            "published": self.published,
+            "serializations": self.serializations,
+            "enqueued": self.enqueued,
+            "sent": self._retired["sent"] + sum(q.sent for q in queues),
+            "dropped": self._retired["dropped"] + sum(q.dropped for q in queues),
+            "conflated": self._retired["conflated"] + sum(q.conflated for q in queues),
+            "send_errors": self.send_errors,
+            "queued_now": sum(len(q) for q in queues),
+            "queue_size": self.queue_size,
+            "serializer": "orjson" if ORJSON_AVAILABLE else "json"
+        }
+
+
+# =================================================================
+# BENCHMARK
+# =================================================================
+
+async def benchmark_fanout(clients: int = 5000, symbols: int = 20, frames: int = 60, slow_clients: int = 50):
+    """
+    Compara el broadcast previo (recorrer todos los clientes, json.dumps por destinatario
+    y gather de envíos) con FanoutHub, incluyendo clientes lentos que tardan 200 ms por envío.
+    """
+    print(f"🧪 Fan-out benchmark: {clients} clientes, {symbols} símbolos, {frames} frames, {slow_clients} lentos")
+
+    class FakeSocket:
+        def __init__(self, slow: bool):
+            self.slow = slow
+            self.received = 0
+
+        async def send_text(self, text: str):
+            if self.slow:
+                await asyncio.sleep(0.2)
+            self.received += 1
+
+    symbol_names = [f"SYM{i}USDT" for i in range(symbols)]
+    sockets = {f"client-{i}": FakeSocket(i < slow_clients) for i in range(clients)}
+    subscriptions = {client_id: {symbol_names[i % symbols]} for i, client_id in enumerate(sockets)}
+
+    def frame_message(symbol: str, frame: int) -> Dict[str, Any]:
+        return {"type": "market_data", "symbol": symbol, "data": {"price": 100.0 + frame, "frame": frame}}
+
+    # Legacy: O(clientes) por símbolo + json.dumps por destinatario + gather (espera al más lento)
+    start = time.perf_counter()
+    for frame in range(min(frames, 5)):
+        for symbol in symbol_names:
+            tasks = []
+            for client_id, websocket in sockets.items():
+                if symbol in subscriptions[client_id]:
+                    tasks.append(websocket.send_text(json.dumps(frame_message(symbol, frame))))
+            await asyncio.gather(*tasks, return_exceptions=True)
+    legacy_frames = min(frames, 5)
+    legacy_ms = (time.perf_counter() - start) * 1000 / legacy_frames
+
+    # FanoutHub: publish no bloquea; los writers drenan en segundo plano
+    hub = FanoutHub(queue_size=8, send_timeout=1.0)
+    for client_id, websocket in sockets.items():
+        hub.register(client_id, websocket.send_text)
+        for symbol in subscriptions[client_id]:
+            hub.subscribe(client_id, symbol)
+
+    publish_times = []
+    for frame in range(frames):
+        start = time.perf_counter()
+        for symbol in symbol_names:
+            hub.publish(symbol, frame_message(symbol, frame))
+        publish_times.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(1 / 60)
+
+    await asyncio.sleep(0.5)
+    stats = hub.get_stats()
+    for client_id in list(sockets):
+        hub.unregister(client_id)
+    await asyncio.sleep(0)
+
+    publish_times.sort()
+    print(f"   legacy: {legacy_ms:8.2f} ms por frame (espera al envío más lento)")
+    print(f"   fanout: {sum(publish_times) / frames:8.2f} ms por frame publish "
+          f"(p99 {publish_times[int(0.99 * (frames - 1))]:.2f} ms)")
+    print(f"   serializaciones: legacy {clients * legacy_frames} vs fanout {stats['serializations']} "
+          f"| conflated {stats['conflated']} | dropped {stats['dropped']}")
+    return {"legacy_ms_per_frame": legacy_ms, "fanout_stats": stats}
+
+
+if __name__ == "__main__":
+    asyncio.run(benchmark_fanout())